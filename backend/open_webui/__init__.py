@@ -99,5 +99,19 @@ def dev(
     )
 
 
+@app.command()
+def reindex_chat_search(
+    batch_size: int = 500,
+    full: Annotated[
+        bool, typer.Option(help="Rebuild every chat, not only unindexed ones")
+    ] = False,
+):
+    """Backfill the full-text chat search index for existing chats."""
+    from open_webui.models.chats import Chats
+
+    indexed = Chats.reindex_chat_search(batch_size=batch_size, full=full)
+    typer.echo(f"Indexed {indexed} chats for search")
+
+
 if __name__ == "__main__":
     app()
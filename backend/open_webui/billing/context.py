@@ -143,6 +143,7 @@ class BillingContext:
                     actual_cost, refund, balance = settle_precharge_with_usage(
                         precharge_id=self.precharge_id,
                         usage_info=self._usage_info,
+                        model_id=self.model_id,
                     )
                     log.info(
                         f"[Billing] 精确结算: user={self.user_id} "
@@ -156,6 +157,7 @@ class BillingContext:
                         precharge_id=self.precharge_id,
                         actual_prompt_tokens=self.actual_usage["prompt"],
                         actual_completion_tokens=self.actual_usage["completion"],
+                        model_id=self.model_id,
                     )
                     log.info(
                         f"[Billing] 精确结算: user={self.user_id} "
@@ -11,15 +11,20 @@
 import time
 import uuid
 import logging
-from typing import Tuple, Optional
+from typing import Callable, Tuple, Optional
 
 from fastapi import HTTPException
+from sqlalchemy import case, func
 
 from open_webui.models.users import User
 from open_webui.models.billing import BillingLog, ModelPricings, RechargeLog
 from open_webui.internal.db import get_db
+from open_webui.billing import reservations
 from open_webui.billing.ratio import DEFAULT_PRICING
 from open_webui.config import PersistentConfig
+from open_webui.env import BILLING_PRICING_CACHE_TTL
+from open_webui.utils.lazy import register_warm_up
+from open_webui.utils.ttl_cache import TTLCache
 
 log = logging.getLogger(__name__)
 
@@ -233,6 +238,13 @@ def estimate_prompt_tokens(messages: list, model_id: str) -> int:
         return _estimate_prompt_tokens_fallback(messages, model_id)
 
 
+# 首次调用需要加载（或下载）cl100k_base 编码表，启动后在后台预热
+register_warm_up(
+    "tiktoken",
+    lambda: estimate_prompt_tokens([{"role": "user", "content": "warm up"}], ""),
+)
+
+
 def _estimate_prompt_tokens_fallback(messages: list, model_id: str) -> int:
     """
     降级的 token 估算（不依赖 tiktoken）
@@ -356,6 +368,10 @@ def check_trust_quota(user_id: str) -> bool:
         return False
 
 
+# 模型定价缓存，预扣费与结算不必每次查询定价表；本进程修改定价时显式失效
+_pricing_cache = TTLCache(1000, BILLING_PRICING_CACHE_TTL)
+
+
 def get_model_pricing(model_id: str) -> Tuple[int, int]:
     """
     获取模型定价
@@ -366,13 +382,28 @@ def get_model_pricing(model_id: str) -> Tuple[int, int]:
     Returns:
         Tuple[int, int]: (input_price, output_price) 毫/百万tokens
     """
+    cached = _pricing_cache.get(model_id)
+    if cached is not None:
+        return cached
+
     pricing = ModelPricings.get_by_model_id(model_id)
 
     if pricing:
-        return pricing.input_price, pricing.output_price
+        prices = (pricing.input_price, pricing.output_price)
     else:
         default = DEFAULT_PRICING.get(model_id, DEFAULT_PRICING["default"])
-        return default["input"], default["output"]
+        prices = (default["input"], default["output"])
+
+    _pricing_cache.set(model_id, prices)
+    return prices
+
+
+def invalidate_model_pricing(model_id: Optional[str] = None) -> None:
+    """定价变更后调用；不传 model_id 时清空全部"""
+    if model_id is None:
+        _pricing_cache.clear()
+    else:
+        _pricing_cache.pop(model_id)
 
 
 def calculate_cost(
@@ -583,6 +614,7 @@ def deduct_balance(
 
         # 8. 提交事务
         db.commit()
+        reservations.invalidate(user_id)
 
         # 9. 日志输出
         pricing_info = ""
@@ -672,6 +704,7 @@ def deduct_balance_with_usage(
 
         # 8. 提交事务
         db.commit()
+        reservations.invalidate(user_id)
 
         # 9. 日志输出
         log.info(
@@ -742,6 +775,7 @@ def recharge_user(
 
         # 6. 提交事务
         db.commit()
+        reservations.invalidate(user_id)
 
         operation_text = "充值" if amount > 0 else "扣费"
         log.info(
@@ -799,7 +833,30 @@ def precharge_balance(
 
     Raises:
         HTTPException: 余额不足或账户冻结
+
+    Note:
+        启用 Redis 余额预留时只在 Redis 中预留，不锁用户行、不写数据库（见 billing/reservations.py）
     """
+    # 计算最大可能费用
+    max_cost = calculate_cost(model_id, estimated_prompt_tokens, max_completion_tokens)
+
+    if reservations.is_enabled():
+        result = reservations.reserve(
+            user_id,
+            model_id,
+            max_cost,
+            estimated_prompt_tokens + max_completion_tokens,
+            load_balance=_load_balance,
+        )
+        if result is not None:
+            precharge_id, available = result
+            log.info(
+                f"预扣费成功(预留): user={user_id} model={model_id} "
+                f"estimated={estimated_prompt_tokens}+{max_completion_tokens}tokens "
+                f"cost={max_cost / 10000:.4f}元 precharge_id={precharge_id}"
+            )
+            return precharge_id, max_cost, available
+
     with get_db() as db:
         # 1. 行锁获取用户
         user = db.query(User).filter_by(id=user_id).with_for_update().first()
@@ -809,10 +866,7 @@ def precharge_balance(
         # if user.billing_status == "frozen":
         #     raise HTTPException(status_code=403, detail="账户已冻结")
 
-        # 2. 计算最大可能费用
-        max_cost = calculate_cost(model_id, estimated_prompt_tokens, max_completion_tokens)
-
-        # 3. 检查余额
+        # 2. 检查余额
         balance_before = user.balance or 0
         if balance_before < max_cost:
             raise HTTPException(
@@ -820,10 +874,10 @@ def precharge_balance(
                 detail=f"余额不足：当前 {balance_before / 10000:.4f} 元，预估需要 {max_cost / 10000:.4f} 元",
             )
 
-        # 4. 预扣费
+        # 3. 预扣费
         user.balance = balance_before - max_cost
 
-        # 5. 创建预扣费记录
+        # 4. 创建预扣费记录
         precharge_id = str(uuid.uuid4())
         billing_log = BillingLog(
             id=str(uuid.uuid4()),
@@ -841,6 +895,7 @@ def precharge_balance(
         )
         db.add(billing_log)
         db.commit()
+        reservations.invalidate(user_id)
 
         log.info(
             f"预扣费成功: user={user_id} model={model_id} "
@@ -851,8 +906,143 @@ def precharge_balance(
         return precharge_id, max_cost, user.balance
 
 
+def _load_balance(user_id: str) -> Optional[int]:
+    """读取数据库余额（不加锁），用于加载 Redis 热余额"""
+    with get_db() as db:
+        row = db.query(User.balance).filter_by(id=user_id).first()
+        if row is None:
+            return None
+        return row[0] or 0
+
+
+def _settle_reservation(
+    precharge_id: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    model_id: Optional[str],
+    calculate: Callable[[str], int],
+    deduct: Callable[[str, str], Tuple[int, int]],
+) -> Tuple[int, int, int]:
+    """
+    结算 Redis 余额预留
+
+    数据库中用一条 UPDATE 原子扣除实际费用（不先 SELECT ... FOR UPDATE），同时写入结算记录；
+    提交后在 Redis 中释放预留并退还差额。
+
+    预留已被对账任务清理、Redis 数据丢失或不可用时，预留只存在于 Redis，数据库余额未被扣减，
+    改为按实际用量直接扣费，保证用量不漏计
+
+    Args:
+        model_id: 请求的模型 ID，预留丢失时用于直接扣费
+        calculate: 根据模型 ID 计算实际费用（毫）
+        deduct: 预留丢失时直接扣费，参数为 (用户ID, 模型ID)，返回 (费用, 余额)
+    """
+    try:
+        reservation = reservations.claim(precharge_id)
+    except Exception as e:
+        return _settle_without_reservation(
+            precharge_id, prompt_tokens, completion_tokens, model_id, deduct, e
+        )
+    if reservation is None:
+        log.warning(f"预留正在结算: precharge_id={precharge_id}")
+        return 0, 0, 0
+
+    try:
+        actual_cost = calculate(reservation.model_id)
+        refund_amount = reservation.amount - actual_cost
+
+        with get_db() as db:
+            balance_column = func.coalesce(User.balance, 0)
+            updated = (
+                db.query(User)
+                .filter_by(id=reservation.user_id)
+                .update(
+                    {
+                        # 余额不足以支付超出预留的部分时扣到 0
+                        User.balance: case(
+                            (balance_column >= actual_cost, balance_column - actual_cost),
+                            else_=0,
+                        ),
+                        User.total_consumed: func.coalesce(User.total_consumed, 0)
+                        + actual_cost,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            if not updated:
+                raise HTTPException(status_code=404, detail="用户不存在")
+
+            balance_after = (
+                db.query(User.balance).filter_by(id=reservation.user_id).scalar() or 0
+            )
+            db.add(
+                BillingLog(
+                    id=str(uuid.uuid4()),
+                    user_id=reservation.user_id,
+                    model_id=reservation.model_id,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    total_cost=actual_cost,
+                    balance_after=balance_after,
+                    log_type="settle",
+                    precharge_id=precharge_id,
+                    status="settled",
+                    estimated_tokens=reservation.estimated_tokens,
+                    refund_amount=refund_amount,
+                    created_at=int(time.time() * 1000000000),
+                )
+            )
+            db.commit()
+    except Exception:
+        reservations.release(reservation)
+        raise
+
+    reservations.finish(reservation, actual_cost)
+
+    if balance_after == 0 and refund_amount < 0:
+        log.warning(
+            f"补扣余额不足: user={reservation.user_id} need={-refund_amount / 10000:.4f}元"
+        )
+    log.info(
+        f"结算成功(预留): user={reservation.user_id} precharge_id={precharge_id} "
+        f"actual={prompt_tokens}+{completion_tokens}tokens "
+        f"cost={actual_cost / 10000:.4f}元 refund={refund_amount / 10000:.4f}元 "
+        f"balance={balance_after / 10000:.4f}元"
+    )
+    return actual_cost, refund_amount, balance_after
+
+
+def _settle_without_reservation(
+    precharge_id: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    model_id: Optional[str],
+    deduct: Callable[[str, str], Tuple[int, int]],
+    error: Exception,
+) -> Tuple[int, int, int]:
+    """预留丢失或 Redis 不可用时，按实际用量走数据库直接扣费"""
+    if prompt_tokens <= 0 and completion_tokens <= 0:
+        # 全额退款：数据库未扣费，无需处理
+        log.warning(f"预留不可用，跳过退款: precharge_id={precharge_id} {error!r}")
+        return 0, 0, 0
+
+    user_id = reservations.user_id_from_precharge_id(precharge_id)
+    if not model_id:
+        log.error(
+            f"预留不可用且缺少模型，无法扣费: user={user_id} precharge_id={precharge_id} "
+            f"tokens={prompt_tokens}+{completion_tokens} {error!r}"
+        )
+        return 0, 0, 0
+
+    log.warning(
+        f"预留不可用，改为直接扣费: user={user_id} precharge_id={precharge_id} {error!r}"
+    )
+    cost, balance = deduct(user_id, model_id)
+    return cost, 0, balance
+
+
 def settle_precharge_with_usage(
-    precharge_id: str, usage_info: "UsageInfo"
+    precharge_id: str, usage_info: "UsageInfo", model_id: Optional[str] = None
 ) -> Tuple[int, int, int]:
     """
     结算预扣费（使用完整 UsageInfo，支持缓存和推理 token）
@@ -860,12 +1050,25 @@ def settle_precharge_with_usage(
     Args:
         precharge_id: 预扣费事务ID
         usage_info: 完整的 UsageInfo 对象
+        model_id: 请求的模型 ID，余额预留丢失时用于直接扣费
 
     Returns:
         Tuple[int, int, int]: (实际费用（毫）, 退款金额（毫）, 结算后余额（毫）)
     """
     from open_webui.billing.usage import UsageInfo
 
+    if reservations.is_reservation_id(precharge_id):
+        return _settle_reservation(
+            precharge_id,
+            usage_info.prompt_tokens + usage_info.cached_tokens,
+            usage_info.completion_tokens + usage_info.reasoning_tokens,
+            model_id,
+            lambda model_id: calculate_cost_with_usage(model_id, usage_info),
+            lambda user_id, model_id: deduct_balance_with_usage(
+                user_id, model_id, usage_info
+            ),
+        )
+
     with get_db() as db:
         # 1. 查询预扣费记录
         precharge_log = (
@@ -934,6 +1137,7 @@ def settle_precharge_with_usage(
 
         # 9. 提交事务
         db.commit()
+        reservations.invalidate(user.id)
 
         log.info(
             f"结算成功(精确): user={user.id} precharge_id={precharge_id} "
@@ -946,7 +1150,10 @@ def settle_precharge_with_usage(
 
 
 def settle_precharge(
-    precharge_id: str, actual_prompt_tokens: int, actual_completion_tokens: int
+    precharge_id: str,
+    actual_prompt_tokens: int,
+    actual_completion_tokens: int,
+    model_id: Optional[str] = None,
 ) -> Tuple[int, int, int]:
     """
     结算预扣费（退还差额或补扣不足）
@@ -955,10 +1162,25 @@ def settle_precharge(
         precharge_id: 预扣费事务ID
         actual_prompt_tokens: 实际消费的prompt tokens
         actual_completion_tokens: 实际消费的completion tokens
+        model_id: 请求的模型 ID，余额预留丢失时用于直接扣费
 
     Returns:
         Tuple[int, int, int]: (实际费用（毫）, 退款金额（毫）, 结算后余额（毫）)
     """
+    if reservations.is_reservation_id(precharge_id):
+        return _settle_reservation(
+            precharge_id,
+            actual_prompt_tokens,
+            actual_completion_tokens,
+            model_id,
+            lambda model_id: calculate_cost(
+                model_id, actual_prompt_tokens, actual_completion_tokens
+            ),
+            lambda user_id, model_id: deduct_balance(
+                user_id, model_id, actual_prompt_tokens, actual_completion_tokens
+            ),
+        )
+
     with get_db() as db:
         # 1. 查询预扣费记录
         precharge_log = (
@@ -1043,6 +1265,7 @@ def settle_precharge(
 
         # 9. 提交事务
         db.commit()
+        reservations.invalidate(user.id)
 
         log.info(
             f"结算成功: user={user.id} precharge_id={precharge_id} "
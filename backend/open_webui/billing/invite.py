@@ -14,6 +14,7 @@ from open_webui.models.users import Users, User
 from open_webui.models.billing import BillingLog
 from open_webui.models.invite import InviteRebateLogs, InviteStatsTable
 from open_webui.internal.db import get_db
+from open_webui.billing import reservations
 
 log = logging.getLogger(__name__)
 
@@ -99,6 +100,7 @@ def process_invite_rebate(
             # 7. 提交用户余额更新
             db.commit()
             db.refresh(inviter)
+            reservations.invalidate(inviter_id)
 
             # 8. 记录邀请返现日志
             rebate_log = InviteRebateLogs.insert_rebate_log(
@@ -12,6 +12,7 @@ from dataclasses import dataclass
 
 from open_webui.models.billing import PaymentOrders, RechargeLog
 from open_webui.internal.db import get_db
+from open_webui.billing import reservations
 from open_webui.billing.providers import PaymentMethod, get_provider
 
 log = logging.getLogger(__name__)
@@ -188,6 +189,7 @@ def process_payment_success(
             total_amount = order.amount + bonus_amount
             user.balance = (user.balance or 0) + total_amount
             db.commit()
+            reservations.invalidate(order.user_id)
 
             # 4. 记录充值日志
             recharge_log = _create_recharge_log(
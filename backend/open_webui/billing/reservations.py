@@ -0,0 +1,363 @@
+"""
+基于 Redis 的余额预留
+
+预扣费不再锁用户行：每个用户在 Redis 中维护一份热余额（可用余额 = 数据库余额 - 未结算预留），
+预留与结算通过 Lua 脚本原子完成。数据库仍是唯一的账本：
+- 预留：只修改 Redis，不写数据库
+- 结算：数据库中按实际费用原子扣减余额并写入 BillingLog，再在 Redis 中释放预留、退还差额
+- 其他余额变动（充值、按量扣费等）提交后调用 invalidate，下次预留时从数据库重新加载
+
+每个用户的 Redis 键（同一 hash tag，兼容集群）：
+- available：热余额 {available, loaded_ver}，带 BILLING_HOT_BALANCE_TTL 过期
+- reservations：预留明细 {预扣费ID: {amount, model_id, estimated_tokens, created_at}}
+- version：余额版本号，数据库余额变动前递增，用于识别加载热余额时读到的数据库余额是否已过时
+
+崩溃恢复：超过 BILLING_RESERVATION_TTL 仍未结算的预留由对账任务删除并让热余额重新加载；
+预留只存在于 Redis，释放不需要修改数据库。
+
+未配置 Redis 或 Redis 不可用时，调用方回退到数据库行锁方式。
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException
+
+from open_webui.env import (
+    BILLING_HOT_BALANCE_TTL,
+    BILLING_RECONCILE_INTERVAL,
+    BILLING_RESERVATION_TTL,
+    ENABLE_BILLING_RESERVATIONS,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+
+# 预留产生的预扣费 ID 前缀，与数据库方式的预扣费 ID（uuid）区分
+PRECHARGE_ID_PREFIX = "rsv:"
+
+# 可用余额不足时返回 {0, 可用余额}；热余额未加载时返回 {-1, 0}
+_RESERVE_SCRIPT = """
+local available = redis.call('HGET', KEYS[1], 'available')
+if not available then
+    return {-1, 0}
+end
+available = tonumber(available)
+local amount = tonumber(ARGV[1])
+if available < amount then
+    return {0, available}
+end
+local left = redis.call('HINCRBY', KEYS[1], 'available', -amount)
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return {1, left}
+"""
+
+# 版本号与读取数据库前一致时才写入热余额，期间有余额变动则返回 0 由调用方重试
+_LOAD_SCRIPT = """
+local version = tonumber(redis.call('GET', KEYS[3]) or '0')
+if version ~= tonumber(ARGV[2]) then
+    return 0
+end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 1
+end
+local reserved = 0
+for _, value in ipairs(redis.call('HVALS', KEYS[2])) do
+    reserved = reserved + cjson.decode(value)['amount']
+end
+redis.call('HSET', KEYS[1], 'available', tonumber(ARGV[1]) - reserved, 'loaded_ver', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+# 标记预留为结算中（防止重复结算）并递增版本号；返回 {预留明细, 版本号}
+# 预留不存在返回 false，已在结算中返回 0
+_CLAIM_SCRIPT = """
+local value = redis.call('HGET', KEYS[2], ARGV[1])
+if not value then
+    return false
+end
+local reservation = cjson.decode(value)
+if reservation['claimed'] then
+    return 0
+end
+reservation['claimed'] = 1
+redis.call('HSET', KEYS[2], ARGV[1], cjson.encode(reservation))
+local version = redis.call('INCR', KEYS[3])
+return {value, version}
+"""
+
+# 删除预留并把差额加回热余额；热余额在结算开始后才加载（可能已包含本次扣费）时直接删除，下次重新加载
+_FINISH_SCRIPT = """
+local existed = redis.call('HDEL', KEYS[2], ARGV[1])
+local loaded_ver = redis.call('HGET', KEYS[1], 'loaded_ver')
+if loaded_ver then
+    if existed == 1 and tonumber(loaded_ver) < tonumber(ARGV[3]) then
+        redis.call('HINCRBY', KEYS[1], 'available', ARGV[2])
+    else
+        redis.call('DEL', KEYS[1])
+    end
+end
+return existed
+"""
+
+# 数据库余额变动后调用：递增版本号并删除热余额
+_INVALIDATE_SCRIPT = """
+redis.call('INCR', KEYS[3])
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+# 删除早于截止时间的预留（含结算中途崩溃的）；返回仍存在的最早预留时间（无则为 0）
+_SWEEP_SCRIPT = """
+local cutoff = tonumber(ARGV[1])
+local released = 0
+local oldest = 0
+local entries = redis.call('HGETALL', KEYS[2])
+for i = 1, #entries, 2 do
+    local reservation = cjson.decode(entries[i + 1])
+    if reservation['created_at'] < cutoff then
+        redis.call('HDEL', KEYS[2], entries[i])
+        released = released + 1
+    elseif oldest == 0 or reservation['created_at'] < oldest then
+        oldest = reservation['created_at']
+    end
+end
+if released > 0 then
+    redis.call('INCR', KEYS[3])
+    redis.call('DEL', KEYS[1])
+end
+return {released, oldest}
+"""
+
+
+class ReservationMissing(Exception):
+    """预留不存在：已被对账任务清理，或 Redis 重启/淘汰/切换导致数据丢失"""
+
+
+@dataclass
+class Reservation:
+    precharge_id: str
+    user_id: str
+    model_id: str
+    amount: int
+    estimated_tokens: int
+    version: int
+
+
+_redis = None
+_scripts: dict = {}
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            decode_responses=True,
+        )
+    return _redis
+
+
+def _script(name: str, source: str):
+    script = _scripts.get(name)
+    if script is None:
+        script = _scripts[name] = _get_redis().register_script(source)
+    return script
+
+
+def _keys(user_id: str) -> list[str]:
+    prefix = f"{REDIS_KEY_PREFIX}:billing:{{{user_id}}}"
+    return [f"{prefix}:available", f"{prefix}:reservations", f"{prefix}:version"]
+
+
+def _index_key() -> str:
+    # 有预留的用户，score 为该用户最早一笔预留的时间，供对账任务查找孤儿预留
+    return f"{REDIS_KEY_PREFIX}:billing:reservation_users"
+
+
+def is_enabled() -> bool:
+    return ENABLE_BILLING_RESERVATIONS and bool(REDIS_URL)
+
+
+def is_reservation_id(precharge_id: Optional[str]) -> bool:
+    return bool(precharge_id) and precharge_id.startswith(PRECHARGE_ID_PREFIX)
+
+
+def user_id_from_precharge_id(precharge_id: str) -> str:
+    return precharge_id[len(PRECHARGE_ID_PREFIX) :].rsplit(":", 1)[0]
+
+
+def _load(user_id: str, load_balance: Callable[[str], Optional[int]]) -> None:
+    keys = _keys(user_id)
+    for _ in range(3):
+        version = int(_get_redis().get(keys[2]) or 0)
+        balance = load_balance(user_id)
+        if balance is None:
+            raise HTTPException(status_code=404, detail="用户不存在")
+        if _script("load", _LOAD_SCRIPT)(
+            keys=keys, args=[balance, version, BILLING_HOT_BALANCE_TTL]
+        ):
+            return
+    log.debug(f"热余额加载期间余额持续变动: user={user_id}")
+
+
+def reserve(
+    user_id: str,
+    model_id: str,
+    amount: int,
+    estimated_tokens: int,
+    load_balance: Callable[[str], Optional[int]],
+) -> Optional[Tuple[str, int]]:
+    """
+    在 Redis 中预留余额
+
+    Args:
+        load_balance: 热余额未加载时，从数据库读取用户余额（不加锁）
+
+    Returns:
+        Optional[Tuple[str, int]]: (预扣费ID, 预留后可用余额（毫）)；Redis 不可用时返回 None
+
+    Raises:
+        HTTPException: 用户不存在或余额不足
+    """
+    keys = _keys(user_id)
+    precharge_id = f"{PRECHARGE_ID_PREFIX}{user_id}:{uuid.uuid4()}"
+    now = time.time()
+    payload = json.dumps(
+        {
+            "amount": amount,
+            "model_id": model_id,
+            "estimated_tokens": estimated_tokens,
+            "created_at": now,
+        }
+    )
+
+    try:
+        for _ in range(3):
+            status, available = _script("reserve", _RESERVE_SCRIPT)(
+                keys=keys[:2],
+                args=[amount, precharge_id, payload, BILLING_RESERVATION_TTL * 2],
+            )
+            if status == 1:
+                _get_redis().zadd(_index_key(), {user_id: now}, nx=True)
+                return precharge_id, int(available)
+            if status == 0:
+                raise HTTPException(
+                    status_code=402,
+                    detail=f"余额不足：当前 {int(available) / 10000:.4f} 元，预估需要 {amount / 10000:.4f} 元",
+                )
+            _load(user_id, load_balance)
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.warning(f"Redis 余额预留失败，回退到数据库: {e}")
+    return None
+
+
+def claim(precharge_id: str) -> Optional[Reservation]:
+    """
+    开始结算：标记预留为结算中，之后必须调用 finish 或 release
+
+    Returns:
+        预留明细；预留已在结算中时返回 None
+
+    Raises:
+        ReservationMissing: 预留不存在
+    """
+    user_id = user_id_from_precharge_id(precharge_id)
+    result = _script("claim", _CLAIM_SCRIPT)(keys=_keys(user_id), args=[precharge_id])
+    if result is None:
+        raise ReservationMissing(precharge_id)
+    if not result:
+        return None
+
+    value, version = result
+    data = json.loads(value)
+    return Reservation(
+        precharge_id=precharge_id,
+        user_id=user_id,
+        model_id=data["model_id"],
+        amount=int(data["amount"]),
+        estimated_tokens=int(data.get("estimated_tokens") or 0),
+        version=int(version),
+    )
+
+
+def finish(reservation: Reservation, actual_cost: int) -> None:
+    """数据库扣费提交后调用：释放预留，退还 预留 - 实际费用 的差额"""
+    try:
+        _script("finish", _FINISH_SCRIPT)(
+            keys=_keys(reservation.user_id)[:2],
+            args=[
+                reservation.precharge_id,
+                reservation.amount - actual_cost,
+                reservation.version,
+            ],
+        )
+    except Exception as e:
+        log.error(f"释放余额预留失败，将由对账任务处理: {e}")
+        invalidate(reservation.user_id)
+
+
+def release(reservation: Reservation) -> None:
+    """结算失败时调用：数据库未扣费，全额释放预留"""
+    finish(reservation, 0)
+
+
+def invalidate(user_id: str) -> None:
+    """数据库余额变动提交后调用，下次预留时重新加载热余额"""
+    if not is_enabled():
+        return
+    try:
+        _script("invalidate", _INVALIDATE_SCRIPT)(keys=_keys(user_id))
+    except Exception as e:
+        log.warning(f"热余额失效失败: user={user_id} {e}")
+
+
+def reconcile() -> int:
+    """释放超时未结算的预留，返回释放的数量"""
+    if not is_enabled():
+        return 0
+
+    redis = _get_redis()
+    cutoff = time.time() - BILLING_RESERVATION_TTL
+    released = 0
+    for user_id in redis.zrangebyscore(_index_key(), "-inf", cutoff):
+        count, oldest = _script("sweep", _SWEEP_SCRIPT)(
+            keys=_keys(user_id), args=[cutoff]
+        )
+        released += int(count)
+        if float(oldest):
+            redis.zadd(_index_key(), {user_id: float(oldest)})
+        else:
+            redis.zrem(_index_key(), user_id)
+        if count:
+            log.warning(f"释放孤儿预留: user={user_id} count={count}")
+    return released
+
+
+async def periodic_reservation_reconcile():
+    from starlette.concurrency import run_in_threadpool
+
+    while True:
+        await asyncio.sleep(BILLING_RECONCILE_INTERVAL)
+        try:
+            await run_in_threadpool(reconcile)
+        except Exception as e:
+            log.error(f"余额预留对账失败: {e}")
@@ -914,6 +914,23 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# 上传/下载分块大小（字节），单次传输的内存占用约为 分块大小 × 并发数
+# S3 分片上传要求除最后一片外每片不小于 5MB
+try:
+    STORAGE_CHUNK_SIZE = max(
+        int(os.environ.get("STORAGE_CHUNK_SIZE", str(8 * 1024 * 1024))),
+        5 * 1024 * 1024,
+    )
+except ValueError:
+    STORAGE_CHUNK_SIZE = 8 * 1024 * 1024
+
+try:
+    STORAGE_TRANSFER_CONCURRENCY = max(
+        int(os.environ.get("STORAGE_TRANSFER_CONCURRENCY", "4")), 1
+    )
+except ValueError:
+    STORAGE_TRANSFER_CONCURRENCY = 4
+
 ####################################
 # File Upload DIR
 ####################################
@@ -273,6 +273,33 @@ if FROM_INIT_PY:
 # 性能日志目录（默认 DATA_DIR/logs）
 PERF_LOG_DIR = Path(os.getenv("PERF_LOG_DIR", DATA_DIR / "logs"))
 
+# 性能日志采样率（0~1），仅影响落盘；耗时指标始终上报到 OpenTelemetry
+PERF_LOG_SAMPLE_RATE = os.environ.get("PERF_LOG_SAMPLE_RATE", "1.0")
+try:
+    PERF_LOG_SAMPLE_RATE = min(max(float(PERF_LOG_SAMPLE_RATE), 0.0), 1.0)
+except ValueError:
+    PERF_LOG_SAMPLE_RATE = 1.0
+
+# 性能日志文件（JSONL）按大小轮转
+PERF_LOG_MAX_BYTES = os.environ.get("PERF_LOG_MAX_BYTES", str(50 * 1024 * 1024))
+try:
+    PERF_LOG_MAX_BYTES = int(PERF_LOG_MAX_BYTES)
+except ValueError:
+    PERF_LOG_MAX_BYTES = 50 * 1024 * 1024
+
+PERF_LOG_BACKUP_COUNT = os.environ.get("PERF_LOG_BACKUP_COUNT", "5")
+try:
+    PERF_LOG_BACKUP_COUNT = int(PERF_LOG_BACKUP_COUNT)
+except ValueError:
+    PERF_LOG_BACKUP_COUNT = 5
+
+# 后台写入队列长度上限，写入跟不上时丢弃并计数，不阻塞请求
+PERF_LOG_QUEUE_SIZE = os.environ.get("PERF_LOG_QUEUE_SIZE", "1000")
+try:
+    PERF_LOG_QUEUE_SIZE = int(PERF_LOG_QUEUE_SIZE)
+except ValueError:
+    PERF_LOG_QUEUE_SIZE = 1000
+
 ####################################
 # Database
 ####################################
@@ -359,6 +386,36 @@ DATABASE_ENABLE_SQLITE_WAL = (
     os.environ.get("DATABASE_ENABLE_SQLITE_WAL", "False").lower() == "true"
 )
 
+# 只读副本：逗号分隔的连接串，读多的查询可选择走副本（连接池参数与主库相同）
+DATABASE_REPLICA_URLS = [
+    url.strip().replace("postgres://", "postgresql://")
+    for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+# 复制延迟超过该值（秒）的副本暂停使用
+try:
+    DATABASE_REPLICA_MAX_LAG = float(os.environ.get("DATABASE_REPLICA_MAX_LAG", "10"))
+except ValueError:
+    DATABASE_REPLICA_MAX_LAG = 10.0
+# 用户写入后该时长内（秒）的读取仍走主库，保证读到自己的写入；
+# 仍在使用的副本最多落后 DATABASE_REPLICA_MAX_LAG 秒，因此不小于该值
+try:
+    DATABASE_REPLICA_STICKY_SECONDS = float(
+        os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", str(DATABASE_REPLICA_MAX_LAG))
+    )
+except ValueError:
+    DATABASE_REPLICA_STICKY_SECONDS = DATABASE_REPLICA_MAX_LAG
+DATABASE_REPLICA_STICKY_SECONDS = max(
+    DATABASE_REPLICA_STICKY_SECONDS, DATABASE_REPLICA_MAX_LAG
+)
+# 副本健康检查间隔（秒）
+try:
+    DATABASE_REPLICA_CHECK_INTERVAL = max(
+        float(os.environ.get("DATABASE_REPLICA_CHECK_INTERVAL", "15")), 1.0
+    )
+except ValueError:
+    DATABASE_REPLICA_CHECK_INTERVAL = 15.0
+
 DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = os.environ.get(
     "DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL", None
 )
@@ -370,6 +427,24 @@ if DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL is not None:
     except Exception:
         DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = 0.0
 
+# 认证缓存：get_current_user 中 token 声明与用户行的进程内缓存（秒）
+AUTH_TOKEN_CACHE_TTL = float(os.environ.get("AUTH_TOKEN_CACHE_TTL", "300"))
+AUTH_USER_CACHE_TTL = float(os.environ.get("AUTH_USER_CACHE_TTL", "10"))
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "10000"))
+# 用户私有模型凭据与聊天→凭据绑定的进程内缓存（秒），凭据更新/删除时立即失效
+USER_MODEL_CREDENTIAL_CACHE_TTL = float(
+    os.environ.get("USER_MODEL_CREDENTIAL_CACHE_TTL", "60")
+)
+
+# 最近活跃时间批量写库的间隔（秒）
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_FLUSH_INTERVAL", "30"
+)
+try:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = max(float(USER_LAST_ACTIVE_FLUSH_INTERVAL), 1.0)
+except ValueError:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 30.0
+
 ####################################
 # USER PROFILE ANALYSIS
 ####################################
@@ -379,6 +454,51 @@ USER_PROFILE_MESSAGE_THRESHOLD = int(
     os.environ.get("USER_PROFILE_MESSAGE_THRESHOLD", "50")
 )
 
+# 同时进行的用户画像 LLM 分析数量上限
+USER_PROFILE_ANALYSIS_CONCURRENCY = os.environ.get(
+    "USER_PROFILE_ANALYSIS_CONCURRENCY", "2"
+)
+try:
+    USER_PROFILE_ANALYSIS_CONCURRENCY = max(int(USER_PROFILE_ANALYSIS_CONCURRENCY), 1)
+except ValueError:
+    USER_PROFILE_ANALYSIS_CONCURRENCY = 2
+
+# 用户交互计数压缩到 user.info 的间隔（秒）
+USER_INTERACTION_COMPACT_INTERVAL = os.environ.get(
+    "USER_INTERACTION_COMPACT_INTERVAL", "60"
+)
+try:
+    USER_INTERACTION_COMPACT_INTERVAL = max(int(USER_INTERACTION_COMPACT_INTERVAL), 1)
+except ValueError:
+    USER_INTERACTION_COMPACT_INTERVAL = 60
+
+####################################
+# KNOWLEDGE REINDEX
+####################################
+
+# 知识库重建任务的并发批次数（每个批次在线程池中执行）
+KNOWLEDGE_REINDEX_CONCURRENCY = os.environ.get("KNOWLEDGE_REINDEX_CONCURRENCY", "4")
+try:
+    KNOWLEDGE_REINDEX_CONCURRENCY = max(int(KNOWLEDGE_REINDEX_CONCURRENCY), 1)
+except ValueError:
+    KNOWLEDGE_REINDEX_CONCURRENCY = 4
+
+# 同一知识库中合并为一次 embedding 调用的文件数
+KNOWLEDGE_REINDEX_BATCH_SIZE = os.environ.get("KNOWLEDGE_REINDEX_BATCH_SIZE", "8")
+try:
+    KNOWLEDGE_REINDEX_BATCH_SIZE = max(int(KNOWLEDGE_REINDEX_BATCH_SIZE), 1)
+except ValueError:
+    KNOWLEDGE_REINDEX_BATCH_SIZE = 8
+
+# 运行中任务的心跳超时（秒），超时后视为所属实例已退出，可被其他实例接管
+KNOWLEDGE_REINDEX_STALE_TIMEOUT = os.environ.get(
+    "KNOWLEDGE_REINDEX_STALE_TIMEOUT", "300"
+)
+try:
+    KNOWLEDGE_REINDEX_STALE_TIMEOUT = int(KNOWLEDGE_REINDEX_STALE_TIMEOUT)
+except ValueError:
+    KNOWLEDGE_REINDEX_STALE_TIMEOUT = 300
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
@@ -410,6 +530,78 @@ try:
 except ValueError:
     REDIS_SENTINEL_MAX_RETRY_COUNT = 2
 
+####################################
+# BILLING RESERVATIONS
+####################################
+
+# 配置了 Redis 时，预扣费只在 Redis 中预留余额（原子脚本），不锁用户行；结算时写入数据库
+ENABLE_BILLING_RESERVATIONS = (
+    os.environ.get("ENABLE_BILLING_RESERVATIONS", "True").lower() == "true"
+)
+# 预留超过该时长（秒）仍未结算视为孤儿（如进程崩溃），由对账任务释放
+BILLING_RESERVATION_TTL = int(os.environ.get("BILLING_RESERVATION_TTL", "1800"))
+# Redis 中的热余额过期时间（秒），过期后从数据库重新加载，纠正数据库侧的直接修改
+BILLING_HOT_BALANCE_TTL = int(os.environ.get("BILLING_HOT_BALANCE_TTL", "300"))
+# 对账任务执行间隔（秒）
+BILLING_RECONCILE_INTERVAL = int(os.environ.get("BILLING_RECONCILE_INTERVAL", "60"))
+# 模型定价的进程内缓存时间（秒）
+BILLING_PRICING_CACHE_TTL = int(os.environ.get("BILLING_PRICING_CACHE_TTL", "30"))
+
+####################################
+# CHAT TASKS
+####################################
+
+# 配置了 Redis 时，每个任务在 Redis 中持有租约，由所属 worker 定期心跳续期；
+# worker 崩溃或被重新部署后，租约过期的任务记录由其他 worker 清理
+TASK_LEASE_TTL = int(os.environ.get("TASK_LEASE_TTL", "30"))
+# 心跳（续期租约、上报本 worker 活跃任务数、清理过期任务）间隔（秒），应明显小于 TASK_LEASE_TTL
+TASK_HEARTBEAT_INTERVAL = int(os.environ.get("TASK_HEARTBEAT_INTERVAL", "10"))
+# 关闭时进入排空模式：不再接受新的聊天任务，等待进行中的流式回复完成的最长时间（秒），
+# 超时后取消剩余任务
+TASK_DRAIN_TIMEOUT = int(os.environ.get("TASK_DRAIN_TIMEOUT", "60"))
+# 收到 SIGTERM 后先进入排空模式并继续服务该时长（秒），期间 /health/ready 返回 503，
+# 让负载均衡摘除本实例后再交给 uvicorn 关闭监听
+TASK_DRAIN_NOTICE_PERIOD = float(os.environ.get("TASK_DRAIN_NOTICE_PERIOD", "5"))
+
+####################################
+# LLM ADMISSION CONTROL
+####################################
+
+# 上游 LLM 调用的准入控制：按用户、按模型限制并发与每分钟 token 数，配置了 Redis 时跨 worker 共享；
+# 超出限制的请求排队等待（同一模型的空闲槽位优先分给占用最少的用户），超过最长等待时间返回 429
+ENABLE_LLM_ADMISSION_CONTROL = (
+    os.environ.get("ENABLE_LLM_ADMISSION_CONTROL", "True").lower() == "true"
+)
+# 每个用户同时进行的前台 LLM 调用上限，0 表示不限制
+LLM_USER_MAX_CONCURRENCY = int(os.environ.get("LLM_USER_MAX_CONCURRENCY", "4"))
+# 每个用户同时进行的后台 LLM 调用（标题、标签、摘要、图片描述等）上限，0 表示不限制
+LLM_USER_BACKGROUND_MAX_CONCURRENCY = int(
+    os.environ.get("LLM_USER_BACKGROUND_MAX_CONCURRENCY", "2")
+)
+# 每个用户每分钟的 token 上限（按 prompt 预估值 + 实际输出计），0 表示不限制
+LLM_USER_TOKENS_PER_MINUTE = int(os.environ.get("LLM_USER_TOKENS_PER_MINUTE", "0"))
+# 每个模型（所有用户合计）的并发与每分钟 token 上限，0 表示不限制；
+# 用户私有模型（直连）不受模型级限制
+LLM_MODEL_MAX_CONCURRENCY = int(os.environ.get("LLM_MODEL_MAX_CONCURRENCY", "0"))
+LLM_MODEL_TOKENS_PER_MINUTE = int(os.environ.get("LLM_MODEL_TOKENS_PER_MINUTE", "0"))
+# 按模型覆盖上述模型级限制（JSON），例如：
+# {"gpt-4o": {"max_concurrency": 20, "tokens_per_minute": 200000}}
+LLM_MODEL_LIMITS = os.environ.get("LLM_MODEL_LIMITS", "")
+try:
+    LLM_MODEL_LIMITS = json.loads(LLM_MODEL_LIMITS) if LLM_MODEL_LIMITS else {}
+    if not isinstance(LLM_MODEL_LIMITS, dict):
+        LLM_MODEL_LIMITS = {}
+except Exception:
+    log.warning("Invalid LLM_MODEL_LIMITS, ignoring")
+    LLM_MODEL_LIMITS = {}
+# 后台 LLM 调用最多占用模型并发上限的比例，且有前台请求排队时不再分配给后台
+LLM_BACKGROUND_MODEL_SHARE = float(os.environ.get("LLM_BACKGROUND_MODEL_SHARE", "0.5"))
+# 排队的最长等待时间（秒），超时返回 429
+LLM_ADMISSION_MAX_WAIT = float(os.environ.get("LLM_ADMISSION_MAX_WAIT", "30"))
+# 并发槽位的过期时间（秒），防止 worker 异常退出或流未正常结束时槽位泄漏；
+# 流式响应传输期间每隔三分之一过期时间续期一次，不受此上限影响
+LLM_ADMISSION_SLOT_TIMEOUT = int(os.environ.get("LLM_ADMISSION_SLOT_TIMEOUT", "900"))
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -674,6 +866,18 @@ else:
     except Exception:
         MODELS_CACHE_TTL = 1
 
+# Ollama 模型目录在所有用户间共享：超过 MODELS_CACHE_TTL 后先返回旧目录并在后台刷新，
+# 超过 OLLAMA_MODELS_STALE_TTL（秒）的目录不再使用，请求需等待刷新完成
+OLLAMA_MODELS_STALE_TTL = int(os.environ.get("OLLAMA_MODELS_STALE_TTL", "300"))
+
+# Ollama 上游连接池：每个地址复用长连接，连续失败后在冷却期内跳过该地址
+OLLAMA_POOL_LIMIT_PER_HOST = int(os.environ.get("OLLAMA_POOL_LIMIT_PER_HOST", "100"))
+OLLAMA_POOL_KEEPALIVE_TIMEOUT = int(
+    os.environ.get("OLLAMA_POOL_KEEPALIVE_TIMEOUT", "30")
+)
+OLLAMA_UNHEALTHY_THRESHOLD = int(os.environ.get("OLLAMA_UNHEALTHY_THRESHOLD", "3"))
+OLLAMA_UNHEALTHY_COOLDOWN = int(os.environ.get("OLLAMA_UNHEALTHY_COOLDOWN", "30"))
+
 
 ####################################
 # CHAT
@@ -872,6 +1076,33 @@ AUDIT_EXCLUDED_PATHS = os.getenv("AUDIT_EXCLUDED_PATHS", "/chats,/chat,/folders"
 AUDIT_EXCLUDED_PATHS = [path.strip() for path in AUDIT_EXCLUDED_PATHS]
 AUDIT_EXCLUDED_PATHS = [path.lstrip("/") for path in AUDIT_EXCLUDED_PATHS]
 
+# 审计日志由后台线程批量写入；请求路径上只把条目放入有界队列
+AUDIT_LOG_QUEUE_SIZE = max(int(os.environ.get("AUDIT_LOG_QUEUE_SIZE", "10000")), 1)
+AUDIT_LOG_BATCH_SIZE = max(int(os.environ.get("AUDIT_LOG_BATCH_SIZE", "200")), 1)
+# 队列未满一批时，最长等待多久写一次（秒）
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get("AUDIT_LOG_FLUSH_INTERVAL", "1"))
+# 队列已满时的处理方式：drop（丢弃并计数，不影响请求）| block（等待队列空位）
+AUDIT_LOG_BACKPRESSURE = os.environ.get("AUDIT_LOG_BACKPRESSURE", "drop").lower()
+if AUDIT_LOG_BACKPRESSURE not in ("drop", "block"):
+    AUDIT_LOG_BACKPRESSURE = "drop"
+
+# 默认采样率（0~1）；登录 / 登出 / 注册始终记录
+AUDIT_LOG_SAMPLE_RATE = min(
+    max(float(os.environ.get("AUDIT_LOG_SAMPLE_RATE", "1")), 0.0), 1.0
+)
+# 按路由前缀覆盖采样率与请求体捕获，JSON 数组，按顺序匹配第一条，例如：
+# [{"path": "/api/v1/auths", "sample_rate": 1},
+#  {"path": "/api/chat/completions", "sample_rate": 0.1, "capture_response": false}]
+# 可用字段：path, sample_rate, capture_request, capture_response, max_body_size
+AUDIT_LOG_RULES = os.environ.get("AUDIT_LOG_RULES", "")
+try:
+    AUDIT_LOG_RULES = json.loads(AUDIT_LOG_RULES) if AUDIT_LOG_RULES else []
+    if not isinstance(AUDIT_LOG_RULES, list):
+        AUDIT_LOG_RULES = []
+except Exception:
+    log.warning("Invalid AUDIT_LOG_RULES, ignoring")
+    AUDIT_LOG_RULES = []
+
 
 ####################################
 # OPENTELEMETRY
@@ -1134,6 +1365,21 @@ ENCRYPTION_DEBUG = (
     os.environ.get("ENCRYPTION_DEBUG", "false").lower() == "true"
 )
 
+####################################
+# POST-RESPONSE TASKS
+####################################
+
+# 回复完成后的标题 / 标签 / Follow-ups 作为相互独立的任务并发执行，各自超时、失败互不影响
+# 标题对用户可见，按前台调用准入，且只发送截断后的对话
+TITLE_GENERATION_TIMEOUT = float(os.environ.get("TITLE_GENERATION_TIMEOUT", "30"))
+# 标题生成使用的消息条数（首条用户消息 + 最近若干条）与每条消息的字符上限
+TITLE_GENERATION_MAX_MESSAGES = int(
+    os.environ.get("TITLE_GENERATION_MAX_MESSAGES", "4")
+)
+TITLE_GENERATION_MAX_CHARS = int(os.environ.get("TITLE_GENERATION_MAX_CHARS", "1000"))
+# 其他回复后任务（标签、Follow-ups）的超时（秒）
+POST_RESPONSE_TASK_TIMEOUT = float(os.environ.get("POST_RESPONSE_TASK_TIMEOUT", "60"))
+
 ####################################
 # SUMMARY
 ####################################
@@ -1159,6 +1405,17 @@ for item in _BOOTSTRAP_SUMMARY_CHUNK_STRATEGY_RAW.split(","):
 if not BOOTSTRAP_SUMMARY_CHUNK_STRATEGY:
     BOOTSTRAP_SUMMARY_CHUNK_STRATEGY = [90000, 10000, 10000]
 
+# 摘要调度：同一聊天连续多轮在 debounce 窗口内合并为一次摘要
+SUMMARY_DEBOUNCE_SECONDS = float(os.environ.get("SUMMARY_DEBOUNCE_SECONDS", "2"))
+# 本进程同时进行的摘要 LLM 调用上限
+SUMMARY_MAX_CONCURRENCY = max(int(os.environ.get("SUMMARY_MAX_CONCURRENCY", "4")), 1)
+# 所有实例（通过 Redis）同时进行的摘要 LLM 调用上限，0 表示不限制
+SUMMARY_GLOBAL_MAX_CONCURRENCY = int(
+    os.environ.get("SUMMARY_GLOBAL_MAX_CONCURRENCY", "0")
+)
+# Redis 并发槽位的过期时间（秒），防止实例异常退出后槽位泄漏
+SUMMARY_SLOT_TIMEOUT = int(os.environ.get("SUMMARY_SLOT_TIMEOUT", "300"))
+
 ####################################
 # ROLLING SUMMARY (无限上下文)
 ####################################
@@ -1182,6 +1439,15 @@ CURRENT_CONTEXT_MINIAL_MESSAGE = int(os.environ.get("CURRENT_CONTEXT_MINIAL_MESS
 # 当前对话窗口 token 数
 CURRENT_CONTEXT_TOKEN_BUDGET = int(os.environ.get("CURRENT_CONTEXT_TOKEN_BUDGET", "3000"))
 
+# 上下文组装缓存：已清洗、已计数的消息条目数上限
+SUMMARY_CONTEXT_CACHE_SIZE = int(
+    os.environ.get("SUMMARY_CONTEXT_CACHE_SIZE", "50000")
+)
+SUMMARY_CONTEXT_CACHE_TTL = int(os.environ.get("SUMMARY_CONTEXT_CACHE_TTL", "600"))
+# 每个聊天已存储摘要列表的缓存时间（秒）；本进程写入摘要时立即失效，
+# 较短的 TTL 限制其他 worker 写入后的陈旧时间
+SUMMARY_LIST_CACHE_TTL = int(os.environ.get("SUMMARY_LIST_CACHE_TTL", "60"))
+
 ####################################
 # LEGACY SUMMARY (summary.py)
 ####################################
@@ -1196,3 +1462,99 @@ COLD_START_TOKEN_WINDOW_DEFAULT = int(
 ROLLING_SUMMARY_TOKEN_THRESHOLD_DEFAULT = int(
     os.environ.get("ROLLING_SUMMARY_TOKEN_THRESHOLD", "90000")
 )
+
+####################################
+# IMAGE CAPTION
+####################################
+
+# 图片描述缓存：按图片内容哈希缓存，同一张图片只生成一次描述
+IMAGE_CAPTION_CACHE_TTL = int(os.environ.get("IMAGE_CAPTION_CACHE_TTL", "86400"))
+IMAGE_CAPTION_CACHE_SIZE = int(os.environ.get("IMAGE_CAPTION_CACHE_SIZE", "1000"))
+# 单轮对话中并发生成描述的图片数上限
+IMAGE_CAPTION_CONCURRENCY = max(
+    int(os.environ.get("IMAGE_CAPTION_CONCURRENCY", "4")), 1
+)
+
+####################################
+# IMAGE GENERATION
+####################################
+
+# 单次请求中并发生成 / 下载 / 保存的图片数上限
+IMAGE_GENERATION_CONCURRENCY = max(
+    int(os.environ.get("IMAGE_GENERATION_CONCURRENCY", "4")), 1
+)
+# 单次调用图片生成后端的超时（秒）
+IMAGE_GENERATION_TIMEOUT = int(os.environ.get("IMAGE_GENERATION_TIMEOUT", "300"))
+# 图片写入存储前在内存中缓冲的上限（字节），超过后转存到临时文件
+IMAGE_GENERATION_SPOOL_SIZE = int(
+    os.environ.get("IMAGE_GENERATION_SPOOL_SIZE", str(2 * 1024 * 1024))
+)
+
+####################################
+# AUDIO TRANSCRIPTION
+####################################
+
+# 长音频按时间切段后并行转写，相邻分段重叠若干秒，拼接时去重
+AUDIO_STT_SEGMENT_SECONDS = max(
+    int(os.environ.get("AUDIO_STT_SEGMENT_SECONDS", "300")), 30
+)
+AUDIO_STT_SEGMENT_OVERLAP_SECONDS = max(
+    float(os.environ.get("AUDIO_STT_SEGMENT_OVERLAP_SECONDS", "2")), 0
+)
+# 同一文件并行转写的分段数上限
+AUDIO_STT_MAX_WORKERS = max(int(os.environ.get("AUDIO_STT_MAX_WORKERS", "4")), 1)
+# 转写结果按音频内容哈希缓存（磁盘），重复上传同一文件直接返回
+AUDIO_STT_CACHE_ENABLED = (
+    os.environ.get("AUDIO_STT_CACHE_ENABLED", "True").lower() == "true"
+)
+# 转写缓存的磁盘占用上限与有效期，超出时先清理过期条目，再按最久未使用淘汰
+AUDIO_STT_CACHE_MAX_BYTES = int(
+    os.environ.get("AUDIO_STT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+)
+AUDIO_STT_CACHE_TTL = int(os.environ.get("AUDIO_STT_CACHE_TTL", str(30 * 24 * 3600)))
+
+####################################
+# WEB SEARCH CACHE
+####################################
+
+# 联网搜索的三级进程内缓存（LRU + TTL）：搜索结果、网页正文、分块 embedding
+# 网页正文与 embedding 按总字节数限制，每个 worker 各占一份
+ENABLE_WEB_SEARCH_CACHE = (
+    os.environ.get("ENABLE_WEB_SEARCH_CACHE", "True").lower() == "true"
+)
+# 搜索结果列表，key 为 (引擎, 查询, 结果数, 域名过滤)
+WEB_SEARCH_RESULT_CACHE_SIZE = int(os.environ.get("WEB_SEARCH_RESULT_CACHE_SIZE", "1000"))
+WEB_SEARCH_RESULT_CACHE_TTL = int(os.environ.get("WEB_SEARCH_RESULT_CACHE_TTL", "600"))
+# 网页正文，key 为 (加载器, URL)；超过 WEB_PAGE_CACHE_MAX_CHARS 的页面不缓存
+WEB_PAGE_CACHE_MAX_BYTES = int(
+    os.environ.get("WEB_PAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+)
+WEB_PAGE_CACHE_TTL = int(os.environ.get("WEB_PAGE_CACHE_TTL", "3600"))
+WEB_PAGE_CACHE_MAX_CHARS = int(os.environ.get("WEB_PAGE_CACHE_MAX_CHARS", "200000"))
+# 分块 embedding，key 为 (embedding 引擎, 模型, 前缀, 文本哈希)，以 float32 存储
+WEB_EMBEDDING_CACHE_MAX_BYTES = int(
+    os.environ.get("WEB_EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+WEB_EMBEDDING_CACHE_TTL = int(os.environ.get("WEB_EMBEDDING_CACHE_TTL", "86400"))
+
+####################################
+# VECTOR DB
+####################################
+
+# 没有原生异步客户端的向量库，其异步接口在专用线程池中执行同步调用；
+# 线程数即单个 worker 上同时进行的向量库请求上限，不占用 FastAPI 默认线程池
+VECTOR_DB_EXECUTOR_WORKERS = int(os.environ.get("VECTOR_DB_EXECUTOR_WORKERS", "16"))
+
+####################################
+# STARTUP
+####################################
+
+# 端口开放后在后台预热延迟加载的子系统（向量库、本地模型、mem0、jieba 等），
+# 关闭后这些子系统在首次使用时加载
+ENABLE_STARTUP_WARMUP = (
+    os.environ.get("ENABLE_STARTUP_WARMUP", "True").lower() == "true"
+)
+# 预热开始前等待的秒数，避免与启动后的首批请求争用 CPU
+STARTUP_WARMUP_DELAY = float(os.environ.get("STARTUP_WARMUP_DELAY", "0"))
+# STARTUP_PROFILE=true 时启动报告中列出的模块 / 包数量（开关见 utils/startup_profile.py）
+STARTUP_PROFILE_TOP_N = int(os.environ.get("STARTUP_PROFILE_TOP_N", "30"))
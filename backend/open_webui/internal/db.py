@@ -1,7 +1,11 @@
 import os
 import json
+import asyncio
+import itertools
 import logging
+import time
 from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Any, Optional
 
 from open_webui.internal.wrappers import register_connection
@@ -15,9 +19,21 @@ from open_webui.env import (
     DATABASE_POOL_SIZE,
     DATABASE_POOL_TIMEOUT,
     DATABASE_ENABLE_SQLITE_WAL,
+    DATABASE_REPLICA_CHECK_INTERVAL,
+    DATABASE_REPLICA_MAX_LAG,
+    DATABASE_REPLICA_STICKY_SECONDS,
+    DATABASE_REPLICA_URLS,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
 )
+from open_webui.utils.ttl_cache import TTLCache
 from peewee_migrate import Router
-from sqlalchemy import Dialect, create_engine, MetaData, event, types
+from sqlalchemy import Dialect, create_engine, MetaData, event, text, types
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
@@ -82,6 +98,23 @@ handle_peewee_migration(DATABASE_URL)
 
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
+
+def create_pooled_engine(url: str):
+    if isinstance(DATABASE_POOL_SIZE, int):
+        if DATABASE_POOL_SIZE > 0:
+            return create_engine(
+                url,
+                pool_size=DATABASE_POOL_SIZE,
+                max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+                pool_timeout=DATABASE_POOL_TIMEOUT,
+                pool_recycle=DATABASE_POOL_RECYCLE,
+                pool_pre_ping=True,
+                poolclass=QueuePool,
+            )
+        return create_engine(url, pool_pre_ping=True, poolclass=NullPool)
+    return create_engine(url, pool_pre_ping=True)
+
+
 # Handle SQLCipher URLs
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite+sqlcipher://"):
     database_password = os.environ.get("DATABASE_PASSWORD")
@@ -126,23 +159,7 @@ elif "sqlite" in SQLALCHEMY_DATABASE_URL:
 
     event.listen(engine, "connect", on_connect)
 else:
-    if isinstance(DATABASE_POOL_SIZE, int):
-        if DATABASE_POOL_SIZE > 0:
-            engine = create_engine(
-                SQLALCHEMY_DATABASE_URL,
-                pool_size=DATABASE_POOL_SIZE,
-                max_overflow=DATABASE_POOL_MAX_OVERFLOW,
-                pool_timeout=DATABASE_POOL_TIMEOUT,
-                pool_recycle=DATABASE_POOL_RECYCLE,
-                pool_pre_ping=True,
-                poolclass=QueuePool,
-            )
-        else:
-            engine = create_engine(
-                SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
-            )
-    else:
-        engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+    engine = create_pooled_engine(SQLALCHEMY_DATABASE_URL)
 
 
 SessionLocal = sessionmaker(
@@ -162,3 +179,274 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+####################################
+# 只读副本
+#
+# 读多的表方法可改用 get_read_db 走副本，其余调用保持不变：
+# - 用户写入主库后 DATABASE_REPLICA_STICKY_SECONDS 内，该用户的读取仍走主库（读到自己的写入）；
+#   该值不小于 DATABASE_REPLICA_MAX_LAG，窗口结束时仍在使用的副本已追上这次写入
+# - 复制延迟超过 DATABASE_REPLICA_MAX_LAG 或连接失败的副本暂停使用，全部不可用时回退到主库
+####################################
+
+_PG_REPLICATION_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class _Replica:
+    def __init__(self, url: str):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        if url.startswith("sqlite"):
+            self.engine = create_engine(url, connect_args={"check_same_thread": False})
+        else:
+            self.engine = create_pooled_engine(url)
+        # 首次健康检查通过前不使用
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+
+    def mark_failed(self, e: Exception):
+        if self.healthy:
+            log.warning(f"数据库副本 {self.name} 不可用，读取回退到主库: {e}")
+        self.healthy = False
+
+    def check(self):
+        self.checked_at = time.time()
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    lag = conn.execute(text(_PG_REPLICATION_LAG_SQL)).scalar()
+                else:
+                    conn.execute(text("SELECT 1"))
+                    lag = 0
+        except Exception as e:
+            self.lag = None
+            self.mark_failed(e)
+            return
+
+        self.lag = float(lag or 0)
+        healthy = self.lag <= DATABASE_REPLICA_MAX_LAG
+        if healthy and not self.healthy:
+            log.info(f"数据库副本 {self.name} 可用，复制延迟 {self.lag:.1f}s")
+        elif not healthy and self.healthy:
+            log.warning(
+                f"数据库副本 {self.name} 复制延迟 {self.lag:.1f}s 超过阈值，读取回退到主库"
+            )
+        self.healthy = healthy
+
+
+_replicas = [_Replica(url) for url in DATABASE_REPLICA_URLS]
+_replica_cursor = itertools.count()
+
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False
+)
+
+
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        raise RuntimeError("只读会话不能写入，请使用 get_db")
+
+
+def has_replicas() -> bool:
+    return bool(_replicas)
+
+
+def _pick_replica() -> Optional[_Replica]:
+    healthy = [replica for replica in _replicas if replica.healthy]
+    if not healthy:
+        return None
+    return healthy[next(_replica_cursor) % len(healthy)]
+
+
+def check_replicas():
+    for replica in _replicas:
+        replica.check()
+
+
+async def periodic_replica_health_check():
+    from starlette.concurrency import run_in_threadpool
+
+    while True:
+        try:
+            await run_in_threadpool(check_replicas)
+        except Exception as e:
+            log.error(f"数据库副本健康检查失败: {e}")
+        await asyncio.sleep(DATABASE_REPLICA_CHECK_INTERVAL)
+
+
+####################################
+# 读写粘滞
+####################################
+
+# 当前请求的认证用户，由请求中间件创建、get_current_user 填入
+_request_scope: ContextVar[Optional[dict]] = ContextVar(
+    "db_request_scope", default=None
+)
+_sticky_users = TTLCache(max_size=100000, ttl=DATABASE_REPLICA_STICKY_SECONDS)
+_sticky_redis = None
+
+
+@contextmanager
+def request_db_scope():
+    token = _request_scope.set({})
+    try:
+        yield
+    finally:
+        _request_scope.reset(token)
+
+
+def bind_request_user(user_id: str):
+    scope = _request_scope.get()
+    if scope is not None:
+        scope["user_id"] = user_id
+
+
+def _get_request_user() -> Optional[str]:
+    scope = _request_scope.get()
+    return scope.get("user_id") if scope else None
+
+
+def _get_sticky_redis():
+    global _sticky_redis
+    if _sticky_redis is None and REDIS_URL:
+        from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+        _sticky_redis = get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            decode_responses=True,
+        )
+    return _sticky_redis
+
+
+def _sticky_key(user_id: str) -> str:
+    return f"{REDIS_KEY_PREFIX}:db:sticky:{user_id}"
+
+
+def mark_user_write(user_id: Optional[str]):
+    """
+    记录用户刚写入主库，粘滞窗口内该用户的读取走主库
+
+    配置了 Redis 时同时写入 Redis，使其他 worker 也能看到
+    """
+    if not _replicas or not user_id or DATABASE_REPLICA_STICKY_SECONDS <= 0:
+        return
+
+    _sticky_users.set(user_id, True)
+    try:
+        redis = _get_sticky_redis()
+        if redis is not None:
+            redis.set(
+                _sticky_key(user_id),
+                1,
+                px=int(DATABASE_REPLICA_STICKY_SECONDS * 1000),
+            )
+    except Exception as e:
+        log.debug(f"记录读写粘滞失败: {e}")
+
+
+def is_user_sticky(user_id: str) -> bool:
+    if _sticky_users.get(user_id):
+        return True
+    try:
+        redis = _get_sticky_redis()
+        return redis is not None and bool(redis.exists(_sticky_key(user_id)))
+    except Exception as e:
+        log.debug(f"读取读写粘滞失败: {e}")
+        return False
+
+
+def _track_flush(session, flush_context):
+    users = session.info.setdefault("written_users", set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if getattr(obj, "__tablename__", None) == "user":
+            user_id = obj.id
+        else:
+            user_id = getattr(obj, "user_id", None)
+        if isinstance(user_id, str):
+            users.add(user_id)
+    session.info["wrote"] = True
+
+
+def _track_bulk_write(orm_execute_state):
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["wrote"] = True
+
+
+def _mark_written_users(session):
+    users = session.info.pop("written_users", set())
+    if not session.info.pop("wrote", False):
+        return
+
+    request_user = _get_request_user()
+    if request_user:
+        users.add(request_user)
+    for user_id in users:
+        mark_user_write(user_id)
+
+
+def _forget_written_users(session):
+    session.info.pop("written_users", None)
+    session.info.pop("wrote", None)
+
+
+if _replicas:
+    # 写入发生在主库会话中：提交后把涉及的用户（行上的 user_id 与当前请求用户）标记为粘滞
+    event.listen(SessionLocal, "after_flush", _track_flush)
+    event.listen(SessionLocal, "do_orm_execute", _track_bulk_write)
+    event.listen(SessionLocal, "after_commit", _mark_written_users)
+    event.listen(SessionLocal, "after_rollback", _forget_written_users)
+
+
+def get_read_session(user_id: Optional[str] = None):
+    """
+    只读会话：有可用副本且用户不在粘滞窗口内时连接副本，否则使用主库
+
+    user_id 缺省时取当前请求的认证用户
+    """
+    replica = None
+    if _replicas:
+        user_id = user_id or _get_request_user()
+        if not (user_id and is_user_sticky(user_id)):
+            replica = _pick_replica()
+
+    if replica is None:
+        yield from get_session()
+        return
+
+    db = ReadSessionLocal(bind=replica.engine)
+    try:
+        db.connection()
+    except OperationalError as e:
+        replica.mark_failed(e)
+        db.close()
+        yield from get_session()
+        return
+
+    try:
+        yield db
+    except OperationalError as e:
+        # 查询中途连接断开：暂停该副本，等待下次健康检查恢复
+        if e.connection_invalidated:
+            replica.mark_failed(e)
+        raise
+    finally:
+        db.close()
+
+
+get_read_db = contextmanager(get_read_session)
@@ -1,3 +1,7 @@
+from open_webui.utils import startup_profile
+
+startup_profile.install()
+
 import asyncio
 import inspect
 import json
@@ -58,9 +62,14 @@ from starsessions import (
 from starsessions.stores.redis import RedisStore
 
 from open_webui.utils import logger
-from open_webui.utils.audit import AuditLevel, AuditLoggingMiddleware
+from open_webui.utils.audit import (
+    AuditLevel,
+    AuditLoggingMiddleware,
+    audit_log_queue,
+)
 from open_webui.utils.chat_error_boundary import chat_error_boundary
 from open_webui.utils.logger import start_logger
+from open_webui.utils.lazy import LazyObject, warm_up_subsystems
 from open_webui.socket.main import (
     app as socket_app,
     periodic_usage_pool_cleanup,
@@ -110,7 +119,13 @@ from open_webui.routers.retrieval import (
     get_rf,
 )
 
-from open_webui.internal.db import Session, engine
+from open_webui.internal.db import (
+    Session,
+    engine,
+    has_replicas,
+    periodic_replica_health_check,
+    request_db_scope,
+)
 
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
@@ -438,6 +453,8 @@ from open_webui.config import (
 )
 from open_webui.env import (
     LICENSE_KEY,
+    ENABLE_STARTUP_WARMUP,
+    STARTUP_WARMUP_DELAY,
     AUDIT_EXCLUDED_PATHS,
     AUDIT_LOG_LEVEL,
     CHANGELOG,
@@ -452,6 +469,8 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     VERSION,
     INSTANCE_ID,
+    TASK_DRAIN_NOTICE_PERIOD,
+    TASK_DRAIN_TIMEOUT,
     WEBUI_BUILD_HASH,
     WEBUI_SECRET_KEY,
     WEBUI_SESSION_COOKIE_SAME_SITE,
@@ -526,6 +545,14 @@ from open_webui.utils.auth import (
     get_verified_user,
 )
 from open_webui.utils.plugin import install_tool_and_function_dependencies
+from open_webui.billing import reservations as billing_reservations
+from open_webui.utils.knowledge_reindex import resume_reindex_jobs
+from open_webui.utils.user_stats import periodic_interaction_compaction
+from open_webui.utils.user_cache import (
+    flush_user_last_active,
+    periodic_user_last_active_flush,
+    user_cache_invalidation_listener,
+)
 from open_webui.utils.oauth import (
     OAuthManager,
     OAuthClientManager,
@@ -537,10 +564,15 @@ from open_webui.utils.redis import get_redis_connection
 
 from open_webui.tasks import (
     redis_task_command_listener,
+    periodic_task_heartbeat,
     list_task_ids_by_item_id,
     create_task,
     stop_task,
     list_tasks,
+    list_workers,
+    is_draining,
+    drain,
+    install_drain_signal_handler,
 )  # Import from tasks.py
 
 from open_webui.utils.redis import get_sentinels_from_env
@@ -604,7 +636,8 @@ async def lifespan(app: FastAPI):
     # This should be blocking (sync) so functions are not deactivated on first /get_models calls
     # when the first user lands on the / route.
     log.info("Installing external dependencies of functions and tools...")
-    install_tool_and_function_dependencies()
+    with startup_profile.phase("install tool and function dependencies"):
+        install_tool_and_function_dependencies()
 
     app.state.redis = get_redis_connection(
         redis_url=REDIS_URL,
@@ -623,39 +656,79 @@ async def lifespan(app: FastAPI):
         app.state.redis_task_command_listener = asyncio.create_task(
             redis_task_command_listener(app)
         )
+        app.state.user_cache_invalidation_listener = asyncio.create_task(
+            user_cache_invalidation_listener(app)
+        )
+        app.state.task_heartbeat = asyncio.create_task(periodic_task_heartbeat(app))
+
+    # uvicorn 已安装信号处理；收到 SIGTERM 时先排空一段时间再交给它关闭监听
+    install_drain_signal_handler(TASK_DRAIN_NOTICE_PERIOD)
 
     if THREAD_POOL_SIZE and THREAD_POOL_SIZE > 0:
         limiter = anyio.to_thread.current_default_thread_limiter()
         limiter.total_tokens = THREAD_POOL_SIZE
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(resume_reindex_jobs(app))
+    asyncio.create_task(periodic_interaction_compaction(app))
+    asyncio.create_task(periodic_user_last_active_flush())
+    if billing_reservations.is_enabled():
+        asyncio.create_task(billing_reservations.periodic_reservation_reconcile())
+    if has_replicas():
+        asyncio.create_task(periodic_replica_health_check())
 
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
-        await get_all_models(
-            Request(
-                # Creating a mock request object to pass to get_all_models
-                {
-                    "type": "http",
-                    "asgi.version": "3.0",
-                    "asgi.spec_version": "2.0",
-                    "method": "GET",
-                    "path": "/internal",
-                    "query_string": b"",
-                    "headers": Headers({}).raw,
-                    "client": ("127.0.0.1", 12345),
-                    "server": ("127.0.0.1", 80),
-                    "scheme": "http",
-                    "app": app,
-                }
-            ),
-            None,
-        )
+        with startup_profile.phase("base models cache"):
+            await get_all_models(
+                Request(
+                    # Creating a mock request object to pass to get_all_models
+                    {
+                        "type": "http",
+                        "asgi.version": "3.0",
+                        "asgi.spec_version": "2.0",
+                        "method": "GET",
+                        "path": "/internal",
+                        "query_string": b"",
+                        "headers": Headers({}).raw,
+                        "client": ("127.0.0.1", 12345),
+                        "server": ("127.0.0.1", 80),
+                        "scheme": "http",
+                        "app": app,
+                    }
+                ),
+                None,
+            )
+
+    startup_profile.report()
+    if ENABLE_STARTUP_WARMUP:
+        # 预热在线程池中进行，不阻塞端口开放和请求处理
+        asyncio.create_task(warm_up_subsystems(STARTUP_WARMUP_DELAY))
+    else:
+        startup_profile.uninstall()
 
     yield
 
+    # 排空：不再接受新的聊天任务，等待进行中的流式回复完成（期间仍响应停止命令）
+    await drain(app.state.redis, TASK_DRAIN_TIMEOUT)
+
+    if hasattr(app.state, "task_heartbeat"):
+        app.state.task_heartbeat.cancel()
+
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "user_cache_invalidation_listener"):
+        app.state.user_cache_invalidation_listener.cancel()
+
+    # 退出前写入尚未落库的最近活跃时间
+    flush_user_last_active()
+
+    await ollama.ollama_pool.close()
+    await images.images_pool.close()
+
+    # 写出队列中尚未落盘的审计日志
+    await asyncio.to_thread(audit_log_queue.close)
+
 
 app = FastAPI(
     title="Cakumi",
@@ -1053,22 +1126,44 @@ app.state.YOUTUBE_LOADER_TRANSLATION = None
 
 
 try:
-    app.state.ef = get_ef(
-        app.state.config.RAG_EMBEDDING_ENGINE,
-        app.state.config.RAG_EMBEDDING_MODEL,
-        RAG_EMBEDDING_MODEL_AUTO_UPDATE,
-    )
+    # 本地 SentenceTransformer / CrossEncoder 模型加载需要数秒到数十秒，
+    # 首次使用时再加载，并在端口开放后由后台预热提前完成
+    if app.state.config.RAG_EMBEDDING_ENGINE == "" and app.state.config.RAG_EMBEDDING_MODEL:
+        app.state.ef = LazyObject(
+            lambda: get_ef(
+                app.state.config.RAG_EMBEDDING_ENGINE,
+                app.state.config.RAG_EMBEDDING_MODEL,
+                RAG_EMBEDDING_MODEL_AUTO_UPDATE,
+            ),
+            "embedding_model",
+        )
     if (
         app.state.config.ENABLE_RAG_HYBRID_SEARCH
         and not app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
     ):
-        app.state.rf = get_rf(
-            app.state.config.RAG_RERANKING_ENGINE,
-            app.state.config.RAG_RERANKING_MODEL,
-            app.state.config.RAG_EXTERNAL_RERANKER_URL,
-            app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
-            RAG_RERANKING_MODEL_AUTO_UPDATE,
-        )
+        if (
+            app.state.config.RAG_RERANKING_MODEL
+            and app.state.config.RAG_RERANKING_ENGINE != "external"
+        ):
+            app.state.rf = LazyObject(
+                lambda: get_rf(
+                    app.state.config.RAG_RERANKING_ENGINE,
+                    app.state.config.RAG_RERANKING_MODEL,
+                    app.state.config.RAG_EXTERNAL_RERANKER_URL,
+                    app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
+                    RAG_RERANKING_MODEL_AUTO_UPDATE,
+                ),
+                "reranking_model",
+                optional=True,
+            )
+        else:
+            app.state.rf = get_rf(
+                app.state.config.RAG_RERANKING_ENGINE,
+                app.state.config.RAG_RERANKING_MODEL,
+                app.state.config.RAG_EXTERNAL_RERANKER_URL,
+                app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
+                RAG_RERANKING_MODEL_AUTO_UPDATE,
+            )
     else:
         app.state.rf = None
 except Exception as e:
@@ -1320,7 +1415,9 @@ app.add_middleware(SecurityHeadersMiddleware)
 
 @app.middleware("http")
 async def commit_session_after_request(request: Request, call_next):
-    response = await call_next(request)
+    # 请求范围内记录认证用户，用于只读副本的读写粘滞
+    with request_db_scope():
+        response = await call_next(request)
     # log.debug("Commit session after request")
     Session.commit()
     return response
@@ -1568,6 +1665,7 @@ async def chat_completion(
     Raises:
         HTTPException 400: 模型不存在、无访问权限、参数错误
         HTTPException 404: Chat 不存在
+        HTTPException 503: 实例正在排空（关闭中），客户端应重试到其他实例
 
     处理流程:
     1. 加载所有模型到 app.state.MODELS
@@ -1580,6 +1678,13 @@ async def chat_completion(
        - 调用 process_chat_response (处理响应、事件发射)
     5. 根据是否有 session_id 决定同步/异步执行
     """
+    if is_draining():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is shutting down, please retry",
+            headers={"Retry-After": "1"},
+        )
+
     # === 1. 初始化性能日志记录器 ===
     # 只在 CHAT_DEBUG_FLAG=True 时启用性能日志
     perf_logger = None
@@ -1728,16 +1833,13 @@ async def chat_completion(
                 )
 
 
-            # === 8.0.5 用户画像分析（异步，不阻塞主请求）===
-            await create_task(
-                request.app.state.redis,
-                update_profile(
-                    user.id,
-                    request,
-                    form_data.get("model", ""),
-                    user,
-                    form_data,
-                ),
+            # === 8.0.5 用户画像分析（仅追加消息，达到阈值后在后台分析）===
+            await update_profile(
+                user.id,
+                request,
+                form_data.get("model", ""),
+                user,
+                form_data,
             )
 
             # 标记 payload 处理开始
@@ -1944,6 +2046,14 @@ async def list_tasks_by_chat_id_endpoint(
     return {"task_ids": task_ids}
 
 
+@app.get("/api/tasks/workers")
+async def list_task_workers_endpoint(
+    request: Request, user=Depends(get_admin_user)
+):
+    # 各 worker 的活跃任务数与排空状态，供滚动部署 / 扩缩容参考
+    return {"workers": await list_workers(request.app.state.redis)}
+
+
 ##################################
 #
 # Config Endpoints
@@ -2340,6 +2450,16 @@ async def healthcheck():
     return {"status": True}
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    # 排空期间返回 503，负载均衡不再向本实例分发新请求
+    if is_draining():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="draining"
+        )
+    return {"status": True}
+
+
 @app.get("/health/db")
 async def healthcheck_with_db():
     Session.execute(text("SELECT 1;")).all()
@@ -2,17 +2,37 @@ import os
 import zlib
 import re
 import hashlib
-import jieba.posseg as pseg  # [新增] 引入jieba词性标注
 from logging import getLogger
 from typing import Dict, List
 
-from mem0 import MemoryClient
 from open_webui.billing.core import deduct_balance
+from open_webui.utils.lazy import LazyObject, register_warm_up
 
 log = getLogger(__name__)
 
 mem0_api_key = os.getenv("MEM0_API_KEY")
-memory_client = MemoryClient(api_key=mem0_api_key)
+
+
+def _create_memory_client():
+    # MemoryClient 初始化时会请求 mem0 校验 key，首次使用（或后台预热）时再创建
+    from mem0 import MemoryClient
+
+    return MemoryClient(api_key=mem0_api_key)
+
+
+memory_client = LazyObject(_create_memory_client, "mem0")
+
+
+def _load_jieba():
+    # [新增] jieba 词性标注，词典加载较慢，首次使用（或后台预热）时再加载
+    import jieba
+    import jieba.posseg as pseg
+
+    jieba.initialize()
+    return pseg
+
+
+register_warm_up("jieba", _load_jieba)
 
 # 计费常量
 BILLING_UNIT_TOKENS = 1
@@ -112,7 +132,7 @@ def is_low_density(text: str) -> bool:
         return False 
 
     try:
-        words = pseg.cut(text)
+        words = _load_jieba().cut(text)
         high_val_count = 0
         total_count = 0
         
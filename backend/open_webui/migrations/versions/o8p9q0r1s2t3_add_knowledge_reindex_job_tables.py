@@ -0,0 +1,75 @@
+"""Add knowledge reindex job tables
+
+Revision ID: o8p9q0r1s2t3
+Revises: n7o8p9q0r1s2, soft_delete_cred_001
+Create Date: 2026-10-18 10:00:00.000000
+
+添加知识库重建任务表：
+- knowledge_reindex_job: 重建任务及其进度
+- knowledge_reindex_item: 文件级检查点，用于重启后断点续跑
+同时合并 sign_in 与 credential 软删除两个迁移分支
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'o8p9q0r1s2t3'
+down_revision: Union[str, None] = ('n7o8p9q0r1s2', 'soft_delete_cred_001')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """升级数据库：添加知识库重建任务表"""
+    op.create_table(
+        'knowledge_reindex_job',
+        sa.Column('id', sa.Text(), nullable=False),
+        sa.Column('user_id', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=False, server_default='pending'),
+        sa.Column('owner', sa.Text(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('meta', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_knowledge_reindex_job_status',
+        'knowledge_reindex_job',
+        ['status'],
+        unique=False
+    )
+
+    op.create_table(
+        'knowledge_reindex_item',
+        sa.Column('id', sa.Text(), nullable=False),
+        sa.Column('job_id', sa.Text(), nullable=False),
+        sa.Column('knowledge_id', sa.Text(), nullable=False),
+        sa.Column('file_id', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=False, server_default='pending'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_knowledge_reindex_item_job_id',
+        'knowledge_reindex_item',
+        ['job_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """降级数据库：移除知识库重建任务表"""
+    op.drop_index('ix_knowledge_reindex_item_job_id', table_name='knowledge_reindex_item')
+    op.drop_table('knowledge_reindex_item')
+
+    op.drop_index('ix_knowledge_reindex_job_status', table_name='knowledge_reindex_job')
+    op.drop_table('knowledge_reindex_job')
@@ -0,0 +1,46 @@
+"""Add user profile message table
+
+Revision ID: p9q0r1s2t3u4
+Revises: o8p9q0r1s2t3
+Create Date: 2026-10-18 11:00:00.000000
+
+添加用户画像待分析消息追加表，替代 data_for_personalized_experience.data
+中读改写的 messages 数组
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'p9q0r1s2t3u4'
+down_revision: Union[str, None] = 'o8p9q0r1s2t3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """升级数据库：添加用户画像消息表"""
+    op.create_table(
+        'user_profile_message',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('model_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_user_profile_message_user_id',
+        'user_profile_message',
+        ['user_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """降级数据库：移除用户画像消息表"""
+    op.drop_index('ix_user_profile_message_user_id', table_name='user_profile_message')
+    op.drop_table('user_profile_message')
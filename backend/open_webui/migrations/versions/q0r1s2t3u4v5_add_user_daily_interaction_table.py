@@ -0,0 +1,74 @@
+"""Add user daily interaction table
+
+Revision ID: q0r1s2t3u4v5
+Revises: p9q0r1s2t3u4
+Create Date: 2026-10-18 12:00:00.000000
+
+添加用户每日交互计数表 user_daily_interaction：
+- 每次 LLM 调用只对 (user_id, date) 行做原子累加，不再读写整个 user.info
+- user.info 中的统计字段由后台任务定期压缩生成
+迁移时从已有的 user.info.interaction_history 回填，回填的数据视为已压缩
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'q0r1s2t3u4v5'
+down_revision: Union[str, None] = 'p9q0r1s2t3u4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """升级数据库：添加用户每日交互计数表并回填历史数据"""
+    interaction_table = op.create_table(
+        'user_daily_interaction',
+        sa.Column('user_id', sa.Text(), nullable=False),
+        sa.Column('date', sa.String(length=10), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('compacted_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_interaction_at', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'date'),
+    )
+
+    conn = op.get_bind()
+    users = conn.execute(sa.text('SELECT id, info FROM "user" WHERE info IS NOT NULL'))
+
+    rows = []
+    for user_id, info in users:
+        try:
+            if isinstance(info, str):
+                info = json.loads(info)
+            if not isinstance(info, dict):
+                continue
+
+            daily_interaction = info.get('daily_interaction') or {}
+            for day, count in (info.get('interaction_history') or {}).items():
+                rows.append(
+                    {
+                        'user_id': user_id,
+                        'date': day,
+                        'count': int(count),
+                        'compacted_count': int(count),
+                        'last_interaction_at': (
+                            daily_interaction.get('last_interaction_at')
+                            if daily_interaction.get('date') == day
+                            else None
+                        ),
+                    }
+                )
+        except Exception:
+            continue
+
+    if rows:
+        op.bulk_insert(interaction_table, rows)
+
+
+def downgrade() -> None:
+    """降级数据库：移除用户每日交互计数表"""
+    op.drop_table('user_daily_interaction')
@@ -0,0 +1,108 @@
+"""Add chat search index
+
+Revision ID: r1s2t3u4v5w6
+Revises: q0r1s2t3u4v5
+Create Date: 2026-10-18 14:00:00.000000
+
+添加聊天全文检索索引 chat_search_index：
+- SQLite：外部内容 FTS5 表 chat_search_fts（trigram 分词）+ 同步触发器
+- PostgreSQL：content 上的 pg_trgm GIN 索引
+已有聊天通过 `open-webui reindex-chat-search` 回填，回填前搜索自动退回 JSON 扫描
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'r1s2t3u4v5w6'
+down_revision: Union[str, None] = 'q0r1s2t3u4v5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+log = logging.getLogger(__name__)
+
+
+def upgrade() -> None:
+    """升级数据库：添加聊天全文检索索引"""
+    op.create_table(
+        'chat_search_index',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('chat_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chat_id'),
+    )
+    op.create_index(
+        'ix_chat_search_index_user_id',
+        'chat_search_index',
+        ['user_id'],
+        unique=False
+    )
+
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        try:
+            op.execute(
+                "CREATE VIRTUAL TABLE chat_search_fts USING fts5("
+                "content, content='chat_search_index', content_rowid='id', "
+                "tokenize='trigram')"
+            )
+        except Exception as e:
+            # SQLite < 3.34 不支持 trigram，搜索退回到索引表的 LIKE 扫描
+            log.warning(f"FTS5 trigram unavailable, chat search uses plain index: {e}")
+            return
+
+        op.execute(
+            "CREATE TRIGGER chat_search_index_ai AFTER INSERT ON chat_search_index BEGIN "
+            "INSERT INTO chat_search_fts(rowid, content) VALUES (new.id, new.content); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER chat_search_index_ad AFTER DELETE ON chat_search_index BEGIN "
+            "INSERT INTO chat_search_fts(chat_search_fts, rowid, content) "
+            "VALUES ('delete', old.id, old.content); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER chat_search_index_au AFTER UPDATE ON chat_search_index BEGIN "
+            "INSERT INTO chat_search_fts(chat_search_fts, rowid, content) "
+            "VALUES ('delete', old.id, old.content); "
+            "INSERT INTO chat_search_fts(rowid, content) VALUES (new.id, new.content); "
+            "END"
+        )
+    elif conn.dialect.name == 'postgresql':
+        # 创建扩展可能需要额外权限，失败时仅缺少 GIN 索引，搜索仍然可用
+        savepoint = conn.begin_nested()
+        try:
+            conn.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(
+                sa.text(
+                    "CREATE INDEX ix_chat_search_index_content_trgm "
+                    "ON chat_search_index USING gin (content gin_trgm_ops)"
+                )
+            )
+            savepoint.commit()
+        except Exception as e:
+            savepoint.rollback()
+            log.warning(f"pg_trgm unavailable, chat search index has no GIN index: {e}")
+
+
+def downgrade() -> None:
+    """降级数据库：移除聊天全文检索索引"""
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS chat_search_index_au")
+        op.execute("DROP TRIGGER IF EXISTS chat_search_index_ad")
+        op.execute("DROP TRIGGER IF EXISTS chat_search_index_ai")
+        op.execute("DROP TABLE IF EXISTS chat_search_fts")
+    elif conn.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_chat_search_index_content_trgm")
+
+    op.drop_index('ix_chat_search_index_user_id', table_name='chat_search_index')
+    op.drop_table('chat_search_index')
@@ -0,0 +1,45 @@
+"""Add chat model credential binding
+
+Revision ID: s2t3u4v5w6x7
+Revises: r1s2t3u4v5w6
+Create Date: 2026-10-18 16:00:00.000000
+
+添加 chat_model_credential 表：记录聊天使用的私有模型凭据，
+后台任务解析凭据时不再扫描聊天历史。已有聊天在首次解析时补写绑定。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 's2t3u4v5w6x7'
+down_revision: Union[str, None] = 'r1s2t3u4v5w6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """升级数据库：添加聊天→凭据绑定表"""
+    op.create_table(
+        'chat_model_credential',
+        sa.Column('chat_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('credential_id', sa.String(), nullable=True),
+        sa.Column('updated_at', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('chat_id'),
+    )
+    op.create_index(
+        'ix_chat_model_credential_user_id',
+        'chat_model_credential',
+        ['user_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """降级数据库：移除聊天→凭据绑定表"""
+    op.drop_index('ix_chat_model_credential_user_id', table_name='chat_model_credential')
+    op.drop_table('chat_model_credential')
@@ -81,7 +81,7 @@ from typing import Optional
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, JSON
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_db, get_read_db
 
 
 ##############################################################################
@@ -297,7 +297,7 @@ class AnnouncementReadsTable:
 
         用途：快速查询多个公告的阅读状态，用于前端显示"已读/未读"标识
         """
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             reads = (
                 db.query(AnnouncementRead)
                 .filter(
@@ -385,7 +385,7 @@ class AnnouncementsTable:
         - 用户查看最新公告：status="active", limit=20
         - 增量拉取：status="active", since=上次拉取时间
         """
-        with get_db() as db:
+        with get_read_db() as db:
             query = db.query(Announcement)
             if status:
                 query = query.filter(Announcement.status == status)
@@ -11,7 +11,7 @@ from typing import Optional
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import Boolean, Column, String, Integer, BigInteger, Text, func, UniqueConstraint
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_db, get_read_db
 
 
 ####################
@@ -243,7 +243,7 @@ class BillingLogTable:
         self, user_id: str, limit: int = 50, offset: int = 0
     ) -> list[BillingLogModel]:
         """获取用户计费日志"""
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             logs = (
                 db.query(BillingLog)
                 .filter_by(user_id=user_id)
@@ -256,7 +256,7 @@ class BillingLogTable:
 
     def get_all_by_user_id(self, user_id: str) -> list[BillingLogModel]:
         """获取用户全部计费日志（不分页）"""
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             logs = (
                 db.query(BillingLog)
                 .filter_by(user_id=user_id)
@@ -267,7 +267,7 @@ class BillingLogTable:
 
     def count_by_user_id(self, user_id: str) -> int:
         """统计用户日志数量"""
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             return db.query(BillingLog).filter_by(user_id=user_id).count()
 
 
@@ -278,7 +278,7 @@ class RechargeLogTable:
         self, user_id: str, limit: int = 50, offset: int = 0
     ) -> list[RechargeLogModel]:
         """获取用户充值日志"""
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             logs = (
                 db.query(RechargeLog)
                 .filter_by(user_id=user_id)
@@ -295,7 +295,7 @@ class RechargeLogTable:
         """获取用户充值日志,包含操作员姓名"""
         from open_webui.models.users import User
 
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             logs = (
                 db.query(RechargeLog, User.name.label("operator_name"))
                 .join(User, RechargeLog.operator_id == User.id)
@@ -547,7 +547,7 @@ class FirstRechargeBonusLogTable:
 
     def get_stats(self) -> dict:
         """获取首充优惠统计数据"""
-        with get_db() as db:
+        with get_read_db() as db:
             result = db.query(
                 func.count(FirstRechargeBonusLog.id).label("participant_count"),
                 func.sum(FirstRechargeBonusLog.recharge_amount).label("total_recharge"),
@@ -566,7 +566,7 @@ class FirstRechargeBonusLogTable:
         """获取参与者列表（包含用户名）"""
         from open_webui.models.users import User
 
-        with get_db() as db:
+        with get_read_db() as db:
             # 查询总数
             total = db.query(FirstRechargeBonusLog).count()
 
@@ -3,13 +3,17 @@ import time
 import uuid
 from typing import Optional, List, Dict, Literal
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_db, get_read_db
 from open_webui.models.tags import TagModel, Tags
 from open_webui.models.folders import Folders
+from open_webui.models.user_model_credentials import (
+    ChatModelCredential,
+    UserModelCredentials,
+)
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, Text, JSON, Index
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
@@ -55,6 +59,62 @@ class Chat(Base):
     )
 
 
+class ChatSearchIndex(Base):
+    """
+    聊天全文检索索引：每个聊天一行，content 为标题与全部消息文本（小写）
+
+    - SQLite：外部内容 FTS5 表 chat_search_fts（trigram 分词）通过触发器与本表同步
+    - PostgreSQL：content 上的 pg_trgm GIN 索引
+    两者都支持 LIKE '%关键词%' 子串匹配（含中文），与原有搜索语义一致
+    """
+
+    __tablename__ = "chat_search_index"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # FTS5 rowid
+    chat_id = Column(String, nullable=False, unique=True)
+    user_id = Column(String, index=True)
+    content = Column(Text)
+    updated_at = Column(BigInteger)
+
+
+# trigram 分词下少于 3 个字符的模式无法使用 FTS 索引
+CHAT_SEARCH_FTS_MIN_LENGTH = 3
+
+# SQLite 下 FTS5 表是否存在（由迁移创建，SQLite 不支持 trigram 时可能缺失）
+_chat_search_fts_available: Optional[bool] = None
+
+
+def build_chat_search_content(chat: dict) -> str:
+    """把聊天标题与所有消息文本拼接为检索内容"""
+    parts = [chat.get("title") or ""]
+    seen_ids = set()
+
+    messages = list((chat.get("history") or {}).get("messages", {}).values())
+    messages += chat.get("messages") or []
+
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+
+        message_id = message.get("id")
+        if message_id is not None:
+            if message_id in seen_ids:
+                continue
+            seen_ids.add(message_id)
+
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(
+                item.get("text", "")
+                for item in content
+                if isinstance(item, dict) and item.get("type") == "text"
+            )
+        if isinstance(content, str) and content:
+            parts.append(content)
+
+    return "\n".join(parts).replace("\x00", "").lower()
+
+
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -122,6 +182,116 @@ class ChatTitleIdResponse(BaseModel):
 
 
 class ChatTable:
+    def _upsert_search_index(self, db, chat_item: Chat) -> None:
+        """在同一事务中刷新聊天的全文检索内容"""
+        if chat_item.user_id and chat_item.user_id.startswith("shared-"):
+            return
+
+        content = build_chat_search_content(chat_item.chat or {})
+        updated_at = int(time.time())
+
+        # 只查主键，不把整段检索内容读回来；内容未变化时不写，避免触发器重建 FTS
+        index_id = db.query(ChatSearchIndex.id).filter_by(chat_id=chat_item.id).scalar()
+        if index_id is None:
+            db.add(
+                ChatSearchIndex(
+                    chat_id=chat_item.id,
+                    user_id=chat_item.user_id,
+                    content=content,
+                    updated_at=updated_at,
+                )
+            )
+        else:
+            db.query(ChatSearchIndex).filter(
+                ChatSearchIndex.id == index_id,
+                or_(
+                    ChatSearchIndex.content.is_(None),
+                    ChatSearchIndex.content != content,
+                ),
+            ).update(
+                {"content": content, "updated_at": updated_at},
+                synchronize_session=False,
+            )
+
+    def update_chat_search_index_by_id(self, id: str) -> bool:
+        """
+        单独刷新一个聊天的检索内容
+
+        流式输出期间的保存跳过索引（见 upsert_message_to_chat_by_id_and_message_id），
+        生成结束后调用本方法补上
+        """
+        try:
+            with get_db() as db:
+                chat_item = db.get(Chat, id)
+                if chat_item is None:
+                    return False
+                self._upsert_search_index(db, chat_item)
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"update_chat_search_index_by_id failed: {e}")
+            return False
+
+    def reindex_chat_search(self, batch_size: int = 500, full: bool = False) -> int:
+        """
+        为已有聊天回填全文检索索引，返回处理的聊天数
+
+        full=False 时只处理尚未建立索引的聊天，可重复执行
+        """
+        indexed = 0
+        last_id = ""
+        while True:
+            with get_db() as db:
+                query = db.query(Chat).filter(
+                    Chat.id > last_id, ~Chat.user_id.startswith("shared-")
+                )
+                if not full:
+                    query = query.filter(~Chat.id.in_(select(ChatSearchIndex.chat_id)))
+                chats = query.order_by(Chat.id).limit(batch_size).all()
+                if not chats:
+                    return indexed
+
+                for chat_item in chats:
+                    self._upsert_search_index(db, chat_item)
+                db.commit()
+
+                indexed += len(chats)
+                last_id = chats[-1].id
+                log.info(f"Chat search index backfill: {indexed} chats indexed")
+
+    def _search_index_match_sql(self, db, search_text: str) -> str:
+        """返回匹配 :search_pattern 的 chat_id 子查询（限定 :search_user_id）"""
+        global _chat_search_fts_available
+
+        if db.bind.dialect.name == "sqlite":
+            if _chat_search_fts_available is None:
+                _chat_search_fts_available = (
+                    db.execute(
+                        text(
+                            "SELECT 1 FROM sqlite_master "
+                            "WHERE type = 'table' AND name = 'chat_search_fts'"
+                        )
+                    ).first()
+                    is not None
+                )
+
+            if (
+                _chat_search_fts_available
+                and len(search_text) >= CHAT_SEARCH_FTS_MIN_LENGTH
+            ):
+                return (
+                    "SELECT i.chat_id "
+                    "FROM chat_search_fts f "
+                    "JOIN chat_search_index i ON i.id = f.rowid "
+                    "WHERE f.content LIKE :search_pattern "
+                    "AND i.user_id = :search_user_id"
+                )
+
+        return (
+            "SELECT chat_id FROM chat_search_index "
+            "WHERE user_id = :search_user_id AND content LIKE :search_pattern"
+        )
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -143,6 +313,7 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._upsert_search_index(db, result)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -180,17 +351,22 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._upsert_search_index(db, result)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
 
-    def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
+    def update_chat_by_id(
+        self, id: str, chat: dict, index_search: bool = True
+    ) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
                 chat_item.chat = chat
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+                if index_search:
+                    self._upsert_search_index(db, chat_item)
                 db.commit()
                 db.refresh(chat_item)
 
@@ -390,8 +566,14 @@ class ChatTable:
             return None
 
     def upsert_message_to_chat_by_id_and_message_id(
-        self, id: str, message_id: str, message: dict
+        self, id: str, message_id: str, message: dict, index_search: bool = True
     ) -> Optional[ChatModel]:
+        """
+        合并更新一条消息
+
+        只有 content 变化时才重建检索内容；流式实时保存传 index_search=False，
+        由生成结束时的 update_chat_search_index_by_id 统一刷新
+        """
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
@@ -414,7 +596,9 @@ class ChatTable:
         history["currentId"] = message_id
 
         chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return self.update_chat_by_id(
+            id, chat, index_search=index_search and "content" in message
+        )
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
@@ -432,7 +616,8 @@ class ChatTable:
             history["messages"][message_id]["statusHistory"] = status_history
 
         chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        # 状态不参与检索
+        return self.update_chat_by_id(id, chat, index_search=False)
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -566,7 +751,7 @@ class ChatTable:
         limit: int = 50,
     ) -> list[ChatModel]:
 
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             query = db.query(Chat).filter_by(user_id=user_id, archived=True)
 
             if filter:
@@ -603,7 +788,7 @@ class ChatTable:
         skip: int = 0,
         limit: int = 50,
     ) -> list[ChatModel]:
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             query = db.query(Chat).filter_by(user_id=user_id)
             if not include_archived:
                 query = query.filter_by(archived=False)
@@ -643,7 +828,7 @@ class ChatTable:
         skip: Optional[int] = None,
         limit: Optional[int] = None,
     ) -> list[ChatTitleIdResponse]:
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             query = db.query(Chat).filter_by(user_id=user_id)
 
             if not include_folders:
@@ -741,7 +926,7 @@ class ChatTable:
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             all_chats = (
                 db.query(Chat)
                 .filter_by(user_id=user_id, pinned=True, archived=False)
@@ -758,6 +943,38 @@ class ChatTable:
             )
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
+    def _search_clause(
+        self, db, search_text: str, user_id: str, fallback_content_sql: str
+    ):
+        """
+        已建立索引的聊天走全文索引；尚未回填的聊天保持原有的标题 + JSON 扫描，
+        回填完成后这部分为空，检索开销只与匹配数相关
+        """
+        indexed_match = text(
+            f"chat.id IN ({self._search_index_match_sql(db, search_text)})"
+        )
+        not_indexed = text(
+            "chat.id NOT IN ("
+            "SELECT chat_id FROM chat_search_index WHERE user_id = :search_user_id"
+            ")"
+        )
+
+        return or_(
+            indexed_match,
+            and_(
+                not_indexed,
+                or_(
+                    Chat.title.ilike(bindparam("title_key")),
+                    text(fallback_content_sql),
+                ),
+            ),
+        ).params(
+            search_pattern=f"%{search_text}%",
+            search_user_id=user_id,
+            title_key=f"%{search_text}%",
+            content_key=search_text,
+        )
+
     def get_chats_by_user_id_and_search_text(
         self,
         user_id: str,
@@ -828,7 +1045,7 @@ class ChatTable:
 
         search_text = " ".join(search_text_words)
 
-        with get_db() as db:
+        with get_read_db(user_id) as db:
             query = db.query(Chat).filter(Chat.user_id == user_id)
 
             if is_archived is not None:
@@ -853,7 +1070,7 @@ class ChatTable:
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
             if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
+                # SQLite case: 未建立索引的聊天退回 JSON1 扫描
                 sqlite_content_sql = (
                     "EXISTS ("
                     "    SELECT 1 "
@@ -861,12 +1078,12 @@ class ChatTable:
                     "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
                     ")"
                 )
-                sqlite_content_clause = text(sqlite_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
+                if search_text:
+                    query = query.filter(
+                        self._search_clause(
+                            db, search_text, user_id, sqlite_content_sql
+                        )
+                    )
 
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
@@ -899,7 +1116,7 @@ class ChatTable:
                     )
 
             elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
+                # PostgreSQL: 未建立索引的聊天退回 JSON 扫描
                 postgres_content_sql = (
                     "EXISTS ("
                     "    SELECT 1 "
@@ -907,13 +1124,12 @@ class ChatTable:
                     "    WHERE LOWER(message->>'content') LIKE '%' || :content_key || '%'"
                     ")"
                 )
-                postgres_content_clause = text(postgres_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")),
-                        postgres_content_clause,
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
+                if search_text:
+                    query = query.filter(
+                        self._search_clause(
+                            db, search_text, user_id, postgres_content_sql
+                        )
+                    )
 
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
@@ -1148,7 +1364,10 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id).delete()
+                db.query(ChatSearchIndex).filter_by(chat_id=id).delete()
+                db.query(ChatModelCredential).filter_by(chat_id=id).delete()
                 db.commit()
+                UserModelCredentials.evict_chat_credential_bindings([id])
 
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
@@ -1158,7 +1377,14 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                db.query(ChatSearchIndex).filter_by(
+                    chat_id=id, user_id=user_id
+                ).delete()
+                db.query(ChatModelCredential).filter_by(
+                    chat_id=id, user_id=user_id
+                ).delete()
                 db.commit()
+                UserModelCredentials.evict_chat_credential_bindings([id])
 
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
@@ -1169,8 +1395,18 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                bound_chat_ids = [
+                    chat_id
+                    for (chat_id,) in db.query(ChatModelCredential.chat_id).filter_by(
+                        user_id=user_id
+                    )
+                ]
+
                 db.query(Chat).filter_by(user_id=user_id).delete()
+                db.query(ChatSearchIndex).filter_by(user_id=user_id).delete()
+                db.query(ChatModelCredential).filter_by(user_id=user_id).delete()
                 db.commit()
+                UserModelCredentials.evict_chat_credential_bindings(bound_chat_ids)
 
                 return True
         except Exception:
@@ -1181,8 +1417,25 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                folder_chat_ids = select(Chat.id).where(
+                    Chat.user_id == user_id, Chat.folder_id == folder_id
+                )
+                bound_chat_ids = [
+                    chat_id
+                    for (chat_id,) in db.query(ChatModelCredential.chat_id).filter(
+                        ChatModelCredential.chat_id.in_(folder_chat_ids)
+                    )
+                ]
+
+                db.query(ChatSearchIndex).filter(
+                    ChatSearchIndex.chat_id.in_(folder_chat_ids)
+                ).delete(synchronize_session=False)
+                db.query(ChatModelCredential).filter(
+                    ChatModelCredential.chat_id.in_(folder_chat_ids)
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
+                UserModelCredentials.evict_chat_credential_bindings(bound_chat_ids)
 
                 return True
         except Exception:
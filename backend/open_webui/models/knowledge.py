@@ -4,7 +4,7 @@ import time
 from typing import Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_db, get_read_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
@@ -128,7 +128,7 @@ class KnowledgeTable:
                 return None
 
     def get_knowledge_bases(self) -> list[KnowledgeUserModel]:
-        with get_db() as db:
+        with get_read_db() as db:
             all_knowledge = (
                 db.query(Knowledge).order_by(Knowledge.updated_at.desc()).all()
             )
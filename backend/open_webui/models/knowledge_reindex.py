@@ -0,0 +1,268 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Integer, String, Text, JSON, or_
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Knowledge Reindex DB Schema
+####################
+
+
+class KnowledgeReindexJob(Base):
+    __tablename__ = "knowledge_reindex_job"
+
+    id = Column(Text, primary_key=True)
+    user_id = Column(Text, nullable=False)  # 发起重建的管理员
+
+    # pending -> running -> completed / failed / cancelled
+    status = Column(String(32), nullable=False, default="pending", index=True)
+    owner = Column(Text, nullable=True)  # 当前执行该任务的实例 ID
+
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+    # meta.reset_collections: 已在本任务中清空过的知识库 collection，
+    # 断点恢复时不能再次删除，否则会丢掉已完成的文件
+    meta = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(BigInteger, nullable=False)
+    updated_at = Column(BigInteger, nullable=False)  # 同时作为心跳时间
+
+
+class KnowledgeReindexItem(Base):
+    __tablename__ = "knowledge_reindex_item"
+
+    id = Column(Text, primary_key=True)
+    job_id = Column(Text, nullable=False, index=True)
+    knowledge_id = Column(Text, nullable=False)
+    file_id = Column(Text, nullable=False)
+
+    # pending -> processing -> completed / failed
+    status = Column(String(32), nullable=False, default="pending")
+    error = Column(Text, nullable=True)
+
+    updated_at = Column(BigInteger, nullable=False)
+
+
+class KnowledgeReindexJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+
+    status: str
+    owner: Optional[str] = None
+
+    total: int = 0
+    processed: int = 0
+    failed: int = 0
+
+    meta: Optional[dict] = None
+    error: Optional[str] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+class KnowledgeReindexItemModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    job_id: str
+    knowledge_id: str
+    file_id: str
+
+    status: str
+    error: Optional[str] = None
+
+    updated_at: int
+
+
+####################
+# KnowledgeReindexTable
+####################
+
+
+class KnowledgeReindexTable:
+    def insert_new_job(
+        self, user_id: str, items: list[tuple[str, str]]
+    ) -> Optional[KnowledgeReindexJobModel]:
+        """创建重建任务，items 为 (knowledge_id, file_id) 列表"""
+        now = int(time.time())
+        job_id = str(uuid.uuid4())
+
+        with get_db() as db:
+            try:
+                job = KnowledgeReindexJob(
+                    id=job_id,
+                    user_id=user_id,
+                    status="pending",
+                    total=len(items),
+                    processed=0,
+                    failed=0,
+                    meta={"reset_collections": []},
+                    created_at=now,
+                    updated_at=now,
+                )
+                db.add(job)
+                db.add_all(
+                    [
+                        KnowledgeReindexItem(
+                            id=str(uuid.uuid4()),
+                            job_id=job_id,
+                            knowledge_id=knowledge_id,
+                            file_id=file_id,
+                            status="pending",
+                            updated_at=now,
+                        )
+                        for knowledge_id, file_id in items
+                    ]
+                )
+                db.commit()
+                db.refresh(job)
+                return KnowledgeReindexJobModel.model_validate(job)
+            except Exception as e:
+                log.exception(f"Error creating reindex job: {e}")
+                db.rollback()
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[KnowledgeReindexJobModel]:
+        with get_db() as db:
+            job = db.query(KnowledgeReindexJob).filter_by(id=id).first()
+            return KnowledgeReindexJobModel.model_validate(job) if job else None
+
+    def get_jobs(self, limit: int = 20) -> list[KnowledgeReindexJobModel]:
+        with get_db() as db:
+            jobs = (
+                db.query(KnowledgeReindexJob)
+                .order_by(KnowledgeReindexJob.created_at.desc())
+                .limit(limit)
+                .all()
+            )
+            return [KnowledgeReindexJobModel.model_validate(job) for job in jobs]
+
+    def get_active_job(self) -> Optional[KnowledgeReindexJobModel]:
+        with get_db() as db:
+            job = (
+                db.query(KnowledgeReindexJob)
+                .filter(KnowledgeReindexJob.status.in_(["pending", "running"]))
+                .order_by(KnowledgeReindexJob.created_at.desc())
+                .first()
+            )
+            return KnowledgeReindexJobModel.model_validate(job) if job else None
+
+    def get_resumable_job_ids(self, stale_after: int) -> list[str]:
+        """待执行的任务，以及心跳超时（所属实例已退出）的运行中任务"""
+        cutoff = int(time.time()) - stale_after
+        with get_db() as db:
+            jobs = (
+                db.query(KnowledgeReindexJob.id)
+                .filter(
+                    or_(
+                        KnowledgeReindexJob.status == "pending",
+                        (KnowledgeReindexJob.status == "running")
+                        & (KnowledgeReindexJob.updated_at < cutoff),
+                    )
+                )
+                .order_by(KnowledgeReindexJob.created_at.asc())
+                .all()
+            )
+            return [job.id for job in jobs]
+
+    def claim_job(self, id: str, owner: str, stale_after: int) -> bool:
+        """原子地认领任务，多实例部署下保证同一任务只有一个执行者"""
+        now = int(time.time())
+        with get_db() as db:
+            updated = (
+                db.query(KnowledgeReindexJob)
+                .filter(KnowledgeReindexJob.id == id)
+                .filter(
+                    or_(
+                        KnowledgeReindexJob.status == "pending",
+                        (KnowledgeReindexJob.status == "running")
+                        & (
+                            (KnowledgeReindexJob.owner == owner)
+                            | (KnowledgeReindexJob.updated_at < now - stale_after)
+                        ),
+                    )
+                )
+                .update(
+                    {"status": "running", "owner": owner, "updated_at": now},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return updated == 1
+
+    def heartbeat(self, id: str, owner: str) -> bool:
+        """刷新心跳；任务已被其他实例接管时返回 False"""
+        with get_db() as db:
+            updated = (
+                db.query(KnowledgeReindexJob)
+                .filter_by(id=id, owner=owner)
+                .update({"updated_at": int(time.time())}, synchronize_session=False)
+            )
+            db.commit()
+            return updated == 1
+
+    def update_job_by_id(
+        self, id: str, updated: dict
+    ) -> Optional[KnowledgeReindexJobModel]:
+        with get_db() as db:
+            db.query(KnowledgeReindexJob).filter_by(id=id).update(
+                {**updated, "updated_at": int(time.time())}
+            )
+            db.commit()
+            job = db.query(KnowledgeReindexJob).filter_by(id=id).first()
+            return KnowledgeReindexJobModel.model_validate(job) if job else None
+
+    def refresh_job_progress(self, id: str) -> Optional[KnowledgeReindexJobModel]:
+        """根据文件级检查点重新统计进度，同时刷新心跳"""
+        with get_db() as db:
+            items = db.query(KnowledgeReindexItem.status).filter_by(job_id=id).all()
+            processed = sum(1 for item in items if item.status == "completed")
+            failed = sum(1 for item in items if item.status == "failed")
+
+        return self.update_job_by_id(
+            id, {"total": len(items), "processed": processed, "failed": failed}
+        )
+
+    def get_items_by_job_id(
+        self, job_id: str, statuses: Optional[list[str]] = None
+    ) -> list[KnowledgeReindexItemModel]:
+        with get_db() as db:
+            query = db.query(KnowledgeReindexItem).filter_by(job_id=job_id)
+            if statuses:
+                query = query.filter(KnowledgeReindexItem.status.in_(statuses))
+            return [
+                KnowledgeReindexItemModel.model_validate(item) for item in query.all()
+            ]
+
+    def update_items_status(
+        self, ids: list[str], status: str, error: Optional[str] = None
+    ) -> None:
+        if not ids:
+            return
+
+        with get_db() as db:
+            db.query(KnowledgeReindexItem).filter(
+                KnowledgeReindexItem.id.in_(ids)
+            ).update(
+                {"status": status, "error": error, "updated_at": int(time.time())},
+                synchronize_session=False,
+            )
+            db.commit()
+
+
+KnowledgeReindexJobs = KnowledgeReindexTable()
@@ -203,6 +203,55 @@ class MessageTable:
                 for message in db.query(Message).filter_by(parent_id=id).all()
             ]
 
+    def _build_message_responses(
+        self, db, messages: list[Message]
+    ) -> list[MessageReplyToResponse]:
+        """
+        为一页消息批量加载 reply_to 目标消息与发送者：
+        一次 IN 查询 reply_to 目标，一次 IN 查询所有涉及的用户，
+        查询次数与页大小无关
+        """
+        reply_to_ids = {m.reply_to_id for m in messages if m.reply_to_id}
+        reply_to_messages = (
+            {
+                m.id: m
+                for m in db.query(Message).filter(Message.id.in_(reply_to_ids)).all()
+            }
+            if reply_to_ids
+            else {}
+        )
+
+        user_ids = {m.user_id for m in messages} | {
+            m.user_id for m in reply_to_messages.values()
+        }
+        users = {
+            user.id: UserNameResponse.model_validate(user.model_dump())
+            for user in Users.get_users_by_user_ids(list(user_ids))
+        }
+
+        responses = []
+        for message in messages:
+            reply_to_message = reply_to_messages.get(message.reply_to_id)
+            responses.append(
+                MessageReplyToResponse.model_validate(
+                    {
+                        **MessageModel.model_validate(message).model_dump(),
+                        "user": users.get(message.user_id),
+                        "reply_to_message": (
+                            {
+                                **MessageModel.model_validate(
+                                    reply_to_message
+                                ).model_dump(),
+                                "user": users.get(reply_to_message.user_id),
+                            }
+                            if reply_to_message
+                            else None
+                        ),
+                    }
+                )
+            )
+        return responses
+
     def get_messages_by_channel_id(
         self, channel_id: str, skip: int = 0, limit: int = 50
     ) -> list[MessageReplyToResponse]:
@@ -216,26 +265,34 @@ class MessageTable:
                 .all()
             )
 
-            messages = []
-            for message in all_messages:
-                reply_to_message = (
-                    self.get_message_by_id(message.reply_to_id)
-                    if message.reply_to_id
-                    else None
-                )
-                messages.append(
-                    MessageReplyToResponse.model_validate(
-                        {
-                            **MessageModel.model_validate(message).model_dump(),
-                            "reply_to_message": (
-                                reply_to_message.model_dump()
-                                if reply_to_message
-                                else None
-                            ),
-                        }
-                    )
+            return self._build_message_responses(db, all_messages)
+
+    def get_channel_message_page(
+        self, channel_id: str, skip: int = 0, limit: int = 50
+    ) -> list[MessageResponse]:
+        """
+        整页批量加载频道消息：消息、reply_to 目标、用户、回复统计、表情回应
+        各一次查询，语句数与页大小无关
+        """
+        message_list = self.get_messages_by_channel_id(channel_id, skip, limit)
+        message_ids = [message.id for message in message_list]
+        thread_stats = self.get_thread_stats_by_message_ids(message_ids)
+        reactions = self.get_reactions_by_message_ids(message_ids)
+
+        messages = []
+        for message in message_list:
+            reply_count, latest_reply_at = thread_stats.get(message.id, (0, None))
+            messages.append(
+                MessageResponse.model_validate(
+                    {
+                        **message.model_dump(),
+                        "reply_count": reply_count,
+                        "latest_reply_at": latest_reply_at,
+                        "reactions": reactions.get(message.id, []),
+                    }
                 )
-            return messages
+            )
+        return messages
 
     def get_messages_by_parent_id(
         self, channel_id: str, parent_id: str, skip: int = 0, limit: int = 50
@@ -259,26 +316,30 @@ class MessageTable:
             if len(all_messages) < limit:
                 all_messages.append(message)
 
-            messages = []
-            for message in all_messages:
-                reply_to_message = (
-                    self.get_message_by_id(message.reply_to_id)
-                    if message.reply_to_id
-                    else None
-                )
-                messages.append(
-                    MessageReplyToResponse.model_validate(
-                        {
-                            **MessageModel.model_validate(message).model_dump(),
-                            "reply_to_message": (
-                                reply_to_message.model_dump()
-                                if reply_to_message
-                                else None
-                            ),
-                        }
-                    )
+            return self._build_message_responses(db, all_messages)
+
+    def get_thread_stats_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, tuple[int, Optional[int]]]:
+        """批量统计回复数与最新回复时间：{message_id: (reply_count, latest_reply_at)}"""
+        if not ids:
+            return {}
+
+        with get_db() as db:
+            rows = (
+                db.query(
+                    Message.parent_id,
+                    func.count(Message.id),
+                    func.max(Message.created_at),
                 )
-            return messages
+                .filter(Message.parent_id.in_(ids))
+                .group_by(Message.parent_id)
+                .all()
+            )
+            return {
+                parent_id: (reply_count, latest_reply_at)
+                for parent_id, reply_count, latest_reply_at in rows
+            }
 
     def update_message_by_id(
         self, id: str, form_data: MessageForm
@@ -318,11 +379,26 @@ class MessageTable:
             return MessageReactionModel.model_validate(result) if result else None
 
     def get_reactions_by_message_id(self, id: str) -> list[Reactions]:
+        return self.get_reactions_by_message_ids([id]).get(id, [])
+
+    def get_reactions_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        """批量加载多条消息的表情回应，按消息分组"""
+        if not ids:
+            return {}
+
         with get_db() as db:
-            all_reactions = db.query(MessageReaction).filter_by(message_id=id).all()
+            all_reactions = (
+                db.query(MessageReaction)
+                .filter(MessageReaction.message_id.in_(ids))
+                .order_by(MessageReaction.created_at.asc())
+                .all()
+            )
 
-            reactions = {}
+            reactions_by_message: dict[str, dict] = {}
             for reaction in all_reactions:
+                reactions = reactions_by_message.setdefault(reaction.message_id, {})
                 if reaction.name not in reactions:
                     reactions[reaction.name] = {
                         "name": reaction.name,
@@ -332,7 +408,10 @@ class MessageTable:
                 reactions[reaction.name]["user_ids"].append(reaction.user_id)
                 reactions[reaction.name]["count"] += 1
 
-            return [Reactions(**reaction) for reaction in reactions.values()]
+            return {
+                message_id: [Reactions(**reaction) for reaction in reactions.values()]
+                for message_id, reactions in reactions_by_message.items()
+            }
 
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
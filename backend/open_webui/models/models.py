@@ -2,7 +2,7 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import Base, JSONField, get_db, get_read_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.groups import Groups
@@ -226,7 +226,7 @@ class ModelsTable:
         Returns:
             list[ModelUserResponse]: 自定义模型列表（附带用户信息）
         """
-        with get_db() as db:
+        with get_read_db() as db:
             # 只查询自定义模型（base_model_id 不为 None）
             all_models = db.query(Model).filter(Model.base_model_id != None).all()
 
@@ -307,6 +307,24 @@ class ModelsTable:
         except Exception:
             return None
 
+    def get_models_by_ids(self, ids: list[str]) -> list[ModelModel]:
+        """
+        根据 ID 列表批量获取模型（不存在的 ID 会被忽略）
+
+        Args:
+            ids: 模型 ID 列表
+
+        Returns:
+            list[ModelModel]: 找到的模型列表
+        """
+        if not ids:
+            return []
+        with get_db() as db:
+            return [
+                ModelModel.model_validate(model)
+                for model in db.query(Model).filter(Model.id.in_(ids)).all()
+            ]
+
     def toggle_model_by_id(self, id: str) -> Optional[ModelModel]:
         """
         切换模型激活状态（启用/禁用）
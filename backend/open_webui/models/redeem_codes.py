@@ -428,6 +428,10 @@ class RedeemCodesTable:
             # 10. 提交事务
             db.commit()
 
+            from open_webui.billing import reservations
+
+            reservations.invalidate(user_id)
+
             print(
                 f"兑换码兑换成功: user={user_id} code={code} "
                 f"amount={redeem_code.amount / 10000:.2f}元 "
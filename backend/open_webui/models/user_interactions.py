@@ -0,0 +1,187 @@
+import logging
+import time
+from typing import Callable, Optional
+
+from open_webui.internal.db import Base, get_db, get_read_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Integer, String, Text
+from sqlalchemy.exc import IntegrityError
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# UserDailyInteraction DB Schema
+####################
+
+
+class UserDailyInteraction(Base):
+    """
+    用户每日交互计数，(user_id, date) 一行
+
+    - count: 当日交互次数，只通过 count = count + n 原子累加
+    - compacted_count: 已同步到 user.info 视图的次数，
+      count - compacted_count 即为待压缩的增量
+    """
+
+    __tablename__ = "user_daily_interaction"
+
+    user_id = Column(Text, primary_key=True)
+    date = Column(String(10), primary_key=True)  # ISO 日期，如 "2025-12-28"
+    count = Column(Integer, nullable=False, default=0)
+    compacted_count = Column(Integer, nullable=False, default=0)
+    last_interaction_at = Column(BigInteger)
+
+
+class UserDailyInteractionModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: str
+    date: str
+    count: int = 0
+    compacted_count: int = 0
+    last_interaction_at: Optional[int] = None
+
+
+####################
+# UserInteractionTable
+####################
+
+
+class UserInteractionTable:
+    def increment(
+        self,
+        user_id: str,
+        day: str,
+        amount: int = 1,
+        last_interaction_at: Optional[int] = None,
+    ) -> bool:
+        """原子累加当日计数，行不存在时插入"""
+        last_interaction_at = last_interaction_at or int(time.time())
+        values = {
+            "count": UserDailyInteraction.count + amount,
+            "last_interaction_at": last_interaction_at,
+        }
+
+        try:
+            with get_db() as db:
+                updated = (
+                    db.query(UserDailyInteraction)
+                    .filter_by(user_id=user_id, date=day)
+                    .update(values, synchronize_session=False)
+                )
+                if updated == 0:
+                    try:
+                        db.add(
+                            UserDailyInteraction(
+                                user_id=user_id,
+                                date=day,
+                                count=amount,
+                                compacted_count=0,
+                                last_interaction_at=last_interaction_at,
+                            )
+                        )
+                        db.commit()
+                        return True
+                    except IntegrityError:
+                        # 并发插入同一行，退回到累加
+                        db.rollback()
+                        db.query(UserDailyInteraction).filter_by(
+                            user_id=user_id, date=day
+                        ).update(values, synchronize_session=False)
+                db.commit()
+                return True
+        except Exception as e:
+            log.error(f"Error incrementing interaction count for {user_id}: {e}")
+            return False
+
+    def get_by_user_id(
+        self, user_id: str, since: Optional[str] = None
+    ) -> list[UserDailyInteractionModel]:
+        with get_read_db(user_id) as db:
+            query = db.query(UserDailyInteraction).filter_by(user_id=user_id)
+            if since:
+                query = query.filter(UserDailyInteraction.date >= since)
+            return [
+                UserDailyInteractionModel.model_validate(row)
+                for row in query.order_by(UserDailyInteraction.date.desc()).all()
+            ]
+
+    def get_uncompacted(self, limit: int = 1000) -> list[UserDailyInteractionModel]:
+        """尚未同步到 user.info 的行"""
+        with get_db() as db:
+            rows = (
+                db.query(UserDailyInteraction)
+                .filter(UserDailyInteraction.count > UserDailyInteraction.compacted_count)
+                .limit(limit)
+                .all()
+            )
+            return [UserDailyInteractionModel.model_validate(row) for row in rows]
+
+    def compact_into_user_info(
+        self,
+        user_id: str,
+        rows: list[UserDailyInteractionModel],
+        apply: Callable[[dict, list[UserDailyInteractionModel]], dict],
+    ) -> bool:
+        """
+        在一个事务中认领增量并写入 user.info
+
+        逐行把 compacted_count 从读到的旧值推进到 count（其他实例已认领的行跳过），
+        再用 apply(info, 认领到的行) 生成新的 info 写回 user 行；
+        任何一步失败整体回滚，增量留待下次压缩。用户已删除时直接删除其计数行。
+        """
+        from open_webui.models.users import User
+        from open_webui.utils.user_cache import invalidate_user
+
+        with get_db() as db:
+            user = db.query(User).filter_by(id=user_id).with_for_update().first()
+            if user is None:
+                db.query(UserDailyInteraction).filter_by(user_id=user_id).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+                return False
+
+            claimed = []
+            for row in rows:
+                updated = (
+                    db.query(UserDailyInteraction)
+                    .filter_by(
+                        user_id=user_id,
+                        date=row.date,
+                        compacted_count=row.compacted_count,
+                    )
+                    .update({"compacted_count": row.count}, synchronize_session=False)
+                )
+                if updated == 1:
+                    claimed.append(row)
+
+            if not claimed:
+                db.rollback()
+                return False
+
+            user.info = apply(dict(user.info or {}), claimed)
+            db.commit()
+
+        invalidate_user(user_id)
+        return True
+
+    def delete_before(self, day: str) -> int:
+        """清理保留期之外且已压缩的行"""
+        with get_db() as db:
+            deleted = (
+                db.query(UserDailyInteraction)
+                .filter(
+                    UserDailyInteraction.date < day,
+                    UserDailyInteraction.count == UserDailyInteraction.compacted_count,
+                )
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            return deleted
+
+
+UserInteractions = UserInteractionTable()
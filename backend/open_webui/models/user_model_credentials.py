@@ -37,11 +37,21 @@ import logging
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.env import AUTH_CACHE_SIZE, USER_MODEL_CREDENTIAL_CACHE_TTL
+from open_webui.utils.ttl_cache import TTLCache
+from open_webui.utils.user_cache import (
+    get_cached_credential,
+    invalidate_credential,
+    set_cached_credential,
+)
 
 log = logging.getLogger(__name__)
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text
 
+# chat_id -> 绑定的凭据引用（"user:<id>"），"" 表示该聊天未使用私有模型
+_chat_binding_cache = TTLCache(AUTH_CACHE_SIZE, USER_MODEL_CREDENTIAL_CACHE_TTL)
+
 ####################
 # DB Schema - 数据库表定义
 ####################
@@ -78,6 +88,24 @@ class UserModelCredential(Base):
     deleted_at = Column(BigInteger, nullable=True)  # Soft delete timestamp
 
 
+class ChatModelCredential(Base):
+    """
+    聊天与私有模型凭据的绑定 - 后台任务（标题/标签等）据此还原所用凭据，
+    无需解析聊天历史
+
+    字段说明：
+    - chat_id: 聊天 ID（主键）
+    - user_id: 所属用户 ID
+    - credential_id: 凭据引用（"user:<凭据 ID>"），NULL 表示该聊天未使用私有模型
+    """
+    __tablename__ = "chat_model_credential"
+
+    chat_id = Column(String, primary_key=True)
+    user_id = Column(String, index=True)
+    credential_id = Column(String, nullable=True)
+    updated_at = Column(BigInteger)
+
+
 class UserModelCredentialModel(BaseModel):
     """
     用户私有模型凭据数据模型 - 内部使用的完整数据模型
@@ -248,6 +276,7 @@ class UserModelCredentialsTable:
             # === 3. 持久化 ===
             db.commit()
             db.refresh(cred)
+            invalidate_credential(cred_id, user_id)
             return UserModelCredentialModel.model_validate(cred)
 
     def delete_credential_by_id_and_user_id(
@@ -280,6 +309,7 @@ class UserModelCredentialsTable:
             # === 2. 软删除：标记为已删除而非物理删除 ===
             cred.deleted_at = int(time.time())
             db.commit()
+            invalidate_credential(cred_id, user_id)
             return True
 
     def get_credentials_by_user_id(
@@ -380,5 +410,78 @@ class UserModelCredentialsTable:
             log.info(f"[CredLookup] Found credential: id={cred.id}, model_id={cred.model_id}, deleted_at={cred.deleted_at}")
             return UserModelCredentialModel.model_validate(cred)
 
+    def get_cached_credential_by_id_and_user_id(
+        self, cred_id: str, user_id: str
+    ) -> Optional[UserModelCredentialModel]:
+        """
+        带短期内存缓存的凭据查询（包含已软删除的），用于每次对话请求的凭据解析
+
+        凭据更新或删除时缓存立即失效（多 worker 通过 Redis 广播）
+        """
+        cred = get_cached_credential(cred_id, user_id)
+        if cred is not None:
+            return cred
+
+        cred = self.get_credential_by_id_and_user_id_include_deleted(cred_id, user_id)
+        if cred is not None:
+            set_cached_credential(cred)
+        return cred
+
+    def get_chat_credential_binding(self, chat_id: str) -> Optional[str]:
+        """
+        获取聊天绑定的凭据引用
+
+        Returns:
+            "user:<id>" 表示已绑定；"" 表示已确认未使用私有模型；None 表示尚无记录
+        """
+        binding = _chat_binding_cache.get(chat_id)
+        if binding is not None:
+            return binding
+
+        with get_db() as db:
+            row = db.get(ChatModelCredential, chat_id)
+            if row is None:
+                return None
+            binding = row.credential_id or ""
+
+        _chat_binding_cache.set(chat_id, binding)
+        return binding
+
+    def set_chat_credential_binding(
+        self, chat_id: str, user_id: str, credential_id: Optional[str]
+    ) -> None:
+        """记录聊天使用的凭据引用；credential_id 为 None 表示未使用私有模型"""
+        binding = credential_id or ""
+        if _chat_binding_cache.get(chat_id) == binding:
+            return
+
+        try:
+            with get_db() as db:
+                row = db.get(ChatModelCredential, chat_id)
+                if row is None:
+                    db.add(
+                        ChatModelCredential(
+                            chat_id=chat_id,
+                            user_id=user_id,
+                            credential_id=credential_id,
+                            updated_at=int(time.time()),
+                        )
+                    )
+                elif row.credential_id != credential_id:
+                    row.credential_id = credential_id
+                    row.updated_at = int(time.time())
+                db.commit()
+        except Exception as e:
+            # 并发请求同时插入同一聊天的绑定，下次请求再写入即可
+            log.warning(f"[UserModel] Failed to bind chat {chat_id} to credential: {e}")
+            return
+
+        _chat_binding_cache.set(chat_id, binding)
+
+    def evict_chat_credential_bindings(self, chat_ids: list[str]) -> None:
+        """聊天删除后清掉本进程缓存的绑定（绑定行由 Chats 在删除聊天的事务中一并删除）"""
+        for chat_id in chat_ids:
+            _chat_binding_cache.pop(chat_id)
+
 
 UserModelCredentials = UserModelCredentialsTable()
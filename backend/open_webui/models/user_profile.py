@@ -3,7 +3,7 @@ from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String
+from sqlalchemy import BigInteger, Column, Integer, String, Text, func
 
 ####################
 # DataforPersonalizedExperience DB Schema
@@ -20,6 +20,18 @@ class DataforPersonalizedExperience(Base):
     created_at = Column(BigInteger)
 
 
+class UserProfileMessage(Base):
+    """待分析消息的追加表，每轮对话只做一次 INSERT，不再读改写 JSON 行"""
+
+    __tablename__ = "user_profile_message"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String, nullable=False, index=True)
+    content = Column(Text, nullable=False)
+    model_id = Column(String, nullable=True)  # 用于分析的模型
+    created_at = Column(BigInteger)
+
+
 ####################
 # Pydantic Models
 ####################
@@ -35,6 +47,16 @@ class UserProfileModel(BaseModel):
     created_at: int
 
 
+class UserProfileMessageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: str
+    content: str
+    model_id: Optional[str] = None
+    created_at: int
+
+
 ####################
 # UserProfileTable
 ####################
@@ -179,5 +201,74 @@ class UserProfileTable:
             print(f"Error clearing messages: {e}")
             return None
 
+    def add_pending_message(
+        self, user_id: str, content: str, model_id: Optional[str] = None
+    ) -> bool:
+        """追加一条待分析消息（仅 INSERT）"""
+        try:
+            with get_db() as db:
+                db.add(
+                    UserProfileMessage(
+                        user_id=user_id,
+                        content=content,
+                        model_id=model_id,
+                        created_at=int(time.time()),
+                    )
+                )
+                db.commit()
+                return True
+        except Exception as e:
+            print(f"Error adding pending message: {e}")
+            return False
+
+    def count_pending_messages(self, user_id: str) -> int:
+        """统计待分析消息数"""
+        try:
+            with get_db() as db:
+                return (
+                    db.query(func.count(UserProfileMessage.id))
+                    .filter_by(user_id=user_id)
+                    .scalar()
+                    or 0
+                )
+        except Exception as e:
+            print(f"Error counting pending messages: {e}")
+            return 0
+
+    def get_pending_messages(
+        self, user_id: str, limit: Optional[int] = None
+    ) -> list[UserProfileMessageModel]:
+        """按追加顺序获取待分析消息"""
+        try:
+            with get_db() as db:
+                query = (
+                    db.query(UserProfileMessage)
+                    .filter_by(user_id=user_id)
+                    .order_by(UserProfileMessage.id.asc())
+                )
+                if limit:
+                    query = query.limit(limit)
+                return [
+                    UserProfileMessageModel.model_validate(message)
+                    for message in query.all()
+                ]
+        except Exception as e:
+            print(f"Error getting pending messages: {e}")
+            return []
+
+    def delete_pending_messages(self, user_id: str, max_id: int) -> bool:
+        """删除已分析的消息，分析期间新追加的消息（id 更大）保留"""
+        try:
+            with get_db() as db:
+                db.query(UserProfileMessage).filter(
+                    UserProfileMessage.user_id == user_id,
+                    UserProfileMessage.id <= max_id,
+                ).delete(synchronize_session=False)
+                db.commit()
+                return True
+        except Exception as e:
+            print(f"Error deleting pending messages: {e}")
+            return False
+
 
 UserProfiles = UserProfileTable()
@@ -10,6 +10,7 @@ from open_webui.models.chats import Chats
 from open_webui.models.groups import Groups
 from open_webui.utils.misc import throttle
 from open_webui.utils.invite import generate_unique_invite_code
+from open_webui.utils.user_cache import invalidate_user
 
 
 from pydantic import BaseModel, ConfigDict
@@ -428,6 +429,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                invalidate_user(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -442,6 +444,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                invalidate_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -462,6 +465,24 @@ class UsersTable:
         except Exception:
             return None
 
+    def update_users_last_active(self, last_active: dict[str, int]) -> None:
+        """批量写入最近活跃时间：{user_id: timestamp}，一条 executemany 语句"""
+        if not last_active:
+            return
+
+        try:
+            with get_db() as db:
+                db.bulk_update_mappings(
+                    User,
+                    [
+                        {"id": user_id, "last_active_at": timestamp}
+                        for user_id, timestamp in last_active.items()
+                    ],
+                )
+                db.commit()
+        except Exception as e:
+            log.error(f"Error updating users last active: {e}")
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -469,6 +490,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                invalidate_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -480,6 +502,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                invalidate_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -500,6 +523,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                invalidate_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -518,6 +542,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                invalidate_user(id)
 
                 return True
             else:
@@ -530,6 +555,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                invalidate_user(id)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from typing import Optional, Union
@@ -9,6 +10,7 @@ import time
 import re
 
 from urllib.parse import quote
+from starlette.concurrency import run_in_threadpool
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
 from langchain_community.retrievers import BM25Retriever
@@ -27,12 +29,9 @@ from open_webui.models.notes import Notes
 
 from open_webui.retrieval.vector.main import GetResult
 from open_webui.utils.access_control import has_access
+from open_webui.utils.lazy import resolve
 from open_webui.utils.misc import get_message_list
 
-from open_webui.retrieval.web.utils import get_web_loader
-from open_webui.retrieval.loaders.youtube import YoutubeLoader
-
-
 from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
@@ -61,12 +60,16 @@ def is_youtube_url(url: str) -> bool:
 
 def get_loader(request, url: str):
     if is_youtube_url(url):
+        from open_webui.retrieval.loaders.youtube import YoutubeLoader
+
         return YoutubeLoader(
             url,
             language=request.app.state.config.YOUTUBE_LOADER_LANGUAGE,
             proxy_url=request.app.state.config.YOUTUBE_LOADER_PROXY_URL,
         )
     else:
+        from open_webui.retrieval.web.utils import get_web_loader
+
         return get_web_loader(
             url,
             verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
@@ -75,8 +78,13 @@ def get_loader(request, url: str):
 
 
 def get_content_from_url(request, url: str) -> str:
-    loader = get_loader(request, url)
-    docs = loader.load()
+    from open_webui.retrieval.web import cache as web_cache
+
+    docs = web_cache.get_page_docs(
+        str(request.app.state.config.WEB_LOADER_ENGINE),
+        url,
+        lambda: get_loader(request, url).load(),
+    )
     content = " ".join([doc.page_content for doc in docs])
     return content, docs
 
@@ -147,6 +155,40 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
+async def aquery_doc(
+    collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
+):
+    try:
+        log.debug(f"query_doc:doc {collection_name}")
+        result = await VECTOR_DB_CLIENT.asearch(
+            collection_name=collection_name,
+            vectors=[query_embedding],
+            limit=k,
+        )
+
+        if result:
+            log.info(f"query_doc:result {result.ids} {result.metadatas}")
+
+        return result
+    except Exception as e:
+        log.exception(f"Error querying doc {collection_name} with limit {k}: {e}")
+        raise e
+
+
+async def aget_doc(collection_name: str, user: UserModel = None):
+    try:
+        log.debug(f"get_doc:doc {collection_name}")
+        result = await VECTOR_DB_CLIENT.aget(collection_name=collection_name)
+
+        if result:
+            log.info(f"query_doc:result {result.ids} {result.metadatas}")
+
+        return result
+    except Exception as e:
+        log.exception(f"Error getting doc {collection_name}: {e}")
+        raise e
+
+
 def query_doc_with_hybrid_search(
     collection_name: str,
     collection_result: GetResult,
@@ -327,6 +369,22 @@ def get_all_items_from_collections(collection_names: list[str]) -> dict:
     return merge_get_results(results)
 
 
+async def aget_all_items_from_collections(collection_names: list[str]) -> dict:
+    async def fetch(collection_name):
+        try:
+            result = await aget_doc(collection_name=collection_name)
+            if result is not None:
+                return result.model_dump()
+        except Exception as e:
+            log.exception(f"Error when querying the collection: {e}")
+        return None
+
+    results = await asyncio.gather(
+        *[fetch(collection_name) for collection_name in collection_names if collection_name]
+    )
+    return merge_get_results([result for result in results if result is not None])
+
+
 def query_collection(
     collection_names: list[str],
     queries: list[str],
@@ -379,6 +437,51 @@ def query_collection(
     return merge_and_sort_query_results(results, k=k)
 
 
+async def aquery_collection(
+    collection_names: list[str],
+    queries: list[str],
+    embedding_function,
+    k: int,
+) -> dict:
+    """query_collection 的异步版本：embedding 在线程池中计算，向量检索并发执行"""
+
+    async def process_query_collection(collection_name, query_embedding):
+        try:
+            if collection_name:
+                result = await aquery_doc(
+                    collection_name=collection_name,
+                    k=k,
+                    query_embedding=query_embedding,
+                )
+                if result is not None:
+                    return result.model_dump(), None
+            return None, None
+        except Exception as e:
+            log.exception(f"Error when querying the collection: {e}")
+            return None, e
+
+    query_embeddings = await run_in_threadpool(
+        embedding_function, queries, prefix=RAG_EMBEDDING_QUERY_PREFIX
+    )
+    log.debug(
+        f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
+    )
+
+    task_results = await asyncio.gather(
+        *[
+            process_query_collection(collection_name, query_embedding)
+            for query_embedding in query_embeddings
+            for collection_name in collection_names
+        ]
+    )
+
+    results = [result for result, err in task_results if result is not None]
+    if not results and any(err is not None for _, err in task_results):
+        log.warning("All collection queries failed. No results returned.")
+
+    return merge_and_sort_query_results(results, k=k)
+
+
 def query_collection_with_hybrid_search(
     collection_names: list[str],
     queries: list[str],
@@ -389,8 +492,6 @@ def query_collection_with_hybrid_search(
     r: float,
     hybrid_bm25_weight: float,
 ) -> dict:
-    results = []
-    error = False
     # Fetch collection data once per collection sequentially
     # Avoid fetching the same data multiple times later
     collection_results = {}
@@ -406,6 +507,69 @@ def query_collection_with_hybrid_search(
             log.exception(f"Failed to fetch collection {collection_name}: {e}")
             collection_results[collection_name] = None
 
+    return _hybrid_search_collection_results(
+        collection_names=collection_names,
+        collection_results=collection_results,
+        queries=queries,
+        embedding_function=embedding_function,
+        k=k,
+        reranking_function=reranking_function,
+        k_reranker=k_reranker,
+        r=r,
+        hybrid_bm25_weight=hybrid_bm25_weight,
+    )
+
+
+async def aquery_collection_with_hybrid_search(
+    collection_names: list[str],
+    queries: list[str],
+    embedding_function,
+    k: int,
+    reranking_function,
+    k_reranker: int,
+    r: float,
+    hybrid_bm25_weight: float,
+) -> dict:
+    """并发读取各集合后，在线程池中执行 BM25 与重排（CPU 密集）"""
+
+    async def fetch(collection_name):
+        try:
+            return await VECTOR_DB_CLIENT.aget(collection_name=collection_name)
+        except Exception as e:
+            log.exception(f"Failed to fetch collection {collection_name}: {e}")
+            return None
+
+    collection_names = list(collection_names)
+    fetched = await asyncio.gather(*[fetch(cn) for cn in collection_names])
+
+    return await run_in_threadpool(
+        _hybrid_search_collection_results,
+        collection_names=collection_names,
+        collection_results=dict(zip(collection_names, fetched)),
+        queries=queries,
+        embedding_function=embedding_function,
+        k=k,
+        reranking_function=reranking_function,
+        k_reranker=k_reranker,
+        r=r,
+        hybrid_bm25_weight=hybrid_bm25_weight,
+    )
+
+
+def _hybrid_search_collection_results(
+    collection_names: list[str],
+    collection_results: dict,
+    queries: list[str],
+    embedding_function,
+    k: int,
+    reranking_function,
+    k_reranker: int,
+    r: float,
+    hybrid_bm25_weight: float,
+) -> dict:
+    results = []
+    error = False
+
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
@@ -506,15 +670,46 @@ def get_embedding_function(
 def get_reranking_function(reranking_engine, reranking_model, reranking_function):
     if reranking_function is None:
         return None
-    if reranking_engine == "external":
-        return lambda sentences, user=None: reranking_function.predict(
-            sentences, user=user
-        )
-    else:
-        return lambda sentences, user=None: reranking_function.predict(sentences)
 
+    def rerank(sentences, user=None):
+        # 延迟加载的模型在加载失败时为 None，返回 None 让调用方退回 embedding 相似度
+        model = resolve(reranking_function)
+        if model is None:
+            return None
+        if reranking_engine == "external":
+            return model.predict(sentences, user=user)
+        return model.predict(sentences)
+
+    return rerank
+
+
+def _get_readable_note(note_id: str, user: UserModel):
+    """读取笔记并校验读权限（含用户组查询），在线程池中调用"""
+    note = Notes.get_note_by_id(note_id)
+    if note and (
+        user.role == "admin"
+        or note.user_id == user.id
+        or has_access(user.id, "read", note.access_control)
+    ):
+        return note
+    return None
+
+
+def _get_readable_knowledge_files(knowledge_id: str, user: UserModel):
+    """读取知识库并校验读权限，返回 (file_ids, file_objects)；无权限时返回 None"""
+    knowledge_base = Knowledges.get_knowledge_by_id(knowledge_id)
+    if not knowledge_base or not (
+        user.role == "admin"
+        or knowledge_base.user_id == user.id
+        or has_access(user.id, "read", knowledge_base.access_control)
+    ):
+        return None
+
+    file_ids = knowledge_base.data.get("file_ids", [])
+    return file_ids, [Files.get_file_by_id(file_id) for file_id in file_ids]
 
-def get_sources_from_items(
+
+async def get_sources_from_items(
     request,
     items,
     queries,
@@ -577,13 +772,9 @@ def get_sources_from_items(
 
         elif item.get("type") == "note":
             # Note Attached
-            note = Notes.get_note_by_id(item.get("id"))
+            note = await run_in_threadpool(_get_readable_note, item.get("id"), user)
 
-            if note and (
-                user.role == "admin"
-                or note.user_id == user.id
-                or has_access(user.id, "read", note.access_control)
-            ):
+            if note:
                 # User has access to the note
                 query_result = {
                     "documents": [[note.data.get("content", {}).get("md", "")]],
@@ -592,7 +783,7 @@ def get_sources_from_items(
 
         elif item.get("type") == "chat":
             # Chat Attached
-            chat = Chats.get_chat_by_id(item.get("id"))
+            chat = await run_in_threadpool(Chats.get_chat_by_id, item.get("id"))
 
             if chat and (user.role == "admin" or chat.user_id == user.id):
                 messages_map = chat.chat.get("history", {}).get("messages", {})
@@ -615,7 +806,9 @@ def get_sources_from_items(
                     }
 
         elif item.get("type") == "url":
-            content, docs = get_content_from_url(request, item.get("url"))
+            content, docs = await run_in_threadpool(
+                get_content_from_url, request, item.get("url")
+            )
             if docs:
                 query_result = {
                     "documents": [[content]],
@@ -646,7 +839,9 @@ def get_sources_from_items(
                         ],
                     }
                 elif item.get("id"):
-                    file_object = Files.get_file_by_id(item.get("id"))
+                    file_object = await run_in_threadpool(
+                        Files.get_file_by_id, item.get("id")
+                    )
                     if file_object:
                         query_result = {
                             "documents": [[file_object.data.get("content", "")]],
@@ -673,20 +868,16 @@ def get_sources_from_items(
                 or request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
             ):
                 # Manual Full Mode Toggle for Collection
-                knowledge_base = Knowledges.get_knowledge_by_id(item.get("id"))
-
-                if knowledge_base and (
-                    user.role == "admin"
-                    or knowledge_base.user_id == user.id
-                    or has_access(user.id, "read", knowledge_base.access_control)
-                ):
+                knowledge_files = await run_in_threadpool(
+                    _get_readable_knowledge_files, item.get("id"), user
+                )
 
-                    file_ids = knowledge_base.data.get("file_ids", [])
+                if knowledge_files is not None:
+                    file_ids, file_objects = knowledge_files
 
                     documents = []
                     metadatas = []
-                    for file_id in file_ids:
-                        file_object = Files.get_file_by_id(file_id)
+                    for file_id, file_object in zip(file_ids, file_objects):
 
                         if file_object:
                             documents.append(file_object.data.get("content", ""))
@@ -732,12 +923,14 @@ def get_sources_from_items(
 
             try:
                 if full_context:
-                    query_result = get_all_items_from_collections(collection_names)
+                    query_result = await aget_all_items_from_collections(
+                        collection_names
+                    )
                 else:
                     query_result = None  # Initialize to None
                     if hybrid_search:
                         try:
-                            query_result = query_collection_with_hybrid_search(
+                            query_result = await aquery_collection_with_hybrid_search(
                                 collection_names=collection_names,
                                 queries=queries,
                                 embedding_function=embedding_function,
@@ -754,7 +947,7 @@ def get_sources_from_items(
 
                     # fallback to non-hybrid search
                     if not hybrid_search and query_result is None:
-                        query_result = query_collection(
+                        query_result = await aquery_collection(
                             collection_names=collection_names,
                             queries=queries,
                             embedding_function=embedding_function,
@@ -1046,14 +1239,13 @@ class RerankCompressor(BaseDocumentCompressor):
         query: str,
         callbacks: Optional[Callbacks] = None,
     ) -> Sequence[Document]:
-        reranking = self.reranking_function is not None
-
         scores = None
-        if reranking:
+        if self.reranking_function is not None:
             scores = self.reranking_function(
                 [(query, doc.page_content) for doc in documents]
             )
-        else:
+        if scores is None:
+            # 未配置或无法加载重排模型时按 embedding 相似度排序
             from sentence_transformers import util
 
             query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
@@ -1,4 +1,4 @@
-from elasticsearch import Elasticsearch, BadRequestError
+from elasticsearch import AsyncElasticsearch, Elasticsearch, BadRequestError
 from typing import Optional
 import ssl
 from elasticsearch.helpers import bulk, scan
@@ -32,7 +32,7 @@ class ElasticsearchClient(VectorDBBase):
 
     def __init__(self):
         self.index_prefix = ELASTICSEARCH_INDEX_PREFIX
-        self.client = Elasticsearch(
+        client_kwargs = dict(
             hosts=[ELASTICSEARCH_URL],
             ca_certs=ELASTICSEARCH_CA_CERTS,
             api_key=ELASTICSEARCH_API_KEY,
@@ -44,6 +44,9 @@ class ElasticsearchClient(VectorDBBase):
             ),
             ssl_assert_fingerprint=SSL_ASSERT_FINGERPRINT,
         )
+        self.client = Elasticsearch(**client_kwargs)
+        # 检索走异步客户端，不占用线程；批量写入仍使用同步 helpers
+        self.aclient = AsyncElasticsearch(**client_kwargs)
 
     # Status: works
     def _get_index_name(self, dimension: int) -> str:
@@ -135,13 +138,11 @@ class ElasticsearchClient(VectorDBBase):
 
     # Status: works
     def has_collection(self, collection_name) -> bool:
-        query_body = {"query": {"bool": {"filter": []}}}
-        query_body["query"]["bool"]["filter"].append(
-            {"term": {"collection": collection_name}}
-        )
-
         try:
-            result = self.client.count(index=f"{self.index_prefix}*", body=query_body)
+            result = self.client.count(
+                index=f"{self.index_prefix}*",
+                body=self._collection_body(collection_name),
+            )
 
             return result.body["count"] > 0
         except Exception as e:
@@ -155,7 +156,20 @@ class ElasticsearchClient(VectorDBBase):
     def search(
         self, collection_name: str, vectors: list[list[float]], limit: int
     ) -> Optional[SearchResult]:
-        query = {
+        result = self.client.search(
+            index=self._get_index_name(len(vectors[0])),
+            body=self._search_body(collection_name, vectors, limit),
+        )
+
+        return self._result_to_search_result(result)
+
+    def _collection_body(self, collection_name: str) -> dict:
+        return {"query": {"bool": {"filter": [{"term": {"collection": collection_name}}]}}}
+
+    def _search_body(
+        self, collection_name: str, vectors: list[list[float]], limit: int
+    ) -> dict:
+        return {
             "size": limit,
             "_source": ["text", "metadata"],
             "query": {
@@ -173,12 +187,6 @@ class ElasticsearchClient(VectorDBBase):
             },
         }
 
-        result = self.client.search(
-            index=self._get_index_name(len(vectors[0])), body=query
-        )
-
-        return self._result_to_search_result(result)
-
     # Status: only tested halfwat
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
@@ -186,6 +194,19 @@ class ElasticsearchClient(VectorDBBase):
         if not self.has_collection(collection_name):
             return None
 
+        try:
+            result = self.client.search(
+                index=f"{self.index_prefix}*",
+                body=self._query_body(collection_name, filter),
+                size=limit if limit else 10,
+            )
+
+            return self._result_to_get_result(result)
+
+        except Exception as e:
+            return None
+
+    def _query_body(self, collection_name: str, filter: dict) -> dict:
         query_body = {
             "query": {"bool": {"filter": []}},
             "_source": ["text", "metadata"],
@@ -196,19 +217,7 @@ class ElasticsearchClient(VectorDBBase):
         query_body["query"]["bool"]["filter"].append(
             {"term": {"collection": collection_name}}
         )
-        size = limit if limit else 10
-
-        try:
-            result = self.client.search(
-                index=f"{self.index_prefix}*",
-                body=query_body,
-                size=size,
-            )
-
-            return self._result_to_get_result(result)
-
-        except Exception as e:
-            return None
+        return query_body
 
     # Status: works
     def _has_index(self, dimension: int):
@@ -300,3 +309,44 @@ class ElasticsearchClient(VectorDBBase):
         indices = self.client.indices.get(index=f"{self.index_prefix}*")
         for index in indices:
             self.client.indices.delete(index=index)
+
+    # 异步接口：检索类请求使用 AsyncElasticsearch
+
+    async def ahas_collection(self, collection_name) -> bool:
+        try:
+            result = await self.aclient.count(
+                index=f"{self.index_prefix}*",
+                body=self._collection_body(collection_name),
+            )
+
+            return result.body["count"] > 0
+        except Exception as e:
+            return None
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float]], limit: int
+    ) -> Optional[SearchResult]:
+        result = await self.aclient.search(
+            index=self._get_index_name(len(vectors[0])),
+            body=self._search_body(collection_name, vectors, limit),
+        )
+
+        return self._result_to_search_result(result)
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not await self.ahas_collection(collection_name):
+            return None
+
+        try:
+            result = await self.aclient.search(
+                index=f"{self.index_prefix}*",
+                body=self._query_body(collection_name, filter),
+                size=limit if limit else 10,
+            )
+
+            return self._result_to_get_result(result)
+
+        except Exception as e:
+            return None
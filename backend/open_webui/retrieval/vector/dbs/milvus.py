@@ -1,4 +1,4 @@
-from pymilvus import MilvusClient as Client
+from pymilvus import AsyncMilvusClient, MilvusClient as Client
 from pymilvus import FieldSchema, DataType
 from pymilvus import connections, Collection
 
@@ -12,6 +12,7 @@ from open_webui.retrieval.vector.main import (
     VectorItem,
     SearchResult,
     GetResult,
+    run_in_vector_db_executor,
 )
 from open_webui.config import (
     MILVUS_URI,
@@ -35,9 +36,14 @@ class MilvusClient(VectorDBBase):
     def __init__(self):
         self.collection_prefix = "open_webui"
         if MILVUS_TOKEN is None:
-            self.client = Client(uri=MILVUS_URI, db_name=MILVUS_DB)
+            self.client_kwargs = dict(uri=MILVUS_URI, db_name=MILVUS_DB)
         else:
-            self.client = Client(uri=MILVUS_URI, db_name=MILVUS_DB, token=MILVUS_TOKEN)
+            self.client_kwargs = dict(
+                uri=MILVUS_URI, db_name=MILVUS_DB, token=MILVUS_TOKEN
+            )
+        self.client = Client(**self.client_kwargs)
+        # grpc.aio 通道绑定创建时的事件循环，首次在事件循环中调用时再创建
+        self.aclient: Optional[AsyncMilvusClient] = None
 
     def _result_to_get_result(self, result) -> GetResult:
         ids = []
@@ -197,6 +203,25 @@ class MilvusClient(VectorDBBase):
         )
         return self._result_to_search_result(result)
 
+    def _filter_string(self, filter: dict) -> str:
+        return " && ".join(
+            [
+                f'metadata["{key}"] == {json.dumps(value)}'
+                for key, value in filter.items()
+            ]
+        )
+
+    def _to_rows(self, items: list[VectorItem]) -> list[dict]:
+        return [
+            {
+                "id": item["id"],
+                "vector": item["vector"],
+                "data": {"text": item["text"]},
+                "metadata": process_metadata(item["metadata"]),
+            }
+            for item in items
+        ]
+
     def query(self, collection_name: str, filter: dict, limit: int = -1):
         connections.connect(uri=MILVUS_URI, token=MILVUS_TOKEN, db_name=MILVUS_DB)
 
@@ -207,12 +232,7 @@ class MilvusClient(VectorDBBase):
                 f"Query attempted on non-existent collection: {self.collection_prefix}_{collection_name}"
             )
             return None
-        filter_string = " && ".join(
-            [
-                f'metadata["{key}"] == {json.dumps(value)}'
-                for key, value in filter.items()
-            ]
-        )
+        filter_string = self._filter_string(filter)
 
         collection = Collection(f"{self.collection_prefix}_{collection_name}")
         collection.load()
@@ -284,15 +304,7 @@ class MilvusClient(VectorDBBase):
         )
         return self.client.insert(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            data=[
-                {
-                    "id": item["id"],
-                    "vector": item["vector"],
-                    "data": {"text": item["text"]},
-                    "metadata": process_metadata(item["metadata"]),
-                }
-                for item in items
-            ],
+            data=self._to_rows(items),
         )
 
     def upsert(self, collection_name: str, items: list[VectorItem]):
@@ -320,15 +332,7 @@ class MilvusClient(VectorDBBase):
         )
         return self.client.upsert(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            data=[
-                {
-                    "id": item["id"],
-                    "vector": item["vector"],
-                    "data": {"text": item["text"]},
-                    "metadata": process_metadata(item["metadata"]),
-                }
-                for item in items
-            ],
+            data=self._to_rows(items),
         )
 
     def delete(
@@ -354,12 +358,7 @@ class MilvusClient(VectorDBBase):
                 ids=ids,
             )
         elif filter:
-            filter_string = " && ".join(
-                [
-                    f'metadata["{key}"] == {json.dumps(value)}'
-                    for key, value in filter.items()
-                ]
-            )
+            filter_string = self._filter_string(filter)
             log.info(
                 f"Deleting items by filter from {self.collection_prefix}_{collection_name}. Filter: {filter_string}"
             )
@@ -389,3 +388,90 @@ class MilvusClient(VectorDBBase):
                 except Exception as e:
                     log.error(f"Error deleting collection {collection_name_full}: {e}")
         log.info(f"Milvus reset complete. Deleted collections: {deleted_collections}")
+
+    # 异步接口：使用 AsyncMilvusClient，不经过线程池
+    # query/get 需要分页遍历整个 collection，AsyncMilvusClient 没有 query_iterator，
+    # 仍走基类的线程池实现
+
+    def _get_aclient(self) -> AsyncMilvusClient:
+        if self.aclient is None:
+            self.aclient = AsyncMilvusClient(**self.client_kwargs)
+        return self.aclient
+
+    async def ahas_collection(self, collection_name: str) -> bool:
+        collection_name = collection_name.replace("-", "_")
+        return await self._get_aclient().has_collection(
+            collection_name=f"{self.collection_prefix}_{collection_name}"
+        )
+
+    async def adelete_collection(self, collection_name: str):
+        collection_name = collection_name.replace("-", "_")
+        return await self._get_aclient().drop_collection(
+            collection_name=f"{self.collection_prefix}_{collection_name}"
+        )
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        collection_name = collection_name.replace("-", "_")
+        result = await self._get_aclient().search(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            data=vectors,
+            limit=limit,
+            output_fields=["data", "metadata"],
+        )
+        return self._result_to_search_result(result)
+
+    async def _acreate_collection_if_not_exists(
+        self, collection_name: str, items: list[VectorItem]
+    ):
+        if await self.ahas_collection(collection_name):
+            return
+        if not items:
+            raise ValueError(
+                "Cannot create Milvus collection without items to determine vector dimension."
+            )
+        # 建表只在首次写入时发生，沿用同步实现的 schema 与索引配置
+        await run_in_vector_db_executor(
+            self._create_collection,
+            collection_name=collection_name.replace("-", "_"),
+            dimension=len(items[0]["vector"]),
+        )
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_collection_if_not_exists(collection_name, items)
+        collection_name = collection_name.replace("-", "_")
+        return await self._get_aclient().insert(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            data=self._to_rows(items),
+        )
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_collection_if_not_exists(collection_name, items)
+        collection_name = collection_name.replace("-", "_")
+        return await self._get_aclient().upsert(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            data=self._to_rows(items),
+        )
+
+    async def adelete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        if not await self.ahas_collection(collection_name):
+            return None
+
+        collection_name = collection_name.replace("-", "_")
+        if ids:
+            return await self._get_aclient().delete(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                ids=ids,
+            )
+        elif filter:
+            return await self._get_aclient().delete(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                filter=self._filter_string(filter),
+            )
+        return None
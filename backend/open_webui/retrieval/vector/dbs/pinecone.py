@@ -343,10 +343,10 @@ class PineconeClient(VectorDBBase):
         batches = [
             points[i : i + BATCH_SIZE] for i in range(0, len(points), BATCH_SIZE)
         ]
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         tasks = [
             loop.run_in_executor(
-                None, functools.partial(self.index.upsert, vectors=batch)
+                self._executor, functools.partial(self.index.upsert, vectors=batch)
             )
             for batch in batches
         ]
@@ -375,10 +375,10 @@ class PineconeClient(VectorDBBase):
         batches = [
             points[i : i + BATCH_SIZE] for i in range(0, len(points), BATCH_SIZE)
         ]
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         tasks = [
             loop.run_in_executor(
-                None, functools.partial(self.index.upsert, vectors=batch)
+                self._executor, functools.partial(self.index.upsert, vectors=batch)
             )
             for batch in batches
         ]
@@ -392,6 +392,12 @@ class PineconeClient(VectorDBBase):
             f"into '{collection_name_with_prefix}'"
         )
 
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        await self.insert_async(collection_name, items)
+
+    async def aupsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        await self.upsert_async(collection_name, items)
+
     def search(
         self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
     ) -> Optional[SearchResult]:
@@ -2,7 +2,7 @@ from typing import Optional
 import logging
 from urllib.parse import urlparse
 
-from qdrant_client import QdrantClient as Qclient
+from qdrant_client import AsyncQdrantClient, QdrantClient as Qclient
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
 
@@ -43,6 +43,7 @@ class QdrantClient(VectorDBBase):
 
         if not self.QDRANT_URI:
             self.client = None
+            self.aclient = None
             return
 
         # Unified handling for either scheme
@@ -51,7 +52,7 @@ class QdrantClient(VectorDBBase):
         http_port = parsed.port or 6333  # default REST port
 
         if self.PREFER_GRPC:
-            self.client = Qclient(
+            client_kwargs = dict(
                 host=host,
                 port=http_port,
                 grpc_port=self.GRPC_PORT,
@@ -60,11 +61,14 @@ class QdrantClient(VectorDBBase):
                 timeout=self.QDRANT_TIMEOUT,
             )
         else:
-            self.client = Qclient(
+            client_kwargs = dict(
                 url=self.QDRANT_URI,
                 api_key=self.QDRANT_API_KEY,
                 timeout=QDRANT_TIMEOUT,
             )
+        self.client = Qclient(**client_kwargs)
+        # 异步客户端供事件循环中的调用使用，不占用线程
+        self.aclient = AsyncQdrantClient(**client_kwargs)
 
     def _result_to_get_result(self, points) -> GetResult:
         ids = []
@@ -158,6 +162,9 @@ class QdrantClient(VectorDBBase):
             query=vectors[0],
             limit=limit,
         )
+        return self._result_to_search_result(query_response)
+
+    def _result_to_search_result(self, query_response) -> SearchResult:
         get_result = self._result_to_get_result(query_response.points)
         return SearchResult(
             ids=get_result.ids,
@@ -175,17 +182,9 @@ class QdrantClient(VectorDBBase):
             if limit is None:
                 limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
 
-            field_conditions = []
-            for key, value in filter.items():
-                field_conditions.append(
-                    models.FieldCondition(
-                        key=f"metadata.{key}", match=models.MatchValue(value=value)
-                    )
-                )
-
             points = self.client.scroll(
                 collection_name=f"{self.collection_prefix}_{collection_name}",
-                scroll_filter=models.Filter(should=field_conditions),
+                scroll_filter=self._query_filter(filter),
                 limit=limit,
             )
             return self._result_to_get_result(points[0])
@@ -193,6 +192,16 @@ class QdrantClient(VectorDBBase):
             log.exception(f"Error querying a collection '{collection_name}': {e}")
             return None
 
+    def _query_filter(self, filter: dict) -> models.Filter:
+        field_conditions = []
+        for key, value in filter.items():
+            field_conditions.append(
+                models.FieldCondition(
+                    key=f"metadata.{key}", match=models.MatchValue(value=value)
+                )
+            )
+        return models.Filter(should=field_conditions)
+
     def get(self, collection_name: str) -> Optional[GetResult]:
         # Get all the items in the collection.
         points = self.client.scroll(
@@ -220,6 +229,14 @@ class QdrantClient(VectorDBBase):
         filter: Optional[dict] = None,
     ):
         # Delete the items from the collection based on the ids.
+        return self.client.delete(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            points_selector=self._delete_selector(ids, filter),
+        )
+
+    def _delete_selector(
+        self, ids: Optional[list[str]], filter: Optional[dict]
+    ) -> models.FilterSelector:
         field_conditions = []
 
         if ids:
@@ -239,12 +256,7 @@ class QdrantClient(VectorDBBase):
                     ),
                 ),
 
-        return self.client.delete(
-            collection_name=f"{self.collection_prefix}_{collection_name}",
-            points_selector=models.FilterSelector(
-                filter=models.Filter(must=field_conditions)
-            ),
-        )
+        return models.FilterSelector(filter=models.Filter(must=field_conditions))
 
     def reset(self):
         # Resets the database. This will delete all collections and item entries.
@@ -252,3 +264,106 @@ class QdrantClient(VectorDBBase):
         for collection_name in collection_names:
             if collection_name.name.startswith(self.collection_prefix):
                 self.client.delete_collection(collection_name=collection_name.name)
+
+    # 异步接口：使用 AsyncQdrantClient，不经过线程池
+
+    async def _acreate_collection_if_not_exists(self, collection_name, dimension):
+        if await self.ahas_collection(collection_name=collection_name):
+            return
+
+        collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
+        await self.aclient.create_collection(
+            collection_name=collection_name_with_prefix,
+            vectors_config=models.VectorParams(
+                size=dimension,
+                distance=models.Distance.COSINE,
+                on_disk=self.QDRANT_ON_DISK,
+            ),
+            hnsw_config=models.HnswConfigDiff(
+                m=self.QDRANT_HNSW_M,
+            ),
+        )
+        for field_name in ("metadata.hash", "metadata.file_id"):
+            await self.aclient.create_payload_index(
+                collection_name=collection_name_with_prefix,
+                field_name=field_name,
+                field_schema=models.KeywordIndexParams(
+                    type=models.KeywordIndexType.KEYWORD,
+                    is_tenant=False,
+                    on_disk=self.QDRANT_ON_DISK,
+                ),
+            )
+        log.info(f"collection {collection_name_with_prefix} successfully created!")
+
+    async def ahas_collection(self, collection_name: str) -> bool:
+        return await self.aclient.collection_exists(
+            f"{self.collection_prefix}_{collection_name}"
+        )
+
+    async def adelete_collection(self, collection_name: str):
+        return await self.aclient.delete_collection(
+            collection_name=f"{self.collection_prefix}_{collection_name}"
+        )
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        if limit is None:
+            limit = NO_LIMIT
+
+        query_response = await self.aclient.query_points(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            query=vectors[0],
+            limit=limit,
+        )
+        return self._result_to_search_result(query_response)
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ):
+        if not await self.ahas_collection(collection_name):
+            return None
+        try:
+            points = await self.aclient.scroll(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                scroll_filter=self._query_filter(filter),
+                limit=limit if limit is not None else NO_LIMIT,
+            )
+            return self._result_to_get_result(points[0])
+        except Exception as e:
+            log.exception(f"Error querying a collection '{collection_name}': {e}")
+            return None
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        points = await self.aclient.scroll(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            limit=NO_LIMIT,
+        )
+        return self._result_to_get_result(points[0])
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_collection_if_not_exists(
+            collection_name, len(items[0]["vector"])
+        )
+        await self.aclient.upsert(
+            f"{self.collection_prefix}_{collection_name}", self._create_points(items)
+        )
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_collection_if_not_exists(
+            collection_name, len(items[0]["vector"])
+        )
+        return await self.aclient.upsert(
+            f"{self.collection_prefix}_{collection_name}", self._create_points(items)
+        )
+
+    async def adelete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        return await self.aclient.delete(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            points_selector=self._delete_selector(ids, filter),
+        )
@@ -1,5 +1,6 @@
 from open_webui.retrieval.vector.main import VectorDBBase
 from open_webui.retrieval.vector.type import VectorType
+from open_webui.utils.lazy import LazyObject
 from open_webui.config import (
     VECTOR_DB,
     ENABLE_QDRANT_MULTITENANCY_MODE,
@@ -71,4 +72,5 @@ class Vector:
                 raise ValueError(f"Unsupported vector type: {vector_type}")
 
 
-VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+# 客户端库较重且部分会在初始化时建立连接，首次使用时再创建
+VECTOR_DB_CLIENT = LazyObject(lambda: Vector.get_vector(VECTOR_DB), "vector_db")
@@ -1,6 +1,35 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from open_webui.env import VECTOR_DB_EXECUTOR_WORKERS
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_vector_db_executor() -> ThreadPoolExecutor:
+    """向量库同步调用专用的有界线程池，与 FastAPI 默认线程池隔离"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(VECTOR_DB_EXECUTOR_WORKERS, 1),
+                    thread_name_prefix="vector-db",
+                )
+    return _executor
+
+
+async def run_in_vector_db_executor(fn: Callable, *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_vector_db_executor(), functools.partial(fn, *args, **kwargs)
+    )
 
 
 class VectorItem(BaseModel):
@@ -84,3 +113,72 @@ class VectorDBBase(ABC):
     def reset(self) -> None:
         """Reset the vector database by removing all collections or those matching a condition."""
         pass
+
+    # Async interface.
+    #
+    # The default implementations run the synchronous methods in a bounded,
+    # dedicated executor so a slow vector store never blocks the event loop.
+    # Backends with a native async client override them.
+
+    async def ahas_collection(self, collection_name: str) -> bool:
+        """Async version of has_collection."""
+        return await run_in_vector_db_executor(
+            self.has_collection, collection_name=collection_name
+        )
+
+    async def adelete_collection(self, collection_name: str) -> None:
+        """Async version of delete_collection."""
+        return await run_in_vector_db_executor(
+            self.delete_collection, collection_name=collection_name
+        )
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        """Async version of insert."""
+        return await run_in_vector_db_executor(
+            self.insert, collection_name=collection_name, items=items
+        )
+
+    async def aupsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        """Async version of upsert."""
+        return await run_in_vector_db_executor(
+            self.upsert, collection_name=collection_name, items=items
+        )
+
+    async def asearch(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        """Async version of search."""
+        return await run_in_vector_db_executor(
+            self.search, collection_name=collection_name, vectors=vectors, limit=limit
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        """Async version of query."""
+        # Only forward limit when given, backends have different defaults
+        kwargs = {"limit": limit} if limit is not None else {}
+        return await run_in_vector_db_executor(
+            self.query, collection_name=collection_name, filter=filter, **kwargs
+        )
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        """Async version of get."""
+        return await run_in_vector_db_executor(
+            self.get, collection_name=collection_name
+        )
+
+    async def adelete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        """Async version of delete."""
+        return await run_in_vector_db_executor(
+            self.delete, collection_name=collection_name, ids=ids, filter=filter
+        )
+
+    async def areset(self) -> None:
+        """Async version of reset."""
+        return await run_in_vector_db_executor(self.reset)
@@ -0,0 +1,404 @@
+"""
+联网搜索缓存
+
+同一查询或同一链接在短时间内被重复处理时，避免重复的搜索请求、网页抓取与 embedding：
+- 搜索结果：key 为 (引擎, 查询, 结果数, 域名过滤)
+- 网页正文：key 为 (加载器, URL)，按 URL 缓存加载得到的文档
+- 分块 embedding：key 为 (embedding 引擎, 模型, 前缀, 文本哈希)
+- 向量集合：记录集合最近一次写入的内容指纹，内容未变时跳过重建
+
+前三级为进程内 LRU + TTL 缓存，网页正文与 embedding 按总字节数限制，
+embedding 以 float32 字节串存储；各级命中率可通过 get_stats 查看。
+
+向量集合存放在所有 worker 共享的向量库中，指纹因此在配置了 Redis 时写入 Redis，
+任一 worker 重建集合都会更新或清除它；未配置 Redis 时退化为进程内记录，
+仅适用于单 worker 部署，多 worker 下其他 worker 改写同名集合后本进程无法感知。
+"""
+
+import hashlib
+import json
+import logging
+import sys
+import threading
+from array import array
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from langchain_core.documents import Document
+
+from open_webui.env import (
+    ENABLE_WEB_SEARCH_CACHE,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+    WEB_EMBEDDING_CACHE_MAX_BYTES,
+    WEB_EMBEDDING_CACHE_TTL,
+    WEB_PAGE_CACHE_MAX_BYTES,
+    WEB_PAGE_CACHE_MAX_CHARS,
+    WEB_PAGE_CACHE_TTL,
+    WEB_SEARCH_RESULT_CACHE_SIZE,
+    WEB_SEARCH_RESULT_CACHE_TTL,
+)
+from open_webui.utils.ttl_cache import TTLCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class _CacheLevel:
+    """带命中统计的一级缓存"""
+
+    def __init__(
+        self,
+        name: str,
+        max_size: Optional[int],
+        ttl: float,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.name = name
+        self.cache = TTLCache(max_size, ttl, max_bytes=max_bytes, sizeof=sizeof)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        value = self.cache.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.cache.set(key, value)
+
+    def clear(self) -> None:
+        self.cache.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self.cache),
+            "max_size": self.cache.max_size,
+            "bytes": self.cache.nbytes,
+            "max_bytes": self.cache.max_bytes,
+            "ttl": self.cache.ttl,
+        }
+
+
+_search_results = _CacheLevel(
+    "search_results", WEB_SEARCH_RESULT_CACHE_SIZE, WEB_SEARCH_RESULT_CACHE_TTL
+)
+
+
+def _page_size(entry: list[tuple[str, dict]]) -> int:
+    return sum(
+        sys.getsizeof(text) + sys.getsizeof(json.dumps(metadata, default=str))
+        for text, metadata in entry
+    )
+
+
+_pages = _CacheLevel(
+    "pages",
+    None,
+    WEB_PAGE_CACHE_TTL,
+    max_bytes=WEB_PAGE_CACHE_MAX_BYTES,
+    sizeof=_page_size,
+)
+_embeddings = _CacheLevel(
+    "embeddings",
+    None,
+    WEB_EMBEDDING_CACHE_TTL,
+    max_bytes=WEB_EMBEDDING_CACHE_MAX_BYTES,
+    sizeof=len,
+)
+# 未配置 Redis 时的 collection_name -> 内容指纹；TTL 与网页缓存一致，过期后重新写入
+_collections = TTLCache(1000, WEB_PAGE_CACHE_TTL)
+_redis = None
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+####################################
+# 搜索结果
+####################################
+
+
+def cached_search(
+    engine: str,
+    query: str,
+    result_count: int,
+    domain_filter_list: Optional[list],
+    search_fn: Callable[[], list],
+) -> list:
+    if not ENABLE_WEB_SEARCH_CACHE:
+        return search_fn()
+
+    key = (
+        engine,
+        query.strip(),
+        result_count,
+        tuple(domain_filter_list or []),
+    )
+    results = _search_results.get(key)
+    if results is not None:
+        log.debug(f"web search cache hit: {engine} {query}")
+        return list(results)
+
+    results = search_fn()
+    # 空结果可能是上游临时故障，不缓存
+    if results:
+        _search_results.set(key, list(results))
+    return results
+
+
+####################################
+# 网页正文
+####################################
+
+
+def _to_entry(docs: list[Document]) -> Optional[list[tuple[str, dict]]]:
+    if sum(len(doc.page_content) for doc in docs) > WEB_PAGE_CACHE_MAX_CHARS:
+        return None
+    return [(doc.page_content, dict(doc.metadata)) for doc in docs]
+
+
+def _from_entry(entry: list[tuple[str, dict]]) -> list[Document]:
+    # 每次返回新的 Document，调用方修改 metadata 不会污染缓存
+    return [
+        Document(page_content=text, metadata=dict(metadata)) for text, metadata in entry
+    ]
+
+
+def get_page_docs(
+    loader_engine: str, url: str, load_fn: Callable[[], list[Document]]
+) -> list[Document]:
+    """加载单个 URL（网页或 YouTube），结果按 URL 缓存"""
+    if not ENABLE_WEB_SEARCH_CACHE:
+        return load_fn()
+
+    key = (loader_engine, url)
+    entry = _pages.get(key)
+    if entry is not None:
+        return _from_entry(entry)
+
+    docs = load_fn()
+    if docs:
+        entry = _to_entry(docs)
+        if entry is not None:
+            _pages.set(key, entry)
+    return docs
+
+
+async def load_pages(
+    loader_engine: str,
+    urls: list[str],
+    load_fn: Callable[[list[str]], Awaitable[list[Document]]],
+) -> list[Document]:
+    """
+    批量加载 URL：命中缓存的直接返回，只为未命中的 URL 调用加载器
+
+    加载器返回的文档按 metadata.source 归属到各 URL，返回顺序与 urls 一致
+    """
+    if not ENABLE_WEB_SEARCH_CACHE:
+        return await load_fn(urls)
+
+    docs_by_url: dict[str, list[Document]] = {}
+    missing = []
+    for url in urls:
+        entry = _pages.get((loader_engine, url))
+        if entry is not None:
+            docs_by_url[url] = _from_entry(entry)
+        else:
+            missing.append(url)
+
+    extra: list[Document] = []
+    if missing:
+        loaded: dict[str, list[Document]] = {}
+        for doc in await load_fn(missing):
+            source = doc.metadata.get("source")
+            if source:
+                loaded.setdefault(source, []).append(doc)
+            else:
+                extra.append(doc)
+
+        for source, docs in loaded.items():
+            entry = _to_entry(docs)
+            if entry is not None:
+                _pages.set((loader_engine, source), entry)
+            docs_by_url[source] = docs
+
+        log.debug(
+            f"web page cache: {len(urls) - len(missing)} hit, {len(missing)} loaded"
+        )
+
+    ordered = [doc for url in urls for doc in docs_by_url.pop(url, [])]
+    # 加载器返回的 source 与请求 URL 不一致（如跳转）时追加在末尾
+    for docs in docs_by_url.values():
+        ordered.extend(docs)
+    return ordered + extra
+
+
+####################################
+# embedding
+####################################
+
+
+def _decode_embedding(data: Optional[bytes]) -> Optional[list[float]]:
+    if data is None:
+        return None
+    embedding = array("f")
+    embedding.frombytes(data)
+    return embedding.tolist()
+
+
+def embed_texts(
+    embedding_function: Callable,
+    texts: list[str],
+    prefix: Optional[str],
+    user,
+    engine: str,
+    model: str,
+) -> list:
+    """只为未缓存的文本调用 embedding_function，保持与 texts 相同的顺序"""
+    if not ENABLE_WEB_SEARCH_CACHE:
+        return embedding_function(texts, prefix=prefix, user=user)
+
+    keys = [(engine, model, prefix or "", _hash(text)) for text in texts]
+    embeddings = [_decode_embedding(_embeddings.get(key)) for key in keys]
+
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        # 同一批内重复的文本只计算一次
+        unique: dict[Hashable, str] = {}
+        for i in missing:
+            unique.setdefault(keys[i], texts[i])
+
+        computed = embedding_function(list(unique.values()), prefix=prefix, user=user)
+        if len(computed) != len(unique):
+            raise ValueError(f"Expected {len(unique)} embeddings, got {len(computed)}")
+
+        by_key = dict(zip(unique.keys(), computed))
+        for key, embedding in by_key.items():
+            _embeddings.set(key, array("f", embedding).tobytes())
+        for i in missing:
+            embeddings[i] = by_key[keys[i]]
+
+        log.debug(
+            f"web embedding cache: {len(texts) - len(missing)} hit, {len(unique)} computed"
+        )
+
+    return embeddings
+
+
+####################################
+# 向量集合
+####################################
+
+
+def docs_fingerprint(docs: list[Document], *parts: Any) -> str:
+    return _hash(
+        json.dumps(
+            [[doc.page_content, doc.metadata.get("source")] for doc in docs]
+            + [list(map(str, parts))],
+            ensure_ascii=False,
+        )
+    )
+
+
+def _get_redis():
+    global _redis
+    if _redis is None and REDIS_URL:
+        from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+        _redis = get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            decode_responses=True,
+        )
+    return _redis
+
+
+def _collection_key(collection_name: str) -> str:
+    return f"{REDIS_KEY_PREFIX}:web_collection:{collection_name}"
+
+
+def is_collection_current(collection_name: str, fingerprint: str) -> bool:
+    if not ENABLE_WEB_SEARCH_CACHE:
+        return False
+
+    redis = _get_redis()
+    if redis is None:
+        return _collections.get(collection_name) == fingerprint
+
+    try:
+        return redis.get(_collection_key(collection_name)) == fingerprint
+    except Exception as e:
+        # 读不到共享指纹时按已变化处理，重建集合
+        log.debug(f"读取联网集合指纹失败: {e}")
+        return False
+
+
+def mark_collection(collection_name: str, fingerprint: str) -> None:
+    if not ENABLE_WEB_SEARCH_CACHE:
+        return
+
+    redis = _get_redis()
+    if redis is None:
+        _collections.set(collection_name, fingerprint)
+        return
+
+    try:
+        redis.set(_collection_key(collection_name), fingerprint, ex=WEB_PAGE_CACHE_TTL)
+    except Exception as e:
+        log.debug(f"写入联网集合指纹失败: {e}")
+
+
+def invalidate_collection(collection_name: str) -> None:
+    _collections.pop(collection_name)
+
+    redis = _get_redis()
+    if redis is None:
+        return
+
+    try:
+        redis.delete(_collection_key(collection_name))
+    except Exception as e:
+        log.warning(f"清除联网集合指纹失败: {e}")
+
+
+####################################
+# 统计
+####################################
+
+
+def get_stats() -> dict:
+    return {
+        "enabled": ENABLE_WEB_SEARCH_CACHE,
+        "search_results": _search_results.stats(),
+        "pages": _pages.stats(),
+        "embeddings": _embeddings.stats(),
+        "collections": {"size": len(_collections)},
+    }
+
+
+def clear() -> None:
+    _search_results.clear()
+    _pages.clear()
+    _embeddings.clear()
+    _collections.clear()
@@ -2,6 +2,7 @@ import hashlib
 import json
 import logging
 import os
+import shutil
 import uuid
 import html
 from functools import lru_cache
@@ -49,6 +50,21 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     DEVICE_TYPE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    AUDIO_STT_SEGMENT_SECONDS,
+    AUDIO_STT_SEGMENT_OVERLAP_SECONDS,
+    AUDIO_STT_MAX_WORKERS,
+    AUDIO_STT_CACHE_ENABLED,
+    AUDIO_STT_CACHE_MAX_BYTES,
+    AUDIO_STT_CACHE_TTL,
+)
+from open_webui.utils.audio_segments import (
+    SAMPLE_RATE,
+    SAMPLE_WIDTH,
+    TranscriptCache,
+    hash_file,
+    merge_transcripts,
+    remove_segments,
+    segment_audio,
 )
 
 
@@ -59,6 +75,8 @@ MAX_FILE_SIZE_MB = 20
 MAX_FILE_SIZE = MAX_FILE_SIZE_MB * 1024 * 1024  # Convert MB to bytes
 AZURE_MAX_FILE_SIZE_MB = 200
 AZURE_MAX_FILE_SIZE = AZURE_MAX_FILE_SIZE_MB * 1024 * 1024  # Convert MB to bytes
+# 16kHz 单声道 16bit WAV 分段不超过 MAX_FILE_SIZE
+MAX_SEGMENT_SECONDS = MAX_FILE_SIZE // (SAMPLE_RATE * SAMPLE_WIDTH) - 1
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["AUDIO"])
@@ -66,6 +84,12 @@ log.setLevel(SRC_LOG_LEVELS["AUDIO"])
 SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
 SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+TRANSCRIPT_CACHE = TranscriptCache(
+    CACHE_DIR / "audio" / "transcriptions" / "cache",
+    max_bytes=AUDIO_STT_CACHE_MAX_BYTES,
+    ttl=AUDIO_STT_CACHE_TTL,
+)
+
 
 ##########################################
 #
@@ -73,53 +97,6 @@ SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 #
 ##########################################
 
-from pydub import AudioSegment
-from pydub.utils import mediainfo
-
-
-def is_audio_conversion_required(file_path):
-    """
-    Check if the given audio file needs conversion to mp3.
-    """
-    SUPPORTED_FORMATS = {"flac", "m4a", "mp3", "mp4", "mpeg", "wav", "webm"}
-
-    if not os.path.isfile(file_path):
-        log.error(f"File not found: {file_path}")
-        return False
-
-    try:
-        info = mediainfo(file_path)
-        codec_name = info.get("codec_name", "").lower()
-        codec_type = info.get("codec_type", "").lower()
-        codec_tag_string = info.get("codec_tag_string", "").lower()
-
-        if codec_name == "aac" and codec_type == "audio" and codec_tag_string == "mp4a":
-            # File is AAC/mp4a audio, recommend mp3 conversion
-            return True
-
-        # If the codec name is in the supported formats
-        if codec_name in SUPPORTED_FORMATS:
-            return False
-
-        return True
-    except Exception as e:
-        log.error(f"Error getting audio format: {e}")
-        return False
-
-
-def convert_audio_to_mp3(file_path):
-    """Convert audio file to mp3 format."""
-    try:
-        output_path = os.path.splitext(file_path)[0] + ".mp3"
-        audio = AudioSegment.from_file(file_path)
-        audio.export(output_path, format="mp3")
-        log.info(f"Converted {file_path} to {output_path}")
-        return output_path
-    except Exception as e:
-        log.error(f"Error converting audio file: {e}")
-        return None
-
-
 def set_faster_whisper_model(model: str, auto_update: bool = False):
     whisper_model = None
     if model:
@@ -131,6 +108,8 @@ def set_faster_whisper_model(model: str, auto_update: bool = False):
             "compute_type": "int8",
             "download_root": WHISPER_MODEL_DIR,
             "local_files_only": not auto_update,
+            # 允许多个分段并行转写
+            "num_workers": AUDIO_STT_MAX_WORKERS,
         }
 
         try:
@@ -829,21 +808,36 @@ def transcription_handler(request, file_path, metadata):
             )
 
 
+def get_transcript_cache_key(
+    request: Request, file_path: str, metadata: Optional[dict] = None
+) -> str:
+    config = request.app.state.config
+    language = WHISPER_LANGUAGE or (metadata or {}).get("language")
+    model = config.WHISPER_MODEL if config.STT_ENGINE == "" else config.STT_MODEL
+    return TranscriptCache.make_key(
+        hash_file(file_path), config.STT_ENGINE, model, language
+    )
+
+
 def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
     log.info(f"transcribe: {file_path} {metadata}")
 
-    if is_audio_conversion_required(file_path):
-        file_path = convert_audio_to_mp3(file_path)
-
-    try:
-        file_path = compress_audio(file_path)
-    except Exception as e:
-        log.exception(e)
+    cache_key = None
+    if AUDIO_STT_CACHE_ENABLED:
+        cache_key = get_transcript_cache_key(request, file_path, metadata)
+        cached = TRANSCRIPT_CACHE.get(cache_key)
+        if cached is not None:
+            log.info(f"transcribe: cache hit for {file_path}")
+            return cached
 
-    # Always produce a list of chunk paths (could be one entry if small)
+    # 单次流式解码并按时间切段（相邻分段有重叠），格式统一为 16kHz 单声道 WAV
     try:
-        chunk_paths = split_audio(file_path, MAX_FILE_SIZE)
-        print(f"Chunk paths: {chunk_paths}")
+        segments = segment_audio(
+            file_path,
+            min(AUDIO_STT_SEGMENT_SECONDS, MAX_SEGMENT_SECONDS),
+            AUDIO_STT_SEGMENT_OVERLAP_SECONDS,
+        )
+        log.debug(f"transcribe: {len(segments)} segments for {file_path}")
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -851,97 +845,38 @@ def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None
             detail=ERROR_MESSAGES.DEFAULT(e),
         )
 
-    results = []
     try:
-        with ThreadPoolExecutor() as executor:
-            # Submit tasks for each chunk_path
+        with ThreadPoolExecutor(
+            max_workers=min(AUDIO_STT_MAX_WORKERS, len(segments))
+        ) as executor:
             futures = [
-                executor.submit(transcription_handler, request, chunk_path, metadata)
-                for chunk_path in chunk_paths
+                executor.submit(transcription_handler, request, segment.path, metadata)
+                for segment in segments
             ]
-            # Gather results as they complete
+            # 按分段顺序收集结果
+            results = []
             for future in futures:
                 try:
                     results.append(future.result())
                 except Exception as transcribe_exc:
+                    for pending in futures:
+                        pending.cancel()
                     raise HTTPException(
                         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                         detail=f"Error transcribing chunk: {transcribe_exc}",
                     )
     finally:
-        # Clean up only the temporary chunks, never the original file
-        for chunk_path in chunk_paths:
-            if chunk_path != file_path and os.path.isfile(chunk_path):
-                try:
-                    os.remove(chunk_path)
-                except Exception:
-                    pass
-
-    return {
-        "text": " ".join([result["text"] for result in results]),
-    }
-
-
-def compress_audio(file_path):
-    if os.path.getsize(file_path) > MAX_FILE_SIZE:
-        id = os.path.splitext(os.path.basename(file_path))[
-            0
-        ]  # Handles names with multiple dots
-        file_dir = os.path.dirname(file_path)
-
-        audio = AudioSegment.from_file(file_path)
-        audio = audio.set_frame_rate(16000).set_channels(1)  # Compress audio
-
-        compressed_path = os.path.join(file_dir, f"{id}_compressed.mp3")
-        audio.export(compressed_path, format="mp3", bitrate="32k")
-        # log.debug(f"Compressed audio to {compressed_path}")  # Uncomment if log is defined
+        remove_segments(segments)
 
-        return compressed_path
-    else:
-        return file_path
-
-
-def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
-    """
-    Splits audio into chunks not exceeding max_bytes.
-    Returns a list of chunk file paths. If audio fits, returns list with original path.
-    """
-    file_size = os.path.getsize(file_path)
-    if file_size <= max_bytes:
-        return [file_path]  # Nothing to split
-
-    audio = AudioSegment.from_file(file_path)
-    duration_ms = len(audio)
-    orig_size = file_size
-
-    approx_chunk_ms = max(int(duration_ms * (max_bytes / orig_size)) - 1000, 1000)
-    chunks = []
-    start = 0
-    i = 0
+    data = {"text": merge_transcripts([result["text"] for result in results])}
 
-    base, _ = os.path.splitext(file_path)
-
-    while start < duration_ms:
-        end = min(start + approx_chunk_ms, duration_ms)
-        chunk = audio[start:end]
-        chunk_path = f"{base}_chunk_{i}.{format}"
-        chunk.export(chunk_path, format=format, bitrate=bitrate)
-
-        # Reduce chunk duration if still too large
-        while os.path.getsize(chunk_path) > max_bytes and (end - start) > 5000:
-            end = start + ((end - start) // 2)
-            chunk = audio[start:end]
-            chunk.export(chunk_path, format=format, bitrate=bitrate)
-
-        if os.path.getsize(chunk_path) > max_bytes:
-            os.remove(chunk_path)
-            raise Exception("Audio chunk cannot be reduced below max file size.")
-
-        chunks.append(chunk_path)
-        start = end
-        i += 1
+    if cache_key:
+        try:
+            TRANSCRIPT_CACHE.set(cache_key, data)
+        except Exception as e:
+            log.warning(f"Failed to cache transcript: {e}")
 
-    return chunks
+    return data
 
 
 @router.post("/transcriptions")
@@ -976,14 +911,13 @@ def transcription(
         id = uuid.uuid4()
 
         filename = f"{id}.{ext}"
-        contents = file.file.read()
 
         file_dir = f"{CACHE_DIR}/audio/transcriptions"
         os.makedirs(file_dir, exist_ok=True)
         file_path = f"{file_dir}/{filename}"
 
         with open(file_path, "wb") as f:
-            f.write(contents)
+            shutil.copyfileobj(file.file, f)
 
         try:
             metadata = None
@@ -16,7 +16,7 @@ from pydantic import BaseModel, Field
 
 from open_webui.models.users import Users, User
 from open_webui.models.billing import ModelPricings, BillingLogs, RechargeLogs, BillingLog
-from open_webui.billing.core import RECHARGE_TIERS
+from open_webui.billing.core import RECHARGE_TIERS, invalidate_model_pricing
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.billing import recharge_user
 from open_webui.internal.db import get_db, SQLALCHEMY_DATABASE_URL
@@ -419,6 +419,7 @@ async def set_pricing(req: PricingRequest, admin=Depends(get_admin_user)):
             input_price=req.input_price,
             output_price=req.output_price,
         )
+        invalidate_model_pricing(pricing.model_id)
 
         return PricingResponse(
             model_id=pricing.model_id,
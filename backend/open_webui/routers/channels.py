@@ -187,33 +187,10 @@ async def get_channel_messages(
             status_code=status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.DEFAULT()
         )
 
-    message_list = Messages.get_messages_by_channel_id(id, skip, limit)
-    users = {}
-
-    messages = []
-    for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
-        thread_replies = Messages.get_thread_replies_by_message_id(message.id)
-        latest_thread_reply_at = (
-            thread_replies[0].created_at if thread_replies else None
-        )
-
-        messages.append(
-            MessageUserResponse(
-                **{
-                    **message.model_dump(),
-                    "reply_count": len(thread_replies),
-                    "latest_reply_at": latest_thread_reply_at,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
-                }
-            )
-        )
-
-    return messages
+    return [
+        MessageUserResponse(**message.model_dump())
+        for message in Messages.get_channel_message_page(id, skip, limit)
+    ]
 
 
 ############################
@@ -307,15 +284,9 @@ async def model_response_handler(request, channel, message, user):
 
                 thread_history = []
                 images = []
-                message_users = {}
 
                 for thread_message in thread_messages:
-                    message_user = None
-                    if thread_message.user_id not in message_users:
-                        message_user = Users.get_user_by_id(thread_message.user_id)
-                        message_users[thread_message.user_id] = message_user
-                    else:
-                        message_user = message_users[thread_message.user_id]
+                    message_user = thread_message.user
 
                     if thread_message.meta and thread_message.meta.get(
                         "model_id", None
@@ -594,22 +565,19 @@ async def get_channel_thread_messages(
         )
 
     message_list = Messages.get_messages_by_parent_id(id, message_id, skip, limit)
-    users = {}
+    reactions = Messages.get_reactions_by_message_ids(
+        [message.id for message in message_list]
+    )
 
     messages = []
     for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
         messages.append(
             MessageUserResponse(
                 **{
                     **message.model_dump(),
                     "reply_count": 0,
                     "latest_reply_at": None,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
+                    "reactions": reactions.get(message.id, []),
                 }
             )
         )
@@ -31,7 +31,7 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
-def _delete_chat_summary_collection(request: Request, user_id: str, chat_id: str) -> None:
+async def _delete_chat_summary_collection(request: Request, user_id: str, chat_id: str) -> None:
     try:
         store = SummaryChromaStore(request, user_id, chat_id)
         collection_name = store.collection_name
@@ -46,10 +46,11 @@ def _delete_chat_summary_collection(request: Request, user_id: str, chat_id: str
         if not vector_client:
             return
 
-        if hasattr(vector_client, "has_collection") and not vector_client.has_collection(collection_name):
+        if not await vector_client.ahas_collection(collection_name):
             return
 
-        vector_client.delete_collection(collection_name)
+        await vector_client.adelete_collection(collection_name)
+        store.invalidate_cache()
     except Exception as e:
         log.warning(f"delete_chat_summary_collection failed: chat_id={chat_id} error={e}")
 
@@ -130,7 +131,7 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
         if not chat_id and isinstance(chat, dict):
             chat_id = chat.get("id")
         if chat_id:
-            _delete_chat_summary_collection(request, user.id, chat_id)
+            await _delete_chat_summary_collection(request, user.id, chat_id)
 
     result = Chats.delete_chats_by_user_id(user.id)
     return result
@@ -820,7 +821,7 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
         await mem0_delete(chat.user_id, id)
 
         # 删除该聊天对应的 summary 向量集合
-        _delete_chat_summary_collection(request, chat.user_id, id)
+        await _delete_chat_summary_collection(request, chat.user_id, id)
 
         # 清理孤立标签（仅被该聊天使用的标签）
         for tag in chat.meta.get("tags", []):
@@ -855,7 +856,7 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
         await mem0_delete(user.id, id)
 
         # 删除该聊天对应的 summary 向量集合
-        _delete_chat_summary_collection(request, user.id, id)
+        await _delete_chat_summary_collection(request, user.id, id)
 
         # 清理孤立标签
         for tag in chat.meta.get("tags", []):
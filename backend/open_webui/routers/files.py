@@ -198,7 +198,7 @@ def upload_file_handler(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(
+        file_size, file_path = Storage.upload_file(
             file.file,
             filename,
             {
@@ -222,7 +222,7 @@ def upload_file_handler(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": file_size,
                         "data": file_metadata,
                     },
                 }
@@ -341,7 +341,7 @@ async def delete_all_files(user=Depends(get_admin_user)):
     if result:
         try:
             Storage.delete_all_files()
-            VECTOR_DB_CLIENT.reset()
+            await VECTOR_DB_CLIENT.areset()
         except Exception as e:
             log.exception(e)
             log.error("Error deleting files")
@@ -721,7 +721,7 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
         if result:
             try:
                 Storage.delete_file(file.path)
-                VECTOR_DB_CLIENT.delete(collection_name=f"file-{id}")
+                await VECTOR_DB_CLIENT.adelete(collection_name=f"file-{id}")
             except Exception as e:
                 log.exception(e)
                 log.error("Error deleting files")
@@ -5,10 +5,13 @@ import json
 import logging
 import mimetypes
 import re
+import tempfile
+import time
 from pathlib import Path
 from typing import Optional
 
 from urllib.parse import quote
+import aiohttp
 import requests
 from fastapi import (
     APIRouter,
@@ -17,10 +20,17 @@ from fastapi import (
     Request,
     UploadFile,
 )
+from starlette.concurrency import run_in_threadpool
 
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import ENABLE_FORWARD_USER_INFO_HEADERS, SRC_LOG_LEVELS
+from open_webui.env import (
+    ENABLE_FORWARD_USER_INFO_HEADERS,
+    IMAGE_GENERATION_CONCURRENCY,
+    IMAGE_GENERATION_SPOOL_SIZE,
+    IMAGE_GENERATION_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
 from open_webui.routers.files import upload_file_handler
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.images.comfyui import (
@@ -28,6 +38,7 @@ from open_webui.utils.images.comfyui import (
     ComfyUIWorkflow,
     comfyui_generate_image,
 )
+from open_webui.utils.upstream_pool import UpstreamPool
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -39,6 +50,47 @@ IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 router = APIRouter()
 
+# 图片生成后端（Automatic1111 / ComfyUI / OpenAI / Gemini）共用的连接池
+images_pool = UpstreamPool("images")
+
+# 下载生成结果时每次读取的块大小
+IMAGE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def _request_json(method: str, url: str, **kwargs):
+    """
+    通过连接池请求图片生成后端并解析 JSON
+
+    HTTP 错误时抛出异常，异常信息优先使用上游返回的 error.message
+    """
+    start = time.monotonic()
+    try:
+        async with images_pool.get_session(url).request(
+            method,
+            url,
+            timeout=aiohttp.ClientTimeout(total=IMAGE_GENERATION_TIMEOUT),
+            **kwargs,
+        ) as r:
+            try:
+                res = await r.json(content_type=None)
+            except Exception:
+                res = None
+
+            if r.status >= 500:
+                images_pool.record_failure(url, f"HTTP {r.status}")
+            else:
+                images_pool.record_success(url, time.monotonic() - start)
+
+            if r.status >= 400:
+                error = res.get("error") if isinstance(res, dict) else None
+                if isinstance(error, dict):
+                    error = error.get("message")
+                raise Exception(error or f"{r.status}, message='{r.reason}'")
+            return res
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+        images_pool.record_failure(url, e)
+        raise
+
 
 @router.get("/config")
 async def get_config(request: Request, user=Depends(get_admin_user)):
@@ -209,11 +261,11 @@ def get_automatic1111_api_auth(request: Request):
 async def verify_url(request: Request, user=Depends(get_admin_user)):
     if request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111":
         try:
-            r = requests.get(
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+            await _request_json(
+                "GET",
+                f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
                 headers={"authorization": get_automatic1111_api_auth(request)},
             )
-            r.raise_for_status()
             return True
         except Exception:
             request.app.state.config.ENABLE_IMAGE_GENERATION = False
@@ -227,11 +279,11 @@ async def verify_url(request: Request, user=Depends(get_admin_user)):
             }
 
         try:
-            r = requests.get(
-                url=f"{request.app.state.config.COMFYUI_BASE_URL}/object_info",
+            await _request_json(
+                "GET",
+                f"{request.app.state.config.COMFYUI_BASE_URL}/object_info",
                 headers=headers,
             )
-            r.raise_for_status()
             return True
         except Exception:
             request.app.state.config.ENABLE_IMAGE_GENERATION = False
@@ -240,27 +292,28 @@ async def verify_url(request: Request, user=Depends(get_admin_user)):
         return True
 
 
-def set_image_model(request: Request, model: str):
+async def set_image_model(request: Request, model: str):
     log.info(f"Setting image model to {model}")
     request.app.state.config.IMAGE_GENERATION_MODEL = model
     if request.app.state.config.IMAGE_GENERATION_ENGINE in ["", "automatic1111"]:
         api_auth = get_automatic1111_api_auth(request)
-        r = requests.get(
-            url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+        options = await _request_json(
+            "GET",
+            f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
             headers={"authorization": api_auth},
         )
-        options = r.json()
         if model != options["sd_model_checkpoint"]:
             options["sd_model_checkpoint"] = model
-            r = requests.post(
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+            await _request_json(
+                "POST",
+                f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
                 json=options,
                 headers={"authorization": api_auth},
             )
     return request.app.state.config.IMAGE_GENERATION_MODEL
 
 
-def get_image_model(request):
+async def get_image_model(request):
     if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
         return (
             request.app.state.config.IMAGE_GENERATION_MODEL
@@ -284,11 +337,11 @@ def get_image_model(request):
         or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
     ):
         try:
-            r = requests.get(
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
+            options = await _request_json(
+                "GET",
+                f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
                 headers={"authorization": get_automatic1111_api_auth(request)},
             )
-            options = r.json()
             return options["sd_model_checkpoint"]
         except Exception as e:
             request.app.state.config.ENABLE_IMAGE_GENERATION = False
@@ -314,7 +367,7 @@ async def get_image_config(request: Request, user=Depends(get_admin_user)):
 async def update_image_config(
     request: Request, form_data: ImageConfigForm, user=Depends(get_admin_user)
 ):
-    set_image_model(request, form_data.MODEL)
+    await set_image_model(request, form_data.MODEL)
 
     if form_data.IMAGE_SIZE == "auto" and form_data.MODEL != "gpt-image-1":
         raise HTTPException(
@@ -438,45 +491,59 @@ class GenerateImageForm(BaseModel):
     negative_prompt: Optional[str] = None
 
 
+def _parse_b64_image(b64_str: str) -> tuple[str, str]:
+    if "," in b64_str:
+        header, encoded = b64_str.split(",", 1)
+        mime_type = header.split(";")[0].lstrip("data:")
+    else:
+        mime_type = "image/png"
+        encoded = b64_str
+    return encoded, mime_type
+
+
 def load_b64_image_data(b64_str):
     try:
-        if "," in b64_str:
-            header, encoded = b64_str.split(",", 1)
-            mime_type = header.split(";")[0].lstrip("data:")
-            img_data = base64.b64decode(encoded)
-        else:
-            mime_type = "image/png"
-            img_data = base64.b64decode(b64_str)
-        return img_data, mime_type
+        encoded, mime_type = _parse_b64_image(b64_str)
+        return base64.b64decode(encoded), mime_type
     except Exception as e:
         log.exception(f"Error loading image data: {e}")
         return None, None
 
 
-def load_url_image_data(url, headers=None):
-    try:
-        if headers:
-            r = requests.get(url, headers=headers)
-        else:
-            r = requests.get(url)
+def _write_b64_image(b64_str: str, file) -> str:
+    """分块解码 base64 图片并写入 file，不在内存中保留完整的解码结果；返回 MIME 类型"""
+    encoded, mime_type = _parse_b64_image(b64_str)
+    if "\n" in encoded:
+        # 按 4 字符对齐分块，换行会打乱对齐
+        encoded = "".join(encoded.split())
+
+    step = 4 * 256 * 1024
+    for i in range(0, len(encoded), step):
+        file.write(base64.b64decode(encoded[i : i + step]))
+    return mime_type
+
 
+async def _download_image(url: str, headers: Optional[dict], file) -> str:
+    """按块下载图片并写入 file，返回 MIME 类型"""
+    async with images_pool.get_session(url).get(
+        url,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(total=IMAGE_GENERATION_TIMEOUT),
+    ) as r:
         r.raise_for_status()
-        if r.headers["content-type"].split("/")[0] == "image":
-            mime_type = r.headers["content-type"]
-            return r.content, mime_type
-        else:
-            log.error("Url does not point to an image.")
-            return None
+        content_type = r.headers.get("content-type", "")
+        if content_type.split("/")[0] != "image":
+            raise Exception("Url does not point to an image.")
 
-    except Exception as e:
-        log.exception(f"Error saving image: {e}")
-        return None
+        async for chunk in r.content.iter_chunked(IMAGE_DOWNLOAD_CHUNK_SIZE):
+            file.write(chunk)
+        return content_type
 
 
-def upload_image(request, image_data, content_type, metadata, user):
+def _upload_image_file(request, file, content_type, metadata, user) -> str:
     image_format = mimetypes.guess_extension(content_type)
-    file = UploadFile(
-        file=io.BytesIO(image_data),
+    upload = UploadFile(
+        file=file,
         filename=f"generated-image{image_format}",  # will be converted to a unique ID on upload_file
         headers={
             "content-type": content_type,
@@ -484,7 +551,7 @@ def upload_image(request, image_data, content_type, metadata, user):
     )
     file_item = upload_file_handler(
         request,
-        file=file,
+        file=upload,
         metadata=metadata,
         process=False,
         user=user,
@@ -493,6 +560,50 @@ def upload_image(request, image_data, content_type, metadata, user):
     return url
 
 
+def upload_image(request, image_data, content_type, metadata, user):
+    return _upload_image_file(
+        request, io.BytesIO(image_data), content_type, metadata, user
+    )
+
+
+async def _save_image(request, image: dict, metadata, user, semaphore) -> dict:
+    """
+    将一张生成结果写入存储
+
+    image 为 {"url": ..., "headers": ...} 或 {"b64": ...}。图片按块写入缓冲文件，
+    超过 IMAGE_GENERATION_SPOOL_SIZE 后转存到磁盘，再由存储层按块读取上传
+    """
+    async with semaphore:
+        with tempfile.SpooledTemporaryFile(
+            max_size=IMAGE_GENERATION_SPOOL_SIZE
+        ) as file:
+            if "url" in image:
+                content_type = await _download_image(
+                    image["url"], image.get("headers"), file
+                )
+            else:
+                content_type = await run_in_threadpool(
+                    _write_b64_image, image["b64"], file
+                )
+            file.seek(0)
+            url = await run_in_threadpool(
+                _upload_image_file, request, file, content_type, metadata, user
+            )
+    return {"url": url}
+
+
+async def _save_images(request, images: list[dict], metadata, user) -> list[dict]:
+    semaphore = asyncio.Semaphore(IMAGE_GENERATION_CONCURRENCY)
+    return list(
+        await asyncio.gather(
+            *[
+                _save_image(request, image, metadata, user, semaphore)
+                for image in images
+            ]
+        )
+    )
+
+
 @router.post("/generations")
 async def image_generations(
     request: Request,
@@ -514,9 +625,8 @@ async def image_generations(
         size = form_data.size
 
     width, height = tuple(map(int, size.split("x")))
-    model = get_image_model(request)
+    model = await get_image_model(request)
 
-    r = None
     try:
         if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
             headers = {}
@@ -553,28 +663,32 @@ async def image_generations(
                     f"?api-version={request.app.state.config.IMAGES_OPENAI_API_VERSION}"
                 )
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.IMAGES_OPENAI_API_BASE_URL}/images/generations{api_version_query_param}",
-                json=data,
-                headers=headers,
-            )
-
-            r.raise_for_status()
-            res = r.json()
+            # 每个请求只生成一张（dall-e-3 不支持 n > 1），n 张并发生成
+            semaphore = asyncio.Semaphore(IMAGE_GENERATION_CONCURRENCY)
 
-            images = []
+            async def generate():
+                async with semaphore:
+                    return await _request_json(
+                        "POST",
+                        f"{request.app.state.config.IMAGES_OPENAI_API_BASE_URL}/images/generations{api_version_query_param}",
+                        json={**data, "n": 1},
+                        headers=headers,
+                    )
 
-            for image in res["data"]:
-                if image_url := image.get("url", None):
-                    image_data, content_type = load_url_image_data(image_url, headers)
-                else:
-                    image_data, content_type = load_b64_image_data(image["b64_json"])
+            results = await asyncio.gather(
+                *[generate() for _ in range(max(form_data.n, 1))]
+            )
 
-                url = upload_image(request, image_data, content_type, data, user)
-                images.append({"url": url})
-            return images
+            images = [
+                (
+                    {"url": image["url"], "headers": headers}
+                    if image.get("url", None)
+                    else {"b64": image["b64_json"]}
+                )
+                for res in results
+                for image in res["data"]
+            ]
+            return await _save_images(request, images, data, user)
 
         elif request.app.state.config.IMAGE_GENERATION_ENGINE == "gemini":
             headers = {}
@@ -589,26 +703,17 @@ async def image_generations(
                 },
             }
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.IMAGES_GEMINI_API_BASE_URL}/models/{model}:predict",
+            res = await _request_json(
+                "POST",
+                f"{request.app.state.config.IMAGES_GEMINI_API_BASE_URL}/models/{model}:predict",
                 json=data,
                 headers=headers,
             )
 
-            r.raise_for_status()
-            res = r.json()
-
-            images = []
-            for image in res["predictions"]:
-                image_data, content_type = load_b64_image_data(
-                    image["bytesBase64Encoded"]
-                )
-                url = upload_image(request, image_data, content_type, data, user)
-                images.append({"url": url})
-
-            return images
+            images = [
+                {"b64": image["bytesBase64Encoded"]} for image in res["predictions"]
+            ]
+            return await _save_images(request, images, data, user)
 
         elif request.app.state.config.IMAGE_GENERATION_ENGINE == "comfyui":
             data = {
@@ -644,31 +749,24 @@ async def image_generations(
             )
             log.debug(f"res: {res}")
 
-            images = []
-
-            for image in res["data"]:
-                headers = None
-                if request.app.state.config.COMFYUI_API_KEY:
-                    headers = {
-                        "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
-                    }
-
-                image_data, content_type = load_url_image_data(image["url"], headers)
-                url = upload_image(
-                    request,
-                    image_data,
-                    content_type,
-                    form_data.model_dump(exclude_none=True),
-                    user,
-                )
-                images.append({"url": url})
-            return images
+            headers = None
+            if request.app.state.config.COMFYUI_API_KEY:
+                headers = {
+                    "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
+                }
+
+            images = [
+                {"url": image["url"], "headers": headers} for image in res["data"]
+            ]
+            return await _save_images(
+                request, images, form_data.model_dump(exclude_none=True), user
+            )
         elif (
             request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111"
             or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
         ):
             if form_data.model:
-                set_image_model(request, form_data.model)
+                await set_image_model(request, form_data.model)
 
             data = {
                 "prompt": form_data.prompt,
@@ -692,34 +790,17 @@ async def image_generations(
             if request.app.state.config.AUTOMATIC1111_SCHEDULER:
                 data["scheduler"] = request.app.state.config.AUTOMATIC1111_SCHEDULER
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/txt2img",
+            res = await _request_json(
+                "POST",
+                f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/txt2img",
                 json=data,
                 headers={"authorization": get_automatic1111_api_auth(request)},
             )
-
-            res = r.json()
             log.debug(f"res: {res}")
 
-            images = []
-
-            for image in res["images"]:
-                image_data, content_type = load_b64_image_data(image)
-                url = upload_image(
-                    request,
-                    image_data,
-                    content_type,
-                    {**data, "info": res["info"]},
-                    user,
-                )
-                images.append({"url": url})
-            return images
+            images = [{"b64": image} for image in res["images"]]
+            return await _save_images(
+                request, images, {**data, "info": res["info"]}, user
+            )
     except Exception as e:
-        error = e
-        if r != None:
-            data = r.json()
-            if "error" in data:
-                error = data["error"]["message"]
-        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(error))
+        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(e))
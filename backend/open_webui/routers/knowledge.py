@@ -10,6 +10,10 @@ from open_webui.models.knowledge import (
     KnowledgeUserResponse,
 )
 from open_webui.models.files import Files, FileModel, FileMetadataResponse
+from open_webui.models.knowledge_reindex import (
+    KnowledgeReindexJobs,
+    KnowledgeReindexJobModel,
+)
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 from open_webui.routers.retrieval import (
     process_file,
@@ -20,7 +24,8 @@ from open_webui.routers.retrieval import (
 from open_webui.storage.provider import Storage
 
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.utils.auth import get_verified_user
+from open_webui.utils.auth import get_verified_user, get_admin_user
+from open_webui.utils.knowledge_reindex import create_reindex_job, start_reindex_job
 from open_webui.utils.access_control import has_access, has_permission
 
 
@@ -179,7 +184,7 @@ async def create_new_knowledge(
 ############################
 
 
-@router.post("/reindex", response_model=bool)
+@router.post("/reindex", response_model=Optional[KnowledgeReindexJobModel])
 async def reindex_knowledge_files(request: Request, user=Depends(get_verified_user)):
     if user.role != "admin":
         raise HTTPException(
@@ -187,72 +192,38 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
             detail=ERROR_MESSAGES.UNAUTHORIZED,
         )
 
-    knowledge_bases = Knowledges.get_knowledge_bases()
+    # 已有未完成的任务时直接返回它，避免重复清空 collection
+    job = KnowledgeReindexJobs.get_active_job()
+    if job:
+        start_reindex_job(request.app, job.id)
+        return job
 
-    log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
+    job = create_reindex_job(user.id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Failed to create reindex job"),
+        )
 
-    deleted_knowledge_bases = []
+    log.info(f"Enqueued reindex job {job.id} for {job.total} knowledge files")
+    start_reindex_job(request.app, job.id)
+    return job
 
-    for knowledge_base in knowledge_bases:
-        # -- Robust error handling for missing or invalid data
-        if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
-            log.warning(
-                f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
-            )
-            try:
-                Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
-                deleted_knowledge_bases.append(knowledge_base.id)
-            except Exception as e:
-                log.error(
-                    f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
-                )
-            continue
-
-        try:
-            file_ids = knowledge_base.data.get("file_ids", [])
-            files = Files.get_files_by_ids(file_ids)
-            try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
-                    )
-            except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                continue  # Skip, don't raise
-
-            failed_files = []
-            for file in files:
-                try:
-                    process_file(
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
-                    )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
-                    )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
 
-        except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            # Don't raise, just continue
-            continue
+@router.get("/reindex/jobs", response_model=list[KnowledgeReindexJobModel])
+async def get_reindex_jobs(user=Depends(get_admin_user)):
+    return KnowledgeReindexJobs.get_jobs()
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
 
-    log.info(
-        f"Reindexing completed. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
-    )
-    return True
+@router.get("/reindex/jobs/{job_id}", response_model=KnowledgeReindexJobModel)
+async def get_reindex_job_by_id(job_id: str, user=Depends(get_admin_user)):
+    job = KnowledgeReindexJobs.get_job_by_id(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return job
 
 
 ############################
@@ -657,7 +628,7 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 
     # Clean up vector DB
     try:
-        VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        await VECTOR_DB_CLIENT.adelete_collection(collection_name=id)
     except Exception as e:
         log.debug(e)
         pass
@@ -690,7 +661,7 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
         )
 
     try:
-        VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        await VECTOR_DB_CLIENT.adelete_collection(collection_name=id)
     except Exception as e:
         log.debug(e)
         pass
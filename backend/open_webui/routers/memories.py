@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 import logging
 from typing import Optional
 
@@ -88,9 +89,12 @@ async def query_memory(
     if not memories:
         raise HTTPException(status_code=404, detail="No memories found for user")
 
-    results = VECTOR_DB_CLIENT.search(
+    vector = await run_in_threadpool(
+        request.app.state.EMBEDDING_FUNCTION, form_data.content, user=user
+    )
+    results = await VECTOR_DB_CLIENT.asearch(
         collection_name=f"user-memory-{user.id}",
-        vectors=[request.app.state.EMBEDDING_FUNCTION(form_data.content, user=user)],
+        vectors=[vector],
         limit=form_data.k,
     )
 
@@ -104,24 +108,28 @@ async def query_memory(
 async def reset_memory_from_vector_db(
     request: Request, user=Depends(get_verified_user)
 ):
-    VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+    await VECTOR_DB_CLIENT.adelete_collection(f"user-memory-{user.id}")
 
     memories = Memories.get_memories_by_user_id(user.id)
-    VECTOR_DB_CLIENT.upsert(
+    vectors = await run_in_threadpool(
+        lambda: [
+            request.app.state.EMBEDDING_FUNCTION(memory.content, user=user)
+            for memory in memories
+        ]
+    )
+    await VECTOR_DB_CLIENT.aupsert(
         collection_name=f"user-memory-{user.id}",
         items=[
             {
                 "id": memory.id,
                 "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
-                ),
+                "vector": vector,
                 "metadata": {
                     "created_at": memory.created_at,
                     "updated_at": memory.updated_at,
                 },
             }
-            for memory in memories
+            for memory, vector in zip(memories, vectors)
         ],
     )
 
@@ -139,7 +147,7 @@ async def delete_memory_by_user_id(user=Depends(get_verified_user)):
 
     if result:
         try:
-            VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+            await VECTOR_DB_CLIENT.adelete_collection(f"user-memory-{user.id}")
         except Exception as e:
             log.error(e)
         return True
@@ -166,15 +174,16 @@ async def update_memory_by_id(
         raise HTTPException(status_code=404, detail="Memory not found")
 
     if form_data.content is not None:
-        VECTOR_DB_CLIENT.upsert(
+        vector = await run_in_threadpool(
+            request.app.state.EMBEDDING_FUNCTION, memory.content, user=user
+        )
+        await VECTOR_DB_CLIENT.aupsert(
             collection_name=f"user-memory-{user.id}",
             items=[
                 {
                     "id": memory.id,
                     "text": memory.content,
-                    "vector": request.app.state.EMBEDDING_FUNCTION(
-                        memory.content, user=user
-                    ),
+                    "vector": vector,
                     "metadata": {
                         "created_at": memory.created_at,
                         "updated_at": memory.updated_at,
@@ -196,7 +205,7 @@ async def delete_memory_by_id(memory_id: str, user=Depends(get_verified_user)):
     result = Memories.delete_memory_by_id_and_user_id(memory_id, user.id)
 
     if result:
-        VECTOR_DB_CLIENT.delete(
+        await VECTOR_DB_CLIENT.adelete(
             collection_name=f"user-memory-{user.id}", ids=[memory_id]
         )
         return True
@@ -14,7 +14,6 @@ from datetime import datetime
 from typing import Optional, Union
 from urllib.parse import urlparse
 import aiohttp
-from aiocache import cached
 import requests
 from urllib.parse import quote
 
@@ -38,8 +37,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict, validator
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 
+from open_webui.models.groups import Groups
 from open_webui.models.models import Models
 from open_webui.utils.misc import (
     calculate_sha256,
@@ -49,8 +50,10 @@ from open_webui.utils.payload import (
     apply_model_params_to_body_openai,
     apply_system_prompt_to_body,
 )
+from open_webui.utils import admission
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.upstream_pool import UpstreamPool
 
 
 from open_webui.config import (
@@ -60,6 +63,11 @@ from open_webui.env import (
     ENV,
     SRC_LOG_LEVELS,
     MODELS_CACHE_TTL,
+    OLLAMA_MODELS_STALE_TTL,
+    OLLAMA_POOL_LIMIT_PER_HOST,
+    OLLAMA_POOL_KEEPALIVE_TIMEOUT,
+    OLLAMA_UNHEALTHY_THRESHOLD,
+    OLLAMA_UNHEALTHY_COOLDOWN,
     AIOHTTP_CLIENT_SESSION_SSL,
     AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
@@ -70,6 +78,15 @@ from open_webui.constants import ERROR_MESSAGES
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 
+# 所有 Ollama 请求共用的连接池，每个地址一个长期 session
+ollama_pool = UpstreamPool(
+    "ollama",
+    limit_per_host=OLLAMA_POOL_LIMIT_PER_HOST,
+    keepalive_timeout=OLLAMA_POOL_KEEPALIVE_TIMEOUT,
+    unhealthy_threshold=OLLAMA_UNHEALTHY_THRESHOLD,
+    unhealthy_cooldown=OLLAMA_UNHEALTHY_COOLDOWN,
+)
+
 
 ##########################################
 #
@@ -79,42 +96,60 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 
 
 async def send_get_request(url, key=None, user: UserModel = None):
+    # 冷却期内的不健康地址直接跳过，避免每次拉取模型列表都等待超时；
+    # 冷却期结束后只有一个请求作为探测发出
+    if not ollama_pool.allow_request(url):
+        log.debug(f"Skipping unhealthy Ollama upstream: {url}")
+        return None
+
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
+    start = time.monotonic()
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email or "",
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        async with ollama_pool.get_session(url).get(
+            url,
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email or "",
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            if response.status >= 500:
+                ollama_pool.record_failure(url, f"HTTP {response.status}")
+            else:
+                ollama_pool.record_success(url, time.monotonic() - start)
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
+        if isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+            ollama_pool.record_failure(url, e)
         return None
 
 
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    session: Optional[aiohttp.ClientSession] = None,
+    admission_slot: Optional[admission.AdmissionSlot] = None,
 ):
     if response:
-        response.close()
+        # 已读完的连接归还连接池，未读完的连接会被关闭
+        response.release()
     if session:
         await session.close()
+    if admission_slot:
+        # 流未被迭代（客户端提前断开、外层包装抛错）时由这里释放；已释放时为空操作
+        await admission_slot.release()
 
 
 async def send_post_request(
@@ -125,43 +160,52 @@ async def send_post_request(
     content_type: Optional[str] = None,
     user: UserModel = None,
     metadata: Optional[dict] = None,
+    admission_slot: Optional[admission.AdmissionSlot] = None,
 ):
+    """admission_slot：调用方已获取的准入槽位，请求结束（流式则为流结束）后释放"""
 
     r = None
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        session = ollama_pool.get_session(url)
+        try:
+            r = await session.post(
+                url,
+                data=payload,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+                headers={
+                    "Content-Type": "application/json",
+                    **({"Authorization": f"Bearer {key}"} if key else {}),
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email or "",
+                            "X-OpenWebUI-User-Role": user.role,
+                            **(
+                                {"X-OpenWebUI-Chat-Id": metadata.get("chat_id")}
+                                if metadata and metadata.get("chat_id")
+                                else {}
+                            ),
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                        else {}
+                    ),
+                },
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            )
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            ollama_pool.record_failure(url, e)
+            raise
 
-        r = await session.post(
-            url,
-            data=payload,
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email or "",
-                        "X-OpenWebUI-User-Role": user.role,
-                        **(
-                            {"X-OpenWebUI-Chat-Id": metadata.get("chat_id")}
-                            if metadata and metadata.get("chat_id")
-                            else {}
-                        ),
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            ssl=AIOHTTP_CLIENT_SESSION_SSL,
-        )
+        if r.status >= 500:
+            ollama_pool.record_failure(url, f"HTTP {r.status}")
+        else:
+            ollama_pool.record_success(url)
 
         if r.ok is False:
             try:
                 res = await r.json()
-                await cleanup_response(r, session)
+                await cleanup_response(r)
                 if "error" in res:
                     raise HTTPException(status_code=r.status, detail=res["error"])
             except HTTPException as e:
@@ -180,21 +224,31 @@ async def send_post_request(
             if content_type:
                 response_headers["Content-Type"] = content_type
 
+            content = r.content
+            stream_slot, admission_slot = admission_slot, None
+            if stream_slot:
+                # 流结束（包括客户端断开）后释放准入槽位
+                content = admission.release_after_stream(content, stream_slot)
+
             return StreamingResponse(
-                r.content,
+                content,
                 status_code=r.status,
                 headers=response_headers,
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response, response=r, admission_slot=stream_slot
                 ),
             )
         else:
             res = await r.json()
+            if admission_slot:
+                await admission_slot.release(admission.completion_tokens_of(res))
             return res
 
     except HTTPException as e:
+        await cleanup_response(r)
         raise e  # Re-raise HTTPException to be handled by FastAPI
     except Exception as e:
+        await cleanup_response(r)
         detail = f"Ollama: {e}"
 
         raise HTTPException(
@@ -203,7 +257,9 @@ async def send_post_request(
         )
     finally:
         if not stream:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
+        if admission_slot:
+            await admission_slot.release()
 
 
 def get_api_key(idx, url, configs):
@@ -293,6 +349,12 @@ async def get_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/connections")
+async def get_connections(user=Depends(get_admin_user)):
+    """各 Ollama 上游的连接与健康状态"""
+    return ollama_pool.stats()
+
+
 class OllamaConfigForm(BaseModel):
     ENABLE_OLLAMA_API: Optional[bool] = None
     OLLAMA_BASE_URLS: list[str]
@@ -315,6 +377,7 @@ async def update_config(
         for key, value in request.app.state.config.OLLAMA_API_CONFIGS.items()
         if key in keys
     }
+    invalidate_models_catalog()
 
     return {
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
@@ -340,19 +403,109 @@ def merge_ollama_models_lists(model_lists):
     return list(merged_models.values())
 
 
-@cached(
-    ttl=MODELS_CACHE_TTL,
-    key=lambda _, user: f"ollama_all_models_{user.id}" if user else "ollama_all_models",
-)
+class _ModelCatalog:
+    """
+    所有用户共享的 Ollama 模型目录
+
+    - 未超过 MODELS_CACHE_TTL：直接返回
+    - 超过 MODELS_CACHE_TTL 但未超过 OLLAMA_MODELS_STALE_TTL：返回旧目录，后台刷新
+    - 没有目录、目录过旧或连接配置已变化：等待刷新完成
+    同一时间只有一个刷新任务，并发请求共享其结果。
+    invalidate 后 generation 递增，此前发起的刷新任务完成时不再写回目录。
+    不健康的 Ollama 地址由 ollama_pool 跳过，冷却期结束后只放行一次探测。
+    """
+
+    def __init__(self):
+        self.models: Optional[dict] = None
+        self.fingerprint: Optional[str] = None
+        self.fetched_at = 0.0
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.refresh_fingerprint: Optional[str] = None
+        self.generation = 0
+
+
+_catalog = _ModelCatalog()
+
+
+def _get_catalog_fingerprint(request: Request) -> str:
+    config = request.app.state.config
+    return json.dumps(
+        [config.ENABLE_OLLAMA_API, config.OLLAMA_BASE_URLS, config.OLLAMA_API_CONFIGS],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def invalidate_models_catalog():
+    # 进行中的刷新可能拿到的是拉取 / 删除模型之前的列表，丢弃其结果
+    _catalog.generation += 1
+    _catalog.models = None
+    _catalog.fingerprint = None
+    _catalog.refresh_task = None
+    _catalog.refresh_fingerprint = None
+
+
+def _copy_models(models: dict) -> dict:
+    # 调用方会替换或修改列表与条目，返回副本避免污染共享目录
+    return {"models": [{**model} for model in models["models"]]}
+
+
+async def _refresh_catalog(request: Request, fingerprint: str, generation: int) -> dict:
+    models = await fetch_all_models(request)
+    if generation != _catalog.generation:
+        return models
+    _catalog.models = models
+    _catalog.fingerprint = fingerprint
+    _catalog.fetched_at = time.monotonic()
+    request.app.state.OLLAMA_MODELS = {
+        model["model"]: model for model in models["models"]
+    }
+    return models
+
+
+def _on_refresh_done(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        log.error(f"Failed to refresh Ollama models: {task.exception()}")
+
+
+def _start_refresh(request: Request, fingerprint: str) -> asyncio.Task:
+    task = _catalog.refresh_task
+    if task is None or task.done() or _catalog.refresh_fingerprint != fingerprint:
+        task = asyncio.create_task(
+            _refresh_catalog(request, fingerprint, _catalog.generation)
+        )
+        task.add_done_callback(_on_refresh_done)
+        _catalog.refresh_task = task
+        _catalog.refresh_fingerprint = fingerprint
+    return task
+
+
 async def get_all_models(request: Request, user: UserModel = None):
-    log.info("get_all_models()")
+    fingerprint = _get_catalog_fingerprint(request)
+
+    if _catalog.models is not None and _catalog.fingerprint == fingerprint:
+        age = time.monotonic() - _catalog.fetched_at
+        if MODELS_CACHE_TTL is None or age < MODELS_CACHE_TTL:
+            return _copy_models(_catalog.models)
+        if age < OLLAMA_MODELS_STALE_TTL:
+            _start_refresh(request, fingerprint)
+            return _copy_models(_catalog.models)
+
+    # shield：单个请求被取消时不影响其他等待同一刷新任务的请求
+    models = await asyncio.shield(_start_refresh(request, fingerprint))
+    return _copy_models(models)
+
+
+async def fetch_all_models(request: Request):
+    """从所有 Ollama 地址拉取模型列表；目录为所有用户共享，不携带用户信息头"""
+    log.info("fetch_all_models()")
     if request.app.state.config.ENABLE_OLLAMA_API:
         request_tasks = []
         for idx, url in enumerate(request.app.state.config.OLLAMA_BASE_URLS):
             if (str(idx) not in request.app.state.config.OLLAMA_API_CONFIGS) and (
                 url not in request.app.state.config.OLLAMA_API_CONFIGS  # Legacy support
             ):
-                request_tasks.append(send_get_request(f"{url}/api/tags", user=user))
+                request_tasks.append(send_get_request(f"{url}/api/tags"))
             else:
                 api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
                     str(idx),
@@ -365,9 +518,7 @@ async def get_all_models(request: Request, user: UserModel = None):
                 key = api_config.get("key", None)
 
                 if enable:
-                    request_tasks.append(
-                        send_get_request(f"{url}/api/tags", key, user=user)
-                    )
+                    request_tasks.append(send_get_request(f"{url}/api/tags", key))
                 else:
                     request_tasks.append(asyncio.ensure_future(asyncio.sleep(0, None)))
 
@@ -417,7 +568,7 @@ async def get_all_models(request: Request, user: UserModel = None):
         }
 
         try:
-            loaded_models = await get_ollama_loaded_models(request, user=user)
+            loaded_models = await get_ollama_loaded_models(request, user=None)
             expires_map = {
                 m["model"]: m["expires_at"]
                 for m in loaded_models["models"]
@@ -435,20 +586,33 @@ async def get_all_models(request: Request, user: UserModel = None):
     else:
         models = {"models": []}
 
-    request.app.state.OLLAMA_MODELS = {
-        model["model"]: model for model in models["models"]
-    }
     return models
 
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
+    # 模型与用户分组各查询一次，逐个模型的权限判断在内存中完成
+    model_infos, user_group_ids = await run_in_threadpool(
+        lambda: (
+            {
+                model_info.id: model_info
+                for model_info in Models.get_models_by_ids(
+                    [model["model"] for model in models.get("models", [])]
+                )
+            },
+            {group.id for group in Groups.get_groups_by_member_id(user.id)},
+        )
+    )
+
     filtered_models = []
     for model in models.get("models", []):
-        model_info = Models.get_model_by_id(model["model"])
+        model_info = model_infos.get(model["model"])
         if model_info:
             if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
+                user.id,
+                type="read",
+                access_control=model_info.access_control,
+                user_group_ids=user_group_ids,
             ):
                 filtered_models.append(model)
     return filtered_models
@@ -860,6 +1024,7 @@ async def copy_model(
         r.raise_for_status()
 
         log.debug(f"r.text: {r.text}")
+        invalidate_models_catalog()
         return True
     except Exception as e:
         log.exception(e)
@@ -930,6 +1095,7 @@ async def delete_model(
         r.raise_for_status()
 
         log.debug(f"r.text: {r.text}")
+        invalidate_models_catalog()
         return True
     except Exception as e:
         log.exception(e)
@@ -1292,7 +1458,14 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idxs = models[model].get("urls", [])
+        # 优先选择健康的地址；全部不健康时仍按原列表选择
+        healthy_idxs = [
+            idx
+            for idx in url_idxs
+            if ollama_pool.is_healthy(request.app.state.config.OLLAMA_BASE_URLS[idx])
+        ]
+        url_idx = random.choice(healthy_idxs or url_idxs)
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1372,14 +1545,21 @@ async def generate_chat_completion(
     if prefix_id:
         payload["model"] = payload["model"].replace(f"{prefix_id}.", "")
 
+    # 先序列化：准入之后到 send_post_request 之间不再有可能抛错的步骤
+    body = json.dumps(payload)
+    # 准入控制：按用户 / 模型限制并发与 token 速率，超出时排队，超时返回 429
+    admission_slot = await admission.acquire(
+        request, user.id, model_id, payload.get("messages", []), metadata=metadata
+    )
     return await send_post_request(
         url=f"{url}/api/chat",
-        payload=json.dumps(payload),
+        payload=body,
         stream=form_data.stream,
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         content_type="application/x-ndjson",
         user=user,
         metadata=metadata,
+        admission_slot=admission_slot,
     )
 
 
@@ -1561,13 +1741,20 @@ async def generate_openai_chat_completion(
     if prefix_id:
         payload["model"] = payload["model"].replace(f"{prefix_id}.", "")
 
+    # 先序列化：准入之后到 send_post_request 之间不再有可能抛错的步骤
+    body = json.dumps(payload)
+    # 准入控制：按用户 / 模型限制并发与 token 速率，超出时排队，超时返回 429
+    admission_slot = await admission.acquire(
+        request, user.id, model_id, payload.get("messages", []), metadata=metadata
+    )
     return await send_post_request(
         url=f"{url}/v1/chat/completions",
-        payload=json.dumps(payload),
+        payload=body,
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        admission_slot=admission_slot,
     )
 
 
@@ -56,6 +56,7 @@ from open_webui.utils.misc import (
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils import admission
 from open_webui.utils.crypto import create_encryption_session, encrypt_streaming_response
 
 
@@ -101,11 +102,15 @@ async def send_get_request(url, key=None, user: UserModel = None):
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
     session: Optional[aiohttp.ClientSession],
+    admission_slot: Optional[admission.AdmissionSlot] = None,
 ):
     if response:
         response.close()
     if session:
         await session.close()
+    if admission_slot:
+        # 流未被迭代（客户端提前断开、外层包装抛错）时由这里释放；已释放时为空操作
+        await admission_slot.release()
 
 
 def openai_reasoning_model_handler(payload):
@@ -1043,7 +1048,6 @@ async def generate_chat_completion(
     perf_logger: ChatPerfLogger = metadata.get("perf_logger") if metadata else None
     if chatting_completion and perf_logger:
         perf_logger.before_call_llm(payload)
-    payload = json.dumps(payload)  # 序列化为 JSON 字符串
 
     # === 11. 初始化请求状态变量 ===
     # 注意：计费逻辑已移至 billing/proxy.py，由 chat_with_billing 统一处理
@@ -1051,8 +1055,20 @@ async def generate_chat_completion(
     session = None
     streaming = False
     response = None
+    admission_slot = None
 
     try:
+        # 准入控制：按用户 / 模型限制并发与 token 速率，超出时排队，超时返回 429
+        admission_slot = await admission.acquire(
+            request,
+            user.id,
+            model_id,
+            payload.get("messages", []),
+            metadata=metadata,
+            direct=getattr(request.state, "direct", False),
+        )
+        payload = json.dumps(payload)  # 序列化为 JSON 字符串
+
         # === 12. 发起 HTTP 请求到上游 API ===
         session = aiohttp.ClientSession(
             trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
@@ -1076,14 +1092,19 @@ async def generate_chat_completion(
 
             # 统计用户交互次数（流式响应）
             try:
-                from open_webui.utils.user_stats import increment_daily_interaction_count
-                increment_daily_interaction_count(user.id)
+                from open_webui.utils.user_stats import record_interaction
+                await record_interaction(request.app.state.redis, user.id)
             except Exception as stats_error:
                 log.error(f"统计交互次数失败: {stats_error}")
 
-            # === 端到端加密处理 ===
             stream_content = r.content
+            if admission_slot:
+                # 流结束（包括客户端断开）后释放准入槽位
+                stream_content = admission.release_after_stream(
+                    stream_content, admission_slot
+                )
 
+            # === 端到端加密处理 ===
             if ENABLE_E2E_ENCRYPTION:
                 try:
                     # 从请求头中提取 JWT token
@@ -1095,7 +1116,7 @@ async def generate_chat_completion(
                         encryption_session = create_encryption_session(user.id, session_token)
 
                         # 包装流式响应，添加加密
-                        stream_content = encrypt_streaming_response(r.content, encryption_session)
+                        stream_content = encrypt_streaming_response(stream_content, encryption_session)
 
                         if ENCRYPTION_DEBUG:
                             log.info(f"[Crypto] Enabled encryption for user: {user.id}")
@@ -1104,14 +1125,16 @@ async def generate_chat_completion(
                 except Exception as e:
                     log.error(f"[Crypto] Encryption initialization failed: {e}")
                     # 加密失败时降级为不加密
-                    stream_content = r.content
 
             return StreamingResponse(
                 stream_content,
                 status_code=r.status,
                 headers=dict(r.headers),
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response,
+                    response=r,
+                    session=session,
+                    admission_slot=admission_slot,
                 ),
             )
         else:
@@ -1142,8 +1165,8 @@ async def generate_chat_completion(
 
             # 统计用户交互次数（非流式响应，成功时）
             try:
-                from open_webui.utils.user_stats import increment_daily_interaction_count
-                increment_daily_interaction_count(user.id)
+                from open_webui.utils.user_stats import record_interaction
+                await record_interaction(request.app.state.redis, user.id)
             except Exception as stats_error:
                 log.error(f"统计交互次数失败: {stats_error}")
 
@@ -1153,10 +1176,19 @@ async def generate_chat_completion(
     except CustmizedError:
         # Re-raise CustmizedError to let chat_error_boundary handle it properly
         # CustmizedError 已经包含了用户友好的错误消息，应该直接传播到外层
+        if admission_slot:
+            await admission_slot.release()
+        raise
+    except HTTPException:
+        # 准入排队超时的 429 原样返回
+        if admission_slot:
+            await admission_slot.release()
         raise
     except Exception as e:
         # 只有未预期的异常才转换为 HTTPException
         log.exception(e)
+        if admission_slot:
+            await admission_slot.release()
 
         raise HTTPException(
             status_code=r.status if r else 500,
@@ -1167,6 +1199,9 @@ async def generate_chat_completion(
         # 非流式响应需要手动关闭连接（流式响应在 BackgroundTask 中处理）
         if not streaming:
             await cleanup_response(r, session)
+            if admission_slot:
+                usage = response.get("usage") if isinstance(response, dict) else None
+                await admission_slot.release((usage or {}).get("completion_tokens") or 0)
 
 
 async def embeddings(request: Request, form_data: dict, user):
@@ -30,7 +30,6 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import tiktoken
 
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
@@ -44,36 +43,9 @@ from open_webui.storage.provider import Storage
 
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
-# Document loaders
-from open_webui.retrieval.loaders.main import Loader
-from open_webui.retrieval.loaders.youtube import YoutubeLoader
-
-# Web search engines
+# 文档解析器、网页加载器与各搜索引擎依赖较重，在首次使用时再导入
 from open_webui.retrieval.web.main import SearchResult
-from open_webui.retrieval.web.utils import get_web_loader
-from open_webui.retrieval.web.ollama import search_ollama_cloud
-from open_webui.retrieval.web.perplexity_search import search_perplexity_search
-from open_webui.retrieval.web.brave import search_brave
-from open_webui.retrieval.web.kagi import search_kagi
-from open_webui.retrieval.web.mojeek import search_mojeek
-from open_webui.retrieval.web.bocha import search_bocha
-from open_webui.retrieval.web.duckduckgo import search_duckduckgo
-from open_webui.retrieval.web.google_pse import search_google_pse
-from open_webui.retrieval.web.jina_search import search_jina
-from open_webui.retrieval.web.searchapi import search_searchapi
-from open_webui.retrieval.web.serpapi import search_serpapi
-from open_webui.retrieval.web.searxng import search_searxng
-from open_webui.retrieval.web.yacy import search_yacy
-from open_webui.retrieval.web.serper import search_serper
-from open_webui.retrieval.web.serply import search_serply
-from open_webui.retrieval.web.serpstack import search_serpstack
-from open_webui.retrieval.web.tavily import search_tavily
-from open_webui.retrieval.web.bing import search_bing
-from open_webui.retrieval.web.exa import search_exa
-from open_webui.retrieval.web.perplexity import search_perplexity
-from open_webui.retrieval.web.sougou import search_sougou
-from open_webui.retrieval.web.firecrawl import search_firecrawl
-from open_webui.retrieval.web.external import search_external
+from open_webui.retrieval.web import cache as web_cache
 
 from open_webui.retrieval.utils import (
     get_content_from_url,
@@ -1285,6 +1257,7 @@ def save_docs_to_vector_db(
     split: bool = True,
     add: bool = False,
     user=None,
+    cache_embeddings: bool = False,
 ) -> bool:
     def _get_docs_info(docs: list[Document]) -> str:
         docs_info = set()
@@ -1332,6 +1305,8 @@ def save_docs_to_vector_db(
                 f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
             )
 
+            import tiktoken
+
             tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
             text_splitter = TokenTextSplitter(
                 encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
@@ -1449,11 +1424,22 @@ def save_docs_to_vector_db(
             ),
         )
 
-        embeddings = embedding_function(
-            list(map(lambda x: x.replace("\n", " "), texts)),
-            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
-            user=user,
-        )
+        if cache_embeddings:
+            # 联网内容：相同分块复用缓存中的 embedding
+            embeddings = web_cache.embed_texts(
+                embedding_function,
+                list(map(lambda x: x.replace("\n", " "), texts)),
+                prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+                user=user,
+                engine=request.app.state.config.RAG_EMBEDDING_ENGINE,
+                model=request.app.state.config.RAG_EMBEDDING_MODEL,
+            )
+        else:
+            embeddings = embedding_function(
+                list(map(lambda x: x.replace("\n", " "), texts)),
+                prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+                user=user,
+            )
         log.info(f"embeddings generated {len(embeddings)} for {len(texts)} items")
 
         items = [
@@ -1568,6 +1554,9 @@ def process_file(
                 file_path = file.path
                 if file_path:
                     file_path = Storage.get_file(file_path)
+
+                    from open_webui.retrieval.loaders.main import Loader
+
                     loader = Loader(
                         engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
                         DATALAB_MARKER_API_KEY=request.app.state.config.DATALAB_MARKER_API_KEY,
@@ -1773,13 +1762,7 @@ def process_web(
         log.debug(f"text_content: {content}")
 
         if not request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
-            save_docs_to_vector_db(
-                request,
-                docs,
-                collection_name,
-                overwrite=True,
-                user=user,
-            )
+            save_web_docs_to_vector_db(request, docs, collection_name, user=user)
         else:
             collection_name = None
 
@@ -1805,6 +1788,45 @@ def process_web(
         )
 
 
+def save_web_docs_to_vector_db(request: Request, docs, collection_name: str, user=None):
+    """写入联网内容；集合内容与上次写入相同（且集合仍存在）时跳过重建"""
+    fingerprint = web_cache.docs_fingerprint(
+        docs,
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.config.TEXT_SPLITTER,
+        request.app.state.config.CHUNK_SIZE,
+        request.app.state.config.CHUNK_OVERLAP,
+    )
+    if web_cache.is_collection_current(
+        collection_name, fingerprint
+    ) and VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        log.debug(f"web collection {collection_name} is up to date")
+        return True
+
+    web_cache.invalidate_collection(collection_name)
+    result = save_docs_to_vector_db(
+        request,
+        docs,
+        collection_name,
+        overwrite=True,
+        user=user,
+        cache_embeddings=True,
+    )
+    web_cache.mark_collection(collection_name, fingerprint)
+    return result
+
+
+def search_web_cached(request: Request, engine: str, query: str) -> list[SearchResult]:
+    return web_cache.cached_search(
+        engine,
+        query,
+        request.app.state.config.WEB_SEARCH_RESULT_COUNT,
+        request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
+        lambda: search_web(request, engine, query),
+    )
+
+
 def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
     """Search the web using a search engine and return the results as a list of SearchResult objects.
     Will look for a search engine API key in environment variables in the following order:
@@ -1830,6 +1852,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
 
     # TODO: add playwright to search the web
     if engine == "ollama_cloud":
+        from open_webui.retrieval.web.ollama import search_ollama_cloud
+
         return search_ollama_cloud(
             "https://ollama.com",
             request.app.state.config.OLLAMA_CLOUD_WEB_SEARCH_API_KEY,
@@ -1839,6 +1863,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         )
     elif engine == "perplexity_search":
         if request.app.state.config.PERPLEXITY_API_KEY:
+            from open_webui.retrieval.web.perplexity_search import search_perplexity_search
+
             return search_perplexity_search(
                 request.app.state.config.PERPLEXITY_API_KEY,
                 query,
@@ -1849,6 +1875,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No PERPLEXITY_API_KEY found in environment variables")
     elif engine == "searxng":
         if request.app.state.config.SEARXNG_QUERY_URL:
+            from open_webui.retrieval.web.searxng import search_searxng
+
             return search_searxng(
                 request.app.state.config.SEARXNG_QUERY_URL,
                 query,
@@ -1859,6 +1887,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SEARXNG_QUERY_URL found in environment variables")
     elif engine == "yacy":
         if request.app.state.config.YACY_QUERY_URL:
+            from open_webui.retrieval.web.yacy import search_yacy
+
             return search_yacy(
                 request.app.state.config.YACY_QUERY_URL,
                 request.app.state.config.YACY_USERNAME,
@@ -1874,6 +1904,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.GOOGLE_PSE_API_KEY
             and request.app.state.config.GOOGLE_PSE_ENGINE_ID
         ):
+            from open_webui.retrieval.web.google_pse import search_google_pse
+
             return search_google_pse(
                 request.app.state.config.GOOGLE_PSE_API_KEY,
                 request.app.state.config.GOOGLE_PSE_ENGINE_ID,
@@ -1887,6 +1919,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             )
     elif engine == "brave":
         if request.app.state.config.BRAVE_SEARCH_API_KEY:
+            from open_webui.retrieval.web.brave import search_brave
+
             return search_brave(
                 request.app.state.config.BRAVE_SEARCH_API_KEY,
                 query,
@@ -1897,6 +1931,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No BRAVE_SEARCH_API_KEY found in environment variables")
     elif engine == "kagi":
         if request.app.state.config.KAGI_SEARCH_API_KEY:
+            from open_webui.retrieval.web.kagi import search_kagi
+
             return search_kagi(
                 request.app.state.config.KAGI_SEARCH_API_KEY,
                 query,
@@ -1907,6 +1943,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No KAGI_SEARCH_API_KEY found in environment variables")
     elif engine == "mojeek":
         if request.app.state.config.MOJEEK_SEARCH_API_KEY:
+            from open_webui.retrieval.web.mojeek import search_mojeek
+
             return search_mojeek(
                 request.app.state.config.MOJEEK_SEARCH_API_KEY,
                 query,
@@ -1917,6 +1955,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No MOJEEK_SEARCH_API_KEY found in environment variables")
     elif engine == "bocha":
         if request.app.state.config.BOCHA_SEARCH_API_KEY:
+            from open_webui.retrieval.web.bocha import search_bocha
+
             return search_bocha(
                 request.app.state.config.BOCHA_SEARCH_API_KEY,
                 query,
@@ -1927,6 +1967,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No BOCHA_SEARCH_API_KEY found in environment variables")
     elif engine == "serpstack":
         if request.app.state.config.SERPSTACK_API_KEY:
+            from open_webui.retrieval.web.serpstack import search_serpstack
+
             return search_serpstack(
                 request.app.state.config.SERPSTACK_API_KEY,
                 query,
@@ -1938,6 +1980,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SERPSTACK_API_KEY found in environment variables")
     elif engine == "serper":
         if request.app.state.config.SERPER_API_KEY:
+            from open_webui.retrieval.web.serper import search_serper
+
             return search_serper(
                 request.app.state.config.SERPER_API_KEY,
                 query,
@@ -1948,6 +1992,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SERPER_API_KEY found in environment variables")
     elif engine == "serply":
         if request.app.state.config.SERPLY_API_KEY:
+            from open_webui.retrieval.web.serply import search_serply
+
             return search_serply(
                 request.app.state.config.SERPLY_API_KEY,
                 query,
@@ -1957,6 +2003,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         else:
             raise Exception("No SERPLY_API_KEY found in environment variables")
     elif engine == "duckduckgo":
+        from open_webui.retrieval.web.duckduckgo import search_duckduckgo
+
         return search_duckduckgo(
             query,
             request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1965,6 +2013,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         )
     elif engine == "tavily":
         if request.app.state.config.TAVILY_API_KEY:
+            from open_webui.retrieval.web.tavily import search_tavily
+
             return search_tavily(
                 request.app.state.config.TAVILY_API_KEY,
                 query,
@@ -1975,6 +2025,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No TAVILY_API_KEY found in environment variables")
     elif engine == "exa":
         if request.app.state.config.EXA_API_KEY:
+            from open_webui.retrieval.web.exa import search_exa
+
             return search_exa(
                 request.app.state.config.EXA_API_KEY,
                 query,
@@ -1985,6 +2037,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No EXA_API_KEY found in environment variables")
     elif engine == "searchapi":
         if request.app.state.config.SEARCHAPI_API_KEY:
+            from open_webui.retrieval.web.searchapi import search_searchapi
+
             return search_searchapi(
                 request.app.state.config.SEARCHAPI_API_KEY,
                 request.app.state.config.SEARCHAPI_ENGINE,
@@ -1996,6 +2050,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SEARCHAPI_API_KEY found in environment variables")
     elif engine == "serpapi":
         if request.app.state.config.SERPAPI_API_KEY:
+            from open_webui.retrieval.web.serpapi import search_serpapi
+
             return search_serpapi(
                 request.app.state.config.SERPAPI_API_KEY,
                 request.app.state.config.SERPAPI_ENGINE,
@@ -2006,12 +2062,16 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         else:
             raise Exception("No SERPAPI_API_KEY found in environment variables")
     elif engine == "jina":
+        from open_webui.retrieval.web.jina_search import search_jina
+
         return search_jina(
             request.app.state.config.JINA_API_KEY,
             query,
             request.app.state.config.WEB_SEARCH_RESULT_COUNT,
         )
     elif engine == "bing":
+        from open_webui.retrieval.web.bing import search_bing
+
         return search_bing(
             request.app.state.config.BING_SEARCH_V7_SUBSCRIPTION_KEY,
             request.app.state.config.BING_SEARCH_V7_ENDPOINT,
@@ -2021,6 +2081,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "exa":
+        from open_webui.retrieval.web.exa import search_exa
+
         return search_exa(
             request.app.state.config.EXA_API_KEY,
             query,
@@ -2028,6 +2090,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "perplexity":
+        from open_webui.retrieval.web.perplexity import search_perplexity
+
         return search_perplexity(
             request.app.state.config.PERPLEXITY_API_KEY,
             query,
@@ -2041,6 +2105,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.SOUGOU_API_SID
             and request.app.state.config.SOUGOU_API_SK
         ):
+            from open_webui.retrieval.web.sougou import search_sougou
+
             return search_sougou(
                 request.app.state.config.SOUGOU_API_SID,
                 request.app.state.config.SOUGOU_API_SK,
@@ -2053,6 +2119,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
                 "No SOUGOU_API_SID or SOUGOU_API_SK found in environment variables"
             )
     elif engine == "firecrawl":
+        from open_webui.retrieval.web.firecrawl import search_firecrawl
+
         return search_firecrawl(
             request.app.state.config.FIRECRAWL_API_BASE_URL,
             request.app.state.config.FIRECRAWL_API_KEY,
@@ -2061,6 +2129,8 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "external":
+        from open_webui.retrieval.web.external import search_external
+
         return search_external(
             request.app.state.config.EXTERNAL_WEB_SEARCH_URL,
             request.app.state.config.EXTERNAL_WEB_SEARCH_API_KEY,
@@ -2087,7 +2157,7 @@ async def process_web_search(
 
         search_tasks = [
             run_in_threadpool(
-                search_web,
+                search_web_cached,
                 request,
                 request.app.state.config.WEB_SEARCH_ENGINE,
                 query,
@@ -2141,13 +2211,20 @@ async def process_web_search(
                 if hasattr(result, "snippet") and result.snippet is not None
             ]
         else:
-            loader = get_web_loader(
-                urls,
-                verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
-                requests_per_second=request.app.state.config.WEB_LOADER_CONCURRENT_REQUESTS,
-                trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
+            from open_webui.retrieval.web.utils import get_web_loader
+
+            async def load(urls_to_load: list[str]):
+                loader = get_web_loader(
+                    urls_to_load,
+                    verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
+                    requests_per_second=request.app.state.config.WEB_LOADER_CONCURRENT_REQUESTS,
+                    trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
+                )
+                return await loader.aload()
+
+            docs = await web_cache.load_pages(
+                str(request.app.state.config.WEB_LOADER_ENGINE), urls, load
             )
-            docs = await loader.aload()
 
         urls = [
             doc.metadata.get("source") for doc in docs if doc.metadata.get("source")
@@ -2181,11 +2258,10 @@ async def process_web_search(
 
             try:
                 await run_in_threadpool(
-                    save_docs_to_vector_db,
+                    save_web_docs_to_vector_db,
                     request,
                     docs,
                     collection_name,
-                    overwrite=True,
                     user=user,
                 )
             except Exception as e:
@@ -2379,6 +2455,18 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
     Knowledges.delete_all_knowledge()
+    web_cache.clear()
+
+
+@router.get("/web/cache")
+async def get_web_cache_stats(user=Depends(get_admin_user)):
+    return web_cache.get_stats()
+
+
+@router.post("/web/cache/reset")
+async def reset_web_cache(user=Depends(get_admin_user)):
+    web_cache.clear()
+    return {"status": True}
 
 
 @router.post("/reset/uploads")
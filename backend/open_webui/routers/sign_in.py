@@ -17,6 +17,7 @@ from open_webui.models.users import Users, User as UserModel
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.config import get_config, save_config
 from open_webui.internal.db import get_db
+from open_webui.billing import reservations
 
 log = logging.getLogger(__name__)
 
@@ -137,6 +138,7 @@ async def sign_in(user=Depends(get_verified_user)):
             if user_model:
                 user_model.balance = (user_model.balance or 0) + amount_milli
                 db.commit()
+        reservations.invalidate(user.id)
 
         # 获取连续签到天数
         continuous_days = SignInLogs.get_continuous_days(user.id)
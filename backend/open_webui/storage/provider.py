@@ -7,6 +7,7 @@ from abc import ABC, abstractmethod
 from typing import BinaryIO, Tuple, Dict
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -25,6 +26,8 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_CHUNK_SIZE,
+    STORAGE_TRANSFER_CONCURRENCY,
     UPLOAD_DIR,
 )
 from google.cloud import storage
@@ -40,6 +43,10 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
+# GCS 可续传上传的分块必须是 256KB 的整数倍
+GCS_CHUNK_SIZE = max(STORAGE_CHUNK_SIZE // (256 * 1024), 1) * (256 * 1024)
+
+
 class StorageProvider(ABC):
     @abstractmethod
     def get_file(self, file_path: str) -> str:
@@ -48,7 +55,8 @@ class StorageProvider(ABC):
     @abstractmethod
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[int, str]:
+        """上传文件，返回 (文件大小, 存储路径)；文件按块流式写入，不整体读入内存"""
         pass
 
     @abstractmethod
@@ -64,14 +72,18 @@ class LocalStorageProvider(StorageProvider):
     @staticmethod
     def upload_file(
         file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    ) -> Tuple[int, str]:
         file_path = f"{UPLOAD_DIR}/{filename}"
+        size = 0
         with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+            while chunk := file.read(STORAGE_CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+
+        if not size:
+            os.remove(file_path)
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        return size, file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
@@ -140,6 +152,14 @@ class S3StorageProvider(StorageProvider):
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
 
+        # 超过一个分块即走分片上传 / 分段下载，内存占用 ≈ 分块大小 × 并发数
+        self.transfer_config = TransferConfig(
+            multipart_threshold=STORAGE_CHUNK_SIZE,
+            multipart_chunksize=STORAGE_CHUNK_SIZE,
+            max_concurrency=STORAGE_TRANSFER_CONCURRENCY,
+            io_chunksize=min(STORAGE_CHUNK_SIZE, 256 * 1024),
+        )
+
     @staticmethod
     def sanitize_tag_value(s: str) -> str:
         """Only include S3 allowed characters."""
@@ -147,12 +167,14 @@ class S3StorageProvider(StorageProvider):
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[int, str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        size, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         s3_key = os.path.join(self.key_prefix, filename)
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            self.s3_client.upload_file(
+                file_path, self.bucket_name, s3_key, Config=self.transfer_config
+            )
             if S3_ENABLE_TAGGING and tags:
                 sanitized_tags = {
                     self.sanitize_tag_value(k): self.sanitize_tag_value(v)
@@ -168,10 +190,7 @@ class S3StorageProvider(StorageProvider):
                     Key=s3_key,
                     Tagging=tagging,
                 )
-            return (
-                open(file_path, "rb").read(),
-                f"s3://{self.bucket_name}/{s3_key}",
-            )
+            return size, f"s3://{self.bucket_name}/{s3_key}"
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
@@ -180,7 +199,12 @@ class S3StorageProvider(StorageProvider):
         try:
             s3_key = self._extract_s3_key(file_path)
             local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
+            self.s3_client.download_file(
+                self.bucket_name,
+                s3_key,
+                local_file_path,
+                Config=self.transfer_config,
+            )
             return local_file_path
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
@@ -240,13 +264,14 @@ class GCSStorageProvider(StorageProvider):
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[int, str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        size, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         try:
-            blob = self.bucket.blob(filename)
+            # 设置 chunk_size 后使用可续传上传，按块发送
+            blob = self.bucket.blob(filename, chunk_size=GCS_CHUNK_SIZE)
             blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            return size, "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
@@ -256,6 +281,8 @@ class GCSStorageProvider(StorageProvider):
             filename = file_path.removeprefix("gs://").split("/")[1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob = self.bucket.get_blob(filename)
+            # 按 Range 分块下载并直接写入文件
+            blob.chunk_size = GCS_CHUNK_SIZE
             blob.download_to_filename(local_file_path)
 
             return local_file_path
@@ -298,27 +325,48 @@ class AzureStorageProvider(StorageProvider):
         if storage_key:
             # Configure using the Azure Storage Account Endpoint and Key
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=storage_key
+                account_url=self.endpoint,
+                credential=storage_key,
+                **self._transfer_options(),
             )
         else:
             # Configure using the Azure Storage Account Endpoint and DefaultAzureCredential
             # If the key is not configured, then the DefaultAzureCredential will be used to support Managed Identity authentication
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=DefaultAzureCredential()
+                account_url=self.endpoint,
+                credential=DefaultAzureCredential(),
+                **self._transfer_options(),
             )
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
 
+    @staticmethod
+    def _transfer_options() -> Dict[str, int]:
+        """分块上传与 Range 分段下载的块大小"""
+        return {
+            "max_single_put_size": STORAGE_CHUNK_SIZE,
+            "max_block_size": STORAGE_CHUNK_SIZE,
+            "max_single_get_size": STORAGE_CHUNK_SIZE,
+            "max_chunk_get_size": STORAGE_CHUNK_SIZE,
+        }
+
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[int, str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        size, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         try:
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            # 以文件流上传，超过 max_single_put_size 时按块（Put Block）分块提交
+            with open(file_path, "rb") as data:
+                blob_client.upload_blob(
+                    data,
+                    length=size,
+                    overwrite=True,
+                    max_concurrency=STORAGE_TRANSFER_CONCURRENCY,
+                )
+            return size, f"{self.endpoint}/{self.container_name}/{filename}"
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
@@ -329,7 +377,9 @@ class AzureStorageProvider(StorageProvider):
             local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
             with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
+                blob_client.download_blob(
+                    max_concurrency=STORAGE_TRANSFER_CONCURRENCY
+                ).readinto(download_file)
             return local_file_path
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
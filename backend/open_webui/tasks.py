@@ -1,5 +1,7 @@
 # tasks.py
 import asyncio
+import signal
+import time
 from typing import Dict
 from uuid import uuid4
 import json
@@ -8,7 +10,13 @@ from redis.asyncio import Redis
 from fastapi import Request
 from typing import Dict, List, Optional
 
-from open_webui.env import SRC_LOG_LEVELS, REDIS_KEY_PREFIX
+from open_webui.env import (
+    INSTANCE_ID,
+    SRC_LOG_LEVELS,
+    REDIS_KEY_PREFIX,
+    TASK_HEARTBEAT_INTERVAL,
+    TASK_LEASE_TTL,
+)
 
 
 log = logging.getLogger(__name__)
@@ -22,6 +30,30 @@ item_tasks = {}
 REDIS_TASKS_KEY = f"{REDIS_KEY_PREFIX}:tasks"
 REDIS_ITEM_TASKS_KEY = f"{REDIS_KEY_PREFIX}:tasks:item"
 REDIS_PUBSUB_CHANNEL = f"{REDIS_KEY_PREFIX}:tasks:commands"
+# task_id -> lease expiry (unix time), renewed by the owning worker's heartbeat
+REDIS_TASK_LEASES_KEY = f"{REDIS_KEY_PREFIX}:tasks:leases"
+# instance_id -> {"active": ..., "draining": ..., "updated_at": ...}
+REDIS_TASK_WORKERS_KEY = f"{REDIS_KEY_PREFIX}:tasks:workers"
+
+# Set on shutdown: new chat tasks are rejected while running ones finish
+_draining = False
+
+
+def is_draining() -> bool:
+    return _draining
+
+
+def get_active_task_count() -> int:
+    return sum(1 for task in tasks.values() if not task.done())
+
+
+def get_worker_stats() -> dict:
+    return {
+        "instance_id": INSTANCE_ID,
+        "active": get_active_task_count(),
+        "draining": _draining,
+        "updated_at": int(time.time()),
+    }
 
 
 async def redis_task_command_listener(app):
@@ -51,6 +83,7 @@ async def redis_task_command_listener(app):
 async def redis_save_task(redis: Redis, task_id: str, item_id: Optional[str]):
     pipe = redis.pipeline()
     pipe.hset(REDIS_TASKS_KEY, task_id, item_id or "")
+    pipe.zadd(REDIS_TASK_LEASES_KEY, {task_id: time.time() + TASK_LEASE_TTL})
     if item_id:
         pipe.sadd(f"{REDIS_ITEM_TASKS_KEY}:{item_id}", task_id)
     await pipe.execute()
@@ -59,6 +92,7 @@ async def redis_save_task(redis: Redis, task_id: str, item_id: Optional[str]):
 async def redis_cleanup_task(redis: Redis, task_id: str, item_id: Optional[str]):
     pipe = redis.pipeline()
     pipe.hdel(REDIS_TASKS_KEY, task_id)
+    pipe.zrem(REDIS_TASK_LEASES_KEY, task_id)
     if item_id:
         pipe.srem(f"{REDIS_ITEM_TASKS_KEY}:{item_id}", task_id)
         if (await pipe.scard(f"{REDIS_ITEM_TASKS_KEY}:{item_id}").execute())[-1] == 0:
@@ -78,6 +112,168 @@ async def redis_send_command(redis: Redis, command: dict):
     await redis.publish(REDIS_PUBSUB_CHANNEL, json.dumps(command))
 
 
+async def redis_renew_leases(redis: Redis):
+    """
+    Extend the leases of tasks running on this worker and publish its task count.
+    """
+    expires_at = time.time() + TASK_LEASE_TTL
+    pipe = redis.pipeline()
+    for task_id, task in list(tasks.items()):
+        if not task.done():
+            # XX: never resurrect a lease that was already cleaned up
+            pipe.zadd(REDIS_TASK_LEASES_KEY, {task_id: expires_at}, xx=True)
+    pipe.hset(REDIS_TASK_WORKERS_KEY, INSTANCE_ID, json.dumps(get_worker_stats()))
+    await pipe.execute()
+
+
+async def redis_cleanup_expired_tasks(redis: Redis) -> int:
+    """
+    Remove tasks whose owner stopped renewing their lease (crashed or redeployed
+    worker). Returns the number of tasks removed.
+    """
+    now = time.time()
+
+    # Tasks saved before leases existed: give them one lease period to be renewed
+    task_ids = await redis.hkeys(REDIS_TASKS_KEY)
+    if task_ids:
+        pipe = redis.pipeline()
+        for task_id in task_ids:
+            pipe.zscore(REDIS_TASK_LEASES_KEY, task_id)
+        scores = await pipe.execute()
+        unleased = {
+            task_id: now + TASK_LEASE_TTL
+            for task_id, score in zip(task_ids, scores)
+            if score is None
+        }
+        if unleased:
+            await redis.zadd(REDIS_TASK_LEASES_KEY, unleased, nx=True)
+
+    removed = 0
+    for task_id in await redis.zrangebyscore(REDIS_TASK_LEASES_KEY, "-inf", now):
+        if task_id in tasks:
+            continue  # Still running here, renewed on the next heartbeat
+        # Only the worker whose ZREM succeeds cleans up the task
+        if not await redis.zrem(REDIS_TASK_LEASES_KEY, task_id):
+            continue
+        item_id = await redis.hget(REDIS_TASKS_KEY, task_id)
+        await redis_cleanup_task(redis, task_id, item_id or None)
+        removed += 1
+
+    if removed:
+        log.warning(f"Removed {removed} chat tasks with expired leases")
+
+    workers = await redis.hgetall(REDIS_TASK_WORKERS_KEY)
+    stale = [
+        instance_id
+        for instance_id, value in workers.items()
+        if json.loads(value).get("updated_at", 0) < now - TASK_LEASE_TTL
+    ]
+    if stale:
+        await redis.hdel(REDIS_TASK_WORKERS_KEY, *stale)
+
+    return removed
+
+
+async def periodic_task_heartbeat(app):
+    redis: Redis = app.state.redis
+    while True:
+        try:
+            await redis_renew_leases(redis)
+            await redis_cleanup_expired_tasks(redis)
+        except Exception as e:
+            log.warning(f"Task heartbeat failed: {e}")
+        await asyncio.sleep(TASK_HEARTBEAT_INTERVAL)
+
+
+async def list_workers(redis) -> Dict[str, dict]:
+    """
+    Active task count per worker (only this worker without Redis).
+    """
+    if redis:
+        return {
+            instance_id: json.loads(value)
+            for instance_id, value in (
+                await redis.hgetall(REDIS_TASK_WORKERS_KEY)
+            ).items()
+        }
+    return {INSTANCE_ID: get_worker_stats()}
+
+
+def install_drain_signal_handler(notice_period: float) -> None:
+    """
+    Enter draining as soon as SIGTERM/SIGINT arrives, before uvicorn stops
+    accepting connections, so /health/ready and new chat requests can answer 503
+    for `notice_period` seconds. The signal is then handed to the previously
+    installed (uvicorn's) handler, which starts the normal shutdown; a second
+    signal is delegated immediately.
+    """
+    loop = asyncio.get_running_loop()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            global _draining
+            if _draining or notice_period <= 0:
+                _draining = True
+                previous(signum, frame)
+                return
+
+            _draining = True
+            log.info(
+                f"Received signal {signum}, draining for {notice_period}s before shutdown"
+            )
+            loop.call_soon_threadsafe(
+                loop.call_later, notice_period, previous, signum, frame
+            )
+
+        try:
+            signal.signal(sig, handler)
+        except ValueError:
+            # Not the main thread; shutdown still drains in the lifespan
+            return
+
+
+async def drain(redis, timeout: float) -> int:
+    """
+    Stop accepting new chat tasks and wait up to `timeout` seconds for running
+    tasks to finish; cancel whatever is left. Returns the number of tasks cancelled.
+    """
+    global _draining
+    _draining = True
+
+    pending = {task for task in tasks.values() if not task.done()}
+    if redis:
+        try:
+            await redis_renew_leases(redis)
+        except Exception as e:
+            log.warning(f"Failed to publish draining state: {e}")
+
+    if pending:
+        log.info(f"Draining {len(pending)} running tasks (timeout {timeout}s)")
+        _, pending = await asyncio.wait(pending, timeout=timeout)
+
+    if pending:
+        log.warning(f"Cancelling {len(pending)} tasks still running after drain")
+        for task in pending:
+            task.cancel()
+        await asyncio.wait(pending, timeout=5)
+
+    # Done callbacks schedule the cleanup; remove what is left and this worker's entry
+    if redis:
+        try:
+            for task_id in list(tasks.keys()):
+                item_id = await redis.hget(REDIS_TASKS_KEY, task_id)
+                await redis_cleanup_task(redis, task_id, item_id or None)
+            await redis.hdel(REDIS_TASK_WORKERS_KEY, INSTANCE_ID)
+        except Exception as e:
+            log.warning(f"Failed to clean up tasks after drain: {e}")
+
+    return len(pending)
+
+
 async def cleanup_task(redis, task_id: str, id=None):
     """
     Remove a completed or canceled task from the global `tasks` dictionary.
@@ -1,5 +1,6 @@
 import io
 import os
+import tracemalloc
 import boto3
 import pytest
 from botocore.exceptions import ClientError
@@ -69,7 +70,7 @@ class TestLocalStorageProvider:
         contents, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert contents == len(self.file_content)
         assert file_path == str(upload_dir / self.filename)
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -97,6 +98,69 @@ class TestLocalStorageProvider:
         assert not (upload_dir / self.filename_extra).exists()
 
 
+class _SizedStream(io.RawIOBase):
+    """按需生成数据的上传流，避免测试本身持有整个文件"""
+
+    def __init__(self, size: int):
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        if n < 0:
+            n = self.remaining
+        n = min(n, self.remaining)
+        self.remaining -= n
+        return b"x" * n
+
+
+def test_local_upload_memory_is_bounded(monkeypatch, tmp_path):
+    upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+    chunk_size = 1024 * 1024
+    file_size = 32 * chunk_size
+    monkeypatch.setattr(provider, "STORAGE_CHUNK_SIZE", chunk_size)
+
+    tracemalloc.start()
+    try:
+        size, file_path = provider.LocalStorageProvider.upload_file(
+            _SizedStream(file_size), "large.bin", {}
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert size == file_size
+    assert (upload_dir / "large.bin").stat().st_size == file_size
+    assert peak < 4 * chunk_size
+
+
+@mock_aws
+def test_s3_upload_uses_multipart(monkeypatch, tmp_path):
+    mock_upload_dir(monkeypatch, tmp_path)
+    chunk_size = 5 * 1024 * 1024
+    monkeypatch.setattr(provider, "STORAGE_CHUNK_SIZE", chunk_size)
+    monkeypatch.setattr(provider, "S3_REGION_NAME", "us-east-1")
+
+    Storage = provider.S3StorageProvider()
+    Storage.bucket_name = "my-bucket"
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=Storage.bucket_name)
+
+    size, s3_file_path = Storage.upload_file(
+        _SizedStream(3 * chunk_size), "large.bin", {}
+    )
+
+    head = s3.head_object(Bucket=Storage.bucket_name, Key="large.bin")
+    assert size == 3 * chunk_size
+    assert head["ContentLength"] == 3 * chunk_size
+    # 分片上传对象的 ETag 形如 "<md5>-<分片数>"
+    assert head["ETag"].strip('"').endswith("-3")
+
+    local_path = Storage.get_file(s3_file_path)
+    assert os.path.getsize(local_path) == 3 * chunk_size
+
+
 @mock_aws
 class TestS3StorageProvider:
 
@@ -124,7 +188,7 @@ class TestS3StorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert contents == len(self.file_content)
         assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -237,7 +301,7 @@ class TestGCSStorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert contents == len(self.file_content)
         assert gcs_file_path == "gs://" + self.Storage.bucket_name + "/" + self.filename
         # test error if file is empty
         with pytest.raises(ValueError):
@@ -354,10 +418,8 @@ class TestAzureStorageProvider:
 
         # Assertions
         self.Storage.container_client.get_blob_client.assert_called_with(self.filename)
-        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once_with(
-            self.file_content, overwrite=True
-        )
-        assert contents == self.file_content
+        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once()
+        assert contents == len(self.file_content)
         assert (
             azure_file_path
             == f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
@@ -375,8 +437,8 @@ class TestAzureStorageProvider:
         # Mock upload behavior
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         # Mock blob download behavior
-        self.Storage.container_client.get_blob_client().download_blob().readall.return_value = (
-            self.file_content
+        self.Storage.container_client.get_blob_client().download_blob().readinto.side_effect = (
+            lambda stream: stream.write(self.file_content)
         )
 
         file_url = f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
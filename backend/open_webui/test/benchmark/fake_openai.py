@@ -0,0 +1,258 @@
+"""
+本地 OpenAI 兼容假上游
+
+用于基准测试：按配置的速率、分块大小生成确定性的 token 流，不依赖外网。
+
+支持的接口：
+- GET  /v1/models
+- POST /v1/chat/completions（流式 / 非流式，可选 usage）
+- POST /v1/embeddings（按文本哈希生成确定性向量）
+
+单独运行：
+    cd backend
+    python -m open_webui.test.benchmark.fake_openai --port 9999 --tokens-per-second 100
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+
+@dataclass
+class FakeUpstreamConfig:
+    model_ids: list[str] = field(default_factory=lambda: ["bench-model"])
+    # 0 表示不限速，尽可能快地输出
+    tokens_per_second: float = 200
+    # 每个 SSE chunk 包含的 token 数
+    chunk_tokens: int = 1
+    completion_tokens: int = 256
+    # 首 token 前的额外延迟（秒），模拟上游排队与 prefill
+    first_token_delay: float = 0.05
+    # 是否在流末尾返回 usage（同时要求请求带 stream_options.include_usage）
+    include_usage: bool = True
+    # 使用缓存 token 的比例，用于覆盖计费里的缓存价格分支
+    cached_prompt_ratio: float = 0.0
+    embedding_dimensions: int = 64
+
+
+def _token(index: int) -> str:
+    return f" tok{index % 1000}"
+
+
+def _prompt_tokens(messages: list) -> int:
+    # 粗略估算即可，只用于 usage 字段
+    text = json.dumps(messages, ensure_ascii=False)
+    return max(len(text) // 4, 1)
+
+
+def _usage(config: FakeUpstreamConfig, prompt_tokens: int) -> dict:
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": config.completion_tokens,
+        "total_tokens": prompt_tokens + config.completion_tokens,
+    }
+    if config.cached_prompt_ratio > 0:
+        usage["prompt_tokens_details"] = {
+            "cached_tokens": int(prompt_tokens * config.cached_prompt_ratio)
+        }
+    return usage
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> bytes:
+    data = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def create_app(config: FakeUpstreamConfig) -> web.Application:
+    routes = web.RouteTableDef()
+
+    @routes.get("/v1/models")
+    @routes.get("/models")
+    async def models(request: web.Request):
+        return web.json_response(
+            {
+                "object": "list",
+                "data": [
+                    {"id": model_id, "object": "model", "owned_by": "benchmark"}
+                    for model_id in config.model_ids
+                ],
+            }
+        )
+
+    @routes.post("/v1/chat/completions")
+    @routes.post("/chat/completions")
+    async def chat_completions(request: web.Request):
+        payload = await request.json()
+        model = payload.get("model", config.model_ids[0])
+        prompt_tokens = _prompt_tokens(payload.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if not payload.get("stream"):
+            await asyncio.sleep(config.first_token_delay)
+            if config.tokens_per_second > 0:
+                await asyncio.sleep(config.completion_tokens / config.tokens_per_second)
+            return web.json_response(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": "".join(
+                                    _token(i) for i in range(config.completion_tokens)
+                                ),
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": _usage(config, prompt_tokens),
+                }
+            )
+
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+            }
+        )
+        await response.prepare(request)
+
+        await asyncio.sleep(config.first_token_delay)
+        await response.write(_chunk(completion_id, model, {"role": "assistant"}))
+
+        # 按绝对时间节拍发送，避免 sleep 误差累积导致实际速率偏低
+        start = time.perf_counter()
+        chunk_tokens = max(config.chunk_tokens, 1)
+        for offset in range(0, config.completion_tokens, chunk_tokens):
+            count = min(chunk_tokens, config.completion_tokens - offset)
+            if config.tokens_per_second > 0:
+                due = start + offset / config.tokens_per_second
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            content = "".join(_token(offset + i) for i in range(count))
+            await response.write(_chunk(completion_id, model, {"content": content}))
+
+        await response.write(_chunk(completion_id, model, {}, finish_reason="stop"))
+
+        include_usage = (payload.get("stream_options") or {}).get("include_usage")
+        if config.include_usage and include_usage:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": _usage(config, prompt_tokens),
+            }
+            await response.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    @routes.post("/v1/embeddings")
+    @routes.post("/embeddings")
+    async def embeddings(request: web.Request):
+        payload = await request.json()
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        data = []
+        for index, text in enumerate(inputs):
+            digest = hashlib.sha256(str(text).encode("utf-8")).digest()
+            values = [
+                (digest[i % len(digest)] - 128) / 128
+                for i in range(config.embedding_dimensions)
+            ]
+            data.append({"object": "embedding", "index": index, "embedding": values})
+
+        return web.json_response(
+            {
+                "object": "list",
+                "data": data,
+                "model": payload.get("model", ""),
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+            }
+        )
+
+    app = web.Application()
+    app.add_routes(routes)
+    return app
+
+
+class FakeUpstreamServer:
+    """在当前事件循环中运行假上游，绑定随机端口"""
+
+    def __init__(self, config: FakeUpstreamConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> "FakeUpstreamServer":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+
+        self._runner = web.AppRunner(create_app(self.config), access_log=None)
+        await self._runner.setup()
+        await web.SockSite(self._runner, sock).start()
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake upstream")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--model", action="append", dest="model_ids")
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--chunk-tokens", type=int, default=1)
+    parser.add_argument("--completion-tokens", type=int, default=256)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--no-usage", action="store_true")
+    args = parser.parse_args()
+
+    config = FakeUpstreamConfig(
+        tokens_per_second=args.tokens_per_second,
+        chunk_tokens=args.chunk_tokens,
+        completion_tokens=args.completion_tokens,
+        first_token_delay=args.first_token_delay,
+        include_usage=not args.no_usage,
+    )
+    if args.model_ids:
+        config.model_ids = args.model_ids
+
+    web.run_app(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
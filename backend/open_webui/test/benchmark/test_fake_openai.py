@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import httpx
+
+from open_webui.test.benchmark.chat_pipeline import (
+    compare_with_baseline,
+    percentile,
+)
+from open_webui.test.benchmark.fake_openai import (
+    FakeUpstreamConfig,
+    FakeUpstreamServer,
+)
+
+
+async def _stream(config: FakeUpstreamConfig, payload: dict) -> list[dict]:
+    server = await FakeUpstreamServer(config).start()
+    try:
+        async with httpx.AsyncClient(trust_env=False) as client:
+            async with client.stream(
+                "POST", f"{server.base_url}/chat/completions", json=payload
+            ) as response:
+                lines = [line async for line in response.aiter_lines()]
+    finally:
+        await server.stop()
+
+    events = [line[len("data: ") :] for line in lines if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    return [json.loads(event) for event in events[:-1]]
+
+
+def test_stream_chunks_and_usage():
+    config = FakeUpstreamConfig(
+        tokens_per_second=0, chunk_tokens=4, completion_tokens=10, first_token_delay=0
+    )
+    chunks = asyncio.run(
+        _stream(
+            config,
+            {
+                "model": "bench-model",
+                "messages": [{"role": "user", "content": "hi"}],
+                "stream": True,
+                "stream_options": {"include_usage": True},
+            },
+        )
+    )
+
+    contents = [
+        c["choices"][0]["delta"]["content"]
+        for c in chunks
+        if c["choices"] and "content" in c["choices"][0]["delta"]
+    ]
+    assert len(contents) == 3
+    assert "".join(contents).split() == [f"tok{i}" for i in range(10)]
+    assert chunks[-1]["usage"]["completion_tokens"] == 10
+
+
+def test_stream_without_usage():
+    config = FakeUpstreamConfig(
+        tokens_per_second=0, completion_tokens=3, first_token_delay=0
+    )
+    chunks = asyncio.run(
+        _stream(config, {"model": "bench-model", "messages": [], "stream": True})
+    )
+
+    assert all("usage" not in c for c in chunks)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_with_baseline():
+    baseline = {
+        "pipeline": {"ttft_p50_ms": 100, "ttft_p99_ms": 200, "tokens_per_s": 100},
+        "db_queries_per_turn": 10,
+    }
+    current = {
+        "pipeline": {"ttft_p50_ms": 110, "ttft_p99_ms": 300, "tokens_per_s": 70},
+        "db_queries_per_turn": 14,
+    }
+
+    regressions = compare_with_baseline(current, baseline, tolerance=0.25)
+
+    assert [r.split(":")[0] for r in regressions] == [
+        "pipeline.ttft_p99_ms",
+        "pipeline.tokens_per_s",
+        "db_queries_per_turn",
+    ]
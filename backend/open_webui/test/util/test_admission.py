@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from open_webui.utils import admission
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(admission, "_local_backend", admission._LocalBackend())
+    monkeypatch.setattr(admission, "_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(admission, "LLM_ADMISSION_MAX_WAIT", 0.2)
+    monkeypatch.setattr(admission, "LLM_USER_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(admission, "LLM_USER_BACKGROUND_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(admission, "LLM_USER_TOKENS_PER_MINUTE", 0)
+    monkeypatch.setattr(admission, "LLM_MODEL_MAX_CONCURRENCY", 0)
+    monkeypatch.setattr(admission, "LLM_MODEL_TOKENS_PER_MINUTE", 0)
+    monkeypatch.setattr(admission, "LLM_MODEL_LIMITS", {})
+
+
+def _acquire(user_id: str, model_id: str = "m", metadata=None):
+    return admission.acquire(None, user_id, model_id, [], metadata=metadata)
+
+
+def test_user_requests_queue_then_time_out():
+    async def run():
+        first = await _acquire("u1")
+
+        # 排队等到第一个释放
+        waiter = asyncio.create_task(_acquire("u1"))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        await first.release()
+        second = await waiter
+
+        with pytest.raises(HTTPException) as exc:
+            await _acquire("u1")
+        assert exc.value.status_code == 429
+
+        # 其他用户与后台调用不受影响
+        other = await _acquire("u2")
+        background = await _acquire("u1", metadata={"task": "title_generation"})
+        for slot in (second, other, background):
+            await slot.release()
+
+    asyncio.run(run())
+
+
+def test_model_slots_go_to_user_holding_fewest(monkeypatch):
+    monkeypatch.setattr(admission, "LLM_USER_MAX_CONCURRENCY", 10)
+    monkeypatch.setattr(admission, "LLM_MODEL_MAX_CONCURRENCY", 2)
+
+    async def run():
+        heavy = [await _acquire("heavy"), await _acquire("heavy")]
+
+        light = asyncio.create_task(_acquire("light"))
+        await asyncio.sleep(0.05)
+        heavy_again = asyncio.create_task(_acquire("heavy"))
+        await asyncio.sleep(0.05)
+
+        # 空出的槽位分给没有占用的用户
+        await heavy[0].release()
+        light_slot = await light
+        assert not heavy_again.done()
+
+        await heavy[1].release()
+        await (await heavy_again).release()
+        await light_slot.release()
+
+    asyncio.run(run())
+
+
+def test_background_yields_to_interactive(monkeypatch):
+    monkeypatch.setattr(admission, "LLM_USER_MAX_CONCURRENCY", 10)
+    monkeypatch.setattr(admission, "LLM_USER_BACKGROUND_MAX_CONCURRENCY", 10)
+    monkeypatch.setattr(admission, "LLM_MODEL_MAX_CONCURRENCY", 4)
+
+    async def run():
+        with admission.background_llm_work():
+            background = [await _acquire(f"b{i}") for i in range(2)]
+            # 后台最多占用一半的模型槽位
+            with pytest.raises(HTTPException):
+                await _acquire("b2")
+
+        interactive = [await _acquire(f"i{i}") for i in range(2)]
+        for slot in background + interactive:
+            await slot.release()
+
+    asyncio.run(run())
+
+
+def test_stream_release_counts_completion_tokens(monkeypatch):
+    monkeypatch.setattr(admission, "LLM_USER_TOKENS_PER_MINUTE", 1000)
+    monkeypatch.setattr(admission, "_estimate_tokens", lambda messages, model: 10)
+
+    async def upstream():
+        yield b'data: {"choices": []}\n'
+        yield b'data: {"choices": [], "usage": {"completion_tokens": 5}}\n'
+        yield b"data: [DONE]\n"
+
+    async def run():
+        slot = await _acquire("u1")
+        lines = [
+            line async for line in admission.release_after_stream(upstream(), slot)
+        ]
+
+        assert len(lines) == 3
+        assert slot.released
+        key = admission._tokens_key("user", "u1")
+        assert await admission._local_backend.get_tokens(key) == 15
+
+    asyncio.run(run())
+
+
+def test_ollama_stream_counts_eval_count(monkeypatch):
+    monkeypatch.setattr(admission, "LLM_USER_TOKENS_PER_MINUTE", 1000)
+    monkeypatch.setattr(admission, "_estimate_tokens", lambda messages, model: 10)
+
+    async def upstream():
+        yield b'{"message": {"content": "hi"}, "done": false}\n'
+        yield b'{"done": true, "prompt_eval_count": 10, "eval_count": 7}\n'
+
+    async def run():
+        slot = await _acquire("u1")
+        lines = [
+            line async for line in admission.release_after_stream(upstream(), slot)
+        ]
+
+        assert len(lines) == 2
+        key = admission._tokens_key("user", "u1")
+        assert await admission._local_backend.get_tokens(key) == 17
+
+    asyncio.run(run())
+
+
+def test_stream_renews_slot_until_released(monkeypatch):
+    monkeypatch.setattr(admission, "LLM_ADMISSION_SLOT_TIMEOUT", 3)
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "time", lambda: now[0])
+
+    async def run():
+        slot = await _acquire("u1")
+        key, token = slot.slots[0]
+        backend = admission._local_backend
+
+        # 超过过期时间仍在传输的流会被续期，不会被当作泄漏清除
+        now[0] += 2
+        await slot.renew()
+        now[0] += 2
+        assert token in backend._live_slots(key)
+
+        await slot.release()
+        await slot.release()
+        await slot.renew()
+        assert token not in backend._live_slots(key)
+
+    asyncio.run(run())
+
+
+def test_unconsumed_stream_slot_released_by_cleanup():
+    from open_webui.routers import ollama, openai
+
+    async def upstream():
+        yield b"data: {}"
+
+    async def run():
+        for cleanup_response in (ollama.cleanup_response, openai.cleanup_response):
+            slot = await _acquire("u1")
+            # 流从未被迭代：生成器的 finally 不会执行，由响应清理的后台任务释放
+            admission.release_after_stream(upstream(), slot)
+            await cleanup_response(None, None, admission_slot=slot)
+            assert slot.released
+
+            again = await _acquire("u1")
+            await again.release()
+
+    asyncio.run(run())
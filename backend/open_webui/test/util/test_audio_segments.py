@@ -0,0 +1,132 @@
+import io
+import os
+import sys
+import time
+import wave
+
+import pytest
+
+from open_webui.utils.audio_segments import (
+    SAMPLE_RATE,
+    SAMPLE_WIDTH,
+    TranscriptCache,
+    merge_transcripts,
+    segment_audio,
+    split_pcm_stream,
+)
+
+
+def _pcm(seconds: float) -> bytes:
+    return b"\x01\x00" * int(seconds * SAMPLE_RATE)
+
+
+def _duration(path: str) -> float:
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+class TestSplitPcmStream:
+    def test_segments_overlap(self, tmp_path):
+        segments = split_pcm_stream(
+            io.BytesIO(_pcm(25)), str(tmp_path / "audio"), 10, overlap_seconds=1
+        )
+
+        assert [(s.start, s.end) for s in segments] == [
+            (0, 10),
+            (9, 20),
+            (19, 25),
+        ]
+        assert [_duration(s.path) for s in segments] == [10, 11, 6]
+
+    def test_short_audio_single_segment(self, tmp_path):
+        segments = split_pcm_stream(
+            io.BytesIO(_pcm(3)), str(tmp_path / "audio"), 10, overlap_seconds=1
+        )
+
+        assert len(segments) == 1
+        assert _duration(segments[0].path) == 3
+
+    def test_no_trailing_overlap_only_segment(self, tmp_path):
+        segments = split_pcm_stream(
+            io.BytesIO(_pcm(20)), str(tmp_path / "audio"), 10, overlap_seconds=1
+        )
+
+        assert [(s.start, s.end) for s in segments] == [(0, 10), (9, 20)]
+
+    def test_empty_stream(self, tmp_path):
+        assert split_pcm_stream(io.BytesIO(b""), str(tmp_path / "audio"), 10) == []
+
+
+class TestMergeTranscripts:
+    def test_removes_overlap(self):
+        assert (
+            merge_transcripts(
+                ["the quick brown fox jumps", "Fox jumps over the lazy dog."]
+            )
+            == "the quick brown fox jumps over the lazy dog."
+        )
+
+    def test_no_overlap(self):
+        assert merge_transcripts(["hello there", "general kenobi"]) == (
+            "hello there general kenobi"
+        )
+
+    def test_cjk_overlap(self):
+        assert merge_transcripts(["今天天气很好我们去", "我们去公园散步"]) == (
+            "今天天气很好我们去公园散步"
+        )
+
+    def test_skips_empty_segments(self):
+        assert merge_transcripts(["hello world", "", "again"]) == ("hello world again")
+
+
+def test_transcript_cache_roundtrip(tmp_path):
+    cache = TranscriptCache(tmp_path / "cache")
+    key = TranscriptCache.make_key("abc", "openai", "whisper-1", None)
+
+    assert cache.get(key) is None
+    cache.set(key, {"text": "hello"})
+    assert cache.get(key) == {"text": "hello"}
+    assert key != TranscriptCache.make_key("abc", "openai", "whisper-1", "en")
+
+
+def test_transcript_cache_evicts_by_size_and_age(tmp_path):
+    cache = TranscriptCache(tmp_path / "cache", max_bytes=140, ttl=60)
+    keys = [TranscriptCache.make_key(str(i)) for i in range(4)]
+
+    for i, key in enumerate(keys[:3]):
+        cache.set(key, {"text": "x" * 30})
+        os.utime(cache._path(key), (time.time() - 10 + i,) * 2)
+    # 命中刷新访问时间，最旧的 keys[0] 不再是第一个被淘汰的
+    assert cache.get(keys[0]) is not None
+
+    cache.set(keys[3], {"text": "x" * 30})
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[3]) is not None
+
+    os.utime(cache._path(keys[3]), (time.time() - 120,) * 2)
+    assert cache.get(keys[3]) is None
+    assert not cache._path(keys[3]).exists()
+
+
+def test_segment_audio_does_not_block_on_verbose_stderr(tmp_path, monkeypatch):
+    pydub_utils = pytest.importorskip("pydub.utils")
+
+    # 模拟 ffmpeg：先向 stderr 写出远超管道缓冲区的错误信息，再输出 PCM
+    encoder = tmp_path / "fake_ffmpeg"
+    encoder.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "sys.stderr.write('corrupt frame\\n' * 100000)\n"
+        "sys.stderr.flush()\n"
+        f"sys.stdout.buffer.write(b'\\x01\\x00' * {SAMPLE_RATE * 3})\n"
+    )
+    encoder.chmod(0o755)
+    monkeypatch.setattr(pydub_utils, "get_encoder_name", lambda: str(encoder))
+
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"")
+    segments = segment_audio(str(audio), 10)
+
+    assert [(s.start, s.end) for s in segments] == [(0, 3)]
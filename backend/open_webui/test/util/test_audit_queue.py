@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("asgiref")
+
+from open_webui.utils import audit
+from open_webui.utils.audit import (
+    AuditLevel,
+    AuditLoggingMiddleware,
+    AuditLogQueue,
+    AuditRule,
+)
+
+
+@pytest.fixture(autouse=True)
+def enable_audit(monkeypatch):
+    monkeypatch.setattr(audit, "AUDIT_LOG_LEVEL", "REQUEST_RESPONSE")
+
+
+class FakeAuditLogger:
+    def __init__(self):
+        self.entries = []
+
+    def write(self, entry):
+        self.entries.append(entry)
+
+
+async def _app(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    for _ in range(3):
+        await send({"type": "http.response.body", "body": b"chunk", "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "headers": [(b"authorization", b"Bearer token")],
+    }
+
+
+async def _call(middleware, path: str, body: bytes = b'{"a": 1}'):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(_scope(path), receive, send)
+    return sent
+
+
+def test_entries_are_written_by_background_thread():
+    audit_logger = FakeAuditLogger()
+    log_queue = AuditLogQueue(audit_logger, flush_interval=0.01)
+    middleware = AuditLoggingMiddleware(
+        _app,
+        audit_level=AuditLevel.REQUEST_RESPONSE,
+        rules=[AuditRule(path="/api/v1/files", capture_response=False)],
+        log_queue=log_queue,
+    )
+
+    sent = asyncio.run(_call(middleware, "/api/v1/knowledge/create"))
+    asyncio.run(_call(middleware, "/api/v1/files/upload"))
+    log_queue.close()
+
+    assert len(sent) == 5
+    assert log_queue.stats()["written"] == 2
+    first, second = audit_logger.entries
+    assert first.request_object == '{"a": 1}'
+    assert first.response_object == "chunkchunkchunk"
+    assert first.response_status_code == 200
+    assert second.request_object == '{"a": 1}'
+    assert second.response_object == ""
+
+
+def test_sampling_and_drop_backpressure():
+    log_queue = AuditLogQueue(FakeAuditLogger(), max_size=1, backpressure="drop")
+    # 不启动写线程，队列满后新条目被丢弃并计数
+    log_queue._ensure_started = lambda: None
+    middleware = AuditLoggingMiddleware(
+        _app,
+        audit_level=AuditLevel.METADATA,
+        rules=[AuditRule(path="/api/v1/tools", sample_rate=0)],
+        log_queue=log_queue,
+    )
+
+    async def run():
+        for _ in range(3):
+            await _call(middleware, "/api/v1/knowledge/create")
+        await _call(middleware, "/api/v1/tools/create")
+
+    asyncio.run(run())
+
+    assert log_queue.stats()["enqueued"] == 1
+    assert log_queue.stats()["dropped"] == 2
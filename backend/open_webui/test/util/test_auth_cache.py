@@ -0,0 +1,182 @@
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import users as users_module
+from open_webui.models.users import User, Users
+from open_webui.utils import user_cache
+from open_webui.utils.auth import create_token, get_current_user
+
+
+@pytest.fixture(autouse=True)
+def lookups(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/users.db")
+    User.__table__.create(engine)
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(users_module, "get_db", get_db)
+    monkeypatch.setattr(user_cache, "_redis", None)
+    monkeypatch.setattr(user_cache, "_loop", None)
+    user_cache._token_cache.clear()
+    user_cache._user_cache.clear()
+
+    with get_db() as db:
+        db.add(
+            User(
+                id="u1",
+                name="Alice",
+                email="alice@example.com",
+                role="user",
+                profile_image_url="",
+                settings={"ui": {"theme": "dark"}},
+                last_active_at=0,
+                updated_at=0,
+                created_at=0,
+            )
+        )
+        db.commit()
+
+    # 统计实际的用户行查询次数
+    calls = []
+    get_user_by_id = Users.get_user_by_id
+    monkeypatch.setattr(
+        Users,
+        "get_user_by_id",
+        lambda id: calls.append(id) or get_user_by_id(id),
+    )
+    yield calls
+    user_cache._token_cache.clear()
+    user_cache._user_cache.clear()
+
+
+def _authenticate(token):
+    request = SimpleNamespace(cookies={}, headers={})
+    return get_current_user(
+        request,
+        Response(),
+        None,
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=token),
+    )
+
+
+def test_repeated_requests_reuse_cached_claims_and_user(lookups, monkeypatch):
+    token = create_token({"id": "u1"}, timedelta(hours=1))
+    assert _authenticate(token).name == "Alice"
+
+    decoded = []
+    monkeypatch.setattr(
+        "open_webui.utils.auth.decode_token", lambda token: decoded.append(token)
+    )
+    assert _authenticate(token).name == "Alice"
+    assert decoded == []
+    assert lookups == ["u1"]
+
+
+def test_cached_claims_still_honor_token_expiry():
+    token = create_token({"id": "u1"}, timedelta(seconds=-1))
+    # 即使声明已在缓存中，过期后也必须重新验签并拒绝
+    user_cache.set_cached_token_claims(token, {"id": "u1", "exp": time.time() - 1})
+
+    with pytest.raises(HTTPException) as exc_info:
+        _authenticate(token)
+    assert exc_info.value.status_code == 401
+    assert user_cache.get_cached_token_claims(token) is None
+
+
+def test_role_and_billing_status_changes_invalidate_cached_user(lookups):
+    token = create_token({"id": "u1"}, timedelta(hours=1))
+    assert _authenticate(token).role == "user"
+
+    # 停用账号（降为 pending）后下一个请求立即看到新角色
+    Users.update_user_role_by_id("u1", "pending")
+    assert _authenticate(token).role == "pending"
+
+    Users.update_user_by_id("u1", {"billing_status": "frozen"})
+    assert _authenticate(token).billing_status == "frozen"
+    assert lookups == ["u1", "u1", "u1"]
+
+
+def test_cached_user_is_isolated_from_callers():
+    user = Users.get_user_by_id("u1")
+    user_cache.set_cached_user(user)
+    user.settings.ui["theme"] = "light"
+
+    cached = user_cache.get_cached_user("u1")
+    assert cached.settings.ui["theme"] == "dark"
+
+    cached.role = "admin"
+    cached.settings.ui["theme"] = "light"
+    again = user_cache.get_cached_user("u1")
+    assert again.role == "user"
+    assert again.settings.ui["theme"] == "dark"
+
+
+class _PubSub:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def subscribe(self, channel):
+        self.redis.channel = channel
+
+    async def listen(self):
+        while True:
+            message = await self.redis.inbox.get()
+            if message is None:
+                return
+            yield {"type": "message", "data": message}
+
+
+class _Redis:
+    def __init__(self):
+        self.inbox = asyncio.Queue()
+        self.published = []
+
+    def pubsub(self):
+        return _PubSub(self)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+
+def test_invalidation_is_broadcast_and_applied_by_listener():
+    async def run():
+        redis = _Redis()
+        app = SimpleNamespace(state=SimpleNamespace(redis=redis))
+        listener = asyncio.create_task(user_cache.user_cache_invalidation_listener(app))
+        await asyncio.sleep(0)
+
+        # 本进程的失效会广播给其他 worker
+        Users.update_user_role_by_id("u1", "admin")
+        await asyncio.sleep(0)
+        channel, payload = redis.published[0]
+        assert channel == user_cache.USER_CACHE_PUBSUB_CHANNEL
+        assert payload["user_id"] == "u1"
+        assert payload["origin"] == user_cache.INSTANCE_ID
+
+        # 其他 worker 的广播使本进程缓存失效，且不再转发
+        user_cache.set_cached_user(Users.get_user_by_id("u1"))
+        await redis.inbox.put(json.dumps({"user_id": "u1", "origin": "other"}))
+        await redis.inbox.put(None)
+        await asyncio.wait_for(listener, 5)
+
+        assert user_cache.get_cached_user("u1") is None
+        assert len(redis.published) == 1
+
+    asyncio.run(run())
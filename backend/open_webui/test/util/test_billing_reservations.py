@@ -0,0 +1,125 @@
+import pytest
+from fastapi import HTTPException
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from open_webui.billing import reservations
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(reservations, "REDIS_URL", "redis://fake")
+    monkeypatch.setattr(reservations, "_redis", client)
+    monkeypatch.setattr(reservations, "_scripts", {})
+    return client
+
+
+def _available(redis, user_id: str) -> int:
+    return int(redis.hget(reservations._keys(user_id)[0], "available"))
+
+
+def test_reserve_and_settle(redis):
+    db = {"u1": 10000}
+
+    first, available = reservations.reserve("u1", "m", 3000, 10, db.get)
+    assert available == 7000
+    _, available = reservations.reserve("u1", "m", 3000, 10, db.get)
+    assert available == 4000
+
+    with pytest.raises(HTTPException) as exc:
+        reservations.reserve("u1", "m", 5000, 10, db.get)
+    assert exc.value.status_code == 402
+
+    reservation = reservations.claim(first)
+    assert reservation.amount == 3000
+    assert reservations.claim(first) is None
+
+    db["u1"] -= 1000
+    reservations.finish(reservation, 1000)
+    assert _available(redis, "u1") == 6000
+
+
+def test_invalidate_reloads_from_db(redis):
+    db = {"u1": 10000}
+    reservations.reserve("u1", "m", 3000, 10, db.get)
+
+    db["u1"] += 5000
+    reservations.invalidate("u1")
+
+    _, available = reservations.reserve("u1", "m", 1000, 10, db.get)
+    assert available == 11000
+
+
+def test_finish_after_reload_does_not_double_count(redis):
+    db = {"u1": 10000}
+    precharge_id, _ = reservations.reserve("u1", "m", 1000, 10, db.get)
+
+    # 结算开始后热余额过期并被重新加载
+    redis.delete(reservations._keys("u1")[0])
+    reservation = reservations.claim(precharge_id)
+    db["u1"] -= 500
+    reservations.finish(reservation, 500)
+
+    _, available = reservations.reserve("u1", "m", 100, 10, db.get)
+    assert available == 9400
+
+
+def test_reconcile_releases_orphans(redis, monkeypatch):
+    db = {"u1": 10000}
+    reservations.reserve("u1", "m", 3000, 10, db.get)
+
+    monkeypatch.setattr(reservations, "BILLING_RESERVATION_TTL", -1)
+    assert reservations.reconcile() == 1
+    assert redis.zcard(reservations._index_key()) == 0
+
+    monkeypatch.setattr(reservations, "BILLING_RESERVATION_TTL", 1800)
+    _, available = reservations.reserve("u1", "m", 1000, 10, db.get)
+    assert available == 9000
+
+
+@pytest.fixture
+def deductions(monkeypatch):
+    from open_webui.billing import core
+
+    calls = []
+
+    def deduct_balance(user_id, model_id, prompt_tokens, completion_tokens, **kwargs):
+        calls.append((user_id, model_id, prompt_tokens, completion_tokens))
+        return 42, 9958
+
+    monkeypatch.setattr(core, "deduct_balance", deduct_balance)
+    return calls
+
+
+def test_settle_swept_reservation_deducts_from_db(redis, deductions, monkeypatch):
+    from open_webui.billing import core
+
+    db = {"u1": 10000}
+    precharge_id, _ = reservations.reserve("u1", "m", 3000, 10, db.get)
+
+    monkeypatch.setattr(reservations, "BILLING_RESERVATION_TTL", -1)
+    assert reservations.reconcile() == 1
+
+    assert core.settle_precharge(precharge_id, 100, 50, model_id="m") == (42, 0, 9958)
+    assert deductions == [("u1", "m", 100, 50)]
+
+    # 全额退款不产生扣费
+    assert core.settle_precharge(precharge_id, 0, 0, model_id="m") == (0, 0, 0)
+    assert len(deductions) == 1
+
+
+def test_settle_with_redis_down_deducts_from_db(redis, deductions, monkeypatch):
+    from open_webui.billing import core
+
+    db = {"u1": 10000}
+    precharge_id, _ = reservations.reserve("u1", "m", 3000, 10, db.get)
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(reservations, "_script", unavailable)
+
+    assert core.settle_precharge(precharge_id, 100, 50, model_id="m") == (42, 0, 9958)
+    assert deductions == [("u1", "m", 100, 50)]
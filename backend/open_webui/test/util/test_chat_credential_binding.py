@@ -0,0 +1,153 @@
+import asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import chats as chats_module
+from open_webui.models import user_model_credentials as credentials_module
+from open_webui.models.chats import Chat, ChatForm, Chats, ChatSearchIndex
+from open_webui.models.user_model_credentials import (
+    ChatModelCredential,
+    UserModelCredentials,
+)
+from open_webui.utils.models import transform_user_model_if_needed
+
+USER = SimpleNamespace(id="u1")
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/chats.db")
+    for table in (Chat, ChatSearchIndex, ChatModelCredential):
+        table.__table__.create(engine)
+
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db(*args):
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(chats_module, "get_db", get_db)
+    monkeypatch.setattr(credentials_module, "get_db", get_db)
+    credentials_module._chat_binding_cache.clear()
+
+    credential = SimpleNamespace(
+        deleted_at=None,
+        base_url="https://llm.example.com/v1",
+        model_id="private-model",
+        name="Private",
+        api_key="sk-test",
+        config={},
+    )
+    monkeypatch.setattr(
+        UserModelCredentials,
+        "get_cached_credential_by_id_and_user_id",
+        lambda cred_id, user_id: credential if cred_id == "c1" else None,
+    )
+    yield get_db
+    credentials_module._chat_binding_cache.clear()
+
+
+def _new_chat(messages=None, folder_id=None):
+    chat = {"title": "Chat", "history": {"messages": messages or {}}}
+    return Chats.insert_new_chat("u1", ChatForm(chat=chat, folder_id=folder_id))
+
+
+def _transform(form_data):
+    return asyncio.run(transform_user_model_if_needed(form_data, USER))
+
+
+def _stored_binding(get_db, chat_id):
+    with get_db() as db:
+        row = db.get(ChatModelCredential, chat_id)
+        return None if row is None else row.credential_id
+
+
+def test_explicit_private_model_request_binds_chat(db):
+    chat = _new_chat()
+    form_data = _transform(
+        {
+            "chat_id": chat.id,
+            "model": "private-model",
+            "model_item": {"credential_id": "user:c1"},
+        }
+    )
+    assert form_data["model_item"]["direct"] is True
+    assert _stored_binding(db, chat.id) == "user:c1"
+
+    # 后台任务（无 model_item）通过绑定还原私有模型
+    credentials_module._chat_binding_cache.clear()
+    form_data = _transform({"chat_id": chat.id, "model": "private-model"})
+    assert form_data["model_item"]["base_url"] == "https://llm.example.com/v1"
+
+
+def test_platform_model_request_keeps_existing_private_binding(db):
+    chat = _new_chat()
+    UserModelCredentials.set_chat_credential_binding(chat.id, "u1", "user:c1")
+
+    form_data = _transform(
+        {"chat_id": chat.id, "model": "gpt-4o", "model_item": {"id": "gpt-4o"}}
+    )
+    assert form_data["model"] == "gpt-4o"
+    assert _stored_binding(db, chat.id) == "user:c1"
+    assert UserModelCredentials.get_chat_credential_binding(chat.id) == "user:c1"
+
+
+def test_platform_model_request_records_unbound_chat(db):
+    chat = _new_chat()
+    _transform({"chat_id": chat.id, "model": "gpt-4o", "model_item": {"id": "x"}})
+
+    with db() as session:
+        assert session.get(ChatModelCredential, chat.id) is not None
+    assert UserModelCredentials.get_chat_credential_binding(chat.id) == ""
+
+
+def test_legacy_chat_is_backfilled_from_history_once(db, monkeypatch):
+    chat = _new_chat(
+        {
+            "m1": {"role": "user", "content": "hi", "models": ["user:c1"]},
+            "m2": {"role": "assistant", "content": "hello"},
+        }
+    )
+    lookups = []
+    get_messages_map = Chats.get_messages_map_by_chat_id
+    monkeypatch.setattr(
+        Chats,
+        "get_messages_map_by_chat_id",
+        lambda chat_id: lookups.append(chat_id) or get_messages_map(chat_id),
+    )
+
+    form_data = _transform({"chat_id": chat.id, "model": "private-model"})
+    assert form_data["model_item"]["id"] == "private-model"
+    assert _stored_binding(db, chat.id) == "user:c1"
+
+    credentials_module._chat_binding_cache.clear()
+    _transform({"chat_id": chat.id, "model": "private-model"})
+    assert lookups == [chat.id]
+
+
+def test_deleting_chats_removes_their_bindings(db):
+    single = _new_chat()
+    owned = _new_chat()
+    in_folder = _new_chat(folder_id="f1")
+    for chat in (single, owned, in_folder):
+        UserModelCredentials.set_chat_credential_binding(chat.id, "u1", "user:c1")
+
+    assert Chats.delete_chat_by_id_and_user_id(single.id, "u1")
+    assert _stored_binding(db, single.id) is None
+    assert UserModelCredentials.get_chat_credential_binding(single.id) is None
+
+    assert Chats.delete_chats_by_user_id_and_folder_id("u1", "f1")
+    assert _stored_binding(db, in_folder.id) is None
+    assert _stored_binding(db, owned.id) == "user:c1"
+
+    assert Chats.delete_chats_by_user_id("u1")
+    assert _stored_binding(db, owned.id) is None
+    assert UserModelCredentials.get_chat_credential_binding(owned.id) is None
@@ -0,0 +1,213 @@
+import importlib.util
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import chats as chats_module
+from open_webui.models.chats import Chat, ChatForm, Chats
+from open_webui.models.user_model_credentials import ChatModelCredential
+
+MIGRATION = (
+    Path(chats_module.__file__).parent.parent
+    / "migrations"
+    / "versions"
+    / "r1s2t3u4v5w6_add_chat_search_index.py"
+)
+
+
+def _load_migration():
+    spec = importlib.util.spec_from_file_location("chat_search_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _migrate(engine, step):
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            getattr(_load_migration(), step)()
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/chats.db")
+    for table in (Chat, ChatModelCredential):
+        table.__table__.create(engine)
+    _migrate(engine, "upgrade")
+
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db(*args):
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(chats_module, "get_db", get_db)
+    monkeypatch.setattr(chats_module, "get_read_db", get_db)
+    monkeypatch.setattr(chats_module, "_chat_search_fts_available", None)
+    monkeypatch.setattr(
+        chats_module.Folders, "search_folders_by_names", lambda user_id, names: []
+    )
+    return engine
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+def _new_chat(user_id, title, *contents):
+    messages = {
+        f"m{i}": {"id": f"m{i}", "role": "user", "content": content}
+        for i, content in enumerate(contents)
+    }
+    chat = {"title": title, "history": {"messages": messages, "currentId": None}}
+    return Chats.insert_new_chat(user_id, ChatForm(chat=chat))
+
+
+def _search(user_id, query):
+    return [c.title for c in Chats.get_chats_by_user_id_and_search_text(user_id, query)]
+
+
+def _fts_rows(engine, query):
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT rowid FROM chat_search_fts WHERE content LIKE :q"),
+            {"q": f"%{query}%"},
+        ).all()
+
+
+def test_migration_creates_fts_table_kept_in_sync_by_triggers(engine):
+    tables = inspect(engine).get_table_names()
+    assert {"chat_search_index", "chat_search_fts"} <= set(tables)
+
+    chat = _new_chat("u1", "Trip", "packing list for kyoto")
+    assert len(_fts_rows(engine, "kyoto")) == 1
+
+    Chats.update_chat_by_id(
+        chat.id, {**chat.chat, "history": {"messages": {}}, "title": "osaka"}
+    )
+    assert _fts_rows(engine, "kyoto") == []
+    assert len(_fts_rows(engine, "osaka")) == 1
+
+    Chats.delete_chat_by_id(chat.id)
+    assert _fts_rows(engine, "osaka") == []
+
+    _migrate(engine, "downgrade")
+    tables = inspect(engine).get_table_names()
+    assert "chat_search_index" not in tables
+    assert "chat_search_fts" not in tables
+
+
+def test_search_uses_fts_for_long_queries_and_index_table_for_short(engine, statements):
+    _new_chat("u1", "Trip", "packing list for 京都之旅")
+    _new_chat("u1", "Recipes", "dumplings")
+    _new_chat("u2", "Other user", "packing for 京都之旅")
+
+    statements.clear()
+    assert _search("u1", "PACKING") == ["Trip"]
+    assert any("chat_search_fts" in s for s in statements)
+
+    # 少于 3 个字符时 trigram 不可用，退回索引表的 LIKE
+    statements.clear()
+    assert _search("u1", "京都") == ["Trip"]
+    assert not any("chat_search_fts" in s for s in statements)
+
+
+def test_postgres_matches_on_trigram_indexed_content():
+    db = SimpleNamespace(
+        bind=SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+    )
+    sql = Chats._search_index_match_sql(db, "packing")
+    # pg_trgm GIN 索引直接服务于 content LIKE '%...%'
+    assert "FROM chat_search_index" in sql
+    assert "content LIKE :search_pattern" in sql
+
+
+def test_unindexed_chats_fall_back_to_json_scan_until_backfilled(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            Chat.__table__.insert(),
+            {
+                "id": "legacy",
+                "user_id": "u1",
+                "title": "Legacy",
+                "chat": {"messages": [{"content": "Old Notes about kyoto"}]},
+                "archived": False,
+                "created_at": 0,
+                "updated_at": 0,
+            },
+        )
+    _new_chat("u1", "Indexed", "kyoto trip")
+
+    assert sorted(_search("u1", "kyoto")) == ["Indexed", "Legacy"]
+    assert _search("u1", "legacy") == ["Legacy"]
+
+    assert Chats.reindex_chat_search() == 1
+    assert Chats.reindex_chat_search() == 0
+    # 回填后同样的结果完全来自索引
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE chat SET chat = '{}' WHERE id = 'legacy'"))
+    assert sorted(_search("u1", "kyoto")) == ["Indexed", "Legacy"]
+
+
+def _index_writes(statements):
+    return [
+        s
+        for s in statements
+        if "chat_search_index" in s and s.lstrip().startswith(("INSERT", "UPDATE"))
+    ]
+
+
+def test_streaming_saves_skip_the_index_until_generation_ends(engine, statements):
+    chat = _new_chat("u1", "Stream", "question")
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat.id, "a1", {"role": "assistant", "content": ""}
+    )
+
+    statements.clear()
+    for chunk in ("zebra", "zebra crossing", "zebra crossing rules"):
+        Chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id, "a1", {"content": chunk}, index_search=False
+        )
+    Chats.add_message_status_to_chat_by_id_and_message_id(
+        chat.id, "a1", {"description": "searching"}
+    )
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat.id, "a1", {"followUps": ["more?"]}
+    )
+    assert _index_writes(statements) == []
+    assert not any("chat_search_index.content" in s for s in statements)
+    assert _search("u1", "zebra") == []
+
+    assert Chats.update_chat_search_index_by_id(chat.id)
+    assert _search("u1", "zebra") == ["Stream"]
+
+    # 内容未变化时不改动索引行，触发器不会重建 FTS
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE index_updates (id INTEGER)"))
+        conn.execute(
+            text(
+                "CREATE TRIGGER count_index_updates AFTER UPDATE ON chat_search_index "
+                "BEGIN INSERT INTO index_updates VALUES (new.id); END"
+            )
+        )
+    assert Chats.update_chat_search_index_by_id(chat.id)
+    Chats.update_chat_by_id(chat.id, Chats.get_chat_by_id(chat.id).chat)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM index_updates")).scalar() == 0
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import text
+
+from open_webui.internal import db as internal_db
+from open_webui.utils import ttl_cache
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    replica = internal_db._Replica(f"sqlite:///{tmp_path}/replica.db")
+    monkeypatch.setattr(internal_db, "_replicas", [replica])
+    monkeypatch.setattr(
+        internal_db,
+        "_sticky_users",
+        internal_db.TTLCache(100, internal_db.DATABASE_REPLICA_STICKY_SECONDS),
+    )
+    monkeypatch.setattr(internal_db, "_get_sticky_redis", lambda: None)
+    return replica
+
+
+def _bind(user_id=None):
+    with internal_db.get_read_db(user_id) as db:
+        db.execute(text("SELECT 1"))
+        return db.get_bind()
+
+
+def test_reads_go_to_healthy_replica_unless_user_just_wrote(replica):
+    # 首次健康检查前不使用副本
+    assert _bind("u1") is internal_db.engine
+
+    replica.check()
+    assert replica.healthy
+    assert _bind("u1") is replica.engine
+
+    internal_db.mark_user_write("u1")
+    assert _bind("u1") is internal_db.engine
+    assert _bind("u2") is replica.engine
+
+
+def test_lagging_or_failed_replica_falls_back_to_primary(replica, monkeypatch):
+    monkeypatch.setattr(internal_db, "DATABASE_REPLICA_MAX_LAG", -1)
+    replica.check()
+    assert not replica.healthy
+    assert _bind() is internal_db.engine
+
+    broken = internal_db._Replica("sqlite:////nonexistent/dir/replica.db")
+    monkeypatch.setattr(internal_db, "_replicas", [broken])
+    broken.check()
+    assert not broken.healthy
+    assert _bind() is internal_db.engine
+
+
+def test_sticky_window_covers_max_replica_lag(replica, monkeypatch):
+    lag = internal_db.DATABASE_REPLICA_MAX_LAG
+    assert internal_db.DATABASE_REPLICA_STICKY_SECONDS >= lag
+
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    replica.check()
+    # 延迟接近阈值的副本仍在使用
+    replica.lag = lag - 1
+    assert _bind("u1") is replica.engine
+
+    internal_db.mark_user_write("u1")
+    now[0] += 6
+    # 6 秒前的写入在落后 lag - 1 秒的副本上还不可见，必须读主库
+    assert _bind("u1") is internal_db.engine
+
+    now[0] += internal_db.DATABASE_REPLICA_STICKY_SECONDS
+    assert _bind("u1") is replica.engine
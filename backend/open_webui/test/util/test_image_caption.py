@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils import image_caption
+from open_webui.utils.image_caption import caption_images
+
+
+class FakeCaptionModel:
+    """本地 caption 模型替身：记录调用次数与最大并发数"""
+
+    def __init__(self, delay: float = 0.01, fail_urls: tuple = ()):
+        self.delay = delay
+        self.fail_urls = fail_urls
+        self.calls: list[str] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, image_url: str) -> str:
+        self.calls.append(image_url)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if image_url in self.fail_urls:
+                return ""
+            return f"caption of {image_url}"
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def clear_caption_cache():
+    image_caption._caption_cache.clear()
+    yield
+    image_caption._caption_cache.clear()
+
+
+class TestCaptionImages:
+    @pytest.mark.asyncio
+    async def test_each_image_captioned_once_across_turns(self):
+        fake = FakeCaptionModel()
+        history = [f"data:image/png;base64,img{i}" for i in range(5)]
+
+        first = await caption_images(history, "vision", fake)
+        second = await caption_images(
+            history + ["data:image/png;base64,new"], "vision", fake
+        )
+
+        assert len(fake.calls) == 6
+        assert first[history[0]] == f"caption of {history[0]}"
+        assert (
+            second["data:image/png;base64,new"]
+            == "caption of data:image/png;base64,new"
+        )
+
+    @pytest.mark.asyncio
+    async def test_duplicate_images_in_one_turn(self):
+        fake = FakeCaptionModel()
+
+        captions = await caption_images(["a", "a", "b"], "vision", fake)
+
+        assert sorted(fake.calls) == ["a", "b"]
+        assert captions == {"a": "caption of a", "b": "caption of b"}
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(image_caption, "IMAGE_CAPTION_CONCURRENCY", 2)
+        fake = FakeCaptionModel(delay=0.05)
+
+        await caption_images([f"img{i}" for i in range(6)], "vision", fake)
+
+        assert len(fake.calls) == 6
+        assert fake.max_active == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_generation(self):
+        fake = FakeCaptionModel(delay=0.05)
+
+        await asyncio.gather(
+            caption_images(["img"], "vision", fake),
+            caption_images(["img"], "vision", fake),
+        )
+
+        assert fake.calls == ["img"]
+
+    @pytest.mark.asyncio
+    async def test_failed_caption_is_not_cached(self):
+        fake = FakeCaptionModel(fail_urls=("bad",))
+
+        await caption_images(["bad"], "vision", fake)
+        captions = await caption_images(["bad"], "vision", fake)
+
+        assert fake.calls == ["bad", "bad"]
+        assert captions == {"bad": ""}
+
+    @pytest.mark.asyncio
+    async def test_cache_is_per_caption_model(self):
+        fake = FakeCaptionModel()
+
+        await caption_images(["img"], "vision-a", fake)
+        await caption_images(["img"], "vision-b", fake)
+
+        assert len(fake.calls) == 2
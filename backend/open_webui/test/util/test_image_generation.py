@@ -0,0 +1,66 @@
+import asyncio
+import base64
+import io
+import socket
+
+import pytest
+from aiohttp import web
+
+pytest.importorskip("langchain")
+
+from open_webui.routers import images
+
+
+def test_write_b64_image_in_chunks():
+    data = bytes(range(256)) * 5000
+    encoded = base64.b64encode(data).decode()
+    file = io.BytesIO()
+
+    mime_type = images._write_b64_image(f"data:image/webp;base64,{encoded}", file)
+
+    assert mime_type == "image/webp"
+    assert file.getvalue() == data
+
+
+async def _start_image_server(payload: bytes):
+    async def image(request):
+        await asyncio.sleep(0.05)
+        return web.Response(body=payload, content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/image.png", image)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    await web.SockSite(runner, sock).start()
+    return runner, f"http://127.0.0.1:{sock.getsockname()[1]}/image.png"
+
+
+@pytest.mark.asyncio
+async def test_save_images_concurrently_in_order(monkeypatch):
+    payload = b"\x89PNG" + b"x" * 200_000
+    uploads = []
+
+    def fake_upload(request, file, content_type, metadata, user):
+        uploads.append((file.read(), content_type))
+        return f"/files/{len(uploads)}"
+
+    monkeypatch.setattr(images, "_upload_image_file", fake_upload)
+    monkeypatch.setattr(images, "IMAGE_GENERATION_SPOOL_SIZE", 1024)
+
+    runner, url = await _start_image_server(payload)
+    try:
+        results = await images._save_images(
+            None,
+            [{"url": url}] * 4 + [{"b64": base64.b64encode(payload).decode()}],
+            {},
+            None,
+        )
+    finally:
+        await images.images_pool.close()
+        await runner.cleanup()
+
+    assert sorted(r["url"] for r in results) == [f"/files/{i}" for i in range(1, 6)]
+    assert all(data == payload for data, _ in uploads)
+    assert {content_type for _, content_type in uploads} == {"image/png"}
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import knowledge_reindex as reindex_models
+from open_webui.models.knowledge_reindex import (
+    KnowledgeReindexItem,
+    KnowledgeReindexJob,
+    KnowledgeReindexJobs,
+)
+
+STALE_AFTER = 300
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/reindex.db")
+    for table in (KnowledgeReindexJob, KnowledgeReindexItem):
+        table.__table__.create(engine)
+
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(reindex_models, "get_db", get_db)
+    return get_db
+
+
+def _age_job(get_db, job_id, seconds):
+    with get_db() as db:
+        db.query(KnowledgeReindexJob).filter_by(id=job_id).update(
+            {"updated_at": int(time.time()) - seconds}
+        )
+        db.commit()
+
+
+def test_claim_is_exclusive_until_heartbeat_goes_stale(db):
+    job = KnowledgeReindexJobs.insert_new_job("admin", [("kb1", "f1")])
+
+    assert KnowledgeReindexJobs.claim_job(job.id, "a", STALE_AFTER)
+    assert not KnowledgeReindexJobs.claim_job(job.id, "b", STALE_AFTER)
+    # 同一实例重启后可以重新认领自己的任务
+    assert KnowledgeReindexJobs.claim_job(job.id, "a", STALE_AFTER)
+
+    # 心跳刷新后任务仍属于 a
+    _age_job(db, job.id, STALE_AFTER + 1)
+    assert KnowledgeReindexJobs.heartbeat(job.id, "a")
+    assert not KnowledgeReindexJobs.claim_job(job.id, "b", STALE_AFTER)
+    assert job.id not in KnowledgeReindexJobs.get_resumable_job_ids(STALE_AFTER)
+
+    # 心跳超时后被 b 接管，a 的心跳失败
+    _age_job(db, job.id, STALE_AFTER + 1)
+    assert job.id in KnowledgeReindexJobs.get_resumable_job_ids(STALE_AFTER)
+    assert KnowledgeReindexJobs.claim_job(job.id, "b", STALE_AFTER)
+    assert not KnowledgeReindexJobs.heartbeat(job.id, "a")
+    assert KnowledgeReindexJobs.get_job_by_id(job.id).owner == "b"
+
+
+####################
+# 执行器
+####################
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    pytest.importorskip("langchain_core")
+    from open_webui.utils import knowledge_reindex
+
+    calls = {"reset": [], "batches": []}
+
+    async def reset_collection(collection_name):
+        calls["reset"].append(collection_name)
+
+    def process_batch(request, collection_name, items, user):
+        calls["batches"].append(sorted(item.file_id for item in items))
+        KnowledgeReindexJobs.update_items_status(
+            [item.id for item in items], "completed"
+        )
+
+    async def emit_progress(job):
+        pass
+
+    monkeypatch.setattr(knowledge_reindex, "INSTANCE_ID", "a")
+    monkeypatch.setattr(knowledge_reindex, "_reset_collection", reset_collection)
+    monkeypatch.setattr(knowledge_reindex, "_process_batch", process_batch)
+    monkeypatch.setattr(knowledge_reindex, "_emit_progress", emit_progress)
+    monkeypatch.setattr(knowledge_reindex.Users, "get_user_by_id", lambda id: None)
+    return knowledge_reindex, calls
+
+
+def test_resume_skips_completed_files_and_reset_collections(db, runner):
+    knowledge_reindex, calls = runner
+    job = KnowledgeReindexJobs.insert_new_job(
+        "admin", [("kb1", "f1"), ("kb1", "f2"), ("kb2", "f3")]
+    )
+    items = {i.file_id: i for i in KnowledgeReindexJobs.get_items_by_job_id(job.id)}
+
+    # 模拟上次执行在 kb1 清空后中断：f1 已完成，f2 处理到一半
+    KnowledgeReindexJobs.claim_job(job.id, "gone", STALE_AFTER)
+    KnowledgeReindexJobs.update_job_by_id(
+        job.id, {"meta": {"reset_collections": ["kb1"]}}
+    )
+    KnowledgeReindexJobs.update_items_status([items["f1"].id], "completed")
+    KnowledgeReindexJobs.update_items_status([items["f2"].id], "processing")
+    _age_job(db, job.id, STALE_AFTER + 1)
+
+    asyncio.run(knowledge_reindex.run_reindex_job(None, job.id))
+
+    # 已清空过的 kb1 不再删除，否则会丢掉 f1 的向量
+    assert calls["reset"] == ["kb2"]
+    assert sorted(calls["batches"]) == [["f2"], ["f3"]]
+
+    job = KnowledgeReindexJobs.get_job_by_id(job.id)
+    assert job.status == "completed"
+    assert job.owner == "a"
+    assert (job.processed, job.failed, job.total) == (3, 0, 3)
+    assert sorted(job.meta["reset_collections"]) == ["kb1", "kb2"]
+
+    # 再次执行是幂等的：没有待处理文件，也不会再清空任何 collection
+    KnowledgeReindexJobs.update_job_by_id(job.id, {"status": "running"})
+    asyncio.run(knowledge_reindex.run_reindex_job(None, job.id))
+    assert calls["reset"] == ["kb2"]
+    assert len(calls["batches"]) == 2
+
+
+def test_lost_claim_stops_the_runner(db, runner, monkeypatch):
+    knowledge_reindex, _ = runner
+    monkeypatch.setattr(knowledge_reindex, "KNOWLEDGE_REINDEX_STALE_TIMEOUT", 0)
+    job = KnowledgeReindexJobs.insert_new_job("admin", [("kb1", "f1")])
+    KnowledgeReindexJobs.claim_job(job.id, "a", STALE_AFTER)
+
+    async def run():
+        work = asyncio.create_task(asyncio.sleep(30))
+        keeper = asyncio.create_task(knowledge_reindex._keep_claim(job.id, work))
+
+        await asyncio.sleep(1.2)
+        assert not work.done()
+
+        # 其他实例接管后，下一次心跳失败并取消本实例的执行
+        _age_job(db, job.id, STALE_AFTER + 1)
+        assert KnowledgeReindexJobs.claim_job(job.id, "b", STALE_AFTER)
+        await asyncio.wait_for(keeper, 3)
+        assert work.cancelled()
+
+    asyncio.run(run())
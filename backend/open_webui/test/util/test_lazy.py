@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils import lazy
+from open_webui.utils.lazy import LazyObject, is_loaded, resolve
+
+
+class _Client:
+    value = 1
+
+    def ping(self):
+        return "pong"
+
+
+def test_lazy_object_loads_once_on_first_access():
+    calls = []
+    client = LazyObject(lambda: calls.append(1) or _Client(), "client", warm_up=False)
+
+    assert calls == []
+    assert not is_loaded(client)
+
+    assert client.ping() == "pong"
+    assert client.value == 1
+    assert calls == [1]
+    assert isinstance(resolve(client), _Client)
+
+
+def test_lazy_object_retries_after_failure():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("unavailable")
+        return _Client()
+
+    client = LazyObject(factory, "client", warm_up=False)
+
+    with pytest.raises(RuntimeError):
+        client.ping()
+    assert client.ping() == "pong"
+    assert len(attempts) == 2
+
+
+def test_warm_up_loads_registered_objects(monkeypatch):
+    monkeypatch.setattr(lazy, "_warm_ups", [])
+    client = LazyObject(_Client, "client")
+    lazy.register_warm_up("broken", lambda: 1 / 0)
+
+    asyncio.run(lazy.warm_up_subsystems())
+
+    assert is_loaded(client)
+
+
+def test_optional_lazy_object_resolves_to_none_on_failure():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        raise RuntimeError("model missing")
+
+    model = LazyObject(factory, "model", warm_up=False, optional=True)
+
+    assert resolve(model) is None
+    assert resolve(model) is None
+    assert len(attempts) == 1
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import messages as messages_module
+from open_webui.models import users as users_module
+from open_webui.models.messages import Message, MessageReaction, Messages
+from open_webui.models.users import User
+
+
+@pytest.fixture
+def statements(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/messages.db")
+    for table in (User, Message, MessageReaction):
+        table.__table__.create(engine)
+
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(messages_module, "get_db", get_db)
+    monkeypatch.setattr(users_module, "get_db", get_db)
+
+    with get_db() as db:
+        for i in range(60):
+            user_id = f"user-{i % 7}"
+            if i < 7:
+                db.add(
+                    User(
+                        id=user_id,
+                        name=user_id,
+                        email=f"{user_id}@example.com",
+                        role="user",
+                        profile_image_url="",
+                        last_active_at=0,
+                        updated_at=0,
+                        created_at=0,
+                    )
+                )
+            db.add(
+                Message(
+                    id=f"m{i}",
+                    user_id=user_id,
+                    channel_id="c1",
+                    reply_to_id=f"m{i - 1}" if i % 3 == 0 and i else None,
+                    content=str(i),
+                    created_at=i,
+                    updated_at=i,
+                )
+            )
+            db.add(
+                Message(
+                    id=f"r{i}",
+                    user_id=user_id,
+                    channel_id="c1",
+                    parent_id=f"m{i}",
+                    content="reply",
+                    created_at=1000 + i,
+                    updated_at=1000 + i,
+                )
+            )
+            db.add(
+                MessageReaction(
+                    id=f"x{i}",
+                    user_id=user_id,
+                    message_id=f"m{i}",
+                    name="+1",
+                    created_at=i,
+                )
+            )
+        db.commit()
+
+    executed = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+def _count_statements(statements, limit):
+    statements.clear()
+    page = Messages.get_channel_message_page("c1", 0, limit)
+    assert len(page) == limit
+    return len(statements), page
+
+
+def test_channel_message_page_statement_count_is_constant(statements):
+    small, _ = _count_statements(statements, 10)
+    large, page = _count_statements(statements, 50)
+
+    assert small == large
+
+    message = page[0]
+    assert message.user.name == message.user_id
+    assert message.reply_count == 1
+    assert message.reactions[0].count == 1
+    replied = next(m for m in page if m.reply_to_id)
+    assert replied.reply_to_message.id == replied.reply_to_id
+    assert replied.reply_to_message.user is not None
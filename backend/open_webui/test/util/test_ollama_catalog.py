@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.routers import ollama
+
+
+@pytest.fixture(autouse=True)
+def catalog(monkeypatch):
+    catalog = ollama._ModelCatalog()
+    monkeypatch.setattr(ollama, "_catalog", catalog)
+    return catalog
+
+
+def _request():
+    config = SimpleNamespace(
+        ENABLE_OLLAMA_API=True,
+        OLLAMA_BASE_URLS=["http://ollama:11434"],
+        OLLAMA_API_CONFIGS={},
+    )
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(config=config)))
+
+
+def test_invalidate_discards_in_flight_refresh(monkeypatch, catalog):
+    listings = [["before-pull"], ["after-pull"]]
+    release_first = asyncio.Event()
+
+    async def fetch_all_models(request):
+        names = listings.pop(0)
+        if names == ["before-pull"]:
+            await release_first.wait()
+        return {"models": [{"model": name} for name in names]}
+
+    monkeypatch.setattr(ollama, "fetch_all_models", fetch_all_models)
+
+    async def run():
+        request = _request()
+        stale = asyncio.create_task(ollama.get_all_models(request))
+        await asyncio.sleep(0)
+
+        ollama.invalidate_models_catalog()
+        # 旧实现会把失效前的刷新任务交给这里，一直等到它完成
+        fresh = await asyncio.wait_for(ollama.get_all_models(request), 5)
+        assert [m["model"] for m in fresh["models"]] == ["after-pull"]
+
+        # 失效前发起的刷新完成后不覆盖新目录
+        release_first.set()
+        await stale
+        assert [m["model"] for m in catalog.models["models"]] == ["after-pull"]
+        assert list(request.app.state.OLLAMA_MODELS) == ["after-pull"]
+
+    asyncio.run(run())
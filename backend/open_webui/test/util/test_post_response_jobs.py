@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from open_webui.utils import middleware
+from open_webui.utils.middleware import build_title_messages, run_post_response_jobs
+
+
+def test_title_messages_are_bounded(monkeypatch):
+    monkeypatch.setattr(middleware, "TITLE_GENERATION_MAX_MESSAGES", 3)
+    monkeypatch.setattr(middleware, "TITLE_GENERATION_MAX_CHARS", 5)
+    messages = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+        for i in range(10)
+    ]
+
+    result = build_title_messages(messages)
+
+    # 首条用户消息 + 最近两条
+    assert [m["content"] for m in result] == ["messa"] * 3
+    assert result[0] is not messages[0]
+    assert [m["role"] for m in result] == ["user", "user", "assistant"]
+    assert build_title_messages(messages[:2]) == [
+        {"role": "user", "content": "messa"},
+        {"role": "assistant", "content": "messa"},
+    ]
+
+
+def test_jobs_run_concurrently_and_fail_independently():
+    finished = []
+
+    async def fast():
+        await asyncio.sleep(0.01)
+        finished.append("fast")
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def run():
+        await run_post_response_jobs(
+            [("slow", slow(), 0.1), ("broken", broken(), 1), ("fast", fast(), 1)]
+        )
+
+    asyncio.run(run())
+    assert finished == ["fast"]
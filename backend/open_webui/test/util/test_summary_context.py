@@ -0,0 +1,171 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+summary = pytest.importorskip("open_webui.utils.summary_1")
+
+
+@pytest.fixture(autouse=True)
+def token_counts(monkeypatch):
+    """每条消息的 token 数取 content 长度，并记录实际计数过的内容"""
+    summary._context_message_cache.clear()
+    summary._summary_items_cache.clear()
+    counted = []
+
+    def compute_token_count(messages):
+        counted.extend(m["content"] for m in messages)
+        return sum(len(m["content"]) for m in messages)
+
+    monkeypatch.setattr(summary, "compute_token_count", compute_token_count)
+    yield counted
+    summary._context_message_cache.clear()
+    summary._summary_items_cache.clear()
+
+
+def _chain(*contents, parent=None, prefix="m"):
+    messages = {}
+    for i, content in enumerate(contents):
+        message_id = f"{prefix}{i}"
+        messages[message_id] = {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": content,
+            "parentId": parent,
+            "timestamp": 100 + i,
+        }
+        parent = message_id
+    return messages
+
+
+def _ids(window):
+    return [m["id"] for m in window]
+
+
+def test_window_stops_after_budget_is_exceeded():
+    messages = _chain(*["x" * 10] * 8)
+
+    window, tokens = summary._assemble_context_window("c1", messages, "m7", 25, 1)
+    # 加入第三条时超过 25，窗口到此为止
+    assert _ids(window) == ["m5", "m6", "m7"]
+    assert tokens == 30
+
+
+def test_window_keeps_minimum_message_count_over_budget():
+    messages = _chain(*["x" * 10] * 8)
+
+    window, tokens = summary._assemble_context_window("c1", messages, "m7", 5, 4)
+    assert _ids(window) == ["m4", "m5", "m6", "m7"]
+    assert tokens == 40
+
+
+def test_window_follows_parent_chain_of_anchor_branch():
+    messages = _chain("q", "a1", "q2", prefix="m")
+    # 在 m1 处分叉出另一条分支
+    messages.update(_chain("edited q2", "a2", parent="m1", prefix="b"))
+
+    window, _ = summary._assemble_context_window("c1", messages, "b1", 1000, 1)
+    assert _ids(window) == ["m0", "m1", "b0", "b1"]
+
+    window, _ = summary._assemble_context_window("c1", messages, "m2", 1000, 1)
+    assert _ids(window) == ["m0", "m1", "m2"]
+
+
+def test_edited_message_is_recounted(token_counts):
+    messages = _chain("hello", "world")
+    summary._assemble_context_window("c1", messages, "m1", 1000, 1)
+    summary._assemble_context_window("c1", messages, "m1", 1000, 1)
+    assert token_counts == ["world", "hello"]
+
+    messages["m0"]["content"] = "hello again"
+    window, tokens = summary._assemble_context_window("c1", messages, "m1", 1000, 1)
+    assert token_counts == ["world", "hello", "hello again"]
+    assert window[0]["content"] == "hello again"
+    assert tokens == len("hello again") + len("world")
+
+
+class _Client:
+    def __init__(self):
+        self.items = {"ids": ["s1"], "documents": ["summary"], "metadatas": [{}]}
+        self.gets = 0
+        self.collections = set()
+
+    async def aget(self, collection_name):
+        self.gets += 1
+        if collection_name not in self.collections:
+            return None
+        return SimpleNamespace(**{k: [v] for k, v in self.items.items()})
+
+    async def ahas_collection(self, collection_name):
+        return collection_name in self.collections
+
+    async def adelete_collection(self, collection_name):
+        self.collections.discard(collection_name)
+
+
+def _request(client, embedding_function=None):
+    state = SimpleNamespace(
+        VECTOR_DB_CLIENT=client, EMBEDDING_FUNCTION=embedding_function
+    )
+    return SimpleNamespace(app=SimpleNamespace(state=state))
+
+
+def test_summary_list_cache_is_dropped_with_collection():
+    from open_webui.routers.chats import _delete_chat_summary_collection
+
+    client = _Client()
+    request = _request(client)
+    store = summary.SummaryChromaStore(request, "u1", "c1")
+    client.collections.add(store.collection_name)
+
+    async def run():
+        assert len(await store.get_all_cached()) == 1
+        assert len(await store.get_all_cached()) == 1
+        assert client.gets == 1
+
+        await _delete_chat_summary_collection(request, "u1", "c1")
+        assert await store.get_all_cached() == []
+        assert client.gets == 2
+
+    asyncio.run(run())
+
+
+def test_embedding_task_cancelled_when_window_assembly_fails(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def embedding_function(query, user=None):
+        started.set()
+        release.wait(5)
+        return [0.1]
+
+    def broken_window(*args):
+        started.wait(5)
+        raise RuntimeError("broken message map")
+
+    client = _Client()
+    request = _request(client, embedding_function)
+    monkeypatch.setattr(
+        summary.Chats,
+        "get_messages_map_by_chat_id",
+        lambda chat_id: _chain("hello"),
+    )
+    monkeypatch.setattr(summary, "_assemble_context_window", broken_window)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await summary.messages_loaded(
+                request,
+                {"chat_id": "c1", "message_id": "m0"},
+                SimpleNamespace(id="u1"),
+                memory_enabled=False,
+            )
+        pending = [
+            task for task in asyncio.all_tasks() if task is not asyncio.current_task()
+        ]
+        assert pending and all(
+            task.cancelling() or task.cancelled() for task in pending
+        )
+        release.set()
+
+    asyncio.run(run())
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+from open_webui import tasks
+from open_webui.utils import summary_scheduler
+
+
+def test_run_once_waits_only_for_spawned_summary_task(monkeypatch):
+    monkeypatch.setattr(tasks, "tasks", {})
+    monkeypatch.setattr(tasks, "item_tasks", {})
+    monkeypatch.setattr(summary_scheduler, "tasks", tasks.tasks)
+
+    async def run():
+        async def update_summary():
+            # 同一聊天随后登记的对话任务不应被等待
+            await tasks.create_task(None, asyncio.sleep(5), id="chat-1")
+            task_id, _ = await tasks.create_task(None, asyncio.sleep(0.05), id="chat-1")
+            return task_id
+
+        start = time.monotonic()
+        await summary_scheduler._run_once("chat-1", update_summary, ())
+        assert time.monotonic() - start < 1
+
+        for task in list(tasks.tasks.values()):
+            task.cancel()
+        await asyncio.gather(*tasks.tasks.values(), return_exceptions=True)
+
+    asyncio.run(run())
@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+summary = pytest.importorskip("open_webui.utils.summary_1")
+
+
+class _Client:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def asearch(self, collection_name, vectors, limit):
+        self.active += 1
+        self.calls += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+        return SimpleNamespace(
+            ids=[[collection_name]],
+            documents=[["doc"]],
+            metadatas=[[{}]],
+            distances=[[0.5]],
+        )
+
+
+def test_search_in_user_chats_bounds_concurrency(monkeypatch):
+    client = _Client()
+    request = SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(VECTOR_DB_CLIENT=client))
+    )
+    monkeypatch.setattr(summary, "VECTOR_DB_EXECUTOR_WORKERS", 4)
+    monkeypatch.setattr(
+        summary.Chats,
+        "get_chat_title_id_list_by_user_id",
+        lambda user_id, **kwargs: [{"id": f"chat-{i}"} for i in range(50)],
+    )
+
+    store = summary.SummaryChromaStore(request, "user-1", "chat-0")
+    results = asyncio.run(store.search_in_user_chats(request, [0.1], 5))
+
+    assert client.calls == 50
+    assert client.peak == 4
+    assert len(results) == 5
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from open_webui import tasks
+
+
+@pytest.fixture(autouse=True)
+def reset_tasks(monkeypatch):
+    monkeypatch.setattr(tasks, "tasks", {})
+    monkeypatch.setattr(tasks, "item_tasks", {})
+    monkeypatch.setattr(tasks, "_draining", False)
+
+
+def test_expired_leases_are_removed():
+    async def run():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+        # 已崩溃 worker 留下的任务：租约已过期
+        await tasks.redis_save_task(redis, "orphan", "chat-1")
+        await redis.zadd(tasks.REDIS_TASK_LEASES_KEY, {"orphan": 0})
+
+        task_id, task = await tasks.create_task(redis, asyncio.sleep(10), id="chat-2")
+        await redis.zadd(tasks.REDIS_TASK_LEASES_KEY, {task_id: 0})
+
+        assert await tasks.redis_cleanup_expired_tasks(redis) == 1
+        assert await tasks.list_tasks(redis) == [task_id]
+        assert await tasks.list_task_ids_by_item_id(redis, "chat-1") == []
+
+        await tasks.redis_renew_leases(redis)
+        assert await redis.zscore(tasks.REDIS_TASK_LEASES_KEY, task_id) > 0
+        workers = await tasks.list_workers(redis)
+        assert workers[tasks.INSTANCE_ID]["active"] == 1
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        await redis.aclose()
+
+    asyncio.run(run())
+
+
+def test_drain_waits_for_running_tasks():
+    async def run():
+        finished, _ = await tasks.create_task(None, asyncio.sleep(0.05))
+        _, slow = await tasks.create_task(None, asyncio.sleep(10))
+
+        cancelled = await tasks.drain(None, timeout=0.2)
+
+        assert tasks.is_draining()
+        assert cancelled == 1
+        assert slow.cancelled()
+        assert finished not in tasks.tasks
+
+    asyncio.run(run())
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+from open_webui.utils.upstream_pool import UpstreamPool
+
+
+def test_marks_unhealthy_after_threshold_and_recovers():
+    pool = UpstreamPool("test", unhealthy_threshold=2, unhealthy_cooldown=60)
+    url = "http://ollama:11434/api/tags"
+
+    pool.record_failure(url, TimeoutError())
+    assert pool.is_healthy(url)
+    pool.record_failure("http://ollama:11434/api/ps", "boom")
+    assert not pool.is_healthy(url)
+
+    pool.record_success(url, elapsed=0.1)
+    stats = pool.stats()["http://ollama:11434"]
+    assert pool.is_healthy(url)
+    assert stats["total_requests"] == 3
+    assert stats["total_failures"] == 2
+    assert stats["consecutive_failures"] == 0
+    assert stats["latency_ms"] == 100.0
+
+
+def test_reuses_session_per_host():
+    async def run():
+        pool = UpstreamPool("test")
+        first = pool.get_session("http://ollama:11434/api/tags")
+        assert pool.get_session("http://ollama:11434/api/chat") is first
+        assert pool.get_session("http://other:11434/api/tags") is not first
+        await pool.close()
+        assert first.closed
+
+    asyncio.run(run())
+
+
+def test_allows_single_probe_after_cooldown(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("open_webui.utils.upstream_pool.time.monotonic", lambda: now[0])
+    pool = UpstreamPool("test", unhealthy_threshold=1, unhealthy_cooldown=30)
+    url = "http://ollama:11434/api/tags"
+
+    assert pool.allow_request(url)
+    pool.record_failure(url, "boom")
+    assert not pool.allow_request(url)
+
+    now[0] += 31
+    assert pool.allow_request(url)
+    # 探测返回前的并发调用方继续跳过
+    assert not pool.allow_request(url)
+    assert not pool.is_healthy(url)
+
+    pool.record_success(url)
+    assert pool.allow_request(url)
+    assert pool.allow_request(url)
+
+
+def test_recreates_session_on_another_loop():
+    pool = UpstreamPool("test")
+
+    async def get():
+        return pool.get_session("http://ollama:11434/api/tags")
+
+    first = asyncio.run(get())
+    second = asyncio.run(get())
+    assert second is not first
+
+    asyncio.run(pool.close())
+
+
+def test_session_drops_cookies_and_closes_replaced_session():
+    pool = UpstreamPool("test")
+
+    async def get():
+        session = pool.get_session("http://ollama:11434/api/tags")
+        session.cookie_jar.update_cookies({"sid": "user-a"})
+        return session
+
+    first = asyncio.run(get())
+    assert len(first.cookie_jar) == 0
+
+    second = asyncio.run(get())
+    assert first.closed
+    assert not second.closed
+    asyncio.run(pool.close())
+
+
+def test_closes_replaced_session_on_its_running_loop():
+    pool = UpstreamPool("test")
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+
+    async def get():
+        return pool.get_session("http://ollama:11434/api/tags")
+
+    try:
+        first = asyncio.run_coroutine_threadsafe(get(), loop).result()
+        second = asyncio.run(get())
+        for _ in range(100):
+            if first.closed:
+                break
+            time.sleep(0.01)
+        assert first.closed
+        assert not second.closed
+        asyncio.run(pool.close())
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,155 @@
+import asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import user_profile as profile_models
+from open_webui.models.user_profile import (
+    DataforPersonalizedExperience,
+    UserProfileMessage,
+    UserProfiles,
+)
+from open_webui.utils import user_profile
+
+USER = SimpleNamespace(settings=SimpleNamespace(ui={"enableDataAnalysis": True}))
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/profile.db")
+    for table in (DataforPersonalizedExperience, UserProfileMessage):
+        table.__table__.create(engine)
+
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(profile_models, "get_db", get_db)
+    monkeypatch.setattr(user_profile, "USER_PROFILE_MESSAGE_THRESHOLD", 3)
+    user_profile._pending_counts.clear()
+    user_profile._analyzing_users.clear()
+    yield
+    user_profile._pending_counts.clear()
+    user_profile._analyzing_users.clear()
+
+
+def test_pending_message_queue_roundtrip():
+    for i in range(3):
+        assert UserProfiles.add_pending_message("u1", f"m{i}", "gpt")
+    UserProfiles.add_pending_message("u2", "other")
+
+    assert UserProfiles.count_pending_messages("u1") == 3
+    rows = UserProfiles.get_pending_messages("u1")
+    assert [row.content for row in rows] == ["m0", "m1", "m2"]
+    assert [row.content for row in UserProfiles.get_pending_messages("u1", 2)] == [
+        "m0",
+        "m1",
+    ]
+
+    # 只删除快照内的消息，之后追加的保留
+    UserProfiles.add_pending_message("u1", "m3")
+    assert UserProfiles.delete_pending_messages("u1", rows[-1].id)
+    assert [row.content for row in UserProfiles.get_pending_messages("u1")] == ["m3"]
+    assert UserProfiles.count_pending_messages("u2") == 1
+
+
+def _request(redis=None):
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(redis=redis)))
+
+
+def _form(content):
+    return {"messages": [{"role": "user", "content": content}]}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """记录分析用的 prompt；release 之前分析一直挂起"""
+    calls = SimpleNamespace(prompts=[], release=None, started=None)
+
+    async def call_llm_for_profile(prompt, request, model_id, user):
+        calls.prompts.append(prompt)
+        calls.started.set()
+        await calls.release.wait()
+        return {"basic_info": {"language": "zh-CN"}}
+
+    monkeypatch.setattr(user_profile, "call_llm_for_profile", call_llm_for_profile)
+    return calls
+
+
+async def _wait_for_analysis():
+    await asyncio.gather(*list(user_profile._analysis_tasks))
+
+
+def test_threshold_triggers_single_analysis_and_keeps_late_messages(llm):
+    async def run():
+        llm.started, llm.release = asyncio.Event(), asyncio.Event()
+        request = _request()
+
+        for i in range(2):
+            await user_profile.update_profile(
+                "u1", request, "gpt", USER, _form(f"m{i}")
+            )
+        await asyncio.sleep(0)
+        assert not user_profile._analysis_tasks
+
+        await user_profile.update_profile("u1", request, "gpt", USER, _form("m2"))
+        await asyncio.wait_for(llm.started.wait(), 5)
+
+        # 分析期间追加的消息不会再启动分析，也不会被本轮删除
+        await user_profile.update_profile("u1", request, "gpt", USER, _form("m3"))
+        assert len(user_profile._analysis_tasks) == 1
+
+        llm.release.set()
+        await _wait_for_analysis()
+
+    asyncio.run(run())
+
+    assert len(llm.prompts) == 1
+    assert "m2" in llm.prompts[0] and "m3" not in llm.prompts[0]
+    assert UserProfiles.get_by_user_id("u1").profile == {
+        "basic_info": {"language": "zh-CN"}
+    }
+    assert [row.content for row in UserProfiles.get_pending_messages("u1")] == ["m3"]
+
+
+def test_disabled_analysis_does_not_queue():
+    user = SimpleNamespace(settings=SimpleNamespace(ui={}))
+    asyncio.run(user_profile.update_profile("u1", _request(), "gpt", user, _form("x")))
+    assert UserProfiles.count_pending_messages("u1") == 0
+
+
+def test_redis_queue_trims_only_the_analyzed_snapshot(llm):
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        llm.started, llm.release = asyncio.Event(), asyncio.Event()
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        request = _request(redis)
+
+        for i in range(3):
+            await user_profile.update_profile(
+                "u1", request, "gpt", USER, _form(f"m{i}")
+            )
+        await asyncio.wait_for(llm.started.wait(), 5)
+        assert await redis.exists(user_profile._lock_key("u1"))
+
+        await user_profile.update_profile("u1", request, "gpt", USER, _form("m3"))
+        llm.release.set()
+        await _wait_for_analysis()
+
+        remaining = await redis.lrange(user_profile._queue_key("u1"), 0, -1)
+        assert [item for item in remaining if '"m3"' in item] == remaining
+        assert len(remaining) == 1
+        assert not await redis.exists(user_profile._lock_key("u1"))
+
+    asyncio.run(run())
+    assert UserProfiles.count_pending_messages("u1") == 0
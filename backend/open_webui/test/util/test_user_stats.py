@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from open_webui.models.user_interactions import UserInteractions
+from open_webui.utils import user_stats
+
+
+def test_drain_keeps_counts_until_written(monkeypatch):
+    written = []
+    failing = {"u2"}
+
+    def increment(user_id, day, amount=1, last_interaction_at=None):
+        if user_id in failing:
+            return False
+        written.append((user_id, day, amount))
+        return True
+
+    monkeypatch.setattr(UserInteractions, "increment", increment)
+
+    async def run():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        # 长时间中断后遗留的旧日期也要写库
+        await redis.hset(f"{user_stats.REDIS_INTERACTION_KEY}:2020-01-01", "u1", 3)
+        await redis.hset(f"{user_stats.REDIS_INTERACTION_KEY}:2020-01-02", "u2", 5)
+
+        await user_stats._drain_redis_counters(redis)
+        assert written == [("u1", "2020-01-01", 3)]
+        processing = f"{user_stats.REDIS_INTERACTION_PROCESSING_KEY}:2020-01-02"
+        assert await redis.hgetall(processing) == {"u2": "5"}
+
+        # 写库恢复后重试遗留的计数
+        failing.clear()
+        await user_stats._drain_redis_counters(redis)
+        assert written[-1] == ("u2", "2020-01-02", 5)
+        assert await redis.keys("*") == []
+        await redis.aclose()
+
+    asyncio.run(run())
+
+
+def test_last_interaction_kept_until_counts_are_written(monkeypatch):
+    written = []
+    failing = {"u1"}
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    def increment(user_id, day, amount=1, last_interaction_at=None):
+        if user_id in failing:
+            return False
+        written.append((user_id, last_interaction_at))
+        return True
+
+    monkeypatch.setattr(UserInteractions, "increment", increment)
+
+    async def run():
+        await redis.hset(f"{user_stats.REDIS_INTERACTION_KEY}:2020-01-01", "u1", 3)
+        await redis.hset(user_stats.REDIS_INTERACTION_LAST_KEY, "u1", 100)
+
+        # 写库失败时最后交互时间不能丢
+        await user_stats._drain_redis_counters(redis)
+        assert await redis.hgetall(user_stats.REDIS_INTERACTION_LAST_KEY) == {
+            "u1": "100"
+        }
+
+        failing.clear()
+        await user_stats._drain_redis_counters(redis)
+        assert written == [("u1", 100)]
+        assert await redis.hgetall(user_stats.REDIS_INTERACTION_LAST_KEY) == {}
+
+    asyncio.run(run())
+
+
+def test_drain_keeps_last_interaction_updated_meanwhile(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    loops = []
+
+    async def newer_interaction():
+        await redis.hset(user_stats.REDIS_INTERACTION_LAST_KEY, "u1", 200)
+
+    def increment(user_id, day, amount=1, last_interaction_at=None):
+        # 写库期间用户又发起了一次请求
+        asyncio.run_coroutine_threadsafe(newer_interaction(), loops[0]).result(5)
+        return True
+
+    monkeypatch.setattr(UserInteractions, "increment", increment)
+
+    async def run():
+        loops.append(asyncio.get_running_loop())
+        await redis.hset(f"{user_stats.REDIS_INTERACTION_KEY}:2020-01-01", "u1", 3)
+        await redis.hset(user_stats.REDIS_INTERACTION_LAST_KEY, "u1", 100)
+
+        await user_stats._drain_redis_counters(redis)
+        assert await redis.hgetall(user_stats.REDIS_INTERACTION_LAST_KEY) == {
+            "u1": "200"
+        }
+
+    asyncio.run(run())
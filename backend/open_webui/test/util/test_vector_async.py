@@ -0,0 +1,185 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.retrieval.vector.main import VectorDBBase
+
+
+class FakeVectorDB(VectorDBBase):
+    def __init__(self):
+        self.calls = []
+
+    def _record(self, name, **kwargs):
+        self.calls.append((name, threading.current_thread().name, kwargs))
+
+    def has_collection(self, collection_name):
+        self._record("has_collection", collection_name=collection_name)
+        return True
+
+    def delete_collection(self, collection_name):
+        self._record("delete_collection", collection_name=collection_name)
+
+    def insert(self, collection_name, items):
+        self._record("insert", collection_name=collection_name)
+
+    def upsert(self, collection_name, items):
+        self._record("upsert", collection_name=collection_name)
+
+    def search(self, collection_name, vectors, limit):
+        self._record("search", collection_name=collection_name, limit=limit)
+        return "result"
+
+    def query(self, collection_name, filter, limit=-1):
+        self._record("query", collection_name=collection_name, limit=limit)
+
+    def get(self, collection_name):
+        self._record("get", collection_name=collection_name)
+
+    def delete(self, collection_name, ids=None, filter=None):
+        self._record("delete", collection_name=collection_name, ids=ids)
+
+    def reset(self):
+        self._record("reset")
+
+
+def test_async_methods_run_in_vector_db_executor():
+    db = FakeVectorDB()
+
+    result = asyncio.run(db.asearch(collection_name="c", vectors=[[0.1]], limit=3))
+
+    assert result == "result"
+    name, thread_name, kwargs = db.calls[0]
+    assert name == "search"
+    assert thread_name.startswith("vector-db")
+    assert kwargs == {"collection_name": "c", "limit": 3}
+
+
+def test_aquery_keeps_backend_default_limit():
+    db = FakeVectorDB()
+
+    async def run():
+        await db.aquery(collection_name="c", filter={})
+        await db.aquery(collection_name="c", filter={}, limit=5)
+
+    asyncio.run(run())
+
+    assert [call[2]["limit"] for call in db.calls] == [-1, 5]
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            self.calls.append((name, kwargs))
+            return self.results.get(name)
+
+        return call
+
+
+def test_milvus_uses_async_client_and_executor_for_paged_query(monkeypatch):
+    milvus = pytest.importorskip("open_webui.retrieval.vector.dbs.milvus")
+
+    db = milvus.MilvusClient.__new__(milvus.MilvusClient)
+    db.collection_prefix = "open_webui"
+    db.aclient = FakeAsyncClient()
+    db.aclient.results = {
+        "has_collection": True,
+        "search": [[{"id": "a", "distance": 1.0, "entity": {"data": {"text": "t"}}}]],
+    }
+    threads = []
+    monkeypatch.setattr(
+        db, "query", lambda *a, **kw: threads.append(threading.current_thread().name)
+    )
+
+    async def run():
+        result = await db.asearch("file-1", [[0.1]], 3)
+        await db.adelete("file-1", filter={"file_id": "f1"})
+        await db.aget("file-1")
+        return result
+
+    result = asyncio.run(run())
+
+    assert result.ids == [["a"]]
+    assert result.distances == [[1.0]]
+    assert [name for name, _ in db.aclient.calls] == [
+        "search",
+        "has_collection",
+        "delete",
+    ]
+    assert db.aclient.calls[0][1]["collection_name"] == "open_webui_file_1"
+    assert db.aclient.calls[2][1]["filter"] == 'metadata["file_id"] == "f1"'
+    # query_iterator 没有异步版本，仍在线程池中执行
+    assert threads[0].startswith("vector-db")
+
+
+def test_opensearch_writes_through_async_bulk(monkeypatch):
+    opensearch = pytest.importorskip("open_webui.retrieval.vector.dbs.opensearch")
+
+    db = opensearch.OpenSearchClient.__new__(opensearch.OpenSearchClient)
+    db.index_prefix = "open_webui"
+    db.aclient = FakeAsyncClient()
+    db.aclient.indices = FakeAsyncClient()
+    db.aclient.indices.results = {"exists": False}
+    bulks = []
+
+    async def async_bulk(client, actions):
+        bulks.append((client, actions))
+
+    monkeypatch.setattr(opensearch, "async_bulk", async_bulk)
+
+    items = [
+        {"id": f"i{n}", "vector": [0.1, 0.2], "text": "t", "metadata": {}}
+        for n in range(150)
+    ]
+    asyncio.run(db.aupsert("c", items))
+
+    assert [name for name, _ in db.aclient.indices.calls] == [
+        "exists",
+        "create",
+        "refresh",
+    ]
+    assert [len(actions) for _, actions in bulks] == [100, 50]
+    assert all(client is db.aclient for client, _ in bulks)
+    assert bulks[0][1][0]["_op_type"] == "update"
+
+
+def test_source_access_checks_run_off_the_event_loop(monkeypatch):
+    retrieval_utils = pytest.importorskip("open_webui.retrieval.utils")
+
+    checks = []
+    note = SimpleNamespace(
+        id="n1",
+        user_id="owner",
+        title="Note",
+        access_control={},
+        data={"content": {"md": "shared note"}},
+    )
+    monkeypatch.setattr(retrieval_utils.Notes, "get_note_by_id", lambda id: note)
+    monkeypatch.setattr(
+        retrieval_utils,
+        "has_access",
+        lambda *args: checks.append(threading.current_thread()) or True,
+    )
+
+    sources = asyncio.run(
+        retrieval_utils.get_sources_from_items(
+            request=None,
+            items=[{"type": "note", "id": "n1"}],
+            queries=[],
+            embedding_function=None,
+            k=1,
+            reranking_function=None,
+            k_reranker=1,
+            r=0,
+            hybrid_bm25_weight=0,
+            hybrid_search=False,
+            user=SimpleNamespace(id="reader", role="user"),
+        )
+    )
+
+    assert sources[0]["document"] == ["shared note"]
+    assert checks and checks[0] is not threading.main_thread()
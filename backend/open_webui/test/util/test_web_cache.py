@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from open_webui.retrieval.web import cache as web_cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    web_cache.clear()
+    yield
+    web_cache.clear()
+
+
+def test_embed_texts_computes_only_missing():
+    calls = []
+
+    def embed(texts, prefix=None, user=None):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    first = web_cache.embed_texts(embed, ["a", "bb", "a"], None, None, "e", "m")
+    second = web_cache.embed_texts(embed, ["bb", "ccc"], None, None, "e", "m")
+
+    assert first == [[1.0], [2.0], [1.0]]
+    assert second == [[2.0], [3.0]]
+    assert calls == [["a", "bb"], ["ccc"]]
+
+
+def test_load_pages_skips_cached_urls():
+    requested = []
+
+    async def load(urls):
+        requested.append(list(urls))
+        return [Document(page_content=url, metadata={"source": url}) for url in urls]
+
+    asyncio.run(web_cache.load_pages("default", ["u1", "u2"], load))
+    docs = asyncio.run(web_cache.load_pages("default", ["u2", "u3"], load))
+
+    assert requested == [["u1", "u2"], ["u3"]]
+    assert [doc.page_content for doc in docs] == ["u2", "u3"]
+    assert web_cache.get_stats()["pages"]["hits"] == 1
+
+
+def test_embeddings_are_stored_as_float32_within_byte_budget(monkeypatch):
+    level = web_cache._CacheLevel("embeddings", None, 60, max_bytes=16, sizeof=len)
+    monkeypatch.setattr(web_cache, "_embeddings", level)
+
+    def embed(texts, prefix=None, user=None):
+        return [[0.5, 1.5] for _ in texts]
+
+    web_cache.embed_texts(embed, ["a", "b", "c"], None, None, "e", "m")
+
+    # 每条 2 维 float32 占 8 字节，16 字节上限只保留最近两条
+    assert level.cache.nbytes == 16
+    assert len(level.cache) == 2
+    assert web_cache.embed_texts(embed, ["c"], None, None, "e", "m") == [[0.5, 1.5]]
+    assert level.hits == 1
+
+
+def test_collection_fingerprint_is_shared_through_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(web_cache, "_get_redis", lambda: redis)
+
+    web_cache.mark_collection("web-1", "fp")
+    # 另一个 worker 的进程内记录为空，仍能从 Redis 看到指纹
+    web_cache._collections.clear()
+    assert web_cache.is_collection_current("web-1", "fp")
+
+    web_cache.invalidate_collection("web-1")
+    assert not web_cache.is_collection_current("web-1", "fp")
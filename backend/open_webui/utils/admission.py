@@ -0,0 +1,546 @@
+"""
+上游 LLM 调用准入控制
+
+所有 LLM 调用（聊天、标题 / 标签、摘要、图片描述）最终都经过 routers/openai.generate_chat_completion，
+在发起上游请求前调用 acquire 取得准入，响应结束后释放：
+- 并发：每个用户（前台 / 后台分别计数）与每个模型各有并发上限
+- 速率：每个用户与每个模型每分钟的 token 上限（prompt 预估值 + 实际输出）
+- 公平：模型槽位空闲时，优先分给在该模型上占用槽位最少的排队用户；
+  有前台请求排队时不分配给后台调用，后台调用最多占用 LLM_BACKGROUND_MODEL_SHARE 比例的槽位
+- 排队：超出限制时轮询等待，超过 LLM_ADMISSION_MAX_WAIT 返回 429
+
+配置了 Redis 时计数跨 worker 共享（Lua 脚本原子操作，槽位带过期时间防止泄漏）；
+未配置或 Redis 不可用时退化为进程内计数。
+槽位在 LLM_ADMISSION_SLOT_TIMEOUT 后过期，流式响应在传输期间定期续期；
+release 可重复调用，调用方在流结束、响应清理与各异常分支都应调用。
+后台调用通过 background_llm_work 上下文或 metadata 中的 task 字段识别；
+对用户可见的内部任务（如标题）可用 llm_priority(INTERACTIVE) 按前台调用准入。
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import time
+import uuid
+from contextlib import contextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, status
+
+from open_webui.env import (
+    ENABLE_LLM_ADMISSION_CONTROL,
+    LLM_ADMISSION_MAX_WAIT,
+    LLM_ADMISSION_SLOT_TIMEOUT,
+    LLM_BACKGROUND_MODEL_SHARE,
+    LLM_MODEL_LIMITS,
+    LLM_MODEL_MAX_CONCURRENCY,
+    LLM_MODEL_TOKENS_PER_MINUTE,
+    LLM_USER_BACKGROUND_MAX_CONCURRENCY,
+    LLM_USER_MAX_CONCURRENCY,
+    LLM_USER_TOKENS_PER_MINUTE,
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# 排队时的轮询间隔（秒）；排队标记的有效期需覆盖若干次轮询
+_POLL_INTERVAL = 0.2
+_WAITING_TTL = 2
+
+_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "llm_admission_priority", default=None
+)
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """在该上下文中（包括其中创建的 asyncio 任务）发起的 LLM 调用按指定优先级准入"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def background_llm_work():
+    return llm_priority(BACKGROUND)
+
+
+def get_priority(metadata: Optional[dict] = None) -> str:
+    """显式指定的优先级优先；否则带 task 字段的内部任务（标题、标签等）按后台调用"""
+    priority = _priority.get()
+    if priority:
+        return priority
+    return BACKGROUND if (metadata or {}).get("task") else INTERACTIVE
+
+
+def get_model_limits(model_id: str) -> tuple[int, int]:
+    """返回模型的 (并发上限, 每分钟 token 上限)，0 表示不限制"""
+    override = LLM_MODEL_LIMITS.get(model_id) or {}
+    return (
+        int(override.get("max_concurrency", LLM_MODEL_MAX_CONCURRENCY)),
+        int(override.get("tokens_per_minute", LLM_MODEL_TOKENS_PER_MINUTE)),
+    )
+
+
+def _background_model_limit(limit: int) -> int:
+    return max(1, math.floor(limit * LLM_BACKGROUND_MODEL_SHARE))
+
+
+####################################
+# Redis 计数
+####################################
+
+# KEYS[1]: 槽位 zset；ARGV: now, limit, timeout, token
+_ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[3]))
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# KEYS[1]: 模型槽位 zset（成员为 "用户|优先级|随机串"），KEYS[2]: 排队中的前台用户 zset（score 为过期时间）
+# ARGV: now, limit, timeout, token, user_id, waiting_ttl, background_limit, is_background
+_ACQUIRE_MODEL_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[3]))
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local held = {}
+local background = 0
+local slots = redis.call('ZRANGE', KEYS[1], 0, -1)
+for _, member in ipairs(slots) do
+    local owner, priority = string.match(member, '^([^|]*)|([^|]*)|')
+    held[owner] = (held[owner] or 0) + 1
+    if priority == 'background' then
+        background = background + 1
+    end
+end
+local waiting = redis.call('ZRANGE', KEYS[2], 0, -1)
+local ok = #slots < tonumber(ARGV[2])
+if ok and ARGV[8] == '1' then
+    ok = background < tonumber(ARGV[7]) and #waiting == 0
+elseif ok then
+    local mine = held[ARGV[5]] or 0
+    for _, user in ipairs(waiting) do
+        if user ~= ARGV[5] and (held[user] or 0) < mine then
+            ok = false
+            break
+        end
+    end
+end
+if ok then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    redis.call('ZREM', KEYS[2], ARGV[5])
+    return 1
+end
+if ARGV[8] ~= '1' then
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[6]), ARGV[5])
+    redis.call('EXPIRE', KEYS[2], ARGV[6])
+end
+return 0
+"""
+
+
+class _RedisBackend:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def try_acquire_slot(self, key: str, limit: int, token: str) -> bool:
+        return bool(
+            await self.redis.eval(
+                _ACQUIRE_SLOT_SCRIPT,
+                1,
+                key,
+                time.time(),
+                limit,
+                LLM_ADMISSION_SLOT_TIMEOUT,
+                token,
+            )
+        )
+
+    async def try_acquire_model_slot(
+        self, keys: list[str], limit: int, token: str, user_id: str, background: bool
+    ) -> bool:
+        return bool(
+            await self.redis.eval(
+                _ACQUIRE_MODEL_SLOT_SCRIPT,
+                2,
+                *keys,
+                time.time(),
+                limit,
+                LLM_ADMISSION_SLOT_TIMEOUT,
+                token,
+                user_id,
+                _WAITING_TTL,
+                _background_model_limit(limit),
+                1 if background else 0,
+            )
+        )
+
+    async def renew_slot(self, key: str, token: str) -> None:
+        pipe = self.redis.pipeline()
+        pipe.zadd(key, {token: time.time()}, xx=True)
+        pipe.expire(key, LLM_ADMISSION_SLOT_TIMEOUT)
+        await pipe.execute()
+
+    async def release_slot(self, key: str, token: str) -> None:
+        await self.redis.zrem(key, token)
+
+    async def leave_queue(self, key: str, user_id: str) -> None:
+        await self.redis.zrem(key, user_id)
+
+    async def get_tokens(self, key: str) -> int:
+        return int(await self.redis.get(key) or 0)
+
+    async def add_tokens(self, key: str, tokens: int) -> None:
+        pipe = self.redis.pipeline()
+        pipe.incrby(key, tokens)
+        pipe.expire(key, 120)
+        await pipe.execute()
+
+
+####################################
+# 进程内计数
+####################################
+
+
+class _LocalBackend:
+    def __init__(self):
+        # key -> {token: 占用时间}
+        self.slots: dict[str, dict[str, float]] = {}
+        # key -> {user_id: 排队标记过期时间}
+        self.waiting: dict[str, dict[str, float]] = {}
+        # key -> token 数，key 中含分钟窗口
+        self.tokens: dict[str, int] = {}
+
+    def _live_slots(self, key: str) -> dict[str, float]:
+        cutoff = time.time() - LLM_ADMISSION_SLOT_TIMEOUT
+        slots = {
+            token: at for token, at in self.slots.get(key, {}).items() if at > cutoff
+        }
+        self.slots[key] = slots
+        return slots
+
+    async def try_acquire_slot(self, key: str, limit: int, token: str) -> bool:
+        slots = self._live_slots(key)
+        if len(slots) >= limit:
+            return False
+        slots[token] = time.time()
+        return True
+
+    async def try_acquire_model_slot(
+        self, keys: list[str], limit: int, token: str, user_id: str, background: bool
+    ) -> bool:
+        now = time.time()
+        slots = self._live_slots(keys[0])
+        waiting = {
+            user: expires_at
+            for user, expires_at in self.waiting.get(keys[1], {}).items()
+            if expires_at > now
+        }
+        self.waiting[keys[1]] = waiting
+
+        held: dict[str, int] = {}
+        background_held = 0
+        for member in slots:
+            owner, priority, _ = member.split("|", 2)
+            held[owner] = held.get(owner, 0) + 1
+            background_held += priority == BACKGROUND
+
+        ok = len(slots) < limit
+        if ok and background:
+            ok = background_held < _background_model_limit(limit) and not waiting
+        elif ok:
+            mine = held.get(user_id, 0)
+            ok = all(held.get(user, 0) >= mine for user in waiting if user != user_id)
+
+        if ok:
+            slots[token] = now
+            waiting.pop(user_id, None)
+        elif not background:
+            waiting[user_id] = now + _WAITING_TTL
+        return ok
+
+    async def renew_slot(self, key: str, token: str) -> None:
+        slots = self.slots.get(key, {})
+        if token in slots:
+            slots[token] = time.time()
+
+    async def release_slot(self, key: str, token: str) -> None:
+        self.slots.get(key, {}).pop(token, None)
+
+    async def leave_queue(self, key: str, user_id: str) -> None:
+        self.waiting.get(key, {}).pop(user_id, None)
+
+    async def get_tokens(self, key: str) -> int:
+        return self.tokens.get(key, 0)
+
+    async def add_tokens(self, key: str, tokens: int) -> None:
+        window = _current_window()
+        # 丢弃之前分钟窗口的计数
+        for stale in [k for k in self.tokens if not k.endswith(f":{window}")]:
+            self.tokens.pop(stale)
+        self.tokens[key] = self.tokens.get(key, 0) + tokens
+
+
+_local_backend = _LocalBackend()
+
+
+####################################
+# 准入
+####################################
+
+
+def _current_window() -> int:
+    return int(time.time() // 60)
+
+
+def _prefix() -> str:
+    return f"{REDIS_KEY_PREFIX}:llm"
+
+
+def _user_slots_key(user_id: str, priority: str) -> str:
+    return f"{_prefix()}:user:{{{user_id}}}:{priority}"
+
+
+def _model_keys(model_id: str) -> list[str]:
+    prefix = f"{_prefix()}:model:{{{model_id}}}"
+    return [f"{prefix}:slots", f"{prefix}:waiting"]
+
+
+def _tokens_key(scope: str, scope_id: str) -> str:
+    return f"{_prefix()}:tpm:{scope}:{{{scope_id}}}:{_current_window()}"
+
+
+class AdmissionSlot:
+    """一次已准入的 LLM 调用；release 可重复调用"""
+
+    def __init__(self, backend, rate_scopes: list[tuple[str, str]]):
+        self.backend = backend
+        self.rate_scopes = rate_scopes
+        self.slots: list[tuple[str, str]] = []
+        self.released = False
+
+    @property
+    def counts_tokens(self) -> bool:
+        return bool(self.rate_scopes)
+
+    async def add_tokens(self, tokens: int) -> None:
+        for scope, scope_id in self.rate_scopes:
+            await self.backend.add_tokens(_tokens_key(scope, scope_id), tokens)
+
+    async def renew(self) -> None:
+        """刷新槽位的占用时间，避免长时间的流被当作泄漏的槽位清除"""
+        if self.released:
+            return
+        try:
+            for key, token in self.slots:
+                await self.backend.renew_slot(key, token)
+        except Exception as e:
+            log.warning(f"Failed to renew LLM admission slot: {e}")
+
+    async def keep_alive(self) -> None:
+        while not self.released:
+            await asyncio.sleep(max(LLM_ADMISSION_SLOT_TIMEOUT / 3, 1))
+            await self.renew()
+
+    async def release(self, completion_tokens: int = 0) -> None:
+        if self.released:
+            return
+        self.released = True
+        try:
+            for key, token in self.slots:
+                await self.backend.release_slot(key, token)
+            if completion_tokens:
+                await self.add_tokens(completion_tokens)
+        except Exception as e:
+            log.warning(f"Failed to release LLM admission slot: {e}")
+
+
+def _estimate_tokens(messages: list, model_id: str) -> int:
+    from open_webui.billing.core import estimate_prompt_tokens
+
+    try:
+        return estimate_prompt_tokens(messages, model_id)
+    except Exception:
+        return len(json.dumps(messages, ensure_ascii=False)) // 4
+
+
+async def _wait_until(check, deadline: float, reason: str) -> None:
+    while not await check():
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many concurrent requests ({reason}), please retry later",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(_POLL_INTERVAL)
+
+
+async def _acquire(
+    backend,
+    user_id: str,
+    model_id: str,
+    messages: list,
+    priority: str,
+    direct: bool,
+) -> Optional[AdmissionSlot]:
+    background = priority == BACKGROUND
+    user_limit = (
+        LLM_USER_BACKGROUND_MAX_CONCURRENCY if background else LLM_USER_MAX_CONCURRENCY
+    )
+    model_limit, model_tpm = (0, 0) if direct else get_model_limits(model_id)
+
+    rate_limits = [
+        (scope, scope_id, limit)
+        for scope, scope_id, limit in (
+            ("user", user_id, LLM_USER_TOKENS_PER_MINUTE),
+            ("model", model_id, model_tpm),
+        )
+        if limit > 0
+    ]
+    if not (user_limit > 0 or model_limit > 0 or rate_limits):
+        return None
+
+    deadline = time.monotonic() + LLM_ADMISSION_MAX_WAIT
+    start = time.monotonic()
+    slot = AdmissionSlot(
+        backend, [(scope, scope_id) for scope, scope_id, _ in rate_limits]
+    )
+    token = f"{user_id}|{priority}|{uuid.uuid4()}"
+
+    async def within_rate() -> bool:
+        for scope, scope_id, limit in rate_limits:
+            if await backend.get_tokens(_tokens_key(scope, scope_id)) >= limit:
+                return False
+        return True
+
+    try:
+        if rate_limits:
+            await _wait_until(within_rate, deadline, "token rate")
+
+        if user_limit > 0:
+            user_key = _user_slots_key(user_id, priority)
+
+            async def acquire_user_slot() -> bool:
+                return await backend.try_acquire_slot(user_key, user_limit, token)
+
+            await _wait_until(acquire_user_slot, deadline, "user")
+            slot.slots.append((user_key, token))
+
+        if model_limit > 0:
+            model_keys = _model_keys(model_id)
+
+            async def acquire_model_slot() -> bool:
+                return await backend.try_acquire_model_slot(
+                    model_keys, model_limit, token, user_id, background
+                )
+
+            try:
+                await _wait_until(acquire_model_slot, deadline, "model")
+            finally:
+                if not background:
+                    await backend.leave_queue(model_keys[1], user_id)
+            slot.slots.append((model_keys[0], token))
+    except BaseException:
+        await slot.release()
+        raise
+
+    if rate_limits:
+        await slot.add_tokens(_estimate_tokens(messages, model_id))
+
+    waited = time.monotonic() - start
+    if waited >= _POLL_INTERVAL:
+        log.info(
+            f"LLM call admitted after {waited:.1f}s: user={user_id} model={model_id} priority={priority}"
+        )
+    return slot
+
+
+async def acquire(
+    request,
+    user_id: str,
+    model_id: str,
+    messages: list,
+    metadata: Optional[dict] = None,
+    direct: bool = False,
+) -> Optional[AdmissionSlot]:
+    """
+    等待一次 LLM 调用的准入
+
+    Args:
+        direct: 用户私有模型直连，不受模型级限制
+
+    Returns:
+        Optional[AdmissionSlot]: 调用结束后须 release；未启用或无任何限制时返回 None
+
+    Raises:
+        HTTPException 429: 超过最长等待时间
+    """
+    if not ENABLE_LLM_ADMISSION_CONTROL:
+        return None
+
+    priority = get_priority(metadata)
+    redis = getattr(request.app.state, "redis", None) if request else None
+    if redis is not None:
+        try:
+            return await _acquire(
+                _RedisBackend(redis), user_id, model_id, messages, priority, direct
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Redis 不可用时退化为进程内计数
+            log.warning(f"LLM admission via Redis failed, using local limits: {e}")
+
+    return await _acquire(_local_backend, user_id, model_id, messages, priority, direct)
+
+
+def completion_tokens_of(response) -> int:
+    """从响应体中取输出 token 数：OpenAI 格式的 usage，或 Ollama 的 eval_count"""
+    if not isinstance(response, dict):
+        return 0
+    usage = response.get("usage") or {}
+    return int(usage.get("completion_tokens") or response.get("eval_count") or 0)
+
+
+def _parse_completion_tokens(line: bytes) -> Optional[int]:
+    text = line.decode("utf-8", "ignore").strip()
+    if text.startswith("data:"):
+        text = text[len("data:") :].strip()
+    try:
+        return completion_tokens_of(json.loads(text))
+    except Exception:
+        return None
+
+
+async def release_after_stream(
+    stream: AsyncIterator[bytes], slot: AdmissionSlot
+) -> AsyncIterator[bytes]:
+    """
+    透传上游流（SSE 或 Ollama 的 NDJSON），传输期间定期续期槽位，
+    流结束（包括客户端断开）后释放准入，并记录 usage / eval_count 中的输出 token
+
+    流从未被迭代时不会进入这里的 finally，调用方还须在响应清理时调用 slot.release
+    """
+    completion_tokens = 0
+    keep_alive = asyncio.create_task(slot.keep_alive())
+    try:
+        async for line in stream:
+            if slot.counts_tokens and (b'"usage"' in line or b'"eval_count"' in line):
+                completion_tokens = _parse_completion_tokens(line) or completion_tokens
+            yield line
+    finally:
+        keep_alive.cancel()
+        await slot.release(completion_tokens)
@@ -0,0 +1,283 @@
+"""
+长音频分段转写
+
+- 一次流式解码：ffmpeg 把任意格式解码为 16kHz 单声道 PCM 输出到管道，
+  边读边按时间切成 WAV 分段，内存中最多只保留一个分段
+- 相邻分段重叠 overlap 秒，避免切点处的词被截断；拼接时按重叠词去重
+- 转写结果按音频内容哈希缓存在磁盘上，按总大小与有效期淘汰
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import time
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["AUDIO"])
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # s16le
+READ_SIZE = 64 * 1024
+
+# 拼接时最多比较的重叠词数
+MAX_OVERLAP_TOKENS = 40
+
+# 解码失败时错误信息中保留的 ffmpeg 输出长度
+MAX_STDERR_BYTES = 4096
+
+
+@dataclass
+class AudioSegmentFile:
+    path: str
+    start: float  # 秒
+    end: float
+
+
+def _write_wav(path: str, pcm: bytes) -> None:
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(SAMPLE_WIDTH)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm)
+
+
+def split_pcm_stream(
+    stream: BinaryIO,
+    output_base: str,
+    segment_seconds: float,
+    overlap_seconds: float = 0,
+) -> list[AudioSegmentFile]:
+    """
+    把 16kHz 单声道 s16le PCM 流切成 WAV 分段
+
+    每个分段（除第一个外）以前一分段末尾 overlap_seconds 秒开头
+    """
+    bytes_per_second = SAMPLE_RATE * SAMPLE_WIDTH
+    segment_bytes = int(segment_seconds * SAMPLE_RATE) * SAMPLE_WIDTH
+    overlap_bytes = min(
+        int(overlap_seconds * SAMPLE_RATE) * SAMPLE_WIDTH, segment_bytes // 2
+    )
+
+    segments: list[AudioSegmentFile] = []
+    buffer = bytearray()
+    consumed = 0  # 已切出的非重叠字节数，用于计算时间戳
+
+    def flush(pcm: bytes, lead: int) -> None:
+        path = f"{output_base}_seg_{len(segments)}.wav"
+        _write_wav(path, pcm)
+        start = (consumed - lead) / bytes_per_second
+        segments.append(
+            AudioSegmentFile(path, start, start + len(pcm) / bytes_per_second)
+        )
+
+    lead = 0
+    while chunk := stream.read(READ_SIZE):
+        buffer.extend(chunk)
+        while len(buffer) >= lead + segment_bytes:
+            size = lead + segment_bytes
+            flush(bytes(buffer[:size]), lead)
+            consumed += segment_bytes
+            # 保留末尾 overlap 作为下一分段的开头
+            del buffer[: size - overlap_bytes]
+            lead = overlap_bytes
+
+    # 剩余部分只有重叠时不再单独成段
+    if len(buffer) > lead:
+        flush(bytes(buffer), lead)
+
+    return segments
+
+
+def segment_audio(
+    file_path: str, segment_seconds: float, overlap_seconds: float = 0
+) -> list[AudioSegmentFile]:
+    """用 ffmpeg 单次解码音频并切段，分段文件与原文件位于同一目录"""
+    from pydub.utils import get_encoder_name
+
+    output_base = os.path.splitext(file_path)[0]
+    # stderr 写入临时文件而非管道：损坏文件可能输出大量逐帧错误，
+    # 管道写满后 ffmpeg 阻塞，而这里正阻塞在读 stdout，两边互相等待
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [
+            get_encoder_name(),
+            "-nostdin",
+            "-v",
+            "error",
+            "-i",
+            file_path,
+            "-f",
+            "s16le",
+            "-ac",
+            "1",
+            "-ar",
+            str(SAMPLE_RATE),
+            "pipe:1",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=stderr_file,
+    )
+
+    segments = []
+    try:
+        segments = split_pcm_stream(
+            process.stdout, output_base, segment_seconds, overlap_seconds
+        )
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        stderr_file.seek(max(stderr_file.seek(0, os.SEEK_END) - MAX_STDERR_BYTES, 0))
+        stderr = stderr_file.read()
+        stderr_file.close()
+
+    if returncode != 0 or not segments:
+        remove_segments(segments)
+        raise Exception(
+            f"Failed to decode audio: {stderr.decode('utf-8', 'ignore').strip()}"
+        )
+
+    return segments
+
+
+def remove_segments(segments: list[AudioSegmentFile]) -> None:
+    for segment in segments:
+        try:
+            os.remove(segment.path)
+        except OSError:
+            pass
+
+
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]")
+
+
+def _tokenize(text: str) -> tuple[list[str], str, int]:
+    """返回 (词列表, 词间分隔符, 判定为重叠所需的最少词数)"""
+    # 不含空格的中日文按字符比较，单字重复很常见，要求更长的重叠
+    if not re.search(r"\s", text) and _CJK_PATTERN.search(text):
+        return list(text), "", 3
+    return text.split(), " ", 2
+
+
+def _normalize(token: str) -> str:
+    return re.sub(r"[^\w]", "", token.lower())
+
+
+def merge_transcripts(texts: list[str]) -> str:
+    """按顺序拼接分段转写结果，去掉相邻分段重叠区域里重复出现的词"""
+    merged = ""
+    prev_tokens: list[str] = []
+
+    for text in texts:
+        text = (text or "").strip()
+        if not text:
+            continue
+
+        tokens, separator, min_overlap = _tokenize(text)
+
+        if prev_tokens:
+            prev = [_normalize(t) for t in prev_tokens]
+            curr = [_normalize(t) for t in tokens[:MAX_OVERLAP_TOKENS]]
+            for size in range(min(len(prev), len(curr)), min_overlap - 1, -1):
+                if prev[-size:] == curr[:size]:
+                    tokens = tokens[size:]
+                    break
+
+        piece = separator.join(tokens)
+        if piece:
+            merged = f"{merged}{separator}{piece}" if merged else piece
+        prev_tokens = (prev_tokens + tokens)[-MAX_OVERLAP_TOKENS:]
+
+    return merged
+
+
+def hash_file(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(READ_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class TranscriptCache:
+    """
+    以 (音频内容哈希, 引擎, 模型, 语言) 为 key 的磁盘转写缓存
+
+    条目超过 ttl 秒视为过期；每次写入后清理过期条目，总大小仍超过 max_bytes 时
+    按最近访问时间（命中时刷新 mtime）从旧到新删除
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    @staticmethod
+    def make_key(content_hash: str, *parts: Optional[str]) -> str:
+        return hashlib.sha256(
+            "|".join([content_hash, *[str(p or "") for p in parts]]).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            if self.ttl is not None and path.stat().st_mtime < time.time() - self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            with open(path, "r") as f:
+                data = json.load(f)
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"Failed to read cached transcript {path}: {e}")
+            return None
+
+    def set(self, key: str, data: dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        if self.max_bytes is None and self.ttl is None:
+            return
+
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        expires_before = time.time() - self.ttl if self.ttl is not None else None
+        for mtime, size, path in entries:
+            expired = expires_before is not None and mtime < expires_before
+            if not expired and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            path.unlink(missing_ok=True)
+            total -= size
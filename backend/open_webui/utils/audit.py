@@ -1,11 +1,14 @@
-from contextlib import asynccontextmanager
+import asyncio
 from dataclasses import asdict, dataclass
 from enum import Enum
+import queue
+import random
 import re
+import threading
+import time
 from typing import (
     TYPE_CHECKING,
     Any,
-    AsyncGenerator,
     Dict,
     MutableMapping,
     Optional,
@@ -24,7 +27,16 @@ from asgiref.typing import (
 from loguru import logger
 from starlette.requests import Request
 
-from open_webui.env import AUDIT_LOG_LEVEL, MAX_BODY_LOG_SIZE
+from open_webui.env import (
+    AUDIT_LOG_BACKPRESSURE,
+    AUDIT_LOG_BATCH_SIZE,
+    AUDIT_LOG_FLUSH_INTERVAL,
+    AUDIT_LOG_LEVEL,
+    AUDIT_LOG_QUEUE_SIZE,
+    AUDIT_LOG_RULES,
+    AUDIT_LOG_SAMPLE_RATE,
+    MAX_BODY_LOG_SIZE,
+)
 from open_webui.utils.auth import get_current_user, get_http_authorization_cred
 from open_webui.models.users import UserModel
 
@@ -118,12 +130,210 @@ class AuditContext:
             )
 
 
+@dataclass(frozen=True)
+class AuditRule:
+    """
+    Per-route sampling and body capture settings, matched by path prefix.
+
+    `None` fields fall back to the middleware defaults.
+    """
+
+    path: str
+    sample_rate: Optional[float] = None
+    capture_request: Optional[bool] = None
+    capture_response: Optional[bool] = None
+    max_body_size: Optional[int] = None
+
+
+def build_audit_rules(rules: list[dict]) -> list[AuditRule]:
+    result = []
+    for rule in rules:
+        try:
+            result.append(AuditRule(**rule))
+        except TypeError as e:
+            logger.warning(f"Ignoring invalid audit rule {rule}: {e}")
+    return result
+
+
+@dataclass
+class PendingAuditEntry:
+    """Everything captured on the request path; turned into an `AuditLogEntry` by the writer thread."""
+
+    request: Request
+    audit_level: str
+    request_body: bytes
+    response_body: bytes
+    response_status_code: Optional[int]
+
+
+class AuditLogQueue:
+    """
+    Bounded queue between the request path and the audit log sink.
+
+    A daemon thread drains the queue in batches of up to `batch_size` entries (or
+    whatever arrived within `flush_interval` seconds), resolves the user, redacts
+    and formats each entry and writes it through the Loguru audit sink, which
+    handles rotation and compression. When the queue is full, `drop` discards the
+    entry and counts it; `block` makes the request wait for a free slot without
+    blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        audit_logger: AuditLogger,
+        *,
+        max_size: int = AUDIT_LOG_QUEUE_SIZE,
+        batch_size: int = AUDIT_LOG_BATCH_SIZE,
+        flush_interval: float = AUDIT_LOG_FLUSH_INTERVAL,
+        backpressure: str = AUDIT_LOG_BACKPRESSURE,
+    ):
+        self.audit_logger = audit_logger
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backpressure = backpressure
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._reported_dropped = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    async def put(self, item: PendingAuditEntry) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self.backpressure != "block":
+                self.dropped += 1
+                return
+            await asyncio.to_thread(self._queue.put, item)
+        self.enqueued += 1
+
+    def _next_batch(self) -> list[PendingAuditEntry]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+        except queue.Empty:
+            return batch
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            for item in batch:
+                try:
+                    self.audit_logger.write(_to_audit_entry(item))
+                    self.written += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"Failed to log audit entry: {str(e)}")
+
+            if self.dropped != self._reported_dropped:
+                logger.warning(
+                    f"Audit log queue full, dropped {self.dropped - self._reported_dropped} entries "
+                    f"({self.dropped} total)"
+                )
+                self._reported_dropped = self.dropped
+
+    def close(self, timeout: float = 10) -> None:
+        """Flush queued entries and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "backpressure": self.backpressure,
+        }
+
+
+def _get_authenticated_user(request: Request) -> Optional[UserModel]:
+    auth_header = request.headers.get("Authorization")
+
+    try:
+        user = get_current_user(
+            request, None, None, get_http_authorization_cred(auth_header)
+        )
+        return user
+    except Exception as e:
+        logger.debug(f"Failed to get authenticated user: {str(e)}")
+
+    return None
+
+
+def _to_audit_entry(item: PendingAuditEntry) -> AuditLogEntry:
+    request = item.request
+    user = _get_authenticated_user(request)
+    user = user.model_dump(include={"id", "name", "email", "role"}) if user else {}
+
+    request_body = item.request_body.decode("utf-8", errors="replace")
+    response_body = item.response_body.decode("utf-8", errors="replace")
+
+    # Redact sensitive information
+    if "password" in request_body:
+        request_body = re.sub(
+            r'"password":\s*"(.*?)"',
+            '"password": "********"',
+            request_body,
+        )
+
+    return AuditLogEntry(
+        id=str(uuid.uuid4()),
+        user=user,
+        audit_level=item.audit_level,
+        verb=request.method,
+        request_uri=str(request.url),
+        response_status_code=item.response_status_code,
+        source_ip=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+        request_object=request_body,
+        response_object=response_body,
+    )
+
+
+audit_log_queue = AuditLogQueue(AuditLogger(logger))
+
+
 class AuditLoggingMiddleware:
     """
-    ASGI middleware that intercepts HTTP requests and responses to perform audit logging. It captures request/response bodies (depending on audit level), headers, HTTP methods, and user information, then logs a structured audit entry at the end of the request cycle.
+    ASGI middleware that intercepts HTTP requests and responses to perform audit logging. It captures request/response bodies (depending on audit level and route rules), headers, HTTP methods, and user information, then hands a structured audit entry to the background writer at the end of the request cycle.
     """
 
     AUDITED_METHODS = {"PUT", "PATCH", "DELETE", "POST"}
+    ALWAYS_LOG_ENDPOINTS = {
+        "/api/v1/auths/signin",
+        "/api/v1/auths/signout",
+        "/api/v1/auths/signup",
+    }
 
     def __init__(
         self,
@@ -132,12 +342,23 @@ class AuditLoggingMiddleware:
         excluded_paths: Optional[list[str]] = None,
         max_body_size: int = MAX_BODY_LOG_SIZE,
         audit_level: AuditLevel = AuditLevel.NONE,
+        sample_rate: float = AUDIT_LOG_SAMPLE_RATE,
+        rules: Optional[list[AuditRule]] = None,
+        log_queue: Optional[AuditLogQueue] = None,
     ) -> None:
         self.app = app
-        self.audit_logger = AuditLogger(logger)
         self.excluded_paths = excluded_paths or []
         self.max_body_size = max_body_size
         self.audit_level = audit_level
+        self.sample_rate = sample_rate
+        self.rules = rules if rules is not None else build_audit_rules(AUDIT_LOG_RULES)
+        self.log_queue = log_queue or audit_log_queue
+        # match either /api/<resource>/...(for the endpoint /api/chat case) or /api/v1/<resource>/...
+        self.excluded_pattern = (
+            re.compile(r"^/api(?:/v1)?/(" + "|".join(self.excluded_paths) + r")\b")
+            if self.excluded_paths
+            else None
+        )
 
     async def __call__(
         self,
@@ -153,131 +374,94 @@ class AuditLoggingMiddleware:
         if self._should_skip_auditing(request):
             return await self.app(scope, receive, send)
 
-        async with self._audit_context(request) as context:
-
-            async def send_wrapper(message: ASGISendEvent) -> None:
-                if self.audit_level == AuditLevel.REQUEST_RESPONSE:
-                    await self._capture_response(message, context)
+        rule = self._match_rule(request.url.path)
+        if not self._is_sampled(request, rule):
+            return await self.app(scope, receive, send)
 
-                await send(message)
+        capture_request = self.audit_level in (
+            AuditLevel.REQUEST,
+            AuditLevel.REQUEST_RESPONSE,
+        ) and (rule is None or rule.capture_request is not False)
+        capture_response = self.audit_level == AuditLevel.REQUEST_RESPONSE and (
+            rule is None or rule.capture_response is not False
+        )
+        context = AuditContext(
+            max_body_size=(
+                rule.max_body_size
+                if rule is not None and rule.max_body_size is not None
+                else self.max_body_size
+            )
+        )
 
-            original_receive = receive
+        async def send_wrapper(message: ASGISendEvent) -> None:
+            if message["type"] == "http.response.start":
+                context.metadata["response_status_code"] = message["status"]
+            elif capture_response and message["type"] == "http.response.body":
+                context.add_response_chunk(message.get("body", b""))
 
-            async def receive_wrapper() -> ASGIReceiveEvent:
-                nonlocal original_receive
-                message = await original_receive()
+            await send(message)
 
-                if self.audit_level in (
-                    AuditLevel.REQUEST,
-                    AuditLevel.REQUEST_RESPONSE,
-                ):
-                    await self._capture_request(message, context)
+        async def receive_wrapper() -> ASGIReceiveEvent:
+            message = await receive()
 
-                return message
+            if capture_request and message["type"] == "http.request":
+                context.add_request_chunk(message.get("body", b""))
 
-            await self.app(scope, receive_wrapper, send_wrapper)
+            return message
 
-    @asynccontextmanager
-    async def _audit_context(
-        self, request: Request
-    ) -> AsyncGenerator[AuditContext, None]:
-        """
-        async context manager that ensures that an audit log entry is recorded after the request is processed.
-        """
-        context = AuditContext()
         try:
-            yield context
+            await self.app(scope, receive_wrapper, send_wrapper)
         finally:
             await self._log_audit_entry(request, context)
 
-    async def _get_authenticated_user(self, request: Request) -> Optional[UserModel]:
-        auth_header = request.headers.get("Authorization")
+    def _match_rule(self, path: str) -> Optional[AuditRule]:
+        for rule in self.rules:
+            if path.startswith(rule.path):
+                return rule
+        return None
 
-        try:
-            user = get_current_user(
-                request, None, None, get_http_authorization_cred(auth_header)
-            )
-            return user
-        except Exception as e:
-            logger.debug(f"Failed to get authenticated user: {str(e)}")
+    def _is_sampled(self, request: Request, rule: Optional[AuditRule]) -> bool:
+        sample_rate = (
+            rule.sample_rate
+            if rule is not None and rule.sample_rate is not None
+            else self.sample_rate
+        )
+        if sample_rate >= 1 or self._is_always_logged(request):
+            return True
+        return random.random() < sample_rate
 
-        return None
+    def _is_always_logged(self, request: Request) -> bool:
+        path = request.url.path.lower()
+        return any(path.startswith(endpoint) for endpoint in self.ALWAYS_LOG_ENDPOINTS)
 
     def _should_skip_auditing(self, request: Request) -> bool:
-        if (
-            request.method not in {"POST", "PUT", "PATCH", "DELETE"}
-            or AUDIT_LOG_LEVEL == "NONE"
-        ):
+        if request.method not in self.AUDITED_METHODS or AUDIT_LOG_LEVEL == "NONE":
             return True
 
-        ALWAYS_LOG_ENDPOINTS = {
-            "/api/v1/auths/signin",
-            "/api/v1/auths/signout",
-            "/api/v1/auths/signup",
-        }
-        path = request.url.path.lower()
-        for endpoint in ALWAYS_LOG_ENDPOINTS:
-            if path.startswith(endpoint):
-                return False  # Do NOT skip logging for auth endpoints
+        if self._is_always_logged(request):
+            return False  # Do NOT skip logging for auth endpoints
 
         # Skip logging if the request is not authenticated
         if not request.headers.get("authorization"):
             return True
 
-        # match either /api/<resource>/...(for the endpoint /api/chat case) or /api/v1/<resource>/...
-        pattern = re.compile(
-            r"^/api(?:/v1)?/(" + "|".join(self.excluded_paths) + r")\b"
-        )
-        if pattern.match(request.url.path):
+        if self.excluded_pattern and self.excluded_pattern.match(request.url.path):
             return True
 
         return False
 
-    async def _capture_request(self, message: ASGIReceiveEvent, context: AuditContext):
-        if message["type"] == "http.request":
-            body = message.get("body", b"")
-            context.add_request_chunk(body)
-
-    async def _capture_response(self, message: ASGISendEvent, context: AuditContext):
-        if message["type"] == "http.response.start":
-            context.metadata["response_status_code"] = message["status"]
-
-        elif message["type"] == "http.response.body":
-            body = message.get("body", b"")
-            context.add_response_chunk(body)
-
     async def _log_audit_entry(self, request: Request, context: AuditContext):
         try:
-            user = await self._get_authenticated_user(request)
-
-            user = (
-                user.model_dump(include={"id", "name", "email", "role"}) if user else {}
-            )
-
-            request_body = context.request_body.decode("utf-8", errors="replace")
-            response_body = context.response_body.decode("utf-8", errors="replace")
-
-            # Redact sensitive information
-            if "password" in request_body:
-                request_body = re.sub(
-                    r'"password":\s*"(.*?)"',
-                    '"password": "********"',
-                    request_body,
+            await self.log_queue.put(
+                PendingAuditEntry(
+                    request=request,
+                    audit_level=self.audit_level.value,
+                    request_body=bytes(context.request_body),
+                    response_body=bytes(context.response_body),
+                    response_status_code=context.metadata.get(
+                        "response_status_code", None
+                    ),
                 )
-
-            entry = AuditLogEntry(
-                id=str(uuid.uuid4()),
-                user=user,
-                audit_level=self.audit_level.value,
-                verb=request.method,
-                request_uri=str(request.url),
-                response_status_code=context.metadata.get("response_status_code", None),
-                source_ip=request.client.host if request.client else None,
-                user_agent=request.headers.get("user-agent"),
-                request_object=request_body,
-                response_object=response_body,
             )
-
-            self.audit_logger.write(entry)
         except Exception as e:
-            logger.error(f"Failed to log audit entry: {str(e)}")
+            logger.error(f"Failed to queue audit entry: {str(e)}")
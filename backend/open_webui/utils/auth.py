@@ -21,7 +21,15 @@ from typing import Optional, Union, List, Dict
 
 from opentelemetry import trace
 
+from open_webui.internal.db import bind_request_user
 from open_webui.models.users import Users
+from open_webui.utils.user_cache import (
+    get_cached_token_claims,
+    get_cached_user,
+    mark_user_active,
+    set_cached_token_claims,
+    set_cached_user,
+)
 
 from open_webui.constants import ERROR_MESSAGES
 
@@ -252,6 +260,7 @@ def get_current_user(
                 )
 
         user = get_current_user_by_api_key(token)
+        bind_request_user(user.id)
 
         # Add user info to current span
         current_span = trace.get_current_span()
@@ -266,16 +275,27 @@ def get_current_user(
     # auth by jwt token
 
     try:
-        try:
-            data = decode_token(token)
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-            )
+        # 已校验过的 token 直接复用声明，避免每个请求重复验签
+        data = get_cached_token_claims(token)
+        if data is None:
+            try:
+                data = decode_token(token)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid token",
+                )
+            if data is not None:
+                set_cached_token_claims(token, data)
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            # 用户行短 TTL 缓存，角色/设置等变更时由 Users 显式失效
+            user = get_cached_user(data["id"])
+            if user is None:
+                user = Users.get_user_by_id(data["id"])
+                if user is not None:
+                    set_cached_user(user)
+
             if user is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -300,12 +320,10 @@ def get_current_user(
                     current_span.set_attribute("client.user.role", user.role)
                     current_span.set_attribute("client.auth.type", "jwt")
 
-                # Refresh the user's last active timestamp asynchronously
-                # to prevent blocking the request
-                if background_tasks:
-                    background_tasks.add_task(
-                        Users.update_user_last_active_by_id, user.id
-                    )
+                # Record the user's last active timestamp in memory; it is
+                # flushed to the database in batches by a background task
+                mark_user_active(user.id)
+                bind_request_user(user.id)
             return user
         else:
             raise HTTPException(
@@ -344,7 +362,7 @@ def get_current_user_by_api_key(api_key: str):
             current_span.set_attribute("client.user.role", user.role)
             current_span.set_attribute("client.auth.type", "api_key")
 
-        Users.update_user_last_active_by_id(user.id)
+        mark_user_active(user.id)
 
     return user
 
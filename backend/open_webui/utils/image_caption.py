@@ -0,0 +1,94 @@
+"""
+图片描述（caption）缓存与并发生成
+
+目标模型不支持视觉时，聊天历史中的图片需要替换为文字描述。
+历史中的图片每轮都会重新出现，因此：
+- 描述按 (caption 模型, 图片内容哈希) 缓存，带 TTL 与容量上限，每张图片只生成一次
+  （base64 图片按内容哈希，远程图片按 URL 哈希）
+- 本轮未命中缓存的图片在并发上限内同时生成
+- 多个请求同时遇到同一张图片时共享同一次生成
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Awaitable, Callable
+
+from open_webui.env import (
+    IMAGE_CAPTION_CACHE_SIZE,
+    IMAGE_CAPTION_CACHE_TTL,
+    IMAGE_CAPTION_CONCURRENCY,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.ttl_cache import TTLCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+CaptionFn = Callable[[str], Awaitable[str]]
+
+_caption_cache = TTLCache(IMAGE_CAPTION_CACHE_SIZE, IMAGE_CAPTION_CACHE_TTL)
+
+# 正在生成中的描述，key 与缓存一致
+_inflight: dict[str, asyncio.Future] = {}
+
+
+def get_caption_cache_key(image_url: str, caption_model: str) -> str:
+    digest = hashlib.sha256(image_url.encode("utf-8")).hexdigest()
+    return f"{caption_model}:{digest}"
+
+
+async def _caption_image(
+    key: str, image_url: str, caption_fn: CaptionFn, semaphore: asyncio.Semaphore
+) -> str:
+    caption = _caption_cache.get(key)
+    if caption is not None:
+        return caption
+
+    future = _inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    caption = ""
+    try:
+        async with semaphore:
+            caption = await caption_fn(image_url) or ""
+        # 生成失败（空描述）不缓存，下一轮重试
+        if caption:
+            _caption_cache.set(key, caption)
+    except Exception as e:
+        log.error(f"[ImageCaption] Failed to generate caption: {e}")
+    finally:
+        _inflight.pop(key, None)
+        future.set_result(caption)
+
+    return caption
+
+
+async def caption_images(
+    image_urls: list[str], caption_model: str, caption_fn: CaptionFn
+) -> dict[str, str]:
+    """
+    为一组图片生成描述，返回 {image_url: caption}
+
+    Args:
+        image_urls: 图片 URL 或 base64 data URL，可重复
+        caption_model: caption 模型 ID，作为缓存 key 的一部分
+        caption_fn: 实际调用视觉模型的函数
+    """
+    unique_urls = list(dict.fromkeys(url for url in image_urls if url))
+    if not unique_urls:
+        return {}
+
+    semaphore = asyncio.Semaphore(IMAGE_CAPTION_CONCURRENCY)
+    captions = await asyncio.gather(
+        *[
+            _caption_image(
+                get_caption_cache_key(url, caption_model), url, caption_fn, semaphore
+            )
+            for url in unique_urls
+        ]
+    )
+    return dict(zip(unique_urls, captions))
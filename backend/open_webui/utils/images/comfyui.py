@@ -172,7 +172,9 @@ async def comfyui_generate_image(
     try:
         ws = websocket.WebSocket()
         headers = {"Authorization": f"Bearer {api_key}"}
-        ws.connect(f"{ws_url}/ws?clientId={client_id}", header=headers)
+        await asyncio.to_thread(
+            ws.connect, f"{ws_url}/ws?clientId={client_id}", header=headers
+        )
         log.info("WebSocket connection established.")
     except Exception as e:
         log.exception(f"Failed to connect to WebSocket server: {e}")
@@ -188,6 +190,6 @@ async def comfyui_generate_image(
         log.exception(f"Error while receiving images: {e}")
         images = None
 
-    ws.close()
+    await asyncio.to_thread(ws.close)
 
     return images
@@ -0,0 +1,377 @@
+"""
+知识库重建任务
+
+重建任务持久化在 knowledge_reindex_job / knowledge_reindex_item 表中：
+- 每个文件一条检查点记录，进程重启后从未完成的文件继续
+- 同一知识库的文件按批合并为一次 embedding 调用
+- 批次通过有界并发在线程池中执行，单个慢文件不会阻塞整个任务
+- 进度写回任务表，并通过 socket 事件 "knowledge:reindex" 推送给发起者
+- 执行期间定期刷新心跳，慢批次不会让任务被判定为超时；
+  发现任务已被其他实例接管时停止本实例的执行
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import FastAPI
+from langchain_core.documents import Document
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from open_webui.env import (
+    INSTANCE_ID,
+    KNOWLEDGE_REINDEX_BATCH_SIZE,
+    KNOWLEDGE_REINDEX_CONCURRENCY,
+    KNOWLEDGE_REINDEX_STALE_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.files import Files, FileModel
+from open_webui.models.knowledge import Knowledges
+from open_webui.models.knowledge_reindex import (
+    KnowledgeReindexJobs,
+    KnowledgeReindexJobModel,
+    KnowledgeReindexItemModel,
+)
+from open_webui.models.users import Users
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.utils.misc import calculate_sha256_string
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# 本进程中正在执行的任务，避免同一任务被重复调度
+_running_jobs: dict[str, asyncio.Task] = {}
+
+
+def create_reindex_job(user_id: str) -> Optional[KnowledgeReindexJobModel]:
+    """
+    收集所有知识库的文件并创建重建任务。
+    数据无效的知识库与旧逻辑保持一致，直接删除。
+    """
+    items = []
+    for knowledge_base in Knowledges.get_knowledge_bases():
+        if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
+            log.warning(
+                f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
+            )
+            try:
+                Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
+            except Exception as e:
+                log.error(
+                    f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
+                )
+            continue
+
+        for file_id in knowledge_base.data.get("file_ids", []):
+            items.append((knowledge_base.id, file_id))
+
+    return KnowledgeReindexJobs.insert_new_job(user_id, items)
+
+
+def start_reindex_job(app: FastAPI, job_id: str) -> bool:
+    """在后台调度任务，已在本进程运行时返回 False"""
+    task = _running_jobs.get(job_id)
+    if task and not task.done():
+        return False
+
+    task = asyncio.create_task(run_reindex_job(app, job_id))
+    _running_jobs[job_id] = task
+    task.add_done_callback(lambda _: _running_jobs.pop(job_id, None))
+    return True
+
+
+async def resume_reindex_jobs(app: FastAPI):
+    """启动时接管待执行的任务以及心跳超时的任务"""
+    try:
+        job_ids = await run_in_threadpool(
+            KnowledgeReindexJobs.get_resumable_job_ids,
+            KNOWLEDGE_REINDEX_STALE_TIMEOUT,
+        )
+    except Exception as e:
+        log.error(f"Failed to load resumable reindex jobs: {e}")
+        return
+
+    for job_id in job_ids:
+        log.info(f"Resuming knowledge reindex job {job_id}")
+        start_reindex_job(app, job_id)
+
+
+async def run_reindex_job(app: FastAPI, job_id: str):
+    claimed = await run_in_threadpool(
+        KnowledgeReindexJobs.claim_job,
+        job_id,
+        INSTANCE_ID,
+        KNOWLEDGE_REINDEX_STALE_TIMEOUT,
+    )
+    if not claimed:
+        log.info(f"Reindex job {job_id} is owned by another instance, skipping")
+        return
+
+    heartbeat = asyncio.create_task(_keep_claim(job_id, asyncio.current_task()))
+    try:
+        await _run_claimed_job(app, job_id)
+    finally:
+        heartbeat.cancel()
+
+
+async def _keep_claim(job_id: str, runner: asyncio.Task):
+    """在任务执行期间定期刷新心跳，认领丢失时取消执行"""
+    interval = max(KNOWLEDGE_REINDEX_STALE_TIMEOUT / 3, 1)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            owned = await run_in_threadpool(
+                KnowledgeReindexJobs.heartbeat, job_id, INSTANCE_ID
+            )
+        except Exception as e:
+            log.warning(f"Failed to refresh heartbeat of reindex job {job_id}: {e}")
+            continue
+
+        if not owned:
+            log.warning(
+                f"Reindex job {job_id} was taken over by another instance, stopping"
+            )
+            runner.cancel()
+            return
+
+
+async def _run_claimed_job(app: FastAPI, job_id: str):
+    job = await run_in_threadpool(KnowledgeReindexJobs.get_job_by_id, job_id)
+    user = await run_in_threadpool(Users.get_user_by_id, job.user_id)
+
+    # 只有 save_docs_to_vector_db 需要 request，且只用到 request.app.state
+    request = Request({"type": "http", "app": app})
+
+    try:
+        # 上次中断时处理到一半的文件重新处理，写入前会先清理其残留向量
+        processing = await run_in_threadpool(
+            KnowledgeReindexJobs.get_items_by_job_id, job_id, ["processing"]
+        )
+        await run_in_threadpool(
+            KnowledgeReindexJobs.update_items_status,
+            [item.id for item in processing],
+            "pending",
+        )
+
+        pending = await run_in_threadpool(
+            KnowledgeReindexJobs.get_items_by_job_id, job_id, ["pending"]
+        )
+
+        items_by_collection: dict[str, list[KnowledgeReindexItemModel]] = {}
+        for item in pending:
+            items_by_collection.setdefault(item.knowledge_id, []).append(item)
+
+        reset_collections = set((job.meta or {}).get("reset_collections", []))
+        for collection_name in items_by_collection:
+            if collection_name in reset_collections:
+                continue
+            try:
+                await _reset_collection(collection_name)
+            except Exception as e:
+                log.error(f"Error deleting collection {collection_name}: {str(e)}")
+            reset_collections.add(collection_name)
+
+        await run_in_threadpool(
+            KnowledgeReindexJobs.update_job_by_id,
+            job_id,
+            {
+                "meta": {
+                    **(job.meta or {}),
+                    "reset_collections": list(reset_collections),
+                }
+            },
+        )
+
+        semaphore = asyncio.Semaphore(KNOWLEDGE_REINDEX_CONCURRENCY)
+
+        async def process_batch(collection_name, batch):
+            async with semaphore:
+                await run_in_threadpool(
+                    _process_batch, request, collection_name, batch, user
+                )
+                job = await run_in_threadpool(
+                    KnowledgeReindexJobs.refresh_job_progress, job_id
+                )
+                await _emit_progress(job)
+
+        await asyncio.gather(
+            *[
+                process_batch(
+                    collection_name, items[i : i + KNOWLEDGE_REINDEX_BATCH_SIZE]
+                )
+                for collection_name, items in items_by_collection.items()
+                for i in range(0, len(items), KNOWLEDGE_REINDEX_BATCH_SIZE)
+            ]
+        )
+
+        job = await run_in_threadpool(KnowledgeReindexJobs.refresh_job_progress, job_id)
+        job = await run_in_threadpool(
+            KnowledgeReindexJobs.update_job_by_id, job_id, {"status": "completed"}
+        )
+        log.info(
+            f"Reindex job {job_id} completed: {job.processed}/{job.total} files, {job.failed} failed"
+        )
+    except asyncio.CancelledError:
+        # 进程退出时保持 running 状态，心跳超时后由其他实例或下次启动接管
+        log.info(f"Reindex job {job_id} interrupted, will resume later")
+        raise
+    except Exception as e:
+        log.exception(f"Reindex job {job_id} failed: {e}")
+        job = await run_in_threadpool(
+            KnowledgeReindexJobs.update_job_by_id,
+            job_id,
+            {"status": "failed", "error": str(e)},
+        )
+
+    await _emit_progress(job)
+
+
+async def _reset_collection(collection_name: str):
+    if await VECTOR_DB_CLIENT.ahas_collection(collection_name=collection_name):
+        await VECTOR_DB_CLIENT.adelete_collection(collection_name=collection_name)
+
+
+def _delete_file_vectors(collection_name: str, file_id: str):
+    try:
+        VECTOR_DB_CLIENT.delete(
+            collection_name=collection_name, filter={"file_id": file_id}
+        )
+    except Exception as e:
+        log.debug(f"No stale vectors removed for file {file_id}: {e}")
+
+
+def _get_file_docs(file: FileModel) -> list[Document]:
+    """与 process_file 的知识库分支一致：优先复用文件自身 collection 中已切分的内容"""
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=f"file-{file.id}", filter={"file_id": file.id}
+    )
+
+    if result is not None and len(result.ids[0]) > 0:
+        return [
+            Document(
+                page_content=result.documents[0][idx],
+                metadata=result.metadatas[0][idx],
+            )
+            for idx, id in enumerate(result.ids[0])
+        ]
+
+    return [
+        Document(
+            page_content=file.data.get("content", ""),
+            metadata={
+                **file.meta,
+                "name": file.filename,
+                "created_by": file.user_id,
+                "file_id": file.id,
+                "source": file.filename,
+            },
+        )
+    ]
+
+
+def _save_file_docs(request, collection_name, docs, user):
+    from open_webui.routers.retrieval import save_docs_to_vector_db
+
+    return save_docs_to_vector_db(
+        request,
+        docs=docs,
+        collection_name=collection_name,
+        add=True,
+        user=user,
+    )
+
+
+def _process_batch(
+    request: Request,
+    collection_name: str,
+    items: list[KnowledgeReindexItemModel],
+    user,
+):
+    """处理同一知识库下的一批文件，合并为一次 embedding 调用"""
+    KnowledgeReindexJobs.update_items_status([item.id for item in items], "processing")
+
+    files = {
+        file.id: file for file in Files.get_files_by_ids([i.file_id for i in items])
+    }
+
+    prepared: list[tuple[KnowledgeReindexItemModel, FileModel, list[Document]]] = []
+    for item in items:
+        file = files.get(item.file_id)
+        if file is None:
+            KnowledgeReindexJobs.update_items_status(
+                [item.id], "failed", "File not found"
+            )
+            continue
+
+        try:
+            docs = _get_file_docs(file)
+            text_content = file.data.get("content", "")
+            hash = calculate_sha256_string(text_content)
+            for doc in docs:
+                doc.metadata = {
+                    **doc.metadata,
+                    "file_id": file.id,
+                    "name": file.filename,
+                    "hash": hash,
+                }
+
+            # 断点恢复时清理上次中断残留的向量，保证重复执行幂等
+            _delete_file_vectors(collection_name, file.id)
+            prepared.append((item, file, docs))
+        except Exception as e:
+            log.error(f"Error preparing file {file.filename} (ID: {file.id}): {str(e)}")
+            KnowledgeReindexJobs.update_items_status([item.id], "failed", str(e))
+
+    if not prepared:
+        return
+
+    try:
+        _save_file_docs(
+            request,
+            collection_name,
+            [doc for _, _, docs in prepared for doc in docs],
+            user,
+        )
+        succeeded = prepared
+    except Exception as e:
+        # 批量写入失败时逐个重试，把失败范围限制在出问题的文件上
+        log.warning(
+            f"Batch reindex of {len(prepared)} files into {collection_name} failed ({e}), retrying one by one"
+        )
+        succeeded = []
+        for item, file, docs in prepared:
+            try:
+                _delete_file_vectors(collection_name, file.id)
+                _save_file_docs(request, collection_name, docs, user)
+                succeeded.append((item, file, docs))
+            except Exception as e:
+                log.error(
+                    f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
+                )
+                KnowledgeReindexJobs.update_items_status([item.id], "failed", str(e))
+
+    for item, file, _ in succeeded:
+        Files.update_file_metadata_by_id(file.id, {"collection_name": collection_name})
+        Files.update_file_data_by_id(file.id, {"status": "completed"})
+
+    KnowledgeReindexJobs.update_items_status(
+        [item.id for item, _, _ in succeeded], "completed"
+    )
+
+
+async def _emit_progress(job: Optional[KnowledgeReindexJobModel]):
+    if job is None:
+        return
+
+    try:
+        from open_webui.socket.main import sio, USER_POOL
+
+        for session_id in USER_POOL.get(job.user_id, []):
+            await sio.emit(
+                "knowledge:reindex",
+                job.model_dump(exclude={"meta"}),
+                to=session_id,
+            )
+    except Exception as e:
+        log.debug(f"Failed to emit reindex progress for job {job.id}: {e}")
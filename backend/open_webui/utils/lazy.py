@@ -0,0 +1,119 @@
+"""
+重量级可选子系统的延迟加载
+
+向量库客户端、mem0 客户端、本地 embedding / rerank 模型、jieba 词典等在导入时
+就初始化会拖慢每个 worker 的冷启动。这里提供：
+- LazyObject：首次访问属性时才创建真实对象的线程安全代理，加载完成后行为与原对象一致
+- 预热注册表：端口开放后由 warm_up_subsystems 在线程池中依次加载，
+  使首个请求通常无需等待
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# (名称, 加载函数)，按注册顺序预热
+_warm_ups: list[tuple[str, Callable[[], Any]]] = []
+
+
+class LazyObject:
+    """
+    首次访问属性时调用 factory 创建真实对象，之后所有属性访问直接转发
+
+    optional=True 时加载失败只记录一次错误，之后 resolve 得到 None（与启动时加载失败
+    置为 None 的行为一致），调用方需用 resolve 的结果判断是否可用
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        name: str,
+        warm_up: bool = True,
+        optional: bool = False,
+    ):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_optional", optional)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_loaded", False)
+        object.__setattr__(self, "_instance", None)
+
+        if warm_up:
+            register_warm_up(name, self._load)
+
+    def _load(self) -> Any:
+        if self._loaded:
+            return self._instance
+
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    instance = self._factory()
+                except Exception as e:
+                    if not self._optional:
+                        raise
+                    log.error(f"Failed to load {self._name}, disabled: {e}")
+                    instance = None
+                object.__setattr__(self, "_instance", instance)
+                object.__setattr__(self, "_loaded", True)
+                log.info(
+                    f"Loaded {self._name} in {time.perf_counter() - start:.2f}s"
+                )
+        return self._instance
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._load(), item)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        setattr(self._load(), key, value)
+
+    def __repr__(self) -> str:
+        if self._loaded:
+            return repr(self._instance)
+        return f"<LazyObject {self._name} (not loaded)>"
+
+
+def resolve(obj: Any) -> Any:
+    """返回代理背后的真实对象（需要时触发加载），非代理对象原样返回"""
+    if isinstance(obj, LazyObject):
+        return obj._load()
+    return obj
+
+
+def is_loaded(obj: Any) -> bool:
+    return not isinstance(obj, LazyObject) or obj._loaded
+
+
+def register_warm_up(name: str, fn: Callable[[], Any]) -> None:
+    _warm_ups.append((name, fn))
+
+
+async def warm_up_subsystems(delay: float = 0) -> None:
+    """在后台依次加载已注册的子系统，失败只记录日志，首次使用时会再次尝试"""
+    from starlette.concurrency import run_in_threadpool
+
+    from open_webui.utils import startup_profile
+
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    start = time.perf_counter()
+    for name, fn in list(_warm_ups):
+        try:
+            with startup_profile.phase(f"warm-up: {name}"):
+                await run_in_threadpool(fn)
+        except Exception as e:
+            log.warning(f"Failed to warm up {name}: {e}")
+
+    log.info(
+        f"Warmed up {len(_warm_ups)} subsystems in {time.perf_counter() - start:.2f}s"
+    )
+    startup_profile.report_warm_up()
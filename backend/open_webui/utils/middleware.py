@@ -17,11 +17,11 @@ import re
 import ast
 
 from uuid import uuid4
-from concurrent.futures import ThreadPoolExecutor
 
 
 from fastapi import Request, HTTPException
 from fastapi.responses import HTMLResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import Response, StreamingResponse, JSONResponse
 
 
@@ -65,6 +65,9 @@ from open_webui.utils.files import (
     get_image_url_from_base64,
 )
 from open_webui.utils.perf_logger import ChatPerfLogger
+from open_webui.utils.summary_scheduler import schedule_summary
+from open_webui.utils.image_caption import caption_images
+from open_webui.utils.admission import INTERACTIVE, background_llm_work, llm_priority
 
 
 from open_webui.models.users import UserModel
@@ -119,6 +122,10 @@ from open_webui.env import (
     CHAT_RESPONSE_MAX_TOOL_CALL_RETRIES,
     ENABLE_REALTIME_CHAT_SAVE,
     ENABLE_QUERIES_CACHE,
+    POST_RESPONSE_TASK_TIMEOUT,
+    TITLE_GENERATION_MAX_CHARS,
+    TITLE_GENERATION_MAX_MESSAGES,
+    TITLE_GENERATION_TIMEOUT,
 )
 from open_webui.constants import TASKS
 
@@ -129,12 +136,63 @@ log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 summary_mode = SUMMARY_SYSTEM
 if summary_mode in ("summary", "legacy", "summary_legacy"):
-    messages_loaded = summary_legacy.messages_loaded
+
+    async def messages_loaded(*args):
+        return await run_in_threadpool(summary_legacy.messages_loaded, *args)
+
     update_summary = summary_legacy.update_summary
 else:
     messages_loaded = summary_new.messages_loaded
     update_summary = summary_new.update_summary
 
+# 后台任务（标题/标签）用不到的内容：<details>...</details> 折叠区域与 ![](url) 图片
+# re.S 使 . 匹配换行符，re.I 忽略大小写
+TASK_CONTENT_STRIP_PATTERN = re.compile(
+    r"<details\b[^>]*>.*?<\/details>|!\[.*?\]\(.*?\)", flags=re.S | re.I
+)
+
+
+def build_title_messages(messages: list[dict]) -> list[dict]:
+    """
+    标题生成的输入：只保留首条用户消息与最近的若干条消息，每条截断到 TITLE_GENERATION_MAX_CHARS，
+    长对话的标题请求大小不随对话长度增长
+    """
+    if len(messages) > TITLE_GENERATION_MAX_MESSAGES:
+        recent = messages[len(messages) - max(TITLE_GENERATION_MAX_MESSAGES - 1, 0) :]
+        first_user = next((m for m in messages if m.get("role") == "user"), None)
+        messages = (
+            [first_user] if first_user is not None and first_user not in recent else []
+        ) + recent
+
+    return [
+        {
+            **message,
+            "content": (
+                message["content"][:TITLE_GENERATION_MAX_CHARS]
+                if isinstance(message.get("content"), str)
+                else message.get("content")
+            ),
+        }
+        for message in messages
+    ]
+
+
+async def run_post_response_jobs(jobs: list[tuple[str, Any, float]]) -> None:
+    """并发执行回复后任务 (名称, 协程, 超时秒数)：各自超时，单个任务失败或超时不影响其他任务"""
+
+    async def run(name: str, job, timeout: float):
+        start = time.time()
+        try:
+            await asyncio.wait_for(job, timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"Post-response task {name} timed out after {timeout}s")
+        except Exception as e:
+            log.exception(f"Post-response task {name} failed: {e}")
+        else:
+            log.debug(f"Post-response task {name} took {time.time() - start:.2f}s")
+
+    await asyncio.gather(*(run(*job) for job in jobs))
+
 
 DEFAULT_REASONING_TAGS = [
     ("<think>", "</think>"),
@@ -940,37 +998,32 @@ async def chat_completion_files_handler(
             queries = [get_last_user_message(body["messages"])]
 
         try:
-            # Offload get_sources_from_items to a separate thread
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor() as executor:
-                sources = await loop.run_in_executor(
-                    executor,
-                    lambda: get_sources_from_items(
-                        request=request,
-                        items=files,
-                        queries=queries,
-                        embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                            query, prefix=prefix, user=user
-                        ),
-                        k=request.app.state.config.TOP_K,
-                        reranking_function=(
-                            (
-                                lambda sentences: request.app.state.RERANKING_FUNCTION(
-                                    sentences, user=user
-                                )
-                            )
-                            if request.app.state.RERANKING_FUNCTION
-                            else None
-                        ),
-                        k_reranker=request.app.state.config.TOP_K_RERANKER,
-                        r=request.app.state.config.RELEVANCE_THRESHOLD,
-                        hybrid_bm25_weight=request.app.state.config.HYBRID_BM25_WEIGHT,
-                        hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
-                        full_context=all_full_context
-                        or request.app.state.config.RAG_FULL_CONTEXT,
-                        user=user,
-                    ),
-                )
+            # 数据库与 embedding 在线程池中执行，向量检索走异步接口
+            sources = await get_sources_from_items(
+                request=request,
+                items=files,
+                queries=queries,
+                embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
+                    query, prefix=prefix, user=user
+                ),
+                k=request.app.state.config.TOP_K,
+                reranking_function=(
+                    (
+                        lambda sentences: request.app.state.RERANKING_FUNCTION(
+                            sentences, user=user
+                        )
+                    )
+                    if request.app.state.RERANKING_FUNCTION
+                    else None
+                ),
+                k_reranker=request.app.state.config.TOP_K_RERANKER,
+                r=request.app.state.config.RELEVANCE_THRESHOLD,
+                hybrid_bm25_weight=request.app.state.config.HYBRID_BM25_WEIGHT,
+                hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
+                full_context=all_full_context
+                or request.app.state.config.RAG_FULL_CONTEXT,
+                user=user,
+            )
         except Exception as e:
             log.exception(e)
 
@@ -1096,12 +1149,14 @@ async def generate_caption_for_image(request, image_url: str, user) -> str:
     }
 
     try:
-        response = await generate_chat_completion(
-            request=request,
-            form_data=caption_request,
-            user=user,
-            bypass_filter=True
-        )
+        # 图片描述按后台调用准入，不挤占前台对话
+        with background_llm_work():
+            response = await generate_chat_completion(
+                request=request,
+                form_data=caption_request,
+                user=user,
+                bypass_filter=True
+            )
 
         if response and "choices" in response:
             return response["choices"][0]["message"]["content"]
@@ -1154,32 +1209,30 @@ async def process_image_captions_if_needed(request, form_data, user, model):
 
     log.info(f"[ImageCaption] Processing images with caption model: {caption_model}")
 
-    # 遍历消息，处理图片
+    # 遍历消息，收集图片
     messages = form_data.get("messages", [])
-    images_found = 0
-    for message in messages:
-        if message.get("role") != "user":
-            continue
-
-        content = message.get("content")
-        log.info(f"[ImageCaption] 检查消息内容类型: {type(content)}")
-        if not isinstance(content, list):
-            log.info(f"[ImageCaption] 消息内容不是列表，跳过")
-            continue
-
-        log.info(f"[ImageCaption] 消息内容项数: {len(content)}")
-        for item in content:
-            log.info(f"[ImageCaption] 内容项类型: {item.get('type', 'unknown')}")
-            if item.get("type") == "image_url":
-                images_found += 1
+    image_urls = [
+        item.get("image_url", {}).get("url", "")
+        for message in messages
+        if message.get("role") == "user" and isinstance(message.get("content"), list)
+        for item in message["content"]
+        if item.get("type") == "image_url"
+    ]
 
-    log.info(f"[ImageCaption] 找到 {images_found} 张图片")
+    log.info(f"[ImageCaption] 找到 {len(image_urls)} 张图片")
 
-    if images_found == 0:
+    if not image_urls:
         log.info(f"[ImageCaption] 没有找到图片，跳过处理")
         return form_data
 
-    # 重新遍历消息，处理图片
+    # 命中缓存的图片直接复用描述，其余图片并发生成
+    captions_by_url = await caption_images(
+        image_urls,
+        caption_model,
+        lambda image_url: generate_caption_for_image(request, image_url, user),
+    )
+
+    # 重新遍历消息，用 caption 替换图片
     for message in messages:
         if message.get("role") != "user":
             continue
@@ -1195,15 +1248,9 @@ async def process_image_captions_if_needed(request, form_data, user, model):
         for item in content:
             if item.get("type") == "image_url":
                 image_url = item.get("image_url", {}).get("url", "")
-                if image_url:
-                    try:
-                        log.info(f"[ImageCaption] Generating caption for image...")
-                        caption = await generate_caption_for_image(request, image_url, user)
-                        if caption:
-                            captions.append(caption)
-                            log.info(f"[ImageCaption] Caption generated: {caption[:100]}...")
-                    except Exception as e:
-                        log.error(f"[ImageCaption] Failed to generate caption: {e}")
+                caption = captions_by_url.get(image_url)
+                if caption:
+                    captions.append(caption)
                 # 不添加图片到新内容（用 caption 替代）
             else:
                 new_content.append(item)
@@ -1322,7 +1369,9 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     if perf_logger:
         perf_logger.mark_payload_checkpoint("image_caption")
 
-    form_data["messages"] = messages_loaded(request, metadata, user, memory_enabled, perf_logger)
+    form_data["messages"] = await messages_loaded(
+        request, metadata, user, memory_enabled, perf_logger
+    )
 
     # === 2. 处理 System Prompt 变量替换 ===
     system_message = get_system_message(form_data.get("messages", []))
@@ -1879,12 +1928,14 @@ async def process_chat_response(
     # ========================================
     async def background_tasks_handler():
         """
-        在响应完成后异步执行后台任务，增强用户体验
+        在响应完成后执行回复后任务，增强用户体验
 
-        执行的任务类型：
-        1. Follow-ups 生成 - 使用 LLM 生成 3-5 个后续问题建议，引导用户继续对话
-        2. Title 生成 - 基于对话内容自动生成聊天标题（首次对话时）
-        3. Tags 生成 - 自动生成聊天分类标签（如"技术"、"工作"等）
+        任务类型（相互独立的任务，并发执行，各自超时，单个失败不影响其他任务）：
+        1. Title 生成 - 基于对话内容自动生成聊天标题；对用户可见，按前台调用准入，
+           只发送截断后的对话（build_title_messages），耗时与摘要无关
+        2. Tags 生成 - 自动生成聊天分类标签（如"技术"、"工作"等）[已屏蔽]
+        3. Follow-ups 生成 - 使用 LLM 生成 3-5 个后续问题建议 [已屏蔽]
+        4. 摘要更新 - 交给摘要调度器登记后立即返回，不等待摘要完成
 
         数据流转：
         - 输入：从数据库读取完整的消息历史（message_list）或从 form_data 获取临时消息
@@ -1906,7 +1957,9 @@ async def process_chat_response(
         if "chat_id" in metadata and not metadata["chat_id"].startswith("local:"):
             # 从数据库获取持久化的聊天历史
             # 数据结构：messages_map = {"message-id": {"role": "user", "content": "...", ...}}
-            messages_map = Chats.get_messages_map_by_chat_id(metadata["chat_id"])
+            messages_map = await run_in_threadpool(
+                Chats.get_messages_map_by_chat_id, metadata["chat_id"]
+            )
             message = messages_map.get(metadata["message_id"]) if messages_map else None
 
             # 构建有序的消息链表（从 root 到当前 message_id）
@@ -1934,12 +1987,7 @@ async def process_chat_response(
 
                 # 正则清理：移除对生成任务无用的内容
                 if isinstance(content, str):
-                    content = re.sub(
-                        r"<details\b[^>]*>.*?<\/details>|!\[.*?\]\(.*?\)",  # <details>...</details> 或 ![](url)
-                        "",
-                        content,
-                        flags=re.S | re.I,  # re.S 使 . 匹配换行符，re.I 忽略大小写
-                    ).strip()
+                    content = TASK_CONTENT_STRIP_PATTERN.sub("", content).strip()
 
                 # 构建清理后的消息对象
                 messages.append(
@@ -1962,249 +2010,254 @@ async def process_chat_response(
         # ----------------------------------------
         # 业务逻辑：仅当 message 有效且包含 model 字段时才执行
         # 边界情况：若 messages 为空或 tasks 未配置，则跳过所有任务
-        if message and "model" in message:
-            if tasks and messages:
-                # ========================================
-                # 任务 1: Follow-ups 生成 
-                # [已屏蔽]
-                # ========================================
-                # 业务逻辑：根据对话历史，使用 LLM 生成 3-5 个后续问题建议
-                # 目的：引导用户继续深入对话，提升用户体验
-                if False:
-                    if (
-                        TASKS.FOLLOW_UP_GENERATION in tasks
-                        and tasks[TASKS.FOLLOW_UP_GENERATION]
-                    ):
-                        # 调用 LLM 生成 Follow-ups
-                        # 数据流转：messages → LLM → JSON 格式的 follow_ups 列表
-                        res = await generate_follow_ups(
-                            request,
-                            {
-                                "model": message["model"],  # 使用当前对话的模型
-                                "messages": messages,        # 完整的清理后的消息历史
-                                "message_id": metadata["message_id"],
-                                "chat_id": metadata["chat_id"],
-                            },
-                            user,
-                        )
+        if not (message and "model" in message and tasks and messages):
+            return
 
-                        # 边界情况：检查 LLM 响应是否有效
-                        if res and isinstance(res, dict):
-                            if len(res.get("choices", [])) == 1:
-                                response_message = res.get("choices", [])[0].get(
-                                    "message", {}
-                                )
+        # 边界情况：临时聊天（local:）不需要标题和标签
+        is_local_chat = metadata.get("chat_id", "").startswith("local:")
 
-                                # 提取内容（优先 content，回退到 reasoning_content）
-                                follow_ups_string = response_message.get(
-                                    "content"
-                                ) or response_message.get("reasoning_content", "")
-                            else:
-                                # 边界情况：LLM 返回多个 choices 或没有 choices
-                                follow_ups_string = ""
+        # ========================================
+        # 任务 1: Follow-ups 生成
+        # ========================================
+        # 业务逻辑：根据对话历史，使用 LLM 生成 3-5 个后续问题建议
+        # 目的：引导用户继续深入对话，提升用户体验
+        async def follow_ups_job():
+            # 调用 LLM 生成 Follow-ups
+            # 数据流转：messages → LLM → JSON 格式的 follow_ups 列表
+            res = await generate_follow_ups(
+                request,
+                {
+                    "model": message["model"],  # 使用当前对话的模型
+                    "messages": messages,        # 完整的清理后的消息历史
+                    "message_id": metadata["message_id"],
+                    "chat_id": metadata["chat_id"],
+                },
+                user,
+            )
 
-                            # 数据清理：提取 JSON 对象（从第一个 { 到最后一个 }）
-                            # 业务逻辑：LLM 可能在 JSON 前后添加说明文字，需要裁剪
-                            follow_ups_string = follow_ups_string[
-                                follow_ups_string.find("{") : follow_ups_string.rfind("}")
-                                + 1
-                            ]
+            # 边界情况：检查 LLM 响应是否有效
+            if res and isinstance(res, dict):
+                if len(res.get("choices", [])) == 1:
+                    response_message = res.get("choices", [])[0].get(
+                        "message", {}
+                    )
 
-                            try:
-                                # 解析 JSON：{"follow_ups": ["问题1", "问题2", "问题3"]}
-                                follow_ups = json.loads(follow_ups_string).get(
-                                    "follow_ups", []
-                                )
+                    # 提取内容（优先 content，回退到 reasoning_content）
+                    follow_ups_string = response_message.get(
+                        "content"
+                    ) or response_message.get("reasoning_content", "")
+                else:
+                    # 边界情况：LLM 返回多个 choices 或没有 choices
+                    follow_ups_string = ""
+
+                # 数据清理：提取 JSON 对象（从第一个 { 到最后一个 }）
+                # 业务逻辑：LLM 可能在 JSON 前后添加说明文字，需要裁剪
+                follow_ups_string = follow_ups_string[
+                    follow_ups_string.find("{") : follow_ups_string.rfind("}")
+                    + 1
+                ]
 
-                                # 数据流转：通过 WebSocket 实时推送给前端
-                                await event_emitter(
-                                    {
-                                        "type": "chat:message:follow_ups",
-                                        "data": {
-                                            "follow_ups": follow_ups,
-                                        },
-                                    }
-                                )
+                try:
+                    # 解析 JSON：{"follow_ups": ["问题1", "问题2", "问题3"]}
+                    follow_ups = json.loads(follow_ups_string).get(
+                        "follow_ups", []
+                    )
 
-                                # 数据流转：持久化到数据库（仅非临时聊天）
-                                # 边界情况：临时聊天（local:）不持久化
-                                if not metadata.get("chat_id", "").startswith("local:"):
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                                        metadata["chat_id"],
-                                        metadata["message_id"],
-                                        {
-                                            "followUps": follow_ups,
-                                        },
-                                    )
+                    # 数据流转：通过 WebSocket 实时推送给前端
+                    await event_emitter(
+                        {
+                            "type": "chat:message:follow_ups",
+                            "data": {
+                                "follow_ups": follow_ups,
+                            },
+                        }
+                    )
 
-                            except Exception as e:
-                                # 边界情况：JSON 解析失败（LLM 返回格式错误）
-                                # 静默失败，不影响主流程
-                                pass
+                    # 数据流转：持久化到数据库（仅非临时聊天）
+                    # 边界情况：临时聊天（local:）不持久化
+                    if not metadata.get("chat_id", "").startswith("local:"):
+                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                            metadata["chat_id"],
+                            metadata["message_id"],
+                            {
+                                "followUps": follow_ups,
+                            },
+                        )
 
-                # ========================================
-                # 任务 4: 摘要更新（基于新增 token 阈值）
-                # ========================================
-                is_user_model = form_data.get("is_user_model", False)
-                await update_summary(request, metadata, user, model, is_user_model)
-
-                # ========================================
-                # 任务 2 & 3: 标题和标签生成（仅非临时聊天）
-                # ========================================
-                # 边界情况：临时聊天（local:）不需要标题和标签，跳过这两个任务
-                if not metadata.get("chat_id", "").startswith("local:"):
-                    # ========================================
-                    # 任务 2: 标题生成
-                    # ========================================
-                    # 业务逻辑：自动生成聊天标题，提升用户体验（避免显示 "New Chat"）
-                    # 触发时机：首次对话完成后
-                    if (
-                        TASKS.TITLE_GENERATION in tasks
-                        and tasks[TASKS.TITLE_GENERATION]
-                    ):
-                        # 获取最后一条用户消息作为回退标题
-                        user_message = get_last_user_message(messages)
-                        if user_message and len(user_message) > 100:
-                            # 边界情况：截断过长的消息（避免标题过长）
-                            user_message = user_message[:100] + "..."
+                except Exception as e:
+                    # 边界情况：JSON 解析失败（LLM 返回格式错误）
+                    # 静默失败，不影响主流程
+                    pass
 
-                        if tasks[TASKS.TITLE_GENERATION]:
+        # ========================================
+        # 任务 2: 标题生成
+        # ========================================
+        # 业务逻辑：自动生成聊天标题，提升用户体验（避免显示 "New Chat"）
+        # 触发时机：首次对话完成后
+        async def title_job():
+            # 获取最后一条用户消息作为回退标题
+            user_message = get_last_user_message(messages)
+            if user_message and len(user_message) > 100:
+                # 边界情况：截断过长的消息（避免标题过长）
+                user_message = user_message[:100] + "..."
+
+            # 调用 LLM 生成标题
+            # 数据流转：截断后的 messages → LLM → JSON 格式的 title 字符串
+            # 标题对用户可见，按前台调用准入，不排在摘要等后台调用之后
+            with llm_priority(INTERACTIVE):
+                res = await generate_title(
+                    request,
+                    {
+                        "model": message["model"],
+                        "messages": build_title_messages(messages),
+                        "chat_id": metadata["chat_id"],
+                    },
+                    user,
+                )
 
-                            # 调用 LLM 生成标题
-                            # 数据流转：messages → LLM → JSON 格式的 title 字符串
-                            res = await generate_title(
-                                request,
-                                {
-                                    "model": message["model"],
-                                    "messages": messages,
-                                    "chat_id": metadata["chat_id"],
-                                },
-                                user,
-                            )
+            # 边界情况：检查 LLM 响应是否有效
+            if res and isinstance(res, dict):
+                if len(res.get("choices", [])) == 1:
+                    response_message = res.get("choices", [])[0].get(
+                        "message", {}
+                    )
 
-                            # 边界情况：检查 LLM 响应是否有效
-                            if res and isinstance(res, dict):
-                                if len(res.get("choices", [])) == 1:
-                                    response_message = res.get("choices", [])[0].get(
-                                        "message", {}
-                                    )
+                    # 提取内容（多层回退策略）
+                    # 优先级：content > reasoning_content > 当前 AI 回复 > 用户消息
+                    title_string = (
+                        response_message.get("content")
+                        or response_message.get(
+                            "reasoning_content",
+                        )
+                        or message.get("content", user_message)
+                    )
+                else:
+                    # 边界情况：LLM 返回多个 choices 或没有 choices
+                    title_string = ""
 
-                                    # 提取内容（多层回退策略）
-                                    # 优先级：content > reasoning_content > 当前 AI 回复 > 用户消息
-                                    title_string = (
-                                        response_message.get("content")
-                                        or response_message.get(
-                                            "reasoning_content",
-                                        )
-                                        or message.get("content", user_message)
-                                    )
-                                else:
-                                    # 边界情况：LLM 返回多个 choices 或没有 choices
-                                    title_string = ""
-
-                                # 数据清理：提取 JSON 对象
-                                title_string = title_string[
-                                    title_string.find("{") : title_string.rfind("}") + 1
-                                ]
-
-                                try:
-                                    # 解析 JSON：{"title": "生成的标题"}
-                                    title = json.loads(title_string).get(
-                                        "title", user_message
-                                    )
-                                except Exception as e:
-                                    # 边界情况：JSON 解析失败
-                                    title = ""
+                # 数据清理：提取 JSON 对象
+                title_string = title_string[
+                    title_string.find("{") : title_string.rfind("}") + 1
+                ]
 
-                                # 边界情况：标题为空时，使用首条用户消息作为回退
-                                if not title:
-                                    title = messages[0].get("content", user_message)
+                try:
+                    # 解析 JSON：{"title": "生成的标题"}
+                    title = json.loads(title_string).get(
+                        "title", user_message
+                    )
+                except Exception as e:
+                    # 边界情况：JSON 解析失败
+                    title = ""
 
-                                # 数据流转：更新数据库
-                                Chats.update_chat_title_by_id(
-                                    metadata["chat_id"], title
-                                )
+                # 边界情况：标题为空时，使用首条用户消息作为回退
+                if not title:
+                    title = messages[0].get("content", user_message)
 
-                                # 数据流转：通过 WebSocket 发送标题给前端
-                                await event_emitter(
-                                    {
-                                        "type": "chat:title",
-                                        "data": title,
-                                    }
-                                )
-                        # 边界情况：简单对话（仅 2 条消息：1条 user + 1条 assistant）
-                        # 业务逻辑：直接用用户消息作为标题，无需调用 LLM（节省成本）
-                        elif len(messages) == 2:
-                            title = messages[0].get("content", user_message)
+                # 数据流转：更新数据库
+                await run_in_threadpool(
+                    Chats.update_chat_title_by_id, metadata["chat_id"], title
+                )
 
-                            Chats.update_chat_title_by_id(metadata["chat_id"], title)
+                # 数据流转：通过 WebSocket 发送标题给前端
+                await event_emitter(
+                    {
+                        "type": "chat:title",
+                        "data": title,
+                    }
+                )
 
-                            await event_emitter(
-                                {
-                                    "type": "chat:title",
-                                    "data": message.get("content", user_message),
-                                }
-                            )
+        # ========================================
+        # 任务 3: 标签生成
+        # ========================================
+        # 业务逻辑：使用 LLM 生成聊天分类标签（如"技术"、"工作"、"生活"等）
+        # 目的：方便用户对聊天进行分类管理和检索
+        async def tags_job():
+            # 调用 LLM 生成标签
+            # 数据流转：messages → LLM → JSON 格式的 tags 数组
+            res = await generate_chat_tags(
+                request,
+                {
+                    "model": message["model"],
+                    "messages": messages,
+                    "chat_id": metadata["chat_id"],
+                },
+                user,
+            )
 
-                    # ========================================
-                    # 任务 3: 标签生成
-                    # ========================================
-                    # 业务逻辑：使用 LLM 生成聊天分类标签（如"技术"、"工作"、"生活"等）
-                    # 目的：方便用户对聊天进行分类管理和检索
-                    if False:
-                        if TASKS.TAGS_GENERATION in tasks and tasks[TASKS.TAGS_GENERATION]:
-                            # 调用 LLM 生成标签
-                            # 数据流转：messages → LLM → JSON 格式的 tags 数组
-                            res = await generate_chat_tags(
-                                request,
-                                {
-                                    "model": message["model"],
-                                    "messages": messages,
-                                    "chat_id": metadata["chat_id"],
-                                },
-                                user,
-                            )
+            # 边界情况：检查 LLM 响应是否有效
+            if res and isinstance(res, dict):
+                if len(res.get("choices", [])) == 1:
+                    response_message = res.get("choices", [])[0].get(
+                        "message", {}
+                    )
 
-                            # 边界情况：检查 LLM 响应是否有效
-                            if res and isinstance(res, dict):
-                                if len(res.get("choices", [])) == 1:
-                                    response_message = res.get("choices", [])[0].get(
-                                        "message", {}
-                                    )
+                    # 提取内容（优先 content，回退到 reasoning_content）
+                    tags_string = response_message.get(
+                        "content"
+                    ) or response_message.get("reasoning_content", "")
+                else:
+                    # 边界情况：LLM 返回多个 choices 或没有 choices
+                    tags_string = ""
 
-                                    # 提取内容（优先 content，回退到 reasoning_content）
-                                    tags_string = response_message.get(
-                                        "content"
-                                    ) or response_message.get("reasoning_content", "")
-                                else:
-                                    # 边界情况：LLM 返回多个 choices 或没有 choices
-                                    tags_string = ""
+                # 数据清理：提取 JSON 对象
+                tags_string = tags_string[
+                    tags_string.find("{") : tags_string.rfind("}") + 1
+                ]
 
-                                # 数据清理：提取 JSON 对象
-                                tags_string = tags_string[
-                                    tags_string.find("{") : tags_string.rfind("}") + 1
-                                ]
+                try:
+                    # 解析 JSON：{"tags": ["技术", "工作", "Python"]}
+                    tags = json.loads(tags_string).get("tags", [])
 
-                                try:
-                                    # 解析 JSON：{"tags": ["技术", "工作", "Python"]}
-                                    tags = json.loads(tags_string).get("tags", [])
+                    # 数据流转：更新数据库（保存到 chat.meta.tags）
+                    Chats.update_chat_tags_by_id(
+                        metadata["chat_id"], tags, user
+                    )
 
-                                    # 数据流转：更新数据库（保存到 chat.meta.tags）
-                                    Chats.update_chat_tags_by_id(
-                                        metadata["chat_id"], tags, user
-                                    )
+                    # 数据流转：通过 WebSocket 发送标签给前端
+                    await event_emitter(
+                        {
+                            "type": "chat:tags",
+                            "data": tags,
+                        }
+                    )
+                except Exception as e:
+                    # 边界情况：JSON 解析失败
+                    # 静默失败，不影响主流程
+                    pass
+
+        # ========================================
+        # 任务 4: 摘要更新（基于新增 token 阈值）
+        # ========================================
+        # 交给摘要调度器：同一聊天单飞 + 防抖合并，不阻塞其他任务
+        is_user_model = form_data.get("is_user_model", False)
+        schedule_summary(
+            update_summary, request, metadata, user, model, is_user_model
+        )
+
+        jobs = []
+        if (
+            not is_local_chat
+            and TASKS.TITLE_GENERATION in tasks
+            and tasks[TASKS.TITLE_GENERATION]
+        ):
+            jobs.append(("title", title_job(), TITLE_GENERATION_TIMEOUT))
+
+        # Follow-ups 与标签生成 [已屏蔽]
+        if False:
+            if (
+                TASKS.FOLLOW_UP_GENERATION in tasks
+                and tasks[TASKS.FOLLOW_UP_GENERATION]
+            ):
+                jobs.append(("follow_ups", follow_ups_job(), POST_RESPONSE_TASK_TIMEOUT))
+            if (
+                not is_local_chat
+                and TASKS.TAGS_GENERATION in tasks
+                and tasks[TASKS.TAGS_GENERATION]
+            ):
+                jobs.append(("tags", tags_job(), POST_RESPONSE_TASK_TIMEOUT))
+
+        await run_post_response_jobs(jobs)
 
-                                    # 数据流转：通过 WebSocket 发送标签给前端
-                                    await event_emitter(
-                                        {
-                                            "type": "chat:tags",
-                                            "data": tags,
-                                        }
-                                    )
-                                except Exception as e:
-                                    # 边界情况：JSON 解析失败
-                                    # 静默失败，不影响主流程
-                                    pass
     # ========================================
     # 第一阶段：事件发射器初始化
     # ========================================
@@ -3442,7 +3495,7 @@ async def process_chat_response(
 
                                         # === 13. 实时保存消息（可选）===
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # 保存到数据库
+                                            # 保存到数据库；检索索引在生成结束后统一刷新
                                             Chats.upsert_message_to_chat_by_id_and_message_id(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
@@ -3451,6 +3504,7 @@ async def process_chat_response(
                                                         content_blocks
                                                     ),
                                                 },
+                                                index_search=False,
                                             )
 
                                         # 准备待发送的数据（用于 WebSocket 流式推送）
@@ -3913,6 +3967,8 @@ async def process_chat_response(
                             "content": serialize_content_blocks(content_blocks),
                         },
                     )
+                else:
+                    Chats.update_chat_search_index_by_id(metadata["chat_id"])
 
                 # Send a webhook notification if the user is not active
                 if not get_active_status_by_user_id(user.id):
@@ -3975,6 +4031,8 @@ async def process_chat_response(
                             "content": serialize_content_blocks(content_blocks),
                         },
                     )
+                else:
+                    Chats.update_chat_search_index_by_id(metadata["chat_id"])
 
             if response.background is not None:
                 await response.background()
@@ -2,6 +2,7 @@ import time
 import logging
 import asyncio
 import sys
+from typing import Optional
 
 from aiocache import cached
 from fastapi import Request
@@ -373,6 +374,46 @@ def get_filtered_models(models, user):
         return models
 
 
+def _find_credential_in_chat_history(chat_id: str) -> Optional[str]:
+    from open_webui.models.chats import Chats
+
+    messages_map = Chats.get_messages_map_by_chat_id(chat_id)
+    for message in (messages_map or {}).values():
+        models = message.get("models")
+        if isinstance(models, list):
+            for model_ref in models:
+                if isinstance(model_ref, str) and model_ref.startswith("user:"):
+                    return model_ref
+    return None
+
+
+def resolve_chat_credential(chat_id: str, user_id: str) -> Optional[str]:
+    """
+    返回聊天绑定的私有模型凭据引用（"user:<id>"）
+
+    绑定在对话请求时写入；没有绑定记录的旧聊天扫描一次历史后补写绑定
+    """
+    from open_webui.models.user_model_credentials import UserModelCredentials
+
+    binding = UserModelCredentials.get_chat_credential_binding(chat_id)
+    if binding is not None:
+        return binding or None
+
+    credential_id = _find_credential_in_chat_history(chat_id)
+    UserModelCredentials.set_chat_credential_binding(chat_id, user_id, credential_id)
+    return credential_id
+
+
+def record_chat_credential(chat_id: str, user_id: str, credential_id: Optional[str]):
+    """显式请求时记录聊天所用的凭据；平台模型请求不覆盖已有的私有模型绑定"""
+    from open_webui.models.user_model_credentials import UserModelCredentials
+
+    if credential_id and credential_id.startswith("user:"):
+        UserModelCredentials.set_chat_credential_binding(chat_id, user_id, credential_id)
+    elif UserModelCredentials.get_chat_credential_binding(chat_id) is None:
+        UserModelCredentials.set_chat_credential_binding(chat_id, user_id, None)
+
+
 async def transform_user_model_if_needed(form_data: dict, user: UserModel):
     import logging
     log = logging.getLogger(__name__)
@@ -384,21 +425,17 @@ async def transform_user_model_if_needed(form_data: dict, user: UserModel):
     # Track if model_item was explicitly provided or reconstructed from history
     model_item_was_explicit = "model_item" in form_data and form_data.get("model_item")
 
-    # If model_item is missing, try to reconstruct it from chat history
-    if not model_item_was_explicit:
-        chat_id = form_data.get("chat_id")
-        if chat_id:
-            from open_webui.models.chats import Chats
-            messages_map = Chats.get_messages_map_by_chat_id(chat_id)
-            if messages_map:
-                for message in messages_map.values():
-                    if "models" in message and isinstance(message["models"], list) and message["models"]:
-                        for model_ref in message["models"]:
-                            if isinstance(model_ref, str) and model_ref.startswith("user:"):
-                                form_data["model_item"] = { "credential_id": model_ref }
-                                break
-                    if "model_item" in form_data:
-                        break
+    # 聊天→凭据绑定：显式请求时记录，后台任务（无 model_item）据此还原
+    chat_id = form_data.get("chat_id")
+    if chat_id and not chat_id.startswith("local:"):
+        if model_item_was_explicit:
+            record_chat_credential(
+                chat_id, user.id, form_data["model_item"].get("credential_id")
+            )
+        else:
+            credential_ref = resolve_chat_credential(chat_id, user.id)
+            if credential_ref:
+                form_data["model_item"] = {"credential_id": credential_ref}
 
     model_id = form_data.get("model")
     model_item = form_data.get("model_item", {})
@@ -415,7 +452,7 @@ async def transform_user_model_if_needed(form_data: dict, user: UserModel):
         log.info(f"[UserModel] Looking up credential: cred_id={cred_id}, user_id={user.id}")
 
         # Try to get credential (including soft-deleted for backward compatibility)
-        cred = UserModelCredentials.get_credential_by_id_and_user_id_include_deleted(cred_id, user.id)
+        cred = UserModelCredentials.get_cached_credential_by_id_and_user_id(cred_id, user.id)
         log.info(f"[UserModel] Credential found: {cred is not None}")
 
         if not cred:
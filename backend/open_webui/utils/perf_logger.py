@@ -9,15 +9,130 @@
 5. LLM 回复完成
 6. update_summary 开始/结束
 
-最终保存为 JSON 文件，便于性能分析。
+耗时同时作为 OpenTelemetry 直方图上报（见 utils/telemetry/chat_metrics.py）；
+完整记录按 PERF_LOG_SAMPLE_RATE 采样后交给后台线程，追加写入轮转的 JSONL 文件，
+序列化与磁盘 I/O 都不在事件循环上进行。
 """
 
-import time
 import json
+import logging
+import queue
+import random
+import threading
+import time
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from typing import Optional, Dict, List, Any
 
-from open_webui.env import PERF_LOG_DIR
+from open_webui.env import (
+    PERF_LOG_BACKUP_COUNT,
+    PERF_LOG_DIR,
+    PERF_LOG_MAX_BYTES,
+    PERF_LOG_QUEUE_SIZE,
+    PERF_LOG_SAMPLE_RATE,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.telemetry import chat_metrics
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+PERF_LOG_FILENAME = "chat_perf.jsonl"
+
+
+class PerfLogWriter:
+    """
+    性能日志后台写入器
+
+    请求路径只做一次非阻塞入队；后台线程批量取出记录，同一条消息的多次快照
+    只保留最新一条，然后追加到按大小轮转的 JSONL 文件。队列满时直接丢弃并计数。
+    """
+
+    def __init__(self, log_dir: Path, max_bytes: int, backup_count: int, maxsize: int):
+        self.log_dir = Path(log_dir)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=maxsize)
+        self._handler: Optional[RotatingFileHandler] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def filepath(self) -> Path:
+        return self.log_dir / PERF_LOG_FILENAME
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            chat_metrics.record_perf_log_dropped()
+            return False
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="perf-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _get_handler(self) -> RotatingFileHandler:
+        if self._handler is None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            self._handler = RotatingFileHandler(
+                self.filepath,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                encoding="utf-8",
+            )
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+        return self._handler
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # 同一条消息在一轮内会保存多次，只写最新快照
+            latest: Dict[str, Dict[str, Any]] = {}
+            for record in batch:
+                latest[record["record_key"]] = record
+
+            try:
+                handler = self._get_handler()
+                for record in latest.values():
+                    handler.emit(
+                        logging.makeLogRecord(
+                            {"msg": json.dumps(record, ensure_ascii=False, default=str)}
+                        )
+                    )
+                handler.flush()
+            except Exception as e:
+                log.error(f"[PERF] Failed to write performance log: {e}")
+
+
+_writers: Dict[Path, PerfLogWriter] = {}
+
+
+def get_perf_log_writer(log_dir: Optional[str] = None) -> PerfLogWriter:
+    """每个日志目录共享一个后台写入器"""
+    log_path = Path(log_dir or PERF_LOG_DIR)
+    if log_path not in _writers:
+        _writers[log_path] = PerfLogWriter(
+            log_path, PERF_LOG_MAX_BYTES, PERF_LOG_BACKUP_COUNT, PERF_LOG_QUEUE_SIZE
+        )
+    return _writers[log_path]
 
 
 class ChatPerfLogger:
@@ -70,14 +185,19 @@ class ChatPerfLogger:
         # 摘要调用明细（bootstrap/rolling）
         self.summary_runs: List[Dict[str, Any]] = []
 
+        # 摘要耗时（bootstrap/rolling）
+        self.summary_durations: List[Dict[str, Any]] = []
+        self._summary_starts: Dict[str, float] = {}
+
         self.model_id: Optional[str] = None
-        self._filepath: Optional[Path] = None
+        # 采样只决定是否落盘，指标始终上报
+        self.sampled = random.random() < PERF_LOG_SAMPLE_RATE
 
     def start(self, model_id: Optional[str] = None) -> None:
         """1. 标记接口调用开始，并记录核心元信息"""
         self.t0 = time.time()
         self.model_id = model_id
-        print(
+        log.debug(
             f"[PERF] 1. /api/chat/completions 接口调用开始: {self.t0:.6f} "
             f"(user_id={self.user_id}, chat_id={self.chat_id}, model_id={self.model_id})"
         )
@@ -92,7 +212,7 @@ class ChatPerfLogger:
         if start:
             self.t_payload_start = time.time()
             delta_ms = (self.t_payload_start - self.t0) * 1000 if self.t0 else 0
-            print(
+            log.debug(
                 f"[PERF] 4. process_chat_payload 开始: {self.t_payload_start:.6f} "
                 f"(距接口调用 +{delta_ms:.2f}ms)"
             )
@@ -100,7 +220,8 @@ class ChatPerfLogger:
             self.t_payload_end = time.time()
             if self.t_payload_start:
                 duration_ms = (self.t_payload_end - self.t_payload_start) * 1000
-                print(
+                chat_metrics.record_payload(duration_ms, self.model_id)
+                log.debug(
                     f"[PERF] 4. process_chat_payload 完成: {self.t_payload_end:.6f} "
                     f"(耗时 {duration_ms:.2f}ms)"
                 )
@@ -120,12 +241,14 @@ class ChatPerfLogger:
         if self._payload_checkpoints:
             last_checkpoint = self._payload_checkpoints[-1]
             duration_ms = (t_now - last_checkpoint["time"]) * 1000
-            print(f"[PERF]   ├─ {last_checkpoint['name']} → {name}: {duration_ms:.2f}ms")
+            chat_metrics.record_payload_checkpoint(name, duration_ms, self.model_id)
+            log.debug(f"[PERF]   ├─ {last_checkpoint['name']} → {name}: {duration_ms:.2f}ms")
         else:
             # 第一个检查点，计算距离 payload_start 的耗时
             if self.t_payload_start:
                 duration_ms = (t_now - self.t_payload_start) * 1000
-                print(f"[PERF]   ├─ payload_start → {name}: {duration_ms:.2f}ms")
+                chat_metrics.record_payload_checkpoint(name, duration_ms, self.model_id)
+                log.debug(f"[PERF]   ├─ payload_start → {name}: {duration_ms:.2f}ms")
 
         self._payload_checkpoints.append({"name": name, "time": t_now})
         self.payload_info[f"checkpoint_{name}"] = t_now
@@ -135,7 +258,9 @@ class ChatPerfLogger:
         self.t_before_llm = time.time()
         self.record_llm_payload(payload)
         delta_ms = (self.t_before_llm - self.t0) * 1000 if self.t0 else 0
-        print(
+        if self.t0:
+            chat_metrics.record_preprocessing(delta_ms, self.model_id)
+        log.debug(
             f"[PERF] 5. 调用 LLM 之前: {self.t_before_llm:.6f} "
             f"(距接口调用 +{delta_ms:.2f}ms)"
         )
@@ -149,7 +274,9 @@ class ChatPerfLogger:
             else 0
         )
         total_ms = (self.t_first_token - self.t0) * 1000 if self.t0 else 0
-        print(
+        if self.t_before_llm:
+            chat_metrics.record_ttft(ttft_ms, self.model_id)
+        log.debug(
             f"[PERF] 6. LLM 返回第一个 token: {self.t_first_token:.6f} "
             f"(TTFT={ttft_ms:.2f}ms, 距接口调用 +{total_ms:.2f}ms)"
         )
@@ -163,6 +290,10 @@ class ChatPerfLogger:
             usage: LLM 使用情况统计（tokens 等）
         """
         self.t_llm_response = time.time()
+        if self.t0:
+            chat_metrics.record_total(
+                (self.t_llm_response - self.t0) * 1000, self.model_id
+            )
         if usage:
             self.llm_info["usage"] = usage
         self.llm_response_content = response
@@ -182,7 +313,7 @@ class ChatPerfLogger:
                 pass
         if isinstance(response, (str, list, dict)):
             self.llm_info["response_length"] = len(response)
-        print("[PERF] 记录 LLM 回复内容")
+        log.debug("[PERF] 记录 LLM 回复内容")
 
     def record_rolling_summary_iteration(
         self,
@@ -215,7 +346,7 @@ class ChatPerfLogger:
             "remaining_messages_count": remaining_messages_count,
         }
         self.rolling_summary_iterations.append(iteration_info)
-        print(
+        log.debug(
             f"[PERF] 滚动摘要第 {iteration} 轮: "
             f"输入消息={len(messages)}, 剩余消息={remaining_messages_count}, "
             f"usage={usage}"
@@ -225,6 +356,7 @@ class ChatPerfLogger:
         self,
         mode: str,
         chunk_summaries: List[Dict[str, Any]],
+        duration_ms: Optional[float] = None,
     ) -> None:
         """
         记录摘要调用明细（每个 chunk 一条）
@@ -232,7 +364,11 @@ class ChatPerfLogger:
         Args:
             mode: bootstrap 或 rolling
             chunk_summaries: summarize_multi_chunk 的返回结果
+            duration_ms: 本次摘要生成总耗时（可选）
         """
+        if duration_ms is not None:
+            self.record_summary_duration(mode, duration_ms)
+
         if not chunk_summaries:
             return
 
@@ -252,7 +388,36 @@ class ChatPerfLogger:
                     "model": summary_info.get("model"),
                 }
             )
-        print(f"[PERF] 记录摘要明细: mode={mode}, chunks={len(chunk_summaries)}")
+        log.debug(f"[PERF] 记录摘要明细: mode={mode}, chunks={len(chunk_summaries)}")
+
+    def record_summary_duration(self, mode: str, duration_ms: float) -> None:
+        """记录一次摘要生成的耗时"""
+        self.summary_durations.append(
+            {"mode": mode, "time": time.time(), "duration_ms": duration_ms}
+        )
+        chat_metrics.record_summary(duration_ms, mode, self.model_id)
+        log.debug(f"[PERF] 摘要耗时: mode={mode}, {duration_ms:.2f}ms")
+
+    def _mark_summary_start(self, mode: str) -> None:
+        self._summary_starts[mode] = time.time()
+
+    def _mark_summary_end(self, mode: str) -> None:
+        t_start = self._summary_starts.pop(mode, None)
+        if t_start is not None:
+            self.record_summary_duration(mode, (time.time() - t_start) * 1000)
+
+    # 旧版摘要系统（utils/summary.py）使用的接口
+    def ensure_initial_summary_start(self, *args, **kwargs) -> None:
+        self._mark_summary_start("bootstrap")
+
+    def ensure_initial_summary_end(self, *args, **kwargs) -> None:
+        self._mark_summary_end("bootstrap")
+
+    def update_summary_start(self, *args, **kwargs) -> None:
+        self._mark_summary_start("rolling")
+
+    def update_summary_end(self, *args, **kwargs) -> None:
+        self._mark_summary_end("rolling")
 
     def record_llm_payload(self, payload: Dict[str, Any]) -> None:
         """
@@ -275,7 +440,7 @@ class ChatPerfLogger:
                 ),
             }
         }
-        print(f"[PERF] 记录 LLM Payload: model={payload.get('model')}, 消息数={len(payload.get('messages', []))}")
+        log.debug(f"[PERF] 记录 LLM Payload: model={payload.get('model')}, 消息数={len(payload.get('messages', []))}")
 
     def record_messages_loaded(
         self,
@@ -295,7 +460,7 @@ class ChatPerfLogger:
                 self.ordered_messages_in_chat = extra_info["ordered_messages_in_chat"]
                 extra_info.pop("ordered_messages_in_chat", None)
             self.messages_loaded_info.update(extra_info)
-        print("[PERF] 记录 messages_loaded 细节")
+        log.debug("[PERF] 记录 messages_loaded 细节")
 
     def _sanitize_messages(self, messages: List[Dict]) -> List[Dict]:
         """
@@ -356,11 +521,13 @@ class ChatPerfLogger:
                 "llm_response": self.t_llm_response,
             },
             "durations_ms": {},
-            "llm_info": self.llm_info,
-            "payload_info": self.payload_info,  # 包含所有 checkpoint 信息
-            "messages_loaded_info": self.messages_loaded_info,
+            # 浅拷贝，后台线程序列化时请求路径仍可继续修改原对象
+            "llm_info": dict(self.llm_info),
+            "payload_info": dict(self.payload_info),  # 包含所有 checkpoint 信息
+            "messages_loaded_info": dict(self.messages_loaded_info),
             "ordered_messages_in_chat": self.ordered_messages_in_chat,
-            "summary_runs": self.summary_runs,
+            "summary_runs": list(self.summary_runs),
+            "summary_durations": list(self.summary_durations),
             "llm_payload": self.llm_payload,  # LLM 调用的完整 payload
             "llm_response": self.llm_response_content,  # LLM 回复内容
         }
@@ -412,47 +579,32 @@ class ChatPerfLogger:
 
     async def save_to_file(self, log_dir: Optional[str] = None) -> Optional[Path]:
         """
-        保存为 JSON 文件
+        将当前快照交给后台写入器（非阻塞）
+
+        同一条消息在一轮中会多次调用，写入器只保留最新快照。
+        未被采样时直接跳过。
 
         Args:
-            log_dir: 日志目录路径
+            log_dir: 日志目录路径（默认 PERF_LOG_DIR）
 
         Returns:
-            保存的文件路径，失败则返回 None
+            写入的 JSONL 文件路径，未采样或入队失败则返回 None
         """
-        log_dir = log_dir or PERF_LOG_DIR
-        try:
-            # 确保 log 目录存在
-            log_path = Path(log_dir)
-            log_path.mkdir(parents=True, exist_ok=True)
-
-            if self._filepath is None:
-                self._filepath = self._build_filepath(log_path)
-
-            # 保存 JSON
-            with open(self._filepath, "w", encoding="utf-8") as f:
-                json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        if not self.sampled:
+            return None
 
-            print(f"[PERF] Performance log saved to: {self._filepath}")
-            return self._filepath
+        try:
+            writer = get_perf_log_writer(log_dir)
+            record = {
+                "record_key": f"{self.chat_id}:{self.message_id}",
+                "saved_at": time.time(),
+                **self.to_dict(),
+            }
+            if not writer.submit(record):
+                log.warning("[PERF] Performance log queue is full, record dropped")
+                return None
+            return writer.filepath
 
         except Exception as e:
-            print(f"[PERF] Failed to save performance log: {e}")
+            log.error(f"[PERF] Failed to enqueue performance log: {e}")
             return None
-
-    def _build_filepath(self, log_path: Path) -> Path:
-        user_name = self.user_name or self.user_id or "unknown"
-        chat_title = self.chat_title or "untitled"
-        message_id = str(self.message_id) or "unknown"
-
-        safe_user = "".join(
-            c for c in user_name if c.isalnum() or c in (" ", "-", "_")
-        ).strip()[:50]
-        safe_title = "".join(
-            c for c in chat_title if c.isalnum() or c in (" ", "-", "_")
-        ).strip()[:50]
-        safe_msg = "".join(c for c in message_id if c.isalnum() or c in ("-", "_"))[
-            :50
-        ]
-        filename = f"{safe_user}_{safe_title}_{safe_msg}.json"
-        return log_path / filename
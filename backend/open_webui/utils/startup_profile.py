@@ -0,0 +1,193 @@
+"""
+启动耗时分析
+
+设置 STARTUP_PROFILE=true 后，在 main.py 最开始安装导入计时钩子，记录每个模块的
+导入耗时（自身 / 含子模块）以及各初始化阶段的耗时；lifespan 开始时输出报告，
+后台预热结束后再输出预热阶段的报告。
+
+开关直接读取 os.environ：钩子必须在导入 open_webui.env 之前安装，
+本模块只能依赖标准库。
+"""
+
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("STARTUP_PROFILE", "False").lower() == "true"
+
+_process_start = time.perf_counter()
+
+# 模块名 -> (自身耗时, 含子模块耗时)，单位秒
+_imports: dict[str, tuple[float, float]] = {}
+# (阶段名, 耗时)
+_phases: list[tuple[str, float]] = []
+# 正在执行的导入栈，每项为 [模块名, 开始时间, 子模块累计耗时]
+_stack: list[list] = []
+
+_finder: Optional["_ImportTimer"] = None
+
+
+class _ImportTimer(MetaPathFinder):
+    """委托其余 finder 查找模块，并为找到的 loader 包一层计时"""
+
+    def __init__(self):
+        self._finding = False
+
+    def find_spec(self, fullname, path, target=None):
+        if self._finding:
+            return None
+
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding = False
+
+        loader = spec.loader
+        # 内建 / 冻结模块的 loader 是类本身，多个模块共享，不做修改
+        if loader is None or isinstance(loader, type):
+            return spec
+
+        exec_module = getattr(loader, "exec_module", None)
+        if exec_module is None:
+            return spec
+
+        def timed_exec_module(module):
+            _stack.append([fullname, time.perf_counter(), 0.0])
+            try:
+                exec_module(module)
+            finally:
+                name, start, children = _stack.pop()
+                elapsed = time.perf_counter() - start
+                _imports[name] = (elapsed - children, elapsed)
+                if _stack:
+                    _stack[-1][2] += elapsed
+
+        try:
+            loader.exec_module = timed_exec_module
+        except (AttributeError, TypeError):
+            pass
+        return spec
+
+
+def install() -> None:
+    global _finder
+    if not ENABLED or _finder is not None:
+        return
+    _finder = _ImportTimer()
+    sys.meta_path.insert(0, _finder)
+
+
+def uninstall() -> None:
+    global _finder
+    if _finder is None:
+        return
+    try:
+        sys.meta_path.remove(_finder)
+    except ValueError:
+        pass
+    _finder = None
+
+
+@contextmanager
+def phase(name: str):
+    """记录一个初始化阶段的耗时，未开启时不做任何事"""
+    if not ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start))
+
+
+def _group_name(module: str) -> str:
+    # open_webui 内部按子包（routers.xxx、retrieval.xxx）汇总，第三方按顶层包汇总
+    parts = module.split(".")
+    if parts[0] == "open_webui":
+        return ".".join(parts[:3])
+    return parts[0]
+
+
+def _format_report(title: str, top_n: int) -> str:
+    lines = [title]
+
+    if _phases:
+        lines.append("  phases:")
+        for name, elapsed in _phases:
+            lines.append(f"    {elapsed * 1000:9.1f} ms  {name}")
+
+    if _imports:
+        total = sum(self_time for self_time, _ in _imports.values())
+        lines.append(f"  imports: {len(_imports)} modules, {total * 1000:.1f} ms")
+
+        groups: dict[str, float] = defaultdict(float)
+        for module, (self_time, _) in _imports.items():
+            groups[_group_name(module)] += self_time
+
+        lines.append(f"  top {top_n} packages by import time:")
+        for group, elapsed in sorted(groups.items(), key=lambda x: -x[1])[:top_n]:
+            lines.append(f"    {elapsed * 1000:9.1f} ms  {group}")
+
+        lines.append(f"  top {top_n} modules by self time:")
+        for module, (self_time, cumulative) in sorted(
+            _imports.items(), key=lambda x: -x[1][0]
+        )[:top_n]:
+            lines.append(
+                f"    {self_time * 1000:9.1f} ms  ({cumulative * 1000:9.1f} ms cumulative)  {module}"
+            )
+
+    return "\n".join(lines)
+
+
+def report() -> None:
+    """lifespan 开始时调用：输出截至目前的导入与初始化耗时，并清空记录"""
+    if not ENABLED:
+        return
+
+    from open_webui.env import STARTUP_PROFILE_TOP_N
+
+    log.info(
+        _format_report(
+            f"Startup profile: ready to serve after "
+            f"{time.perf_counter() - _process_start:.2f}s",
+            STARTUP_PROFILE_TOP_N,
+        )
+    )
+    _imports.clear()
+    _phases.clear()
+
+
+def report_warm_up() -> None:
+    """后台预热结束时调用：输出预热期间的耗时并卸载导入钩子"""
+    if not ENABLED:
+        return
+
+    from open_webui.env import STARTUP_PROFILE_TOP_N
+
+    log.info(
+        _format_report(
+            f"Startup profile: background warm-up finished after "
+            f"{time.perf_counter() - _process_start:.2f}s",
+            STARTUP_PROFILE_TOP_N,
+        )
+    )
+    _imports.clear()
+    _phases.clear()
+    uninstall()
@@ -12,6 +12,7 @@ except ImportError:
 
 from open_webui.models.chats import Chats
 from open_webui.tasks import create_task
+from open_webui.utils.summary_scheduler import summary_llm_slot
 from open_webui.utils.chat_error_boundary import chat_error_boundary, CustmizedError
 from open_webui.routers.openai import generate_chat_completion as generate_openai_chat_completion
 from open_webui.utils.perf_logger import ChatPerfLogger
@@ -693,16 +694,17 @@ async def summarize_multi_chunk(
     total_tokens = compute_token_count(messages)
     if total_tokens <= token_threshold:
         log.info(f"消息 token ({total_tokens}) <= 阈值 ({token_threshold})，直接调用 summarize")
-        return await summarize(
-            messages=messages,
-            model_id=model_id,
-            user=user,
-            request=request,
-            is_user_model=is_user_model,
-            model_config=model_config,
-            old_summary=old_summary,
-            return_details=return_details,
-        )
+        async with summary_llm_slot(request):
+            return await summarize(
+                messages=messages,
+                model_id=model_id,
+                user=user,
+                request=request,
+                is_user_model=is_user_model,
+                model_config=model_config,
+                old_summary=old_summary,
+                return_details=return_details,
+            )
 
     # 2. 将消息分成多段（从后往前，确保最新消息不被截断）
     chunks = []
@@ -744,16 +746,17 @@ async def summarize_multi_chunk(
         try:
             # 只有第一段需要 old_summary
             chunk_old_summary = old_summary if chunk_idx == 0 else None
-            summary_text, details = await summarize(
-                messages=chunk,
-                model_id=model_id,
-                user=user,
-                request=request,
-                is_user_model=is_user_model,
-                model_config=model_config,
-                old_summary=chunk_old_summary,
-                return_details=True,
-            )
+            async with summary_llm_slot(request):
+                summary_text, details = await summarize(
+                    messages=chunk,
+                    model_id=model_id,
+                    user=user,
+                    request=request,
+                    is_user_model=is_user_model,
+                    model_config=model_config,
+                    old_summary=chunk_old_summary,
+                    return_details=True,
+                )
             log.info(
                 f"并行摘要第 {chunk_idx + 1}/{len(chunks)} 段完成: "
                 f"messages={len(chunk)}, "
@@ -1212,16 +1215,17 @@ async def update_summary(request, metadata, user, model, is_user_model):
 
         # 调用摘要生成（复用主对话 API，自动判断是否扣费）
         # 传递 model_config 以直接复用主对话的已验证模型配置，避免重复查找
-        summary_text, summary_llm_details = await summarize(
-            messages=to_be_summarized_summary_messages,
-            model_id=model_id,
-            user=user,
-            request=request,
-            is_user_model=is_user_model,
-            model_config=model,
-            old_summary=old_summary,
-            return_details=True,
-        )
+        async with summary_llm_slot(request):
+            summary_text, summary_llm_details = await summarize(
+                messages=to_be_summarized_summary_messages,
+                model_id=model_id,
+                user=user,
+                request=request,
+                is_user_model=is_user_model,
+                model_config=model,
+                old_summary=old_summary,
+                return_details=True,
+            )
 
         # 在 to_be_summarized_summary_messages 找到最远 5000 个token 或 16条 message， 作为 last_summary_id 点位，以保证 summary 后的连贯性
         recent_messages_in_summary_window ,_ = select_recent_messages_by_tokens(
@@ -1,8 +1,10 @@
 
 # 新版 summary
 
-from typing import Dict, List, Optional, Tuple, Sequence, Any, Union, Callable
+from typing import Dict, List, Optional, Tuple, Sequence, Any, Union, Callable, Iterator
+import asyncio
 import datetime
+import json
 import re
 import os
 import time
@@ -15,8 +17,12 @@ try:
 except ImportError:
     OpenAI = None
 
+from starlette.concurrency import run_in_threadpool
+
 from open_webui.models.chats import Chats
 from open_webui.tasks import create_task
+from open_webui.utils.summary_scheduler import summary_llm_slot
+from open_webui.utils.ttl_cache import TTLCache
 from open_webui.utils.chat_error_boundary import chat_error_boundary, CustmizedError
 from open_webui.routers.openai import generate_chat_completion as generate_openai_chat_completion
 from open_webui.utils.perf_logger import ChatPerfLogger
@@ -34,6 +40,10 @@ from open_webui.env import (
     SUMMARY_RETRIEVAL_USER_MESSAGE_COUNT,
     CURRENT_CONTEXT_TOKEN_BUDGET,
     CURRENT_CONTEXT_MINIAL_MESSAGE,
+    SUMMARY_CONTEXT_CACHE_SIZE,
+    SUMMARY_CONTEXT_CACHE_TTL,
+    SUMMARY_LIST_CACHE_TTL,
+    VECTOR_DB_EXECUTOR_WORKERS,
 )
 
 from open_webui.utils.misc import merge_consecutive_messages
@@ -43,6 +53,12 @@ from fastapi import Request
 
 log = getLogger(__name__)
 
+# (chat_id, message_id) -> (内容指纹, 清洗后的 content, token 数)
+# 每轮只有新消息（或被编辑的消息）需要重新清洗与计数
+_context_message_cache = TTLCache(SUMMARY_CONTEXT_CACHE_SIZE, SUMMARY_CONTEXT_CACHE_TTL)
+# collection_name -> 该聊天已存储的摘要列表，本进程写入摘要时失效
+_summary_items_cache = TTLCache(SUMMARY_CONTEXT_CACHE_SIZE, SUMMARY_LIST_CACHE_TTL)
+
 # --- Constants & Prompts from persona_extractor ---
 
 SUMMARY_PROMPT = """# Role
@@ -272,11 +288,11 @@ class SummaryChromaStore:
     def is_ready(self) -> bool:
         return bool(self._client and self._collection_name)
 
-    def search(self, query_embedding: List[Union[float, int]], limit: int) -> List[Dict[str, Any]]:
+    async def search(self, query_embedding: List[Union[float, int]], limit: int) -> List[Dict[str, Any]]:
         if not self.is_ready():
             return []
 
-        result = self._client.search(
+        result = await self._client.asearch(
             collection_name=self._collection_name,
             vectors=[query_embedding],
             limit=limit,
@@ -302,11 +318,11 @@ class SummaryChromaStore:
             )
         return items
 
-    def get_all(self) -> List[Dict[str, Any]]:
+    async def get_all(self) -> List[Dict[str, Any]]:
         if not self.is_ready():
             return []
 
-        result = self._client.get(collection_name=self._collection_name)
+        result = await self._client.aget(collection_name=self._collection_name)
         if not result:
             return []
 
@@ -326,11 +342,26 @@ class SummaryChromaStore:
             )
         return items
 
-    def upsert(self, item_id: str, text: str, vector: List[Union[float, int]], metadata: Dict[str, Any]) -> None:
+    async def get_all_cached(self) -> List[Dict[str, Any]]:
+        """get_all 的缓存版本，供每轮上下文组装使用"""
+        if not self.is_ready():
+            return []
+
+        items = _summary_items_cache.get(self._collection_name)
+        if items is None:
+            items = await self.get_all()
+            _summary_items_cache.set(self._collection_name, items)
+        return items
+
+    def invalidate_cache(self) -> None:
+        if self._collection_name:
+            _summary_items_cache.pop(self._collection_name)
+
+    async def upsert(self, item_id: str, text: str, vector: List[Union[float, int]], metadata: Dict[str, Any]) -> None:
         if not self.is_ready():
             return
 
-        self._client.upsert(
+        await self._client.aupsert(
             collection_name=self._collection_name,
             items=[
                 {
@@ -341,34 +372,37 @@ class SummaryChromaStore:
                 }
             ],
         )
+        self.invalidate_cache()
 
-    def upsert_many(self, items: List[Dict[str, Any]]) -> None:
+    async def upsert_many(self, items: List[Dict[str, Any]]) -> None:
         if not self.is_ready() or not items:
             return
 
-        self._client.upsert(
+        await self._client.aupsert(
             collection_name=self._collection_name,
             items=items,
         )
+        self.invalidate_cache()
 
-    def search_in_chat(
+    async def search_in_chat(
         self, query_embedding: List[Union[float, int]], limit: int
     ) -> List[Dict[str, Any]]:
-        return self.search(query_embedding, limit)
+        return await self.search(query_embedding, limit)
 
-    def search_in_user_chats(
+    async def search_in_user_chats(
         self, request: Request, query_embedding: List[Union[float, int]], limit: int
     ) -> List[Dict[str, Any]]:
         if not self._user_id:
             return []
 
-        retrieval_results: List[Dict[str, Any]] = []
-        chat_list = Chats.get_chat_title_id_list_by_user_id(
+        chat_list = await run_in_threadpool(
+            Chats.get_chat_title_id_list_by_user_id,
             self._user_id,
             include_archived=True,
             include_folders=True,
             include_pinned=True,
         )
+        stores = []
         for chat in chat_list:
             other_chat_id = getattr(chat, "id", None)
             if not other_chat_id and isinstance(chat, dict):
@@ -381,8 +415,20 @@ class SummaryChromaStore:
                 other_store = SummaryChromaStore(request, self._user_id, other_chat_id)
             if not other_store.is_ready():
                 continue
+            stores.append(other_store)
+
+        # 各聊天的摘要集合并发检索，并发数不超过向量库线程池大小，
+        # 避免聊天很多的用户一次排入成千上万个向量库查询
+        semaphore = asyncio.Semaphore(max(VECTOR_DB_EXECUTOR_WORKERS, 1))
+
+        async def search_store(other_store: "SummaryChromaStore") -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await other_store.search(query_embedding, limit)
 
-            results = other_store.search(query_embedding, limit)
+        retrieval_results: List[Dict[str, Any]] = []
+        for results in await asyncio.gather(
+            *[search_store(other_store) for other_store in stores]
+        ):
             if results:
                 retrieval_results.extend(results)
 
@@ -646,7 +692,7 @@ def _get_message_timestamp(message: Dict) -> int:
         or int(time.time())
     )
 
-def store_summary_chunks(
+async def store_summary_chunks(
     chunk_summaries: List[Dict[str, Any]],
     *,
     embedding_function,
@@ -683,7 +729,7 @@ def store_summary_chunks(
     # 2) 批量生成 embedding（支持 list 输入）
     summary_texts = [item.get("summary", "") for item in valid_summaries]
     try:
-        embeddings = embedding_function(summary_texts, user=user)
+        embeddings = await run_in_threadpool(embedding_function, summary_texts, user=user)
     except Exception as e:
         state["error_status"] = "embedding_error"
         state["error_message"] = str(e)
@@ -802,7 +848,7 @@ def store_summary_chunks(
         else None
     )
     try:
-        store.upsert_many(items)
+        await store.upsert_many(items)
     except Exception as e:
         log.exception(
             "summary vector upsert failed: chat_id=%s user_id=%s collection=%s items=%s "
@@ -1086,16 +1132,17 @@ async def summarize_multi_chunk(
     async def summarize_chunk(chunk_idx: int, chunk: List[Dict]) -> Tuple[int, str, Dict]:
         """对单个分段进行摘要"""
         try:
-            summary_text, details = await summarize(
-                messages=chunk,
-                model_id=model_id,
-                user=user,
-                request=request,
-                is_user_model=is_user_model,
-                model_config=model_config,
-                return_details=True,
-                summary_chars=summary_chars,
-            )
+            async with summary_llm_slot(request):
+                summary_text, details = await summarize(
+                    messages=chunk,
+                    model_id=model_id,
+                    user=user,
+                    request=request,
+                    is_user_model=is_user_model,
+                    model_config=model_config,
+                    return_details=True,
+                    summary_chars=summary_chars,
+                )
             log.info(
                 f"并行摘要第 {chunk_idx + 1}/{len(chunks)} 段完成: "
                 f"messages={len(chunk)}, "
@@ -1143,7 +1190,185 @@ async def summarize_multi_chunk(
 
     return chunk_summaries
 
-def messages_loaded(
+# --- 增量上下文组装 ---
+
+def _message_fingerprint(message: Dict) -> str:
+    content = message.get("content")
+    raw = (
+        content
+        if isinstance(content, str)
+        else json.dumps(content, sort_keys=True, default=str, ensure_ascii=False)
+    )
+    return hashlib.sha1(
+        f"{message.get('role')}\x00{raw}".encode("utf-8")
+    ).hexdigest()
+
+def _get_context_message(
+    chat_id: Optional[str], message_id: str, message: Dict
+) -> Tuple[Dict, int]:
+    """返回 (清洗掉 details 块的消息, token 数)，内容未变化时直接复用缓存"""
+    fingerprint = _message_fingerprint(message)
+    cached = _context_message_cache.get((chat_id, message_id))
+    if cached is not None and cached[0] == fingerprint:
+        _, content, tokens = cached
+    else:
+        content = _transform_message_content(
+            message.get("content"), strip_details_blocks
+        )
+        tokens = compute_token_count([{**message, "content": content}])
+        _context_message_cache.set((chat_id, message_id), (fingerprint, content, tokens))
+
+    # 多模态 content 是列表，下游可能原地修改，返回副本以免污染缓存
+    if isinstance(content, list):
+        content = [dict(item) if isinstance(item, dict) else item for item in content]
+
+    return (
+        {
+            **message,
+            **({"id": message_id} if "id" not in message else {}),
+            "content": content,
+        },
+        tokens,
+    )
+
+def _iter_messages_newest_first(
+    messages_map: Dict, anchor_id: Optional[str]
+) -> Iterator[Tuple[str, Dict]]:
+    """从锚点沿 parentId 向上遍历（与 build_ordered_messages 的顺序相反），按需停止"""
+    if anchor_id and anchor_id in messages_map:
+        current_id: Optional[str] = anchor_id
+        seen = set()
+        while current_id and current_id not in seen:
+            current_msg = messages_map.get(current_id)
+            if not current_msg:
+                break
+            seen.add(current_id)
+            yield current_id, current_msg
+            current_id = current_msg.get("parentId")
+        return
+
+    for message in reversed(build_ordered_messages(messages_map)):
+        yield message["id"], message
+
+def _build_retrieval_query(
+    chat_id: Optional[str], messages_map: Dict, anchor_id: Optional[str]
+) -> str:
+    """最近 N 条用户消息拼成检索 query"""
+    recent_user_messages = []
+    if SUMMARY_RETRIEVAL_USER_MESSAGE_COUNT <= 0:
+        return ""
+
+    for message_id, message in _iter_messages_newest_first(messages_map, anchor_id):
+        if message.get("role") != "user":
+            continue
+        msg, _ = _get_context_message(chat_id, message_id, message)
+        content = _extract_text_content(msg.get("content", ""))
+        if content:
+            recent_user_messages.append(content)
+            if len(recent_user_messages) >= SUMMARY_RETRIEVAL_USER_MESSAGE_COUNT:
+                break
+
+    return "\n".join(reversed(recent_user_messages)).strip()
+
+def _assemble_context_window(
+    chat_id: Optional[str],
+    messages_map: Dict,
+    anchor_id: Optional[str],
+    token_budget: int,
+    min_message_count: int,
+) -> Tuple[List[Dict], int]:
+    """
+    加载最近至少 min_message_count 条消息，满足最小条数后继续追加，
+    直到加入第一条使总 token 超过 token_budget 的消息
+
+    只遍历窗口内的消息，窗口外的历史不清洗也不计数
+    """
+    token_count = 0
+    window = []
+    for message_id, message in _iter_messages_newest_first(messages_map, anchor_id):
+        msg, tokens = _get_context_message(chat_id, message_id, message)
+        token_count += tokens
+        window.append(msg)
+        if len(window) >= min_message_count and token_count > token_budget:
+            break
+    return list(reversed(window)), token_count
+
+def _summary_item_to_latest(item: Dict[str, Any], is_same_chat: bool) -> Dict[str, Any]:
+    metadata_item = item.get("metadata", {}) or {}
+    start_ts = int(metadata_item.get("start_timestamp") or 0)
+    end_ts = int(metadata_item.get("end_timestamp") or 0)
+    return {
+        "timestamp": _format_timestamp_range(start_ts, end_ts),
+        "start_timestamp": start_ts,
+        "end_timestamp": end_ts,
+        "start_time": _format_timestamp(start_ts),
+        "end_time": _format_timestamp(end_ts),
+        "content": item.get("document", ""),
+        "is_same_chat": is_same_chat,
+    }
+
+async def _find_latest_summary_in_chat(
+    store: "SummaryChromaStore", oldest_message_timestamp: int
+) -> Optional[Dict[str, Any]]:
+    """根据窗口最旧消息时间寻找该 chat 的 latest_summary"""
+    in_range = []
+    before = []
+    for item in await store.get_all_cached():
+        metadata_item = item.get("metadata", {}) or {}
+        start_ts = int(metadata_item.get("start_timestamp") or 0)
+        end_ts = int(metadata_item.get("end_timestamp") or 0)
+        if start_ts and end_ts and start_ts <= oldest_message_timestamp <= end_ts:
+            in_range.append((start_ts, item))
+        elif end_ts and end_ts <= oldest_message_timestamp:
+            before.append((end_ts, item))
+
+    if in_range:
+        return max(in_range, key=lambda x: x[0])[1]
+    if before:
+        return max(before, key=lambda x: x[0])[1]
+    return None
+
+async def _find_latest_summary_in_user_chats(
+    request: Request, store: "SummaryChromaStore", user_id: Any, chat_id: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """用户所有聊天中最近的一条摘要"""
+    chat_list = await run_in_threadpool(
+        Chats.get_chat_title_id_list_by_user_id,
+        user_id,
+        include_archived=True,
+        include_folders=True,
+        include_pinned=True,
+    )
+    stores = []
+    for chat in chat_list:
+        other_chat_id = getattr(chat, "id", None)
+        if not other_chat_id and isinstance(chat, dict):
+            other_chat_id = chat.get("id")
+        if not other_chat_id:
+            continue
+
+        other_store = store if other_chat_id == chat_id else SummaryChromaStore(
+            request, user_id, other_chat_id
+        )
+        if other_store.is_ready():
+            stores.append(other_store)
+
+    latest_item = None
+    latest_ts = 0
+    for items in await asyncio.gather(
+        *[other_store.get_all_cached() for other_store in stores]
+    ):
+        for item in items:
+            metadata_item = item.get("metadata", {}) or {}
+            end_ts = int(metadata_item.get("end_timestamp") or 0)
+            start_ts = int(metadata_item.get("start_timestamp") or 0)
+            ts = end_ts or start_ts
+            if ts > latest_ts:
+                latest_ts = ts
+                latest_item = item
+    return latest_item
+
+async def messages_loaded(
     request: Request,
     metadata,
     user,
@@ -1151,238 +1376,168 @@ def messages_loaded(
     perf_logger: Optional[ChatPerfLogger] = None,
 ):
     """
-    同步上下文加载函数（滚动摘要版本）
+    上下文加载函数（滚动摘要版本）
 
     策略：
-    1. 提取最近 N 条用户消息
-    2. 加载最近至少 CURRENT_CONTEXT_MINIAL_MESSAGE 条消息，满足最小条数后继续追加，
+    1. 提取最近 N 条用户消息作为检索 query，并立即在线程池中开始计算 embedding
+    2. 与 embedding 并行：加载最近至少 CURRENT_CONTEXT_MINIAL_MESSAGE 条消息，满足最小条数后继续追加，
        直到加入第一条使总 token 超过 CURRENT_CONTEXT_TOKEN_BUDGET 的消息
     3. 根据窗口最旧消息的时间获取该 chat 的 latest_summary
     4. 检索最相关的摘要（limit+1 后去重 latest_summary）
     5. 构建 system prompt（memory + latest_summary）
     6. 组装最终消息列表
 
+    消息清洗（去除 details 块）与 token 计数按消息缓存，每轮只处理新增或被修改的消息；
+    摘要列表按聊天缓存。所有阻塞操作都在线程池中执行，不阻塞事件循环。
+
     返回：
         [system_message, ...recent_messages]
     """
     chat_id = metadata.get("chat_id", None)
     user_id = user.id
-
-    # 1. 获取当前聊天的消息
-    messages_map = Chats.get_messages_map_by_chat_id(chat_id) or {}
     current_message_id = metadata.get("message_id")
-    ordered_messages_in_chat = build_ordered_messages(messages_map, current_message_id)
-    ordered_messages_in_chat = apply_content_transform_to_messages(
-        messages = ordered_messages_in_chat,
-        transform = strip_details_blocks,
-    )
 
-    # 2. 提取最近 N 条用户消息（用于检索）
-    recent_user_messages = []
-    for msg in reversed(ordered_messages_in_chat):
-        if msg.get("role") == "user":
-            content = _extract_text_content(msg.get("content", ""))
-            if content:
-                recent_user_messages.append(content)
-                if len(recent_user_messages) >= SUMMARY_RETRIEVAL_USER_MESSAGE_COUNT:
-                    break
-    recent_user_messages = list(reversed(recent_user_messages))
-    retrieval_query = "\n".join(recent_user_messages).strip()
+    # 1. 获取当前聊天的消息，并开始计算检索 query 的 embedding
+    messages_map = await run_in_threadpool(Chats.get_messages_map_by_chat_id, chat_id) or {}
+    retrieval_query = await run_in_threadpool(
+        _build_retrieval_query, chat_id, messages_map, current_message_id
+    )
 
     store = SummaryChromaStore(request, user_id, chat_id)
 
-    # 3. 加载最近至少 CURRENT_CONTEXT_MINIAL_MESSAGE 条消息，满足最小条数后继续追加，
-    #    直到加入第一条使总 token 超过 CURRENT_CONTEXT_TOKEN_BUDGET 的消息
-    token_budget = CURRENT_CONTEXT_TOKEN_BUDGET
-    min_message_count = max(CURRENT_CONTEXT_MINIAL_MESSAGE, 0)
-    token_count = 0
-    window = []
-    for msg in reversed(ordered_messages_in_chat):
-        if len(window) >= min_message_count and token_count > token_budget:
-            break
-        next_tokens = compute_token_count([msg])
-        token_count += next_tokens
-        window.append(msg)
-        if len(window) >= min_message_count and token_count > token_budget:
-            break
-    recent_conversation_in_this_chat = list(reversed(window))
+    embedding_function = getattr(request.app.state, "EMBEDDING_FUNCTION", None)
+    embedding_task = None
+    if retrieval_query and embedding_function and store.is_ready():
+        embedding_task = asyncio.create_task(
+            run_in_threadpool(embedding_function, retrieval_query, user=user)
+        )
 
-    # 移除旧的 system 消息
-    recent_conversation_in_this_chat = [
-        m for m in recent_conversation_in_this_chat if m.get("role") != "system"
-    ]
+    try:
+        # 2. 组装当前对话窗口
+        token_budget = CURRENT_CONTEXT_TOKEN_BUDGET
+        min_message_count = max(CURRENT_CONTEXT_MINIAL_MESSAGE, 0)
+        recent_conversation_in_this_chat, token_count = await run_in_threadpool(
+            _assemble_context_window,
+            chat_id,
+            messages_map,
+            current_message_id,
+            token_budget,
+            min_message_count,
+        )
+        window_messages = recent_conversation_in_this_chat
 
-    # 4. 根据窗口最旧消息时间寻找该 chat 的 latest_summary
-    latest_summary_item_id = None
-    latest_summary = {
-        "timestamp": "未知",
-        "start_timestamp": 0,
-        "end_timestamp": 0,
-        "start_time": "未知",
-        "end_time": "未知",
-        "content": "（暂无最近摘要）",
-        "is_same_chat": True,
-    }
-    latest_summary_error = None
-    latest_summary_found = False
-    latest_summary_source = "none"
-    oldest_message_timestamp = (
-        _get_message_timestamp_or_zero(recent_conversation_in_this_chat[0])
-        if recent_conversation_in_this_chat
-        else 0
-    )
-    if oldest_message_timestamp and store.is_ready():
-        try:
-            summary_items = store.get_all()
-            if summary_items:
-                in_range = []
-                before = []
-                for item in summary_items:
-                    metadata_item = item.get("metadata", {}) or {}
-                    start_ts = int(metadata_item.get("start_timestamp") or 0)
-                    end_ts = int(metadata_item.get("end_timestamp") or 0)
-                    if start_ts and end_ts and start_ts <= oldest_message_timestamp <= end_ts:
-                        in_range.append((start_ts, item))
-                    elif end_ts and end_ts <= oldest_message_timestamp:
-                        before.append((end_ts, item))
-
-                chosen_item = None
-                if in_range:
-                    chosen_item = max(in_range, key=lambda x: x[0])[1]
-                elif before:
-                    chosen_item = max(before, key=lambda x: x[0])[1]
+        # 移除旧的 system 消息
+        recent_conversation_in_this_chat = [
+            m for m in recent_conversation_in_this_chat if m.get("role") != "system"
+        ]
 
+        # 3. 根据窗口最旧消息时间寻找该 chat 的 latest_summary
+        latest_summary_item_id = None
+        latest_summary = {
+            "timestamp": "未知",
+            "start_timestamp": 0,
+            "end_timestamp": 0,
+            "start_time": "未知",
+            "end_time": "未知",
+            "content": "（暂无最近摘要）",
+            "is_same_chat": True,
+        }
+        latest_summary_error = None
+        latest_summary_found = False
+        latest_summary_source = "none"
+        oldest_message_timestamp = (
+            _get_message_timestamp_or_zero(recent_conversation_in_this_chat[0])
+            if recent_conversation_in_this_chat
+            else 0
+        )
+        if oldest_message_timestamp and store.is_ready():
+            try:
+                chosen_item = await _find_latest_summary_in_chat(
+                    store, oldest_message_timestamp
+                )
                 if chosen_item:
-                    metadata_item = chosen_item.get("metadata", {}) or {}
-                    start_ts = int(metadata_item.get("start_timestamp") or 0)
-                    end_ts = int(metadata_item.get("end_timestamp") or 0)
-                    latest_summary = {
-                        "timestamp": _format_timestamp_range(start_ts, end_ts),
-                        "start_timestamp": start_ts,
-                        "end_timestamp": end_ts,
-                        "start_time": _format_timestamp(start_ts),
-                        "end_time": _format_timestamp(end_ts),
-                        "content": chosen_item.get("document", ""),
-                        "is_same_chat": True,
-                    }
+                    latest_summary = _summary_item_to_latest(chosen_item, True)
                     latest_summary_item_id = chosen_item.get("id")
                     latest_summary_found = True
                     latest_summary_source = "current_chat"
-        except Exception as e:
-            latest_summary_error = str(e)
-            log.warning(f"latest_summary 获取失败: {e}")
+            except Exception as e:
+                latest_summary_error = str(e)
+                log.warning(f"latest_summary 获取失败: {e}")
 
-    # 4.5 当前 chat 无 summary 时，回退到全局最近的 summary（memory_enabled=True）
-    if not latest_summary_found and memory_enabled:
-        try:
-            chat_list = Chats.get_chat_title_id_list_by_user_id(
-                user_id,
-                include_archived=True,
-                include_folders=True,
-                include_pinned=True,
-            )
-            latest_item = None
-            latest_ts = 0
-            for chat in chat_list:
-                other_chat_id = getattr(chat, "id", None)
-                if not other_chat_id and isinstance(chat, dict):
-                    other_chat_id = chat.get("id")
-                if not other_chat_id:
-                    continue
-
-                other_store = store if other_chat_id == chat_id else SummaryChromaStore(
-                    request, user_id, other_chat_id
-                )
-                if not other_store.is_ready():
-                    continue
-
-                for item in other_store.get_all():
-                    metadata_item = item.get("metadata", {}) or {}
-                    end_ts = int(metadata_item.get("end_timestamp") or 0)
-                    start_ts = int(metadata_item.get("start_timestamp") or 0)
-                    ts = end_ts or start_ts
-                    if ts > latest_ts:
-                        latest_ts = ts
-                        latest_item = item
-
-            if latest_item:
-                metadata_item = latest_item.get("metadata", {}) or {}
-                start_ts = int(metadata_item.get("start_timestamp") or 0)
-                end_ts = int(metadata_item.get("end_timestamp") or 0)
-                latest_summary = {
-                    "timestamp": _format_timestamp_range(start_ts, end_ts),
-                    "start_timestamp": start_ts,
-                    "end_timestamp": end_ts,
-                    "start_time": _format_timestamp(start_ts),
-                    "end_time": _format_timestamp(end_ts),
-                    "content": latest_item.get("document", ""),
-                    "is_same_chat": False,
-                }
-                latest_summary_item_id = latest_item.get("id")
-                latest_summary_found = True
-                latest_summary_source = "user_chats"
-        except Exception as e:
-            latest_summary_error = latest_summary_error or str(e)
-            log.warning(f"latest_summary 全局获取失败: {e}")
-
-    # 5. 检索最相关的摘要（如果有最近用户消息且 embedding 功能可用）
-    retrieved_summaries = []
-    query_embedding = None
-    retrieval_results = []
-    retrieval_error = None
-    if retrieval_query and hasattr(request.app.state, "EMBEDDING_FUNCTION") and store.is_ready():
-        try:
-            # 生成查询 embedding
-            embedding_function = request.app.state.EMBEDDING_FUNCTION
-            query_embedding = embedding_function(retrieval_query, user=user)
-
-            retrieval_limit = SUMMARY_RETRIEVAL_LIMIT + 1
-            if memory_enabled:
-                retrieval_results = store.search_in_user_chats(
-                    request,
-                    query_embedding,
-                    retrieval_limit,
-                )
-            else:
-                retrieval_results = store.search_in_chat(
-                    query_embedding,
-                    retrieval_limit,
+        # 3.5 当前 chat 无 summary 时，回退到全局最近的 summary（memory_enabled=True）
+        if not latest_summary_found and memory_enabled:
+            try:
+                latest_item = await _find_latest_summary_in_user_chats(
+                    request, store, user_id, chat_id
                 )
-
-            # 提取摘要内容，并去除 latest_summary
-            if retrieval_results:
-                filtered_results = []
-                for item in retrieval_results:
-                    if latest_summary_item_id and item.get("id") == latest_summary_item_id:
-                        continue
-                    filtered_results.append(item)
-                    summary_text = item.get("document", "")
-                    metadata_item = item.get("metadata", {})
-                    start_timestamp = metadata_item.get("start_timestamp", 0)
-                    end_timestamp = metadata_item.get("end_timestamp", 0)
-
-                    retrieved_summaries.append(
-                        {
-                            "start_timestamp": int(start_timestamp or 0),
-                            "end_timestamp": int(end_timestamp or 0),
-                            "start_time": _format_timestamp(int(start_timestamp or 0)),
-                            "end_time": _format_timestamp(int(end_timestamp or 0)),
-                            "is_same_chat": bool(
-                                metadata_item.get("chat_id")
-                                and chat_id
-                                and metadata_item.get("chat_id") == chat_id
-                            ),
-                            "content": summary_text,
-                        }
+                if latest_item:
+                    latest_summary = _summary_item_to_latest(latest_item, False)
+                    latest_summary_item_id = latest_item.get("id")
+                    latest_summary_found = True
+                    latest_summary_source = "user_chats"
+            except Exception as e:
+                latest_summary_error = latest_summary_error or str(e)
+                log.warning(f"latest_summary 全局获取失败: {e}")
+
+        # 4. 检索最相关的摘要
+        retrieved_summaries = []
+        retrieval_results = []
+        retrieval_error = None
+        if embedding_task is not None:
+            try:
+                query_embedding = await embedding_task
+
+                retrieval_limit = SUMMARY_RETRIEVAL_LIMIT + 1
+                if memory_enabled:
+                    retrieval_results = await store.search_in_user_chats(
+                        request,
+                        query_embedding,
+                        retrieval_limit,
+                    )
+                else:
+                    retrieval_results = await store.search_in_chat(
+                        query_embedding,
+                        retrieval_limit,
                     )
-                    if len(retrieved_summaries) >= SUMMARY_RETRIEVAL_LIMIT:
-                        break
 
-                retrieval_results = filtered_results[:SUMMARY_RETRIEVAL_LIMIT]
-                log.info(f"检索到 {len(retrieved_summaries)} 个相关摘要")
-        except Exception as e:
-            retrieval_error = str(e)
-            log.warning(f"摘要检索失败: {e}")
+                # 提取摘要内容，并去除 latest_summary
+                if retrieval_results:
+                    filtered_results = []
+                    for item in retrieval_results:
+                        if latest_summary_item_id and item.get("id") == latest_summary_item_id:
+                            continue
+                        filtered_results.append(item)
+                        summary_text = item.get("document", "")
+                        metadata_item = item.get("metadata", {})
+                        start_timestamp = metadata_item.get("start_timestamp", 0)
+                        end_timestamp = metadata_item.get("end_timestamp", 0)
+
+                        retrieved_summaries.append(
+                            {
+                                "start_timestamp": int(start_timestamp or 0),
+                                "end_timestamp": int(end_timestamp or 0),
+                                "start_time": _format_timestamp(int(start_timestamp or 0)),
+                                "end_time": _format_timestamp(int(end_timestamp or 0)),
+                                "is_same_chat": bool(
+                                    metadata_item.get("chat_id")
+                                    and chat_id
+                                    and metadata_item.get("chat_id") == chat_id
+                                ),
+                                "content": summary_text,
+                            }
+                        )
+                        if len(retrieved_summaries) >= SUMMARY_RETRIEVAL_LIMIT:
+                            break
+
+                    retrieval_results = filtered_results[:SUMMARY_RETRIEVAL_LIMIT]
+                    log.info(f"检索到 {len(retrieved_summaries)} 个相关摘要")
+            except Exception as e:
+                retrieval_error = str(e)
+                log.warning(f"摘要检索失败: {e}")
+    finally:
+        # 组装窗口出错或请求被取消时，不再留下无人等待的 embedding 任务
+        if embedding_task is not None and not embedding_task.done():
+            embedding_task.cancel()
 
     # 5. 构建 system prompt
     system_content = SUMMARY_SYSTEM_PROMPT_TEMPLATE.render(
@@ -1410,7 +1565,8 @@ def messages_loaded(
                 "user_id": user_id,
                 "current_message_id": current_message_id,
                 "messages_map_size": len(messages_map),
-                "ordered_messages_in_chat": ordered_messages_in_chat,
+                # 只包含本轮实际遍历的窗口消息
+                "ordered_messages_in_chat": window_messages,
                 "retrieved_summaries": retrieved_summaries,
                 "latest_summary": latest_summary,
                 "latest_summary_error": latest_summary_error,
@@ -1590,6 +1746,8 @@ async def update_summary(
        - 消息数 >= SUMMARY_MESSAGE_THRESHOLD 或 token 数 >= SUMMARY_TOKEN_THRESHOLD；
        - 且消息数 >= SUMMARY_SUBCHUNK_MIN_MESSAGES。
     4) bootstrap：无历史消息直接结束；有消息按 [90000, 10000, 10000] 分段摘要。
+
+    返回启动的摘要后台任务 ID，未启动时返回 None（供摘要调度器等待该任务）。
     """
     perf_logger: Optional[ChatPerfLogger] = metadata.get("perf_logger")
     chat_id = metadata.get("chat_id")
@@ -1653,6 +1811,7 @@ async def update_summary(
         async with chat_error_boundary(metadata, user):
             try:
                 # 1) 并行生成各分段摘要
+                t_summary_start = time.time()
                 chunk_summaries = await summarize_multi_chunk(
                     chunks=chunks,
                     model_id=model_id,
@@ -1668,10 +1827,14 @@ async def update_summary(
                         summary_info["chunk_type"] = chunk_types[idx]
 
                 if perf_logger:
-                    perf_logger.record_summary_runs(mode, chunk_summaries)
+                    perf_logger.record_summary_runs(
+                        mode,
+                        chunk_summaries,
+                        duration_ms=(time.time() - t_summary_start) * 1000,
+                    )
 
                 # 3) 生成 embedding 并写入向量库，同时更新统计状态
-                stored = store_summary_chunks(
+                stored = await store_summary_chunks(
                     chunk_summaries,
                     embedding_function=embedding_function,
                     store=store,
@@ -1763,7 +1926,7 @@ async def update_summary(
             summary_state, pending_state, "generating", task_id=summarize_task_id
         )
         Chats.update_chat_meta(chat_id, user_id, {"summary_state": summary_state_payload})
-        return
+        return summarize_task_id
 
     # === Rolling 摘要：基于上次摘要边界只处理新增消息 ===
     last_summary_msg_id = summary_state.get("last_summarized_message_id")
@@ -1843,6 +2006,7 @@ async def update_summary(
         summary_state, pending_state, "generating", task_id=summarize_task_id
     )
     Chats.update_chat_meta(chat_id, user_id, {"summary_state": summary_state_payload})
+    return summarize_task_id
 
 # bootstrap summarize
 # - BOOTSTRAP_SUMMARY_CHUNK_STRATEGY（90000,10000,10000）：首次 bootstrap 摘要时按 token 上限切分历史消息的策略。
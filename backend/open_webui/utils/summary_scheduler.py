@@ -0,0 +1,172 @@
+"""
+摘要任务调度
+
+process_chat_response 每轮结束后只调用 schedule_summary 登记，不再等待摘要完成：
+- 单飞：每个聊天同一时刻最多一个摘要任务（包括 update_summary 内部启动的后台任务）
+- 防抖：任务启动前等待 SUMMARY_DEBOUNCE_SECONDS，窗口内的多轮只保留最新参数；
+  运行中到达的新一轮在本次结束后合并为一次补跑
+- 限流：摘要 LLM 调用经 summary_llm_slot 限制并发，进程内使用信号量，
+  配置 SUMMARY_GLOBAL_MAX_CONCURRENCY 时再通过 Redis 做跨实例限流
+- 执行结果通过 webui.summary.* 指标上报
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from open_webui.env import (
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+    SUMMARY_DEBOUNCE_SECONDS,
+    SUMMARY_GLOBAL_MAX_CONCURRENCY,
+    SUMMARY_MAX_CONCURRENCY,
+    SUMMARY_SLOT_TIMEOUT,
+)
+from open_webui.tasks import tasks
+from open_webui.utils.admission import background_llm_work
+from open_webui.utils.telemetry.chat_metrics import (
+    record_summary_job,
+    record_summary_slot_wait,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+SUMMARY_SLOTS_KEY = f"{REDIS_KEY_PREFIX}:summary:slots"
+
+# 原子地清理过期槽位并尝试占用一个槽位
+# KEYS[1]: 槽位 zset；ARGV: now, limit, timeout, token
+_ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[3]))
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+_local_semaphore = asyncio.Semaphore(SUMMARY_MAX_CONCURRENCY)
+
+
+class _SummaryJob:
+    def __init__(self, update_fn: Callable[..., Awaitable[Any]], args: tuple):
+        self.update_fn = update_fn
+        self.args = args
+        # 是否还有待执行的一轮（首次登记或运行中又有新一轮到达）
+        self.pending = True
+        self.task: Optional[asyncio.Task] = None
+
+
+# chat_id -> 本进程中该聊天的摘要任务
+_jobs: dict[str, _SummaryJob] = {}
+
+
+def schedule_summary(
+    update_fn: Callable[..., Awaitable[Any]],
+    request,
+    metadata: dict,
+    user,
+    model,
+    is_user_model: bool,
+) -> None:
+    """登记一次摘要更新，立即返回"""
+    chat_id = metadata.get("chat_id")
+    args = (request, metadata, user, model, is_user_model)
+
+    job = _jobs.get(chat_id)
+    if job is not None:
+        # 已有任务：只更新参数，本轮与尚未执行的那一轮合并
+        if job.pending:
+            record_summary_job("coalesced")
+        job.update_fn = update_fn
+        job.args = args
+        job.pending = True
+        return
+
+    job = _SummaryJob(update_fn, args)
+    _jobs[chat_id] = job
+    job.task = asyncio.create_task(_run_job(chat_id, job))
+
+
+async def _run_job(chat_id: str, job: _SummaryJob) -> None:
+    try:
+        while job.pending:
+            await asyncio.sleep(SUMMARY_DEBOUNCE_SECONDS)
+            job.pending = False
+
+            start = time.time()
+            try:
+                await _run_once(chat_id, job.update_fn, job.args)
+                record_summary_job("completed", (time.time() - start) * 1000)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Summary job for chat {chat_id} failed: {e}")
+                record_summary_job("failed", (time.time() - start) * 1000)
+    finally:
+        if _jobs.get(chat_id) is job:
+            _jobs.pop(chat_id, None)
+
+
+async def _run_once(chat_id: str, update_fn, args: tuple) -> None:
+    # update_summary 内部通过 create_task 启动实际的摘要生成并返回其任务 ID，
+    # 只等待这个任务结束：单飞覆盖完整的摘要过程，又不会等到同一聊天随后登记的对话任务
+    task_id = await update_fn(*args)
+    task = tasks.get(task_id) if isinstance(task_id, str) else None
+    if task is None:
+        return
+
+    (result,) = await asyncio.gather(task, return_exceptions=True)
+    if isinstance(result, Exception):
+        raise result
+
+
+async def _acquire_global_slot(redis) -> Optional[str]:
+    token = str(uuid.uuid4())
+    while True:
+        try:
+            acquired = await redis.eval(
+                _ACQUIRE_SLOT_SCRIPT,
+                1,
+                SUMMARY_SLOTS_KEY,
+                time.time(),
+                SUMMARY_GLOBAL_MAX_CONCURRENCY,
+                SUMMARY_SLOT_TIMEOUT,
+                token,
+            )
+        except Exception as e:
+            # Redis 不可用时退化为仅进程内限流
+            log.warning(f"Failed to acquire global summary slot: {e}")
+            return None
+
+        if acquired:
+            return token
+        await asyncio.sleep(0.5)
+
+
+@asynccontextmanager
+async def summary_llm_slot(request=None):
+    """占用一个摘要 LLM 调用的并发槽位"""
+    redis = getattr(request.app.state, "redis", None) if request else None
+    start = time.time()
+
+    async with _local_semaphore:
+        token = None
+        if redis is not None and SUMMARY_GLOBAL_MAX_CONCURRENCY > 0:
+            token = await _acquire_global_slot(redis)
+        record_summary_slot_wait((time.time() - start) * 1000)
+
+        try:
+            # 摘要调用按后台调用准入，不挤占前台对话
+            with background_llm_work():
+                yield
+        finally:
+            if token:
+                try:
+                    await redis.zrem(SUMMARY_SLOTS_KEY, token)
+                except Exception as e:
+                    log.warning(f"Failed to release global summary slot: {e}")
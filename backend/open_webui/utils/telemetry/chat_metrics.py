@@ -0,0 +1,128 @@
+"""Chat pipeline timing metrics.
+
+Histograms fed by ``ChatPerfLogger`` so the per-turn timings that used to
+live only in debug JSON files are exported through the regular OTel
+pipeline (see ``metrics.py``). Only the OpenTelemetry API is used here: when
+ENABLE_OTEL_METRICS is off the global meter is a no-op and recording costs
+next to nothing.
+
+Metrics collected:
+
+* webui.chat.ttft (histogram, milliseconds)
+* webui.chat.preprocessing.duration (histogram, milliseconds)
+* webui.chat.payload.duration (histogram, milliseconds)
+* webui.chat.payload.checkpoint.duration (histogram, milliseconds)
+* webui.chat.total.duration (histogram, milliseconds)
+* webui.chat.summary.duration (histogram, milliseconds)
+* webui.chat.perf_log.dropped (counter)
+* webui.summary.jobs (counter)
+* webui.summary.job.duration (histogram, milliseconds)
+* webui.summary.slot.wait (histogram, milliseconds)
+
+Attributes used: model, checkpoint, mode, outcome
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from opentelemetry import metrics
+
+_meter = metrics.get_meter(__name__)
+
+_ttft_histogram = _meter.create_histogram(
+    name="webui.chat.ttft",
+    description="Time from the upstream LLM call to the first streamed token",
+    unit="ms",
+)
+_preprocessing_histogram = _meter.create_histogram(
+    name="webui.chat.preprocessing.duration",
+    description="Time from request start to the upstream LLM call",
+    unit="ms",
+)
+_payload_histogram = _meter.create_histogram(
+    name="webui.chat.payload.duration",
+    description="process_chat_payload duration",
+    unit="ms",
+)
+_checkpoint_histogram = _meter.create_histogram(
+    name="webui.chat.payload.checkpoint.duration",
+    description="Duration of each step inside process_chat_payload",
+    unit="ms",
+)
+_total_histogram = _meter.create_histogram(
+    name="webui.chat.total.duration",
+    description="Time from request start to the final LLM response",
+    unit="ms",
+)
+_summary_histogram = _meter.create_histogram(
+    name="webui.chat.summary.duration",
+    description="Summary generation duration",
+    unit="ms",
+)
+_dropped_counter = _meter.create_counter(
+    name="webui.chat.perf_log.dropped",
+    description="Perf log records dropped because the writer queue was full",
+    unit="1",
+)
+_summary_jobs_counter = _meter.create_counter(
+    name="webui.summary.jobs",
+    description="Summary scheduler jobs by outcome (completed, failed, coalesced)",
+    unit="1",
+)
+_summary_job_histogram = _meter.create_histogram(
+    name="webui.summary.job.duration",
+    description="Scheduled summary job duration, debounce excluded",
+    unit="ms",
+)
+_summary_slot_wait_histogram = _meter.create_histogram(
+    name="webui.summary.slot.wait",
+    description="Time spent waiting for a summary LLM concurrency slot",
+    unit="ms",
+)
+
+
+def _attrs(model_id: Optional[str], **extra) -> dict:
+    return {"model": model_id or "unknown", **extra}
+
+
+def record_ttft(duration_ms: float, model_id: Optional[str]) -> None:
+    _ttft_histogram.record(duration_ms, _attrs(model_id))
+
+
+def record_preprocessing(duration_ms: float, model_id: Optional[str]) -> None:
+    _preprocessing_histogram.record(duration_ms, _attrs(model_id))
+
+
+def record_payload(duration_ms: float, model_id: Optional[str]) -> None:
+    _payload_histogram.record(duration_ms, _attrs(model_id))
+
+
+def record_payload_checkpoint(
+    checkpoint: str, duration_ms: float, model_id: Optional[str]
+) -> None:
+    _checkpoint_histogram.record(
+        duration_ms, _attrs(model_id, checkpoint=checkpoint)
+    )
+
+
+def record_total(duration_ms: float, model_id: Optional[str]) -> None:
+    _total_histogram.record(duration_ms, _attrs(model_id))
+
+
+def record_summary(duration_ms: float, mode: str, model_id: Optional[str]) -> None:
+    _summary_histogram.record(duration_ms, _attrs(model_id, mode=mode))
+
+
+def record_perf_log_dropped() -> None:
+    _dropped_counter.add(1)
+
+
+def record_summary_job(outcome: str, duration_ms: Optional[float] = None) -> None:
+    _summary_jobs_counter.add(1, {"outcome": outcome})
+    if duration_ms is not None:
+        _summary_job_histogram.record(duration_ms, {"outcome": outcome})
+
+
+def record_summary_slot_wait(duration_ms: float) -> None:
+    _summary_slot_wait_histogram.record(duration_ms)
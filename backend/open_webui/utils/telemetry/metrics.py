@@ -8,6 +8,7 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* webui.tasks.active (gauge, running chat tasks on this worker)
 
 Attributes used: http.method, http.route, http.status_code
 
@@ -38,6 +39,7 @@ from opentelemetry.sdk.metrics.export import (
 from opentelemetry.sdk.resources import Resource
 
 from open_webui.env import (
+    INSTANCE_ID,
     OTEL_SERVICE_NAME,
     OTEL_METRICS_EXPORTER_OTLP_ENDPOINT,
     OTEL_METRICS_BASIC_AUTH_USERNAME,
@@ -46,6 +48,7 @@ from open_webui.env import (
     OTEL_METRICS_EXPORTER_OTLP_INSECURE,
 )
 from open_webui.socket.main import get_active_user_ids
+from open_webui.tasks import get_active_task_count, is_draining
 from open_webui.models.users import Users
 
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
@@ -99,6 +102,9 @@ def _build_meter_provider(resource: Resource) -> MeterProvider:
         View(
             instrument_name="webui.users.active",
         ),
+        View(
+            instrument_name="webui.tasks.active",
+        ),
     ]
 
     provider = MeterProvider(
@@ -159,6 +165,24 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         callbacks=[observe_active_users],
     )
 
+    def observe_active_tasks(
+        options: metrics.CallbackOptions,
+    ) -> Sequence[metrics.Observation]:
+        # One series per worker; a draining worker can be stopped once it reaches zero
+        return [
+            metrics.Observation(
+                value=get_active_task_count(),
+                attributes={"instance.id": INSTANCE_ID, "draining": is_draining()},
+            )
+        ]
+
+    meter.create_observable_gauge(
+        name="webui.tasks.active",
+        description="Number of running chat tasks on this worker",
+        unit="tasks",
+        callbacks=[observe_active_tasks],
+    )
+
     # FastAPI middleware
     @app.middleware("http")
     async def _metrics_middleware(request: Request, call_next):
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    进程内 LRU + TTL 缓存
+
+    - 超过 max_size 时淘汰最久未使用的条目
+    - 指定 max_bytes 时按 sizeof 估算的总字节数淘汰，单条超过上限的不缓存
+    - 条目超过 ttl 秒后视为过期，读取时惰性清理
+    - 加锁保证线程池中调用安全
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int],
+        ttl: float,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof if max_bytes is not None else None
+        self.nbytes = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size is not None and self.max_size <= 0:
+            return
+
+        size = self._sizeof(value) if self._sizeof else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self.nbytes += size
+            while (self.max_size is not None and len(self._data) > self.max_size) or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            ):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.nbytes -= evicted
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            entry = self._remove(key)
+            return entry[1] if entry else default
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def _remove(self, key: Hashable) -> Optional[tuple[float, Any, int]]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,192 @@
+"""
+上游 HTTP 连接池
+
+每个上游地址（scheme://host:port）复用一个长期存在的 aiohttp.ClientSession，
+保持 keep-alive 连接，避免每个请求重新建立 TCP / TLS 连接；同时记录各地址的健康状态：
+
+- 连续失败达到阈值后标记为不健康，冷却期内拉取模型列表等非关键请求直接跳过
+- 冷却期结束后由 allow_request 放行一次探测请求，其余调用方在探测结果出来前
+  （最长再一个冷却期）继续跳过；探测成功即恢复健康，失败则重新进入冷却期
+- 只有连接错误、超时和 5xx 计为失败，4xx 属于请求本身的问题
+
+session 绑定创建时的事件循环；在其他事件循环中使用（如测试）时关闭旧 session 并重新创建。
+session 由所有用户共享，使用 DummyCookieJar 丢弃上游返回的 Cookie，避免在用户之间串用。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+@dataclass
+class UpstreamHealth:
+    consecutive_failures: int = 0
+    total_requests: int = 0
+    total_failures: int = 0
+    last_error: Optional[str] = None
+    last_failure_at: Optional[float] = None
+    last_success_at: Optional[float] = None
+    # 不健康状态的截止时间（monotonic），为 0 表示健康
+    unhealthy_until: float = 0.0
+    # 最近请求耗时的指数移动平均（毫秒）
+    latency_ms: Optional[float] = None
+
+
+def get_base_url(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class UpstreamPool:
+    def __init__(
+        self,
+        name: str,
+        limit_per_host: int = 100,
+        keepalive_timeout: float = 30,
+        unhealthy_threshold: int = 3,
+        unhealthy_cooldown: float = 30,
+    ):
+        self.name = name
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.unhealthy_threshold = unhealthy_threshold
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+        # 各 session 创建时所在的事件循环
+        self._session_loops: dict[str, asyncio.AbstractEventLoop] = {}
+        self._health: dict[str, UpstreamHealth] = {}
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        base_url = get_base_url(url)
+        session = self._sessions.get(base_url)
+        loop = asyncio.get_running_loop()
+        if (
+            session is None
+            or session.closed
+            or self._session_loops.get(base_url) is not loop
+        ):
+            if session is not None and not session.closed:
+                self._close_stale_session(session, self._session_loops.get(base_url))
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=0,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                ),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trust_env=True,
+            )
+            self._sessions[base_url] = session
+            self._session_loops[base_url] = loop
+        return session
+
+    @staticmethod
+    def _close_stale_session(
+        session: aiohttp.ClientSession, loop: Optional[asyncio.AbstractEventLoop]
+    ) -> None:
+        """
+        关闭被替换的 session：所属事件循环仍在运行时交给它关闭；
+        该循环已停止时无法再在其上关闭连接，只解除关联，连接随对象回收
+        """
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            session.detach()
+
+    def _get_health(self, url: str) -> UpstreamHealth:
+        base_url = get_base_url(url)
+        health = self._health.get(base_url)
+        if health is None:
+            health = self._health[base_url] = UpstreamHealth()
+        return health
+
+    def is_healthy(self, url: str) -> bool:
+        return self._get_health(url).unhealthy_until <= time.monotonic()
+
+    def allow_request(self, url: str) -> bool:
+        """
+        非关键请求发出前调用：健康时放行；冷却期结束后只放行第一个调用方作为探测，
+        并把冷却期顺延一轮，探测返回前的并发调用方仍被跳过
+        """
+        health = self._get_health(url)
+        if not health.unhealthy_until:
+            return True
+
+        now = time.monotonic()
+        if health.unhealthy_until > now:
+            return False
+
+        health.unhealthy_until = now + self.unhealthy_cooldown
+        log.info(f"{self.name} upstream {get_base_url(url)} cooldown ended, probing")
+        return True
+
+    def record_success(self, url: str, elapsed: Optional[float] = None) -> None:
+        health = self._get_health(url)
+        if health.unhealthy_until:
+            log.info(f"{self.name} upstream {get_base_url(url)} recovered")
+        health.total_requests += 1
+        health.consecutive_failures = 0
+        health.unhealthy_until = 0.0
+        health.last_success_at = time.time()
+        if elapsed is not None:
+            latency_ms = elapsed * 1000
+            health.latency_ms = (
+                latency_ms
+                if health.latency_ms is None
+                else health.latency_ms * 0.8 + latency_ms * 0.2
+            )
+
+    def record_failure(self, url: str, error: Exception | str) -> None:
+        health = self._get_health(url)
+        health.total_requests += 1
+        health.total_failures += 1
+        health.consecutive_failures += 1
+        health.last_error = str(error) or error.__class__.__name__
+        health.last_failure_at = time.time()
+        if health.consecutive_failures >= self.unhealthy_threshold:
+            if health.unhealthy_until <= time.monotonic():
+                log.warning(
+                    f"{self.name} upstream {get_base_url(url)} marked unhealthy after "
+                    f"{health.consecutive_failures} failures: {health.last_error}"
+                )
+            health.unhealthy_until = time.monotonic() + self.unhealthy_cooldown
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            base_url: {
+                "healthy": health.unhealthy_until <= now,
+                "consecutive_failures": health.consecutive_failures,
+                "total_requests": health.total_requests,
+                "total_failures": health.total_failures,
+                "last_error": health.last_error,
+                "last_failure_at": health.last_failure_at,
+                "last_success_at": health.last_success_at,
+                "latency_ms": (
+                    round(health.latency_ms, 1)
+                    if health.latency_ms is not None
+                    else None
+                ),
+                "open_session": base_url in self._sessions
+                and not self._sessions[base_url].closed,
+            }
+            for base_url, health in self._health.items()
+        }
+
+    async def close(self) -> None:
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        self._session_loops.clear()
+        for session in sessions:
+            if not session.closed:
+                await session.close()
@@ -0,0 +1,190 @@
+"""
+认证路径缓存
+
+get_current_user 在每个请求上都要校验 token 并读取用户行，这里提供：
+- token 声明缓存：key 为 token 的 sha256，命中时仍检查 exp
+- 用户行缓存：短 TTL，用户角色、设置、封禁状态等变更时由 Users 显式失效；
+  多 worker 部署下通过 Redis pub/sub 广播失效
+- 最近活跃时间：请求路径只记录到内存，后台任务定期批量写库
+- 用户私有模型凭据：短 TTL，凭据更新/删除时显式失效并广播
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+from open_webui.env import (
+    AUTH_CACHE_SIZE,
+    AUTH_TOKEN_CACHE_TTL,
+    AUTH_USER_CACHE_TTL,
+    INSTANCE_ID,
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
+    USER_MODEL_CREDENTIAL_CACHE_TTL,
+)
+from open_webui.utils.ttl_cache import TTLCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+USER_CACHE_PUBSUB_CHANNEL = f"{REDIS_KEY_PREFIX}:auth:user_invalidate"
+
+_token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL)
+_user_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_USER_CACHE_TTL)
+# (credential_id, user_id) -> UserModelCredentialModel
+_credential_cache = TTLCache(AUTH_CACHE_SIZE, USER_MODEL_CREDENTIAL_CACHE_TTL)
+
+# 广播失效所用的 Redis 客户端与事件循环，由 user_cache_invalidation_listener 设置
+_redis = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# user_id -> 最近一次请求时间，等待批量写库
+_pending_last_active: dict[str, int] = {}
+_pending_lock = threading.Lock()
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_cached_token_claims(token: str) -> Optional[dict]:
+    claims = _token_cache.get(_token_key(token))
+    if claims is None:
+        return None
+
+    exp = claims.get("exp")
+    if exp is not None and exp <= time.time():
+        _token_cache.pop(_token_key(token))
+        return None
+    return claims
+
+
+def set_cached_token_claims(token: str, claims: dict) -> None:
+    _token_cache.set(_token_key(token), claims)
+
+
+def get_cached_user(user_id: str):
+    user = _user_cache.get(user_id)
+    # 返回副本，调用方修改不会污染缓存
+    return user.model_copy(deep=True) if user is not None else None
+
+
+def set_cached_user(user) -> None:
+    _user_cache.set(user.id, user.model_copy(deep=True))
+
+
+def invalidate_user(user_id: str, broadcast: bool = True) -> None:
+    """使本进程的用户缓存失效，并通知其他 worker"""
+    _user_cache.pop(user_id)
+
+    if not broadcast:
+        return
+
+    _broadcast({"user_id": user_id})
+
+
+def get_cached_credential(credential_id: str, user_id: str):
+    credential = _credential_cache.get((credential_id, user_id))
+    return credential.model_copy(deep=True) if credential is not None else None
+
+
+def set_cached_credential(credential) -> None:
+    _credential_cache.set((credential.id, credential.user_id), credential)
+
+
+def invalidate_credential(
+    credential_id: str, user_id: str, broadcast: bool = True
+) -> None:
+    """凭据轮换或删除后丢弃缓存中的明文 key，并通知其他 worker"""
+    _credential_cache.pop((credential_id, user_id))
+
+    if broadcast:
+        _broadcast({"credential_id": credential_id, "user_id": user_id})
+
+
+def _broadcast(payload: dict) -> None:
+    if _redis is None or _loop is None:
+        return
+
+    message = json.dumps({**payload, "origin": INSTANCE_ID})
+    try:
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is _loop:
+            _loop.create_task(_publish(message))
+        else:
+            # 在线程池中调用（同步模型方法）
+            asyncio.run_coroutine_threadsafe(_publish(message), _loop)
+    except Exception as e:
+        log.warning(f"Failed to broadcast cache invalidation: {e}")
+
+
+async def _publish(message: str) -> None:
+    try:
+        await _redis.publish(USER_CACHE_PUBSUB_CHANNEL, message)
+    except Exception as e:
+        log.warning(f"Failed to broadcast cache invalidation: {e}")
+
+
+async def user_cache_invalidation_listener(app):
+    global _redis, _loop
+
+    _redis = app.state.redis
+    _loop = asyncio.get_running_loop()
+
+    pubsub = _redis.pubsub()
+    await pubsub.subscribe(USER_CACHE_PUBSUB_CHANNEL)
+
+    async for message in pubsub.listen():
+        if message["type"] != "message":
+            continue
+        try:
+            data = json.loads(message["data"])
+            if data.get("origin") == INSTANCE_ID:
+                continue
+            if data.get("credential_id"):
+                invalidate_credential(
+                    data["credential_id"], data["user_id"], broadcast=False
+                )
+            else:
+                invalidate_user(data["user_id"], broadcast=False)
+        except Exception as e:
+            log.exception(f"Error handling user cache invalidation: {e}")
+
+
+def mark_user_active(user_id: str) -> None:
+    """记录用户活跃，由 periodic_user_last_active_flush 批量写库"""
+    with _pending_lock:
+        _pending_last_active[user_id] = int(time.time())
+
+
+def flush_user_last_active() -> int:
+    """把累积的最近活跃时间一次性写库，返回写入的用户数"""
+    from open_webui.models.users import Users
+
+    global _pending_last_active
+    with _pending_lock:
+        pending, _pending_last_active = _pending_last_active, {}
+
+    if pending:
+        Users.update_users_last_active(pending)
+    return len(pending)
+
+
+async def periodic_user_last_active_flush():
+    from starlette.concurrency import run_in_threadpool
+
+    while True:
+        await asyncio.sleep(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+        try:
+            await run_in_threadpool(flush_user_last_active)
+        except Exception as e:
+            log.error(f"Failed to flush user last active timestamps: {e}")
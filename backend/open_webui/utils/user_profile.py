@@ -4,13 +4,19 @@
 基于用户聊天数据异步分析生成用户画像，用于个性化体验优化。
 """
 
+import asyncio
 import json
 import logging
 from typing import Any, Optional
 
 from fastapi import Request
+from starlette.concurrency import run_in_threadpool
 
-from open_webui.env import USER_PROFILE_MESSAGE_THRESHOLD
+from open_webui.env import (
+    REDIS_KEY_PREFIX,
+    USER_PROFILE_ANALYSIS_CONCURRENCY,
+    USER_PROFILE_MESSAGE_THRESHOLD,
+)
 from open_webui.models.user_profile import UserProfiles
 
 log = logging.getLogger(__name__)
@@ -164,6 +170,78 @@ def parse_profile_response(response: Any) -> Optional[dict]:
         return None
 
 
+####################################
+# Message Queue
+####################################
+
+# 待分析消息队列：有 Redis 时每个用户一个 list（RPUSH），
+# 否则写入 user_profile_message 追加表。每轮对话只做一次追加。
+
+
+def _queue_key(user_id: str) -> str:
+    return f"{REDIS_KEY_PREFIX}:user_profile:messages:{user_id}"
+
+
+def _lock_key(user_id: str) -> str:
+    return f"{REDIS_KEY_PREFIX}:user_profile:analyzing:{user_id}"
+
+
+# 无 Redis 时本进程缓存的待分析消息数，首次访问时用一次 COUNT 初始化
+_pending_counts: dict[str, int] = {}
+
+# 本进程中正在分析的用户，保证同一用户同时只有一个分析任务
+_analyzing_users: set[str] = set()
+_analysis_tasks: set[asyncio.Task] = set()
+_analysis_semaphore = asyncio.Semaphore(USER_PROFILE_ANALYSIS_CONCURRENCY)
+
+
+async def enqueue_profile_message(
+    redis, user_id: str, content: str, model_id: str
+) -> int:
+    """追加一条待分析消息，返回该用户当前的待分析消息数"""
+    if redis is not None:
+        return await redis.rpush(
+            _queue_key(user_id),
+            json.dumps({"content": content, "model_id": model_id}, ensure_ascii=False),
+        )
+
+    if user_id not in _pending_counts:
+        _pending_counts[user_id] = await run_in_threadpool(
+            UserProfiles.count_pending_messages, user_id
+        )
+
+    await run_in_threadpool(UserProfiles.add_pending_message, user_id, content, model_id)
+    _pending_counts[user_id] += 1
+    return _pending_counts[user_id]
+
+
+async def _load_pending_messages(redis, user_id: str) -> tuple[list[str], Any]:
+    """
+    读取待分析消息快照，返回 (消息列表, ack 回调)。
+    ack 只移除快照中的消息，分析期间新追加的消息保留到下一轮。
+    """
+    if redis is not None:
+        items = await redis.lrange(_queue_key(user_id), 0, -1)
+        messages = [json.loads(item)["content"] for item in items]
+
+        async def ack():
+            await redis.ltrim(_queue_key(user_id), len(items), -1)
+
+        return messages, ack
+
+    rows = await run_in_threadpool(UserProfiles.get_pending_messages, user_id)
+    messages = [row.content for row in rows]
+
+    async def ack():
+        if rows:
+            await run_in_threadpool(
+                UserProfiles.delete_pending_messages, user_id, rows[-1].id
+            )
+        _pending_counts.pop(user_id, None)
+
+    return messages, ack
+
+
 ####################################
 # Core Functions
 ####################################
@@ -173,10 +251,10 @@ async def update_profile(
     user_id: str, request: Request, model_id: str, user: Any, form_data: dict
 ) -> None:
     """
-    检查用户设置并更新用户画像。
+    检查用户设置并记录用户画像待分析消息。
 
-    异步函数，检查用户是否启用数据分析，提取消息并存储，
-    当消息数量达到阈值后调用 LLM 分析生成/更新画像。
+    每轮对话只做一次 O(1) 追加；当待分析消息数达到阈值时，
+    在后台调度一次 LLM 分析（每个用户单飞，全局并发受限）。
 
     Args:
         user_id: 用户 ID
@@ -209,72 +287,121 @@ async def update_profile(
             return
 
         last_user_message = user_messages[-1].get("content", "")
-        if not last_user_message or not last_user_message.strip():
+        if not isinstance(last_user_message, str) or not last_user_message.strip():
             return
 
         # 添加消息到待分析队列
-        UserProfiles.append_message(user_id, last_user_message)
+        message_count = await enqueue_profile_message(
+            request.app.state.redis, user_id, last_user_message, model_id
+        )
         log.debug(f"Added message to user profile queue for user {user_id}")
 
-        # 获取更新后的 profile 数据
-        profile_data = UserProfiles.get_by_user_id(user_id)
-        if profile_data is None:
-            log.debug(f"No profile data found for user {user_id}")
-            return
-
-        stored_messages = profile_data.data.get("messages", [])
-        message_count = len(stored_messages)
-
         # 检查阈值
         if message_count < USER_PROFILE_MESSAGE_THRESHOLD:
-            log.debug(
-                f"User {user_id} has {message_count} messages, "
-                f"threshold is {USER_PROFILE_MESSAGE_THRESHOLD}, skipping analysis"
-            )
             return
 
-        log.info(
-            f"User {user_id} reached threshold ({message_count} messages), "
-            f"starting profile analysis"
-        )
+        if user_id in _analyzing_users:
+            return
 
-        # 获取现有画像
-        existing_profile = profile_data.profile
+        task = asyncio.create_task(analyze_profile(user_id, request, model_id, user))
+        _analysis_tasks.add(task)
+        task.add_done_callback(_analysis_tasks.discard)
 
-        # 调用 LLM 分析
-        # 第一次进行 profile 提取
-        if existing_profile is None:
-            log.info(f"Cold start profile extraction for user {user_id}")
-            prompt = COLD_START_PROMPT.replace(
-                "{{CHAT_LOGS}}", format_messages(stored_messages)
-            )
-            new_profile = await call_llm_for_profile(prompt, request, model_id, user)
+    except Exception as e:
+        log.error(f"Error updating profile for user {user_id}: {e}")
 
-        # 进行 profile 更新
-        else:
-            log.info(f"Incremental profile update for user {user_id}")
-            prompt = INCREMENTAL_PROMPT.replace(
-                "{{EXISTING_PROFILE_JSON}}",
-                json.dumps(existing_profile, ensure_ascii=False),
-            )
-            prompt = prompt.replace(
-                "{{NEW_CHAT_LOGS}}", format_messages(stored_messages)
+
+async def analyze_profile(user_id: str, request: Request, model_id: str, user: Any):
+    """
+    消费用户的待分析消息并调用 LLM 生成/更新画像。
+
+    同一用户在本进程内单飞，有 Redis 时再加一把跨实例锁；
+    全局并发由 USER_PROFILE_ANALYSIS_CONCURRENCY 限制。
+    """
+    if user_id in _analyzing_users:
+        return
+
+    _analyzing_users.add(user_id)
+    redis = request.app.state.redis
+    locked = False
+
+    try:
+        if redis is not None:
+            locked = await redis.set(_lock_key(user_id), "1", nx=True, ex=600)
+            if not locked:
+                return
+
+        async with _analysis_semaphore:
+            stored_messages, ack = await _load_pending_messages(redis, user_id)
+
+            # 兼容旧版本存放在 data.messages 中尚未分析的消息
+            profile_data = await run_in_threadpool(UserProfiles.get_by_user_id, user_id)
+            legacy_messages = (
+                profile_data.data.get("messages", []) if profile_data else []
             )
-            new_profile = await call_llm_for_profile(prompt, request, model_id, user)
+            stored_messages = legacy_messages + stored_messages
 
-        if new_profile:
-            # 更新画像
-            UserProfiles.update_profile(user_id, new_profile)
-            log.info(f"Successfully updated profile for user {user_id}")
+            message_count = len(stored_messages)
+            if message_count < USER_PROFILE_MESSAGE_THRESHOLD:
+                return
 
-            # 清空消息队列
-            UserProfiles.clear_messages(user_id)
-            log.debug(f"Cleared message queue for user {user_id}")
-        else:
-            log.warning(f"Failed to generate profile for user {user_id}")
+            log.info(
+                f"User {user_id} reached threshold ({message_count} messages), "
+                f"starting profile analysis"
+            )
+
+            # 获取现有画像
+            existing_profile = profile_data.profile if profile_data else None
+
+            # 调用 LLM 分析
+            # 第一次进行 profile 提取
+            if existing_profile is None:
+                log.info(f"Cold start profile extraction for user {user_id}")
+                prompt = COLD_START_PROMPT.replace(
+                    "{{CHAT_LOGS}}", format_messages(stored_messages)
+                )
+                new_profile = await call_llm_for_profile(
+                    prompt, request, model_id, user
+                )
+
+            # 进行 profile 更新
+            else:
+                log.info(f"Incremental profile update for user {user_id}")
+                prompt = INCREMENTAL_PROMPT.replace(
+                    "{{EXISTING_PROFILE_JSON}}",
+                    json.dumps(existing_profile, ensure_ascii=False),
+                )
+                prompt = prompt.replace(
+                    "{{NEW_CHAT_LOGS}}", format_messages(stored_messages)
+                )
+                new_profile = await call_llm_for_profile(
+                    prompt, request, model_id, user
+                )
+
+            if new_profile:
+                # 更新画像（不存在时先创建）
+                await run_in_threadpool(UserProfiles.create_or_get, user_id)
+                await run_in_threadpool(UserProfiles.update_profile, user_id, new_profile)
+                log.info(f"Successfully updated profile for user {user_id}")
+
+                # 移除已分析的消息
+                await ack()
+                if legacy_messages:
+                    await run_in_threadpool(UserProfiles.clear_messages, user_id)
+                log.debug(f"Cleared message queue for user {user_id}")
+            else:
+                log.warning(f"Failed to generate profile for user {user_id}")
 
     except Exception as e:
-        log.error(f"Error updating profile for user {user_id}: {e}")
+        log.error(f"Error analyzing profile for user {user_id}: {e}")
+    finally:
+        if locked:
+            try:
+                await redis.delete(_lock_key(user_id))
+            except Exception:
+                pass
+        _analyzing_users.discard(user_id)
+
 
 async def call_llm_for_profile(
     prompt: str, request: Request, model_id: str, user: Any
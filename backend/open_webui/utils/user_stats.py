@@ -1,9 +1,13 @@
 """
 用户统计工具模块
 
-提供用户行为统计相关的辅助函数，统计数据存储在 user.info JSON 字段中。
+提供用户行为统计相关的辅助函数。
 
-数据结构：
+交互计数以原子计数器为准（Redis 当日 hash 或 user_daily_interaction 表），
+每次 LLM 调用只做一次累加；user.info 中的统计字段是由后台任务定期压缩出的视图，
+供管理后台用户列表直接读取。
+
+user.info 视图结构：
 {
   "daily_interaction": {
     "count": 42,
@@ -19,96 +23,214 @@
 }
 """
 
+import asyncio
 from logging import getLogger
 from datetime import date, timedelta
 import time
 from typing import Dict, Optional
 
+from starlette.concurrency import run_in_threadpool
+
+from open_webui.env import REDIS_KEY_PREFIX, USER_INTERACTION_COMPACT_INTERVAL
+
 log = getLogger(__name__)
 
 # 配置：历史记录保留天数（默认90天）
 INTERACTION_HISTORY_RETENTION_DAYS = 90
 
+# Redis 计数：每天一个 hash（user_id -> 次数），另有一个 hash 记录最后交互时间
+REDIS_INTERACTION_KEY = f"{REDIS_KEY_PREFIX}:user_interaction"
+REDIS_INTERACTION_LAST_KEY = f"{REDIS_KEY_PREFIX}:user_interaction:last"
+# 正在写库的计数 hash，写库成功的用户逐个删除
+REDIS_INTERACTION_PROCESSING_KEY = f"{REDIS_KEY_PREFIX}:user_interaction_processing"
+REDIS_INTERACTION_LOCK_KEY = f"{REDIS_KEY_PREFIX}:user_interaction:compact_lock"
+
+# 只删除写库期间未被更新的最后交互时间（ARGV 为 user_id, 时间戳 成对排列）
+_HDEL_UNCHANGED_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return 1
+"""
 
-def increment_daily_interaction_count(user_id: str) -> None:
-    """
-    增加用户的当日交互计数（存储在 user.info.daily_interaction 中）
 
-    功能：
-    - 检测日期变化，跨天时自动重置计数
-    - 记录最后交互时间
-    - 同时维护累计总交互次数
-    - 维护每日交互历史记录（interaction_history）
-    - 自动清理超过保留期的历史数据
+async def record_interaction(redis, user_id: str) -> None:
+    """
+    记录一次用户交互（每次 LLM 调用）
 
-    参数：
-        user_id: 用户 ID
+    只做一次原子累加，不读写 user 行：
+    - 有 Redis 时：HINCRBY 当日 hash
+    - 否则：user_daily_interaction 表 count = count + 1（在线程池中执行）
 
-    示例：
-        >>> increment_daily_interaction_count("user-123")
-        # user.info.daily_interaction.count: 0 -> 1
-        # user.info.interaction_history["2025-12-28"]: 0 -> 1
+    user.info 中的 daily_interaction / interaction_history / total_interaction_count
+    由 compact_interaction_counts 定期从计数器派生。
     """
+    today = date.today().isoformat()
     try:
-        from open_webui.models.users import Users
+        if redis is not None:
+            key = f"{REDIS_INTERACTION_KEY}:{today}"
+            pipe = redis.pipeline()
+            pipe.hincrby(key, user_id, 1)
+            pipe.expire(key, 7 * 24 * 3600)
+            pipe.hset(REDIS_INTERACTION_LAST_KEY, user_id, int(time.time()))
+            await pipe.execute()
+        else:
+            from open_webui.models.user_interactions import UserInteractions
 
-        user = Users.get_user_by_id(user_id)
-        if not user:
-            log.warning(f"用户不存在，无法统计交互: {user_id}")
-            return
+            await run_in_threadpool(UserInteractions.increment, user_id, today)
+    except Exception as e:
+        log.error(f"记录用户交互失败 (user_id={user_id}): {e}")
 
-        # 获取或初始化 info 字段
-        info = user.info or {}
 
-        # 获取当前日期（ISO格式）
-        today = date.today().isoformat()  # 格式: "2025-12-28"
+async def _drain_redis_counters(redis) -> None:
+    """
+    把 Redis 中的计数增量累加到数据库
 
-        # 获取或初始化 daily_interaction 对象
-        daily_interaction = info.get("daily_interaction", {})
-        last_date = daily_interaction.get("date")
-        current_count = daily_interaction.get("count", 0)
+    每天的计数 hash 先 RENAMENX 为处理中的 key，逐个用户写库成功后再从中删除该用户；
+    写库失败时剩余计数保留在处理中的 key 里，下次压缩时先重试。
+    所有日期的 key 都通过 SCAN 找到，长时间中断后也能补齐。
+    最后交互时间在全部计数写库后才删除，写库失败时随计数一起重试。
+    """
+    from open_webui.models.user_interactions import UserInteractions
+
+    last_interaction = await redis.hgetall(REDIS_INTERACTION_LAST_KEY) or {}
+
+    days = set()
+    for pattern in (
+        f"{REDIS_INTERACTION_KEY}:????-??-??",
+        f"{REDIS_INTERACTION_PROCESSING_KEY}:????-??-??",
+    ):
+        async for key in redis.scan_iter(match=pattern):
+            key = key.decode() if isinstance(key, bytes) else key
+            days.add(key.rsplit(":", 1)[1])
+
+    for day in sorted(days):
+        key = f"{REDIS_INTERACTION_KEY}:{day}"
+        processing_key = f"{REDIS_INTERACTION_PROCESSING_KEY}:{day}"
+
+        # 上次遗留的处理中 key 还在时不覆盖，本轮先重试它，新计数留到下一轮
+        pipe = redis.pipeline(transaction=True)
+        pipe.renamenx(key, processing_key)
+        pipe.persist(processing_key)
+        try:
+            await pipe.execute()
+        except Exception:
+            # 当日 key 不存在（只剩处理中的 key）
+            pass
+
+        counts = await redis.hgetall(processing_key)
+        for user_id, count in (counts or {}).items():
+            ok = await run_in_threadpool(
+                UserInteractions.increment,
+                user_id,
+                day,
+                int(count),
+                int(last_interaction.get(user_id, 0)) or None,
+            )
+            if not ok:
+                log.warning(f"交互计数写库失败，保留待重试: day={day}")
+                return
+            await redis.hdel(processing_key, user_id)
+
+    if last_interaction:
+        # 期间有新交互的用户保留新的时间戳，留到下一轮
+        await redis.eval(
+            _HDEL_UNCHANGED_SCRIPT,
+            1,
+            REDIS_INTERACTION_LAST_KEY,
+            *[v for item in last_interaction.items() for v in item],
+        )
 
-        # 获取或初始化 interaction_history 字典
-        interaction_history = info.get("interaction_history", {})
 
-        # 检测跨天，重置当日计数
-        if last_date != today:
-            log.info(f"用户 {user_id} 跨天检测: {last_date} -> {today}，重置当日计数")
-            current_count = 0
+def _apply_interaction_rows(info: dict, rows: list) -> dict:
+    """把认领到的计数行合并进 user.info 视图"""
+    interaction_history = info.get("interaction_history", {})
+    daily_interaction = info.get("daily_interaction", {})
+    total_count = info.get("total_interaction_count", 0)
 
-        # 计算新的计数
-        new_count = current_count + 1
+    for row in sorted(rows, key=lambda r: r.date):
+        total_count += row.count - row.compacted_count
+        interaction_history[row.date] = row.count
 
-        # 更新当日统计数据
-        info["daily_interaction"] = {
-            "count": new_count,
-            "date": today,
-            "last_interaction_at": int(time.time())
-        }
+        if row.date >= daily_interaction.get("date", ""):
+            daily_interaction = {
+                "count": row.count,
+                "date": row.date,
+                "last_interaction_at": row.last_interaction_at,
+            }
 
-        # 更新历史记录（直接覆盖今天的计数）
-        interaction_history[today] = new_count
+    info["daily_interaction"] = daily_interaction
+    info["interaction_history"] = _cleanup_old_history(interaction_history)
+    info["total_interaction_count"] = total_count
+    return info
 
-        # 清理超过保留期的历史数据
-        interaction_history = _cleanup_old_history(interaction_history)
-        info["interaction_history"] = interaction_history
 
-        # 同时维护累计总交互次数
-        total_count = info.get("total_interaction_count", 0)
-        info["total_interaction_count"] = total_count + 1
+def _compact_into_user_info() -> int:
+    """
+    将尚未压缩的计数增量同步到 user.info 视图，返回更新的用户数
 
-        # 更新用户信息
-        Users.update_user_by_id(user_id, {"info": info})
+    每个用户的增量认领与 user.info 写入在同一事务中完成：
+    多个实例并发执行时增量只计入一次，写入失败时增量保留到下次。
+    """
+    from open_webui.models.user_interactions import UserInteractions
 
-        log.info(
-            f"用户 {user_id} 交互计数已更新: "
-            f"当日 {current_count} -> {new_count}, "
-            f"累计 {total_count} -> {total_count + 1}, "
-            f"历史记录天数: {len(interaction_history)}"
-        )
+    rows_by_user: Dict[str, list] = {}
+    for row in UserInteractions.get_uncompacted():
+        rows_by_user.setdefault(row.user_id, []).append(row)
 
+    updated = 0
+    for user_id, user_rows in rows_by_user.items():
+        try:
+            if UserInteractions.compact_into_user_info(
+                user_id, user_rows, _apply_interaction_rows
+            ):
+                updated += 1
+        except Exception as e:
+            log.error(f"压缩用户交互计数失败 (user_id={user_id}): {e}")
+
+    cutoff = (
+        date.today() - timedelta(days=INTERACTION_HISTORY_RETENTION_DAYS)
+    ).isoformat()
+    UserInteractions.delete_before(cutoff)
+
+    return updated
+
+
+async def compact_interaction_counts(redis) -> None:
+    """把交互计数器汇总进 user.info（管理后台用户列表读取的视图）"""
+    locked = False
+    try:
+        if redis is not None:
+            locked = await redis.set(
+                REDIS_INTERACTION_LOCK_KEY,
+                "1",
+                nx=True,
+                ex=max(USER_INTERACTION_COMPACT_INTERVAL, 30),
+            )
+            if not locked:
+                return
+            await _drain_redis_counters(redis)
+
+        updated = await run_in_threadpool(_compact_into_user_info)
+        if updated:
+            log.info(f"用户交互计数压缩完成: 更新 {updated} 个用户")
     except Exception as e:
-        log.error(f"更新用户交互计数失败 (user_id={user_id}): {e}")
+        log.error(f"压缩用户交互计数失败: {e}")
+    finally:
+        if locked:
+            try:
+                await redis.delete(REDIS_INTERACTION_LOCK_KEY)
+            except Exception:
+                pass
+
+
+async def periodic_interaction_compaction(app) -> None:
+    """后台定期压缩交互计数"""
+    while True:
+        await asyncio.sleep(USER_INTERACTION_COMPACT_INTERVAL)
+        await compact_interaction_counts(app.state.redis)
 
 
 def get_daily_interaction_count(user_id: str) -> int:
@@ -119,26 +241,14 @@ def get_daily_interaction_count(user_id: str) -> int:
         user_id: 用户 ID
 
     返回：
-        当日交互次数（跨天时返回 0）
+        当日交互次数（跨天时返回 0；Redis 中尚未压缩的增量不计入）
     """
     try:
-        from open_webui.models.users import Users
-
-        user = Users.get_user_by_id(user_id)
-        if not user:
-            return 0
+        from open_webui.models.user_interactions import UserInteractions
 
-        info = user.info or {}
-        daily_interaction = info.get("daily_interaction", {})
-
-        # 检查日期是否为今天
         today = date.today().isoformat()
-        last_date = daily_interaction.get("date")
-
-        if last_date == today:
-            return daily_interaction.get("count", 0)
-        else:
-            return 0
+        rows = UserInteractions.get_by_user_id(user_id, since=today)
+        return rows[0].count if rows else 0
 
     except Exception as e:
         log.error(f"获取用户交互计数失败 (user_id={user_id}): {e}")
@@ -161,22 +271,17 @@ def get_interaction_history(
         例如: {"2025-12-28": 42, "2025-12-27": 35, ...}
     """
     try:
-        from open_webui.models.users import Users
-
-        user = Users.get_user_by_id(user_id)
-        if not user:
-            return {}
-
-        info = user.info or {}
-        interaction_history = info.get("interaction_history", {})
+        from open_webui.models.user_interactions import UserInteractions
 
         # 如果指定了天数，只返回最近N天的记录
+        cutoff_date = None
         if days is not None and days > 0:
             cutoff_date = (date.today() - timedelta(days=days)).isoformat()
-            interaction_history = {
-                d: count for d, count in interaction_history.items()
-                if d >= cutoff_date
-            }
+
+        interaction_history = {
+            row.date: row.count
+            for row in UserInteractions.get_by_user_id(user_id, since=cutoff_date)
+        }
 
         # 按日期降序排序
         sorted_history = dict(